@@ -8,6 +8,7 @@ urlpatterns = [
     path('workers/approve/<int:worker_id>/', views.approve_worker_profile, name='approve-worker'),
     path('workers/reject/<int:worker_id>/', views.reject_worker_profile, name='reject-worker'),
     path('workers/pending/', views.get_pending_worker_profiles, name='pending-workers'),
+    path('workers/import/', views.import_worker_profiles, name='import-workers'),
     
     # User account management
     path('users/flag/<int:user_id>/', views.flag_user_account, name='flag-user'),
@@ -11,6 +11,8 @@ from collections import defaultdict
 
 from .models import AdminAction
 from apps.workers.models import WorkerProfile
+from apps.workers.bulk_import import DEFAULT_BATCH_SIZE, import_workers
+from utils.spreadsheet_import import SpreadsheetImportError
 from apps.employers.models import JobPosting, EmployerProfile
 from users.models import User
 from users.permissions import IsAdminUser
@@ -686,3 +688,41 @@ def get_platform_analytics(request):
             'days_count': 30,
         }
     })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def import_worker_profiles(request):
+    """
+    Bulk import worker profiles from an agency CSV/XLSX upload (admin only)
+
+    Rows are validated and inserted in batches; invalid rows are reported with
+    their row number and do not abort the import. Pass dry_run=true to only
+    validate the file.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {'error': 'A CSV or XLSX file is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+    try:
+        batch_size = int(request.data.get('batch_size', DEFAULT_BATCH_SIZE))
+    except (TypeError, ValueError):
+        batch_size = DEFAULT_BATCH_SIZE
+
+    try:
+        report = import_workers(upload, upload.name, batch_size=batch_size, dry_run=dry_run)
+    except SpreadsheetImportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not dry_run:
+        AdminAction.objects.create(
+            admin_user=request.user,
+            action_type='other',
+            reason=f"Bulk worker import from {upload.name}: {report['created']} created, {report['failed']} failed"
+        )
+
+    return Response(report, status=status.HTTP_200_OK)
@@ -0,0 +1,196 @@
+"""
+Applicant and shortlist lists for employers
+
+Worker names live encrypted on WorkerProfile, and reading them row by row
+cost a profile query and a decrypt of every encrypted profile field per
+applicant. Lists are now keyset-paginated (newest first, see
+utils/cursors.py) and only the displayed page is hydrated: its
+profiles are prefetched in one query loading `full_name` alone, so each row
+decrypts one field.
+
+Applicants can instead be ranked by how well their profile matches the job
+(match_score, 0-100). Scoring reads only unencrypted profile fields, for
+every applicant in one query; the page shown is then hydrated as above.
+Religion preferences are deliberately not scored.
+"""
+import base64
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Prefetch, QuerySet
+
+from apps.workers.models import WorkerProfile
+from utils.cursors import InvalidCursor, before_cursor, encode_cursor
+from .models import JobApplication, JobPosting, Shortlist
+
+APPLICANT_PAGE_SIZE = 50
+MAX_APPLICANT_PAGE_SIZE = 200
+
+# Unencrypted profile fields read to score applicants
+MATCH_PROFILE_FIELDS = (
+    'user_id', 'skills', 'years_experience', 'education_level', 'languages', 'current_location',
+    'working_time', 'age',
+)
+MATCH_WEIGHTS = {
+    'skills': 35,
+    'experience': 20,
+    'education': 15,
+    'languages': 10,
+    'location': 10,
+    'working_arrangement': 5,
+    'age': 5,
+}
+EDUCATION_RANKS = {'none': 0, 'primary': 1, 'secondary': 2, 'vocational': 3, 'tertiary': 4}
+# Working arrangements each profile working time suits
+WORKING_TIME_ARRANGEMENTS = {
+    'full_time': {'full_time', 'contract', 'temporary'},
+    'live_in': {'full_time', 'contract', 'temporary'},
+    'part_time': {'part_time', 'temporary'},
+}
+
+
+def with_worker_names(queryset: QuerySet) -> QuerySet:
+    """Prefetches each row's worker profile with only its full name loaded (and decrypted)."""
+    return queryset.prefetch_related(
+        Prefetch('worker__worker_profile', queryset=WorkerProfile.objects.only('id', 'user_id', 'full_name'))
+    )
+
+
+def _names(values) -> set:
+    names = set()
+    for value in values or ():
+        if isinstance(value, dict):
+            value = value.get('language') or value.get('name') or ''
+        if isinstance(value, str) and value.strip():
+            names.add(value.strip().lower())
+    return names
+
+
+def _fraction(required: set, offered: set) -> float:
+    return len(required & offered) / len(required) if required else 1.0
+
+
+def match_score(job: JobPosting, profile: Optional[Dict]) -> int:
+    """
+    How well a worker profile (a dict of MATCH_PROFILE_FIELDS) matches the
+    job's requirements, 0-100; 0 without a profile.
+    """
+    if profile is None:
+        return 0
+
+    score = MATCH_WEIGHTS['skills'] * _fraction(_names(job.required_skills), _names(profile['skills']))
+    score += MATCH_WEIGHTS['languages'] * _fraction(
+        _names(job.language_requirements), _names(profile['languages'])
+    )
+
+    required_years = job.experience_required or 0
+    years = profile['years_experience'] or 0
+    score += MATCH_WEIGHTS['experience'] * (min(years / required_years, 1.0) if required_years > 0 else 1.0)
+
+    required_rank = EDUCATION_RANKS.get((job.education_required or '').strip().lower())
+    education_rank = EDUCATION_RANKS.get(profile['education_level'], 0)
+    if required_rank is None or education_rank >= required_rank:
+        score += MATCH_WEIGHTS['education']
+
+    location = (profile['current_location'] or '').strip().lower()
+    if location and location in {job.city.strip().lower(), job.location.strip().lower()}:
+        score += MATCH_WEIGHTS['location']
+
+    if job.working_arrangement in WORKING_TIME_ARRANGEMENTS.get(profile['working_time'], ()):
+        score += MATCH_WEIGHTS['working_arrangement']
+
+    age_min, age_max = job.age_preference_min, job.age_preference_max
+    age = profile['age']
+    if (age_min is None or age >= age_min) and (age_max is None or age <= age_max):
+        score += MATCH_WEIGHTS['age']
+
+    return round(score)
+
+
+def encode_rank_cursor(score: int, application_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score}|{application_id}".encode()).decode().rstrip('=')
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        score, application_id = raw.split('|')
+        return int(score), int(application_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+
+
+def job_applications(job: JobPosting, application_status: Optional[str] = None) -> QuerySet:
+    applications = JobApplication.objects.filter(job=job)
+    if application_status:
+        applications = applications.filter(application_status=application_status)
+    return applications
+
+
+def list_applications(job: JobPosting, cursor: Optional[str] = None, limit: int = APPLICANT_PAGE_SIZE,
+                      application_status: Optional[str] = None) -> Tuple[List[JobApplication], Optional[str]]:
+    """
+    A page of the job's applications, newest first.
+    Returns (applications, next_cursor), next_cursor being None on the last page.
+    """
+    applications = job_applications(job, application_status)
+    if cursor:
+        applications = applications.filter(before_cursor(cursor, 'applied_at'))
+    page = list(with_worker_names(
+        applications.select_related('worker', 'job').order_by('-applied_at', '-id')[:limit + 1]
+    ))
+    has_more = len(page) > limit
+    page = page[:limit]
+    return page, encode_cursor(page[-1], 'applied_at') if has_more else None
+
+
+def rank_applications(job: JobPosting, cursor: Optional[str] = None, limit: int = APPLICANT_PAGE_SIZE,
+                      application_status: Optional[str] = None) -> Tuple[List[JobApplication], Optional[str]]:
+    """
+    A page of the job's applications, best match first (then newest), each
+    with a `match_score`. Returns (applications, next_cursor) like list_applications.
+    """
+    applications = job_applications(job, application_status)
+    worker_ids = dict(applications.values_list('id', 'worker_id'))
+    profiles = {
+        profile['user_id']: profile
+        for profile in WorkerProfile.objects.filter(user_id__in=set(worker_ids.values())).values(*MATCH_PROFILE_FIELDS)
+    }
+    ranked = sorted(
+        ((match_score(job, profiles.get(worker_id)), application_id) for application_id, worker_id in worker_ids.items()),
+        reverse=True,
+    )
+    if cursor:
+        position = decode_rank_cursor(cursor)
+        ranked = [entry for entry in ranked if entry < position]
+
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+    page = with_worker_names(JobApplication.objects.select_related('worker', 'job')).in_bulk(
+        [application_id for _, application_id in ranked]
+    )
+    results = []
+    for score, application_id in ranked:
+        # Applications withdrawn since scoring are left out
+        if application_id in page:
+            page[application_id].match_score = score
+            results.append(page[application_id])
+    return results, encode_rank_cursor(*ranked[-1]) if has_more else None
+
+
+def list_shortlist(employer, job_id: Optional[int] = None, cursor: Optional[str] = None,
+                   limit: int = APPLICANT_PAGE_SIZE) -> Tuple[List[Shortlist], Optional[str]]:
+    """
+    A page of the employer's shortlisted workers, optionally for one job,
+    newest first. Returns (entries, next_cursor) like list_applications.
+    """
+    shortlists = Shortlist.objects.filter(employer=employer)
+    if job_id is not None:
+        shortlists = shortlists.filter(job_id=job_id)
+    if cursor:
+        shortlists = shortlists.filter(before_cursor(cursor, 'added_at'))
+    page = list(with_worker_names(
+        shortlists.select_related('worker', 'job').order_by('-added_at', '-id')[:limit + 1]
+    ))
+    has_more = len(page) > limit
+    page = page[:limit]
+    return page, encode_cursor(page[-1], 'added_at') if has_more else None
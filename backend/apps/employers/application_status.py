@@ -0,0 +1,119 @@
+"""
+Bulk application status transitions
+
+An employer moves many applications of one job to a new status at once, for
+example rejecting every other applicant after hiring someone. Applications
+are selected by id, or by a predicate (their current statuses, minus some
+ids). In one transaction the matching applications are locked and read,
+those allowed to make the transition (ALLOWED_TRANSITIONS) are moved with a
+single UPDATE, and their history rows are written with bulk_create.
+
+The affected workers are then notified as one broadcast (see
+notifications/broadcast.py). Only the broadcast is created here; the
+broadcast workers fan it out and the notification workers deliver it, so the
+status change does not wait for or depend on the fan-out.
+"""
+import logging
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notifications.broadcast import create_broadcast, dispatch_broadcast
+from .models import JobApplication, JobApplicationStatusChange, JobPosting
+
+logger = logging.getLogger(__name__)
+
+# Current status -> statuses it may move to
+ALLOWED_TRANSITIONS = {
+    'pending': {'under_review', 'shortlisted', 'rejected', 'hired'},
+    'under_review': {'shortlisted', 'rejected', 'hired'},
+    'shortlisted': {'under_review', 'rejected', 'hired'},
+    'rejected': {'under_review'},
+    'hired': set(),
+}
+
+NOTIFICATION_CHANNELS = ['email', 'push']
+STATUS_NOTIFICATIONS = {
+    'under_review': ('Application under review', 'Your application for {title} is being reviewed.'),
+    'shortlisted': ('You have been shortlisted', 'You have been shortlisted for {title}.'),
+    'rejected': ('Application update', 'Your application for {title} was not successful this time.'),
+    'hired': ('You have been hired', 'Congratulations! You have been hired for {title}.'),
+}
+
+
+class ApplicationStatusError(ValueError):
+    """Raised for an unknown target status or a missing application selection."""
+
+
+def transition_applications(job: JobPosting, to_status: str, changed_by=None,
+                            application_ids: Optional[Iterable[int]] = None,
+                            from_statuses: Optional[Iterable[str]] = None,
+                            exclude_ids: Optional[Iterable[int]] = None, notify: bool = True) -> Dict:
+    """
+    Moves the selected applications of `job` to `to_status` and notifies
+    their workers. Applications are selected by `application_ids`, or by
+    `from_statuses`; either way `exclude_ids` are left out. Applications
+    that cannot make the transition (including those already in
+    `to_status`) are skipped.
+
+    Returns {'status', 'updated', 'skipped', 'broadcast_id'}.
+
+    Raises:
+        ApplicationStatusError: For an unknown status, or when neither
+            application_ids nor from_statuses is given
+    """
+    if to_status not in STATUS_NOTIFICATIONS:
+        raise ApplicationStatusError(f"Cannot move applications to status: {to_status}")
+    if application_ids is None and from_statuses is None:
+        raise ApplicationStatusError('Either application ids or current statuses are required')
+
+    applications = JobApplication.objects.filter(job=job)
+    if application_ids is not None:
+        applications = applications.filter(id__in=set(application_ids))
+    if from_statuses is not None:
+        unknown = set(from_statuses) - set(ALLOWED_TRANSITIONS)
+        if unknown:
+            raise ApplicationStatusError(f"Unknown statuses: {', '.join(sorted(unknown))}")
+        applications = applications.filter(application_status__in=set(from_statuses))
+    if exclude_ids:
+        applications = applications.exclude(id__in=set(exclude_ids))
+
+    movable_from = {status for status, targets in ALLOWED_TRANSITIONS.items() if to_status in targets}
+    with transaction.atomic():
+        selected = list(applications.select_for_update().values_list('id', 'worker_id', 'application_status'))
+        moved = [row for row in selected if row[2] in movable_from]
+        if moved:
+            # Only the rows locked above; the predicate could match rows inserted since
+            JobApplication.objects.filter(id__in=[row[0] for row in moved]).update(
+                application_status=to_status, updated_at=timezone.now()
+            )
+            JobApplicationStatusChange.objects.bulk_create([
+                JobApplicationStatusChange(
+                    application_id=application_id, from_status=from_status, to_status=to_status,
+                    changed_by=changed_by,
+                )
+                for application_id, _, from_status in moved
+            ])
+
+    report = {'status': to_status, 'updated': len(moved), 'skipped': len(selected) - len(moved), 'broadcast_id': None}
+    if moved and notify:
+        report['broadcast_id'] = notify_status_change(job, to_status, [worker_id for _, worker_id, _ in moved],
+                                                      sender=changed_by)
+    logger.info(f"Moved {report['updated']} applications of job {job.id} to {to_status}, skipped {report['skipped']}")
+    return report
+
+
+def notify_status_change(job: JobPosting, to_status: str, worker_ids, sender=None) -> int:
+    """Queues one broadcast notifying the workers of a status change; returns the broadcast id."""
+    title, message = STATUS_NOTIFICATIONS[to_status]
+    broadcast = create_broadcast(
+        title=f"{title}: {job.title}",
+        message=message.format(title=job.title),
+        channels=NOTIFICATION_CHANNELS,
+        sender=sender,
+        notification_type='job_application',
+        recipient_ids=worker_ids,
+    )
+    dispatch_broadcast(broadcast)
+    return broadcast.id
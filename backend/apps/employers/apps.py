@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EmployersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.employers"
+
+    def ready(self):
+        # Job posting changes invalidate the cached job feed
+        from . import job_feed  # noqa: F401
@@ -0,0 +1,224 @@
+"""
+Bulk job posting upload for staffing agencies and large employers
+
+A CSV/XLSX file of postings is streamed in batches. Region, skill, job
+category and wage unit values are resolved against the reference tables,
+which are loaded once per upload into in-memory lookups, so validation runs
+no per-row queries. Valid postings are written with bulk_create (one
+transaction per batch) and the employer is notified once for the whole
+upload instead of once per posting.
+"""
+import logging
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from apps.jobs.models import JobCategory, Region, Skill, WageUnit
+from utils.spreadsheet_import import clean_text, iter_spreadsheet_rows, split_list
+from .job_feed import invalidate_job_feed
+from .models import JobPosting
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Optional columns: end_date, required_skills ("Cooking; Cleaning"), category,
+# wage_unit, religion_preference, age_preference_min, age_preference_max,
+# language_requirements ("Amharic; English") and status (draft/active)
+REQUIRED_COLUMNS = (
+    'title', 'description', 'location', 'city', 'region', 'salary_min', 'salary_max',
+    'working_arrangement', 'experience_required', 'education_required', 'start_date',
+)
+UPLOADABLE_STATUSES = ('draft', 'active')
+
+
+class JobReferenceData:
+    """
+    In-memory lookups of the job reference tables, keyed by lowercased name
+    (and code where the table has one).
+    """
+
+    def __init__(self):
+        self.regions = {}
+        for name, code in Region.objects.values_list('name', 'code'):
+            self.regions[name.lower()] = name
+            self.regions[code.lower()] = name
+        self.skills = {name.lower(): name for name in Skill.objects.values_list('name', flat=True)}
+        self.categories = {category.name.lower(): category for category in JobCategory.objects.all()}
+        self.wage_units = {}
+        for wage_unit in WageUnit.objects.all():
+            self.wage_units[wage_unit.name.lower()] = wage_unit
+            self.wage_units[wage_unit.code.lower()] = wage_unit
+
+    def resolve(self, row, job_posting, errors):
+        """Sets the reference-backed fields of job_posting from the row."""
+        region = clean_text(row.get('region'))
+        job_posting.region = self.regions.get(region.lower())
+        if job_posting.region is None:
+            errors['region'] = [f"Unknown region: {region}" if region else 'This field is required.']
+
+        skills = []
+        unknown_skills = []
+        for skill in split_list(row.get('required_skills')):
+            name = self.skills.get(skill.lower())
+            if name is None:
+                unknown_skills.append(skill)
+            elif name not in skills:
+                skills.append(name)
+        if unknown_skills:
+            errors['required_skills'] = [f"Unknown skills: {', '.join(unknown_skills)}"]
+        job_posting.required_skills = skills
+
+        category = clean_text(row.get('category'))
+        if category:
+            job_posting.category = self.categories.get(category.lower())
+            if job_posting.category is None:
+                errors['category'] = [f"Unknown job category: {category}"]
+
+        wage_unit = clean_text(row.get('wage_unit'))
+        if wage_unit:
+            job_posting.wage_unit = self.wage_units.get(wage_unit.lower())
+            if job_posting.wage_unit is None:
+                errors['wage_unit'] = [f"Unknown wage unit: {wage_unit}"]
+
+
+class JobPostingUploader:
+    """
+    Validates and inserts job postings for one employer in batches.
+
+    Args:
+        employer: User the postings are created for
+        batch_size: Rows validated and inserted per transaction
+        dry_run: Validate every row without writing anything
+        notify: Send the employer a single summary notification
+    """
+
+    def __init__(self, employer, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False,
+                 notify: bool = True):
+        self.employer = employer
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        self.notify = notify
+        self.reference_data = JobReferenceData()
+
+    def run(self, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Uploads (row_number, row) pairs and returns a report with one result
+        per row: {'row', 'status': 'created'|'valid'|'failed', 'id'|'errors'}
+        """
+        started_at = time.monotonic()
+        report = {'total_rows': 0, 'created': 0, 'failed': 0, 'results': [], 'dry_run': self.dry_run}
+        created_postings = []
+
+        batch = []
+        for row_number, row in rows:
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                created_postings.extend(self._process_batch(batch, report))
+                batch = []
+        if batch:
+            created_postings.extend(self._process_batch(batch, report))
+
+        if created_postings and self.notify:
+            from apps.notifications.services import notify_job_postings_published
+            notify_job_postings_published(self.employer, created_postings)
+
+        report['results'].sort(key=lambda result: result['row'])
+        report['elapsed_seconds'] = round(time.monotonic() - started_at, 4)
+        logger.info(
+            f"Job posting upload for {self.employer.username} finished: {report['created']} created, "
+            f"{report['failed']} failed out of {report['total_rows']} rows in {report['elapsed_seconds']}s"
+        )
+        return report
+
+    def _process_batch(self, batch, report):
+        report['total_rows'] += len(batch)
+        valid = []
+        for row_number, row in batch:
+            errors = {}
+            job_posting = self._build_job_posting(row, errors)
+            if errors:
+                report['failed'] += 1
+                report['results'].append({'row': row_number, 'status': 'failed', 'errors': errors})
+            else:
+                valid.append((row_number, job_posting))
+
+        if not valid:
+            return []
+        if self.dry_run:
+            report['created'] += len(valid)
+            report['results'].extend({'row': row_number, 'status': 'valid'} for row_number, _ in valid)
+            return []
+
+        with transaction.atomic():
+            created = JobPosting.objects.bulk_create([job_posting for _, job_posting in valid])
+            # bulk_create sends no post_save signals
+            transaction.on_commit(invalidate_job_feed)
+        report['created'] += len(created)
+        report['results'].extend(
+            {'row': row_number, 'status': 'created', 'id': job_posting.id}
+            for (row_number, _), job_posting in zip(valid, created)
+        )
+        return created
+
+    def _build_job_posting(self, row, errors) -> JobPosting:
+        job_posting = JobPosting(employer=self.employer)
+        for field_name in (
+            'title', 'description', 'location', 'city', 'salary_min', 'salary_max',
+            'experience_required', 'education_required', 'religion_preference',
+            'age_preference_min', 'age_preference_max', 'start_date', 'end_date',
+        ):
+            value = row.get(field_name)
+            if not isinstance(value, date):
+                # XLSX date cells arrive as date/datetime objects already
+                value = clean_text(value)
+            if not value and JobPosting._meta.get_field(field_name).null:
+                value = None
+            setattr(job_posting, field_name, value)
+        job_posting.working_arrangement = clean_text(row.get('working_arrangement')).lower()
+        job_posting.language_requirements = split_list(row.get('language_requirements'))
+
+        status = clean_text(row.get('status')).lower() or 'active'
+        if status not in UPLOADABLE_STATUSES:
+            errors['status'] = [f"Status must be one of: {', '.join(UPLOADABLE_STATUSES)}"]
+        job_posting.status = status
+        job_posting.is_active = status == 'active'
+
+        self.reference_data.resolve(row, job_posting, errors)
+
+        # Converts the text cells to their Python types and applies the field
+        # validators (choices, max_length, min values)
+        try:
+            job_posting.clean_fields(exclude=['employer', 'region', 'required_skills', 'category', 'wage_unit'])
+        except ValidationError as e:
+            for field, messages in e.message_dict.items():
+                errors.setdefault(field, []).extend(messages)
+
+        if not errors:
+            self._validate_ranges(job_posting, errors)
+        return job_posting
+
+    @staticmethod
+    def _validate_ranges(job_posting, errors):
+        if job_posting.salary_min > job_posting.salary_max:
+            errors['salary_min'] = ['Minimum salary cannot be greater than maximum salary.']
+        if job_posting.end_date and job_posting.end_date < job_posting.start_date:
+            errors['end_date'] = ['End date cannot be before the start date.']
+        if (job_posting.age_preference_min and job_posting.age_preference_max
+                and job_posting.age_preference_min > job_posting.age_preference_max):
+            errors['age_preference_min'] = ['Minimum age cannot be greater than maximum age.']
+
+
+def iter_upload_rows(file, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Streams (row_number, row) pairs from a job posting CSV or XLSX file."""
+    return iter_spreadsheet_rows(file, filename, REQUIRED_COLUMNS)
+
+
+def upload_job_postings(employer, file, filename: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                        dry_run: bool = False, notify: bool = True) -> Dict[str, Any]:
+    """Creates job postings for employer from a CSV or XLSX file object and returns the report."""
+    uploader = JobPostingUploader(employer, batch_size=batch_size, dry_run=dry_run, notify=notify)
+    return uploader.run(iter_upload_rows(file, filename))
@@ -0,0 +1,202 @@
+"""
+Public job feed: the open job postings, newest first
+
+Workers browse and search the active job postings a page at a time. Pages
+are keyset-paginated on (created_at, id) with the shared cursors
+(see utils/cursors.py), and every filter is backed by a partial index
+over the open jobs only (see JobPosting.Meta):
+
+    region, city          job_feed_region_idx / job_feed_city_idx
+    working_arrangement   job_feed_arrangement_idx
+    salary_min/max        job_feed_salary_idx (jobs whose range overlaps the requested one)
+    skills                PostgreSQL GIN index on required_skills (jobs listing every skill)
+    q                     PostgreSQL GIN index on to_tsvector(title || ' ' || description)
+
+Other databases match skills and text with LIKE, unranked and unindexed.
+
+The first page of each filter combination is cached for FEED_CACHE_TIMEOUT
+seconds and shared by every reader. Cache keys include a version that any
+job posting save or delete replaces (bulk uploads invalidate explicitly,
+since bulk_create sends no signals), so a change is visible on the next read.
+If the cache cannot be reached the feed is read from the database.
+"""
+import hashlib
+import json
+import logging
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.cursors import before_cursor, encode_cursor
+from .models import JobPosting
+
+logger = logging.getLogger(__name__)
+
+FEED_PAGE_SIZE = 20
+MAX_FEED_PAGE_SIZE = 100
+FEED_CACHE_PREFIX = 'jobs:feed'
+FEED_CACHE_TIMEOUT = 5 * 60
+SEARCH_CONFIG = 'simple'
+
+
+class FeedFilterError(ValueError):
+    """Raised for invalid feed query parameters; `errors` maps each parameter to its messages."""
+
+    def __init__(self, errors: Dict[str, list]):
+        super().__init__(f"Invalid job feed filters: {', '.join(errors)}")
+        self.errors = errors
+
+
+def parse_feed_filters(params) -> Dict[str, Any]:
+    """
+    Normalized feed filters from query parameters: region, city,
+    working_arrangement, salary_min, salary_max, skills (comma separated) and q.
+    Empty parameters are left out.
+    """
+    filters = {}
+    errors = {}
+    for name in ('region', 'city', 'working_arrangement', 'q'):
+        value = (params.get(name) or '').strip()
+        if value:
+            filters[name] = value
+
+    arrangements = dict(JobPosting.WORKING_ARRANGEMENT_CHOICES)
+    if 'working_arrangement' in filters and filters['working_arrangement'] not in arrangements:
+        errors['working_arrangement'] = [f"Must be one of: {', '.join(arrangements)}"]
+
+    for name in ('salary_min', 'salary_max'):
+        value = (params.get(name) or '').strip()
+        if not value:
+            continue
+        try:
+            filters[name] = Decimal(value)
+        except InvalidOperation:
+            errors[name] = ['A valid number is required.']
+            continue
+        if not filters[name].is_finite() or filters[name] < 0:
+            errors[name] = ['A valid number is required.']
+
+    skills = sorted({skill.strip() for skill in (params.get('skills') or '').split(',') if skill.strip()})
+    if skills:
+        filters['skills'] = skills
+
+    if errors:
+        raise FeedFilterError(errors)
+    return filters
+
+
+def open_jobs() -> QuerySet:
+    """The jobs listed in the feed, with the employer each row shows."""
+    return JobPosting.objects.filter(is_active=True, status='active').select_related('employer')
+
+
+def filter_jobs(queryset: QuerySet, filters: Dict[str, Any]) -> QuerySet:
+    for name in ('region', 'city', 'working_arrangement'):
+        if name in filters:
+            queryset = queryset.filter(**{name: filters[name]})
+    # Salary ranges overlapping the requested one
+    if 'salary_min' in filters:
+        queryset = queryset.filter(salary_max__gte=filters['salary_min'])
+    if 'salary_max' in filters:
+        queryset = queryset.filter(salary_min__lte=filters['salary_max'])
+
+    postgres = connection.vendor == 'postgresql'
+    for skill in filters.get('skills', ()):
+        if postgres:
+            queryset = queryset.filter(required_skills__contains=[skill])
+        else:
+            # The JSON text of the list contains the quoted skill, escaped the same way
+            queryset = queryset.filter(required_skills__icontains=json.dumps(skill))
+
+    if 'q' in filters:
+        queryset = text_match(queryset, filters['q'], postgres)
+    return queryset
+
+
+def text_match(queryset: QuerySet, text: str, postgres: bool) -> QuerySet:
+    """Jobs whose title or description matches every word of `text`."""
+    if postgres:
+        match = RawSQL(
+            f"to_tsvector('{SEARCH_CONFIG}', employers_jobposting.title || ' ' || employers_jobposting.description) "
+            f"@@ websearch_to_tsquery('{SEARCH_CONFIG}', %s)",
+            [text],
+        )
+        return queryset.filter(match)
+    for word in text.split():
+        queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+    return queryset
+
+
+def read_feed_page(filters: Dict[str, Any], cursor: Optional[str] = None,
+                   page_size: int = FEED_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    One serialized page of the feed, newest first:
+    {'results': [...], 'next_cursor': ...}, next_cursor being None on the last page.
+    Raises InvalidCursor for a cursor that was not returned by the feed.
+    """
+    from .serializers import JobPostingListSerializer
+
+    jobs = filter_jobs(open_jobs(), filters)
+    if cursor:
+        jobs = jobs.filter(before_cursor(cursor))
+    page = list(jobs.order_by('-created_at', '-id')[:page_size + 1])
+    has_more = len(page) > page_size
+    page = page[:page_size]
+    return {
+        'results': [dict(row) for row in JobPostingListSerializer(page, many=True).data],
+        'next_cursor': encode_cursor(page[-1]) if has_more else None,
+    }
+
+
+def get_job_feed(filters: Dict[str, Any], cursor: Optional[str] = None,
+                 page_size: int = FEED_PAGE_SIZE) -> Dict[str, Any]:
+    """A page of the feed (see read_feed_page); first pages come from the shared cache."""
+    if cursor:
+        return read_feed_page(filters, cursor, page_size)
+
+    try:
+        key = feed_cache_key(filters, page_size)
+        page = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Job feed cache read failed: {str(e)}")
+        return read_feed_page(filters, None, page_size)
+
+    if page is None:
+        page = read_feed_page(filters, None, page_size)
+        try:
+            cache.set(key, page, FEED_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Job feed cache write failed: {str(e)}")
+    return page
+
+
+def feed_cache_key(filters: Dict[str, Any], page_size: int) -> str:
+    # Read the version before the page, so a page read across a change is stored under the old version
+    version = cache.get(f"{FEED_CACHE_PREFIX}:version")
+    if version is None:
+        cache.add(f"{FEED_CACHE_PREFIX}:version", time.time_ns(), None)
+        version = cache.get(f"{FEED_CACHE_PREFIX}:version")
+    digest = hashlib.sha256(json.dumps(filters, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{FEED_CACHE_PREFIX}:{version}:{page_size}:{digest}"
+
+
+def invalidate_job_feed():
+    """Makes every cached feed page stale."""
+    try:
+        # A fresh timestamp rather than an increment, so an evicted version never comes back
+        cache.set(f"{FEED_CACHE_PREFIX}:version", time.time_ns(), None)
+    except Exception as e:
+        logger.warning(f"Job feed cache invalidation failed: {str(e)}")
+
+
+@receiver(post_save, sender=JobPosting, dispatch_uid='invalidate_job_feed_on_save')
+@receiver(post_delete, sender=JobPosting, dispatch_uid='invalidate_job_feed_on_delete')
+def job_posting_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_job_feed)
@@ -0,0 +1,71 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.employers.bulk_upload import DEFAULT_BATCH_SIZE, upload_job_postings
+from users.models import User
+from utils.spreadsheet_import import SpreadsheetImportError
+
+
+class Command(BaseCommand):
+    help = 'Creates job postings in bulk for an employer from a CSV or XLSX spreadsheet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument('--employer', required=True, help='Username of the employer the postings belong to')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows validated and inserted per transaction (default {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate every row and report errors without writing anything',
+        )
+        parser.add_argument(
+            '--no-notify',
+            action='store_true',
+            help='Do not send the employer the summary notification',
+        )
+        parser.add_argument(
+            '--results-file',
+            help='Write the per-row results to this file as JSON',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            employer = User.objects.get(username=options['employer'], user_type='employer')
+        except User.DoesNotExist:
+            raise CommandError(f"Employer '{options['employer']}' does not exist")
+
+        path = options['path']
+        try:
+            with open(path, 'rb') as file:
+                report = upload_job_postings(
+                    employer,
+                    file,
+                    path,
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                    notify=not options['no_notify'],
+                )
+        except (OSError, SpreadsheetImportError) as e:
+            raise CommandError(str(e))
+
+        failures = [result for result in report['results'] if result['status'] == 'failed']
+        for result in failures[:20]:
+            self.stdout.write(self.style.WARNING(f"Row {result['row']}: {json.dumps(result['errors'])}"))
+        if len(failures) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(failures) - 20} more rows with errors"))
+
+        if options['results_file']:
+            with open(options['results_file'], 'w') as results_file:
+                json.dump(report['results'], results_file, indent=2)
+
+        action = 'Validated' if options['dry_run'] else 'Created'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {report['created']} of {report['total_rows']} job postings "
+            f"({report['failed']} failed) in {report['elapsed_seconds']}s."
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("jobs", "0002_alter_educationlevel_sort_order"),
+        ("employers", "0003_alter_employerprofile_business_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="jobposting",
+            name="category",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="job_postings",
+                to="jobs.jobcategory",
+            ),
+        ),
+        migrations.AddField(
+            model_name="jobposting",
+            name="wage_unit",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="job_postings",
+                to="jobs.wageunit",
+            ),
+        ),
+    ]
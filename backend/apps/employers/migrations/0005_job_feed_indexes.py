@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:44
+
+from django.db import migrations, models
+
+# Expressions as in employers/job_feed.py; only PostgreSQL has GIN indexes
+SEARCH_INDEXES = (
+    ("job_feed_search_idx", "to_tsvector('simple', title || ' ' || description)"),
+    ("job_feed_skills_idx", "required_skills jsonb_path_ops"),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for name, expression in SEARCH_INDEXES:
+            cursor.execute(
+                f"CREATE INDEX {quote(name)} ON employers_jobposting USING GIN ({expression}) "
+                f"WHERE is_active AND status = 'active'"
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for name, _ in SEARCH_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {quote(name)}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employers", "0004_jobposting_category_wage_unit"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("status", "active")),
+                fields=["-created_at", "-id"],
+                name="job_feed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("status", "active")),
+                fields=["region", "city", "-created_at", "-id"],
+                name="job_feed_region_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("status", "active")),
+                fields=["city", "-created_at", "-id"],
+                name="job_feed_city_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("status", "active")),
+                fields=["working_arrangement", "-created_at", "-id"],
+                name="job_feed_arrangement_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="jobposting",
+            index=models.Index(
+                condition=models.Q(("is_active", True), ("status", "active")),
+                fields=["salary_max", "salary_min"],
+                name="job_feed_salary_idx",
+            ),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
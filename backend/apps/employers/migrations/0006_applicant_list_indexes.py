@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("employers", "0005_job_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobapplication",
+            index=models.Index(
+                fields=["job", "-applied_at", "-id"], name="job_application_list_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shortlist",
+            index=models.Index(
+                fields=["employer", "-added_at", "-id"], name="shortlist_list_idx"
+            ),
+        ),
+    ]
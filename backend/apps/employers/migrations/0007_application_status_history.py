@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("employers", "0006_applicant_list_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobApplicationStatusChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "from_status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("under_review", "Under Review"),
+                            ("shortlisted", "Shortlisted"),
+                            ("rejected", "Rejected"),
+                            ("hired", "Hired"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "to_status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("under_review", "Under Review"),
+                            ("shortlisted", "Shortlisted"),
+                            ("rejected", "Rejected"),
+                            ("hired", "Hired"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("changed_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "application",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_changes",
+                        to="employers.jobapplication",
+                    ),
+                ),
+                (
+                    "changed_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["application", "changed_at"],
+                        name="employers_j_applica_c7392f_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -54,6 +54,8 @@ class JobPosting(models.Model):
     salary_min = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)], db_index=True)
     salary_max = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)], db_index=True)
     required_skills = models.JSONField(default=list, blank=True)  # Array of skill names or IDs
+    category = models.ForeignKey('jobs.JobCategory', on_delete=models.SET_NULL, null=True, blank=True, related_name='job_postings')
+    wage_unit = models.ForeignKey('jobs.WageUnit', on_delete=models.SET_NULL, null=True, blank=True, related_name='job_postings')
     working_arrangement = models.CharField(max_length=20, choices=WORKING_ARRANGEMENT_CHOICES, db_index=True)
     experience_required = models.IntegerField(help_text="Minimum years of experience required", db_index=True)
     education_required = models.CharField(max_length=50, help_text="Minimum education level required", db_index=True)
@@ -67,6 +69,23 @@ class JobPosting(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # Partial indexes over the jobs in the public feed (see employers/job_feed.py), newest
+        # first, one per filter;
+        # text and skill search use PostgreSQL GIN indexes created in migration 0005
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(is_active=True, status='active'),
+                         name='job_feed_idx'),
+            models.Index(fields=['region', 'city', '-created_at', '-id'],
+                         condition=models.Q(is_active=True, status='active'), name='job_feed_region_idx'),
+            models.Index(fields=['city', '-created_at', '-id'], condition=models.Q(is_active=True, status='active'),
+                         name='job_feed_city_idx'),
+            models.Index(fields=['working_arrangement', '-created_at', '-id'],
+                         condition=models.Q(is_active=True, status='active'), name='job_feed_arrangement_idx'),
+            models.Index(fields=['salary_max', 'salary_min'], condition=models.Q(is_active=True, status='active'),
+                         name='job_feed_salary_idx'),
+        ]
     
     def __str__(self):
         return f"Job: {self.title} at {self.employer.username}"
@@ -103,11 +122,35 @@ class JobApplication(models.Model):
     
     class Meta:
         unique_together = ('job', 'worker')  # A worker can only apply to a job once
+        indexes = [
+            # Applicant lists, newest first (see employers/applicants.py)
+            models.Index(fields=['job', '-applied_at', '-id'], name='job_application_list_idx'),
+        ]
     
     def __str__(self):
         return f"Application: {self.worker.username} for {self.job.title}"
 
 
+class JobApplicationStatusChange(models.Model):
+    """
+    History of application status changes (see employers/application_status.py)
+    """
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='+')
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['application', 'changed_at']),
+        ]
+
+    def __str__(self):
+        return f"Application {self.application_id}: {self.from_status} -> {self.to_status}"
+
+
 class Shortlist(models.Model):
     """
     Model for employer shortlisting of workers
@@ -120,6 +163,9 @@ class Shortlist(models.Model):
     
     class Meta:
         unique_together = ('job', 'worker')  # A worker can only be shortlisted for a job once
+        indexes = [
+            models.Index(fields=['employer', '-added_at', '-id'], name='shortlist_list_idx'),
+        ]
     
     def __str__(self):
         return f"Shortlist: {self.worker.username} for {self.job.title}"
\ No newline at end of file
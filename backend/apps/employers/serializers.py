@@ -34,7 +34,7 @@ class JobPostingSerializer(serializers.ModelSerializer):
         model = JobPosting
         fields = [
             'id', 'title', 'description', 'location', 'city', 'region',
-            'salary_min', 'salary_max', 'required_skills', 'working_arrangement',
+            'salary_min', 'salary_max', 'wage_unit', 'category', 'required_skills', 'working_arrangement',
             'experience_required', 'education_required', 'religion_preference',
             'age_preference_min', 'age_preference_max', 'language_requirements',
             'start_date', 'end_date', 'is_active', 'status', 'created_at', 'updated_at',
@@ -67,7 +67,7 @@ class JobPostingCreateSerializer(serializers.ModelSerializer):
         model = JobPosting
         fields = [
             'title', 'description', 'location', 'city', 'region',
-            'salary_min', 'salary_max', 'required_skills', 'working_arrangement',
+            'salary_min', 'salary_max', 'wage_unit', 'category', 'required_skills', 'working_arrangement',
             'experience_required', 'education_required', 'religion_preference',
             'age_preference_min', 'age_preference_max', 'language_requirements',
             'start_date', 'end_date'
@@ -117,7 +117,7 @@ class JobPostingUpdateSerializer(serializers.ModelSerializer):
         model = JobPosting
         fields = [
             'title', 'description', 'location', 'city', 'region',
-            'salary_min', 'salary_max', 'required_skills', 'working_arrangement',
+            'salary_min', 'salary_max', 'wage_unit', 'category', 'required_skills', 'working_arrangement',
             'experience_required', 'education_required', 'religion_preference',
             'age_preference_min', 'age_preference_max', 'language_requirements',
             'start_date', 'end_date', 'is_active', 'status'
@@ -131,12 +131,14 @@ class JobApplicationSerializer(serializers.ModelSerializer):
     worker_full_name = serializers.SerializerMethodField()
     worker_username = serializers.CharField(source='worker.username', read_only=True)
     job_title = serializers.CharField(source='job.title', read_only=True)
+    # Set on ranked applicant lists only (see employers/applicants.py)
+    match_score = serializers.IntegerField(read_only=True, required=False)
     
     class Meta:
         model = JobApplication
         fields = [
             'id', 'job', 'job_title', 'worker', 'worker_full_name', 'worker_username',
-            'cover_letter', 'application_status', 'applied_at', 'updated_at'
+            'cover_letter', 'application_status', 'applied_at', 'updated_at', 'match_score'
         ]
         read_only_fields = ['id', 'applied_at', 'updated_at']
 
@@ -0,0 +1,173 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.employers.applicants import list_applications, match_score
+from apps.employers.models import JobApplication, JobPosting, Shortlist
+from apps.workers.models import WorkerProfile
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_job(employer, **fields):
+    values = {
+        'title': 'Cook', 'description': 'Cooking for a family', 'location': 'Bole', 'city': 'Addis Ababa',
+        'region': 'Addis Ababa', 'salary_min': 3000, 'salary_max': 5000, 'working_arrangement': 'full_time',
+        'experience_required': 2, 'education_required': 'secondary', 'start_date': date(2026, 11, 1),
+        'required_skills': ['Cooking', 'Cleaning'], 'language_requirements': ['Amharic'],
+    }
+    values.update(fields)
+    return JobPosting.objects.create(employer=employer, **values)
+
+
+def create_workers(count, start=0, **profile_fields):
+    """Workers with profiles, created in bulk (bypassing WorkerProfile.save's per-row validation)."""
+    users = [User.objects.create(username=f"worker{index}", user_type='worker') for index in range(start, start + count)]
+    profiles = []
+    for user in users:
+        values = {
+            'full_name': f"Full Name {user.username}", 'age': 25, 'place_of_birth': 'Adama',
+            'region_of_origin': 'Oromia', 'current_location': 'Addis Ababa', 'emergency_contact_name': 'Contact',
+            'emergency_contact_phone': '0911000000', 'education_level': 'secondary', 'religion': 'other',
+            'working_time': 'full_time', 'years_experience': 3, 'skills': ['Cooking', 'Cleaning'],
+            'languages': [{'language': 'Amharic', 'proficiency': 'fluent'}],
+        }
+        values.update(profile_fields)
+        profiles.append(WorkerProfile(user=user, fayda_id=f"22051501{user.id:08d}", **values))
+    WorkerProfile.objects.bulk_create(profiles)
+    return users
+
+
+class MatchScoreTest(TestCase):
+    def setUp(self):
+        self.job = create_job(User.objects.create(username='employer', user_type='employer'))
+
+    def profile(self, **fields):
+        values = {
+            'user_id': 1, 'skills': ['cooking', 'Cleaning'], 'years_experience': 2, 'education_level': 'tertiary',
+            'languages': [{'language': 'Amharic'}], 'current_location': 'addis ababa', 'working_time': 'live_in',
+            'age': 30,
+        }
+        values.update(fields)
+        return values
+
+    def test_full_match(self):
+        self.assertEqual(match_score(self.job, self.profile()), 100)
+
+    def test_partial_matches(self):
+        self.assertEqual(match_score(self.job, self.profile(skills=['Cooking'])), 82)
+        self.assertEqual(match_score(self.job, self.profile(years_experience=1)), 90)
+        self.assertEqual(match_score(self.job, self.profile(education_level='primary')), 85)
+        self.assertEqual(match_score(self.job, self.profile(current_location='Hawassa', working_time='part_time')), 85)
+        self.assertEqual(match_score(self.job, None), 0)
+
+    def test_age_preference(self):
+        self.job.age_preference_min = 35
+        self.assertEqual(match_score(self.job, self.profile()), 95)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ApplicantListTest(APITestCase):
+    def setUp(self):
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.job = create_job(self.employer)
+        self.url = reverse('get_job_applications', args=[self.job.id])
+        self.client.force_authenticate(self.employer)
+
+    def apply(self, workers):
+        return [JobApplication.objects.create(job=self.job, worker=worker) for worker in workers]
+
+    def test_lists_newest_first_with_names(self):
+        self.apply(create_workers(3))
+        without_profile = User.objects.create(username='noprofile', user_type='worker')
+        self.apply([without_profile])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        names = [application['worker_full_name'] for application in response.data['results']]
+        self.assertEqual(names, ['noprofile', 'Full Name worker2', 'Full Name worker1', 'Full Name worker0'])
+        self.assertNotIn('match_score', response.data['results'][0])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_query_count_does_not_grow_with_applicants(self):
+        self.apply(create_workers(40))
+
+        # The job, the page of applications, and the page's profiles
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'per_page': 200})
+        self.assertEqual(len(response.data['results']), 40)
+
+    def test_only_displayed_names_are_decrypted(self):
+        self.apply(create_workers(3))
+
+        applications, _ = list_applications(self.job)
+        profile = applications[0].worker.worker_profile
+        self.assertEqual(profile.get_deferred_fields() & {'fayda_id', 'place_of_birth', 'emergency_contact_name',
+                                                          'emergency_contact_phone'},
+                         {'fayda_id', 'place_of_birth', 'emergency_contact_name', 'emergency_contact_phone'})
+        self.assertNotIn('full_name', profile.get_deferred_fields())
+
+    def test_cursor_pagination_and_status_filter(self):
+        applications = self.apply(create_workers(5))
+        JobApplication.objects.filter(id=applications[0].id).update(application_status='rejected')
+
+        first = self.client.get(self.url, {'per_page': 2})
+        second = self.client.get(self.url, {'per_page': 2, 'cursor': first.data['next_cursor']})
+        third = self.client.get(self.url, {'per_page': 2, 'cursor': second.data['next_cursor']})
+        ids = [application['id'] for page in (first, second, third) for application in page.data['results']]
+        self.assertEqual(ids, [application.id for application in reversed(applications)])
+        self.assertIsNone(third.data['next_cursor'])
+
+        rejected = self.client.get(self.url, {'status': 'rejected'})
+        self.assertEqual([application['id'] for application in rejected.data['results']], [applications[0].id])
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nonsense'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ranked_by_match_score(self):
+        strong = self.apply(create_workers(2, start=0))
+        weak = self.apply(create_workers(2, start=2, skills=['Driving'], years_experience=0))
+        unprofiled = self.apply([User.objects.create(username='noprofile', user_type='worker')])
+
+        first = self.client.get(self.url, {'rank': 'true', 'per_page': 3})
+        second = self.client.get(self.url, {'rank': 'true', 'per_page': 3, 'cursor': first.data['next_cursor']})
+        results = first.data['results'] + second.data['results']
+
+        self.assertEqual([application['id'] for application in results],
+                         [strong[1].id, strong[0].id, weak[1].id, weak[0].id, unprofiled[0].id])
+        self.assertEqual([application['match_score'] for application in results], [100, 100, 45, 45, 0])
+        self.assertEqual(results[0]['worker_full_name'], 'Full Name worker1')
+        self.assertIsNone(second.data['next_cursor'])
+
+    def test_other_employers_are_denied(self):
+        self.client.force_authenticate(User.objects.create(username='other', user_type='employer'))
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ShortlistListTest(APITestCase):
+    def setUp(self):
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.jobs = [create_job(self.employer, title='Cook'), create_job(self.employer, title='Nanny')]
+        self.url = reverse('shortlist_management')
+        self.client.force_authenticate(self.employer)
+
+    def test_paginated_and_filtered_by_job(self):
+        workers = create_workers(4)
+        entries = [
+            Shortlist.objects.create(job=self.jobs[index % 2], worker=worker, employer=self.employer)
+            for index, worker in enumerate(workers)
+        ]
+
+        with self.assertNumQueries(2):
+            first = self.client.get(self.url, {'per_page': 3})
+        second = self.client.get(self.url, {'per_page': 3, 'cursor': first.data['next_cursor']})
+        ids = [entry['id'] for page in (first, second) for entry in page.data['results']]
+        self.assertEqual(ids, [entry.id for entry in reversed(entries)])
+        self.assertEqual(first.data['results'][0]['worker_full_name'], 'Full Name worker3')
+
+        nanny = self.client.get(self.url, {'job_id': self.jobs[1].id})
+        self.assertEqual([entry['job_title'] for entry in nanny.data['results']], ['Nanny', 'Nanny'])
+        self.assertEqual(self.client.get(self.url, {'job_id': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
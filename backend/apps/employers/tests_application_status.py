@@ -0,0 +1,110 @@
+from datetime import date
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.employers.application_status import ApplicationStatusError, transition_applications
+from apps.employers.models import JobApplication, JobApplicationStatusChange, JobPosting
+from apps.notifications.broadcast import run_pending_broadcasts
+from apps.notifications.models import Notification, NotificationBroadcast
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkApplicationStatusTest(APITestCase):
+    def setUp(self):
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.job = JobPosting.objects.create(
+            employer=self.employer, title='Nanny', description='Looking after two children', location='Bole',
+            city='Addis Ababa', region='Addis Ababa', salary_min=3000, salary_max=5000,
+            working_arrangement='full_time', experience_required=1, education_required='primary',
+            start_date=date(2026, 11, 1),
+        )
+        self.applications = [
+            JobApplication.objects.create(
+                job=self.job, worker=User.objects.create(username=f"worker{index}", user_type='worker')
+            )
+            for index in range(6)
+        ]
+        self.url = reverse('bulk_update_application_status', args=[self.job.id])
+        self.client.force_authenticate(self.employer)
+
+    def statuses(self):
+        return list(JobApplication.objects.filter(job=self.job).order_by('id').values_list('application_status', flat=True))
+
+    def test_reject_everyone_else_after_hiring(self):
+        hired = self.applications[0]
+        JobApplication.objects.filter(id=self.applications[1].id).update(application_status='shortlisted')
+        JobApplication.objects.filter(id=self.applications[2].id).update(application_status='rejected')
+        transition_applications(self.job, 'hired', application_ids=[hired.id], notify=False)
+
+        response = self.client.post(self.url, {
+            'status': 'rejected', 'from_status': ['pending', 'under_review', 'shortlisted'],
+            'exclude_ids': [hired.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 4)
+        self.assertEqual(response.data['skipped'], 0)
+        self.assertEqual(self.statuses(), ['hired', 'rejected', 'rejected', 'rejected', 'rejected', 'rejected'])
+
+        changes = JobApplicationStatusChange.objects.filter(to_status='rejected', changed_by=self.employer)
+        self.assertEqual(sorted(changes.values_list('from_status', flat=True)),
+                         ['pending', 'pending', 'pending', 'shortlisted'])
+
+        broadcast = NotificationBroadcast.objects.get(id=response.data['broadcast_id'])
+        self.assertEqual(broadcast.status, 'pending')
+        self.assertFalse(Notification.objects.filter(broadcast=broadcast).exists())
+
+        self.assertEqual(run_pending_broadcasts(), 1)
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'completed')
+        notified = Notification.objects.filter(broadcast=broadcast)
+        self.assertEqual(sorted(notified.values_list('recipient__username', flat=True)),
+                         ['worker1', 'worker3', 'worker4', 'worker5'])
+        self.assertEqual(notified.first().message, 'Your application for Nanny was not successful this time.')
+
+    def test_transition_runs_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(5):  # savepoint, select, update, history insert, release
+            report = transition_applications(self.job, 'under_review', from_statuses=['pending'], notify=False)
+        self.assertEqual(report['updated'], 6)
+
+    def test_disallowed_transitions_are_skipped(self):
+        transition_applications(self.job, 'hired', application_ids=[self.applications[0].id], notify=False)
+
+        report = transition_applications(
+            self.job, 'shortlisted', application_ids=[application.id for application in self.applications[:3]],
+            notify=False,
+        )
+        self.assertEqual((report['updated'], report['skipped']), (2, 1))
+        self.assertEqual(self.statuses()[:3], ['hired', 'shortlisted', 'shortlisted'])
+        self.assertEqual(JobApplicationStatusChange.objects.filter(application=self.applications[0]).count(), 1)
+
+    def test_applications_of_other_jobs_are_untouched(self):
+        other_job = JobPosting.objects.get(id=self.job.id)
+        other_job.pk = None
+        other_job.save()
+        other = JobApplication.objects.create(job=other_job, worker=self.applications[0].worker)
+
+        self.client.post(self.url, {'status': 'rejected', 'application_ids': [other.id]}, format='json')
+        other.refresh_from_db()
+        self.assertEqual(other.application_status, 'pending')
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post(self.url, {'status': 'rejected'}, format='json').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(self.url, {'status': 'pending', 'from_status': 'under_review'},
+                                          format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(self.url, {'status': 'rejected', 'application_ids': 5},
+                                          format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertRaises(ApplicationStatusError):
+            transition_applications(self.job, 'rejected', from_statuses=['archived'])
+
+        self.client.force_authenticate(User.objects.create(username='other', user_type='employer'))
+        response = self.client.post(self.url, {'status': 'rejected', 'from_status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(set(self.statuses()), {'pending'})
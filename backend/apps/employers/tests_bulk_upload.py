@@ -0,0 +1,167 @@
+import csv
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.employers.bulk_upload import upload_job_postings
+from apps.employers.models import JobPosting
+from apps.jobs.models import JobCategory, Region, Skill, WageUnit
+from apps.notifications.models import Notification
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+COLUMNS = [
+    'title', 'description', 'location', 'city', 'region', 'salary_min', 'salary_max',
+    'working_arrangement', 'experience_required', 'education_required', 'start_date',
+    'end_date', 'required_skills', 'category', 'wage_unit',
+]
+
+
+def make_row(index, **overrides):
+    row = {
+        'title': f"Housekeeper {index}",
+        'description': 'Full-time housekeeping',
+        'location': 'Bole',
+        'city': 'Addis Ababa',
+        'region': 'AA',
+        'salary_min': '3000',
+        'salary_max': '5000',
+        'working_arrangement': 'full_time',
+        'experience_required': '1',
+        'education_required': 'primary',
+        'start_date': '2026-11-01',
+        'end_date': '',
+        'required_skills': 'cooking; Cleaning',
+        'category': 'Domestic Work',
+        'wage_unit': 'month',
+    }
+    row.update(overrides)
+    return row
+
+
+def make_csv(rows):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode()
+
+
+class ReferenceDataMixin:
+    def create_reference_data(self):
+        Region.objects.create(name='Addis Ababa', code='AA')
+        Skill.objects.create(name='Cooking', category='domestic')
+        Skill.objects.create(name='Cleaning', category='domestic')
+        self.category = JobCategory.objects.create(name='Domestic Work')
+        self.wage_unit = WageUnit.objects.create(name='Per Month', code='month')
+
+
+class JobPostingBulkUploadTest(ReferenceDataMixin, TestCase):
+    def setUp(self):
+        self.create_reference_data()
+        self.employer = User.objects.create(username='agency', user_type='employer', email='agency@example.com')
+
+    def test_creates_postings_with_resolved_reference_data(self):
+        report = upload_job_postings(self.employer, io.BytesIO(make_csv([make_row(i) for i in range(5)])),
+                                     'jobs.csv', batch_size=2)
+
+        self.assertEqual(report['created'], 5)
+        self.assertEqual(report['failed'], 0)
+        self.assertEqual([result['status'] for result in report['results']], ['created'] * 5)
+
+        job_posting = JobPosting.objects.get(id=report['results'][0]['id'])
+        self.assertEqual(job_posting.employer, self.employer)
+        self.assertEqual(job_posting.region, 'Addis Ababa')
+        self.assertEqual(job_posting.required_skills, ['Cooking', 'Cleaning'])
+        self.assertEqual(job_posting.category, self.category)
+        self.assertEqual(job_posting.wage_unit, self.wage_unit)
+        self.assertIsNone(job_posting.end_date)
+
+    def test_reports_row_errors_without_aborting(self):
+        rows = [
+            make_row(1),
+            make_row(2, region='Atlantis'),
+            make_row(3, required_skills='Cooking; Juggling'),
+            make_row(4, salary_min='6000'),
+            make_row(5, wage_unit='fortnight', start_date='not a date'),
+            make_row(6),
+        ]
+        report = upload_job_postings(self.employer, io.BytesIO(make_csv(rows)), 'jobs.csv')
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['failed'], 4)
+        results = {result['row']: result for result in report['results']}
+        self.assertEqual(results[2]['status'], 'created')
+        self.assertIn('region', results[3]['errors'])
+        self.assertEqual(results[4]['errors']['required_skills'], ['Unknown skills: Juggling'])
+        self.assertIn('salary_min', results[5]['errors'])
+        self.assertIn('wage_unit', results[6]['errors'])
+        self.assertIn('start_date', results[6]['errors'])
+        self.assertEqual(JobPosting.objects.filter(employer=self.employer).count(), 2)
+
+    def test_validation_does_not_query_per_row(self):
+        rows = [make_row(i) for i in range(20)]
+        # 4 reference table loads, then savepoint, insert and release for the batch
+        with self.assertNumQueries(4 + 3):
+            upload_job_postings(self.employer, io.BytesIO(make_csv(rows)), 'jobs.csv', notify=False)
+
+    def test_notifies_once_per_upload(self):
+        upload_job_postings(self.employer, io.BytesIO(make_csv([make_row(i) for i in range(7)])),
+                            'jobs.csv', batch_size=3)
+
+        notifications = Notification.objects.filter(recipient=self.employer)
+        self.assertEqual(notifications.count(), 1)
+        self.assertEqual(notifications.get().title, '7 job postings published')
+
+    def test_dry_run_writes_nothing(self):
+        report = upload_job_postings(self.employer, io.BytesIO(make_csv([make_row(1)])), 'jobs.csv', dry_run=True)
+
+        self.assertEqual(report['results'], [{'row': 2, 'status': 'valid'}])
+        self.assertFalse(JobPosting.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class JobPostingBulkUploadEndpointTest(ReferenceDataMixin, APITestCase):
+    def setUp(self):
+        self.create_reference_data()
+        self.employer = User.objects.create(username='agency', user_type='employer')
+        self.worker = User.objects.create(username='worker', user_type='worker')
+        self.admin = User.objects.create(username='admin', user_type='admin')
+        self.url = reverse('bulk_upload_job_postings')
+
+    def _upload(self, rows, **data):
+        upload = SimpleUploadedFile('jobs.csv', make_csv(rows), content_type='text/csv')
+        return self.client.post(self.url, {'file': upload, **data}, format='multipart')
+
+    def test_employer_upload(self):
+        self.client.force_authenticate(self.employer)
+        response = self._upload([make_row(1), make_row(2, working_arrangement='sometimes')])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['results'][1]['status'], 'failed')
+
+    def test_admin_uploads_on_behalf_of_employer(self):
+        self.client.force_authenticate(self.admin)
+        response = self._upload([make_row(1)], employer_id=self.employer.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(JobPosting.objects.filter(employer=self.employer).exists())
+
+    def test_worker_is_forbidden(self):
+        self.client.force_authenticate(self.worker)
+        response = self._upload([make_row(1)])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_missing_columns(self):
+        self.client.force_authenticate(self.employer)
+        upload = SimpleUploadedFile('jobs.csv', b'title,description\nA,B\n', content_type='text/csv')
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,119 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.employers.models import JobPosting
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class JobFeedTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = User.objects.create(username='agency', user_type='employer')
+        self.url = reverse('job_feed')
+
+    def create_job(self, title='Housekeeper', **fields):
+        values = {
+            'description': 'Cleaning and cooking for a family of four', 'location': 'Bole',
+            'city': 'Addis Ababa', 'region': 'Addis Ababa', 'salary_min': 3000, 'salary_max': 5000,
+            'working_arrangement': 'full_time', 'experience_required': 1, 'education_required': 'primary',
+            'start_date': date(2026, 11, 1), 'required_skills': ['Cleaning', 'Cooking'],
+        }
+        values.update(fields)
+        with self.captureOnCommitCallbacks(execute=True):
+            return JobPosting.objects.create(employer=self.employer, title=title, **values)
+
+    def titles(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [job['title'] for job in response.data['results']]
+
+    def test_lists_open_jobs_newest_first_without_login(self):
+        self.create_job('Nanny')
+        self.create_job('Driver')
+        self.create_job('Closed', status='closed')
+        self.create_job('Inactive', is_active=False)
+
+        response = self.client.get(self.url)
+        self.assertEqual(self.titles(response), ['Driver', 'Nanny'])
+        self.assertEqual(response.data['results'][0]['employer_name'], 'agency')
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_cursor_pagination(self):
+        for index in range(5):
+            self.create_job(f"Job {index}")
+
+        first = self.client.get(self.url, {'per_page': 2})
+        second = self.client.get(self.url, {'per_page': 2, 'cursor': first.data['next_cursor']})
+        third = self.client.get(self.url, {'per_page': 2, 'cursor': second.data['next_cursor']})
+
+        self.assertEqual(self.titles(first), ['Job 4', 'Job 3'])
+        self.assertEqual(self.titles(second), ['Job 2', 'Job 1'])
+        self.assertEqual(self.titles(third), ['Job 0'])
+        self.assertIsNone(third.data['next_cursor'])
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nonsense'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_size_is_clamped(self):
+        for index in range(3):
+            self.create_job(f"Job {index}")
+
+        response = self.client.get(self.url, {'per_page': 0})
+        self.assertEqual(response.data['per_page'], 1)
+        self.assertEqual(self.titles(response), ['Job 2'])
+        self.assertEqual(self.client.get(self.url, {'per_page': 500}).data['per_page'], 100)
+
+    def test_filters(self):
+        self.create_job('Nanny in Bahir Dar', region='Amhara', city='Bahir Dar', salary_min=2000, salary_max=2500,
+                        required_skills=['Childcare'])
+        self.create_job('Part-time cook', working_arrangement='part_time', salary_min=4000, salary_max=7000,
+                        description='Traditional Ethiopian dishes', required_skills=['Cooking'])
+        self.create_job('Housekeeper')
+
+        self.assertEqual(self.titles(self.client.get(self.url, {'region': 'Amhara'})), ['Nanny in Bahir Dar'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'city': 'Addis Ababa'})),
+                         ['Housekeeper', 'Part-time cook'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'working_arrangement': 'part_time'})),
+                         ['Part-time cook'])
+        # Salary ranges overlapping the requested one
+        self.assertEqual(self.titles(self.client.get(self.url, {'salary_min': 5500})), ['Part-time cook'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'salary_max': 2800})), ['Nanny in Bahir Dar'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'skills': 'cooking'})),
+                         ['Housekeeper', 'Part-time cook'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'skills': 'Cooking,Cleaning'})), ['Housekeeper'])
+        self.assertEqual(self.titles(self.client.get(self.url, {'q': 'ethiopian cook'})), ['Part-time cook'])
+
+    def test_invalid_filters(self):
+        response = self.client.get(self.url, {'salary_min': 'lots', 'working_arrangement': 'weekends'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'salary_min', 'working_arrangement'})
+
+    def test_first_page_is_cached_until_a_job_changes(self):
+        job = self.create_job('Nanny')
+        self.assertEqual(self.titles(self.client.get(self.url)), ['Nanny'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(self.client.get(self.url)), ['Nanny'])
+
+        job.title = 'Live-in nanny'
+        with self.captureOnCommitCallbacks(execute=True):
+            job.save()
+        self.assertEqual(self.titles(self.client.get(self.url)), ['Live-in nanny'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.delete()
+        self.assertEqual(self.titles(self.client.get(self.url)), [])
+
+    def test_filtered_first_pages_are_cached_separately(self):
+        self.create_job('Nanny', city='Adama')
+        self.create_job('Driver')
+
+        self.assertEqual(self.titles(self.client.get(self.url, {'city': 'Adama'})), ['Nanny'])
+        self.assertEqual(self.titles(self.client.get(self.url)), ['Driver', 'Nanny'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles(self.client.get(self.url, {'city': 'Adama'})), ['Nanny'])
@@ -4,10 +4,14 @@ from . import views
 urlpatterns = [
     # Job postings
     path('jobs/', views.job_postings_list, name='job_postings_list'),
+    path('job-feed/', views.job_feed, name='job_feed'),
+    path('jobs/bulk/upload/', views.bulk_upload_job_postings, name='bulk_upload_job_postings'),
     path('jobs/<int:job_id>/', views.job_posting_detail, name='job_posting_detail'),
     
     # Job applications
     path('jobs/<int:job_id>/applications/', views.get_job_applications, name='get_job_applications'),
+    path('jobs/<int:job_id>/applications/status/', views.bulk_update_application_status,
+         name='bulk_update_application_status'),
     path('jobs/<int:job_id>/apply/', views.apply_to_job, name='apply_to_job'),
     
     # Shortlist management
@@ -1,6 +1,6 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
@@ -9,9 +9,19 @@ from datetime import datetime, timedelta
 import random
 import string
 
+from .application_status import ApplicationStatusError, transition_applications
+from .applicants import (
+    APPLICANT_PAGE_SIZE,
+    MAX_APPLICANT_PAGE_SIZE,
+    list_applications,
+    list_shortlist,
+    rank_applications,
+)
+from .job_feed import FEED_PAGE_SIZE, MAX_FEED_PAGE_SIZE, FeedFilterError, get_job_feed, parse_feed_filters
 from .models import EmployerProfile, JobPosting, JobApplication, Shortlist
 from users.models import User
 from apps.workers.models import WorkerProfile
+from utils.cursors import InvalidCursor
 
 
 @api_view(['GET', 'POST'])
@@ -24,13 +34,13 @@ def job_postings_list(request):
     if request.method == 'GET':
         if request.user.user_type == 'admin':
             # Admins can see all job postings
-            job_postings = JobPosting.objects.all().order_by('-created_at')
+            job_postings = JobPosting.objects.select_related('employer').order_by('-created_at')
         elif request.user.user_type == 'employer':
             # Employers can see only their own job postings
-            job_postings = JobPosting.objects.filter(employer=request.user).order_by('-created_at')
+            job_postings = JobPosting.objects.filter(employer=request.user).select_related('employer').order_by('-created_at')
         elif request.user.user_type == 'worker':
             # Workers can see active job postings
-            job_postings = JobPosting.objects.filter(is_active=True, status='active').order_by('-created_at')
+            job_postings = JobPosting.objects.filter(is_active=True, status='active').select_related('employer').order_by('-created_at')
         else:
             return Response(
                 {'error': 'Permission denied'}, 
@@ -64,6 +74,35 @@ def job_postings_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def job_feed(request):
+    """
+    Public feed of open job postings, newest first, one page at a time
+    Query params: region, city, working_arrangement, salary_min, salary_max,
+    skills (comma separated, all required), q (words in the title or description),
+    per_page (default 20, max 100), cursor (next_cursor of the previous page)
+    """
+    try:
+        per_page = max(1, min(int(request.query_params.get('per_page', FEED_PAGE_SIZE)), MAX_FEED_PAGE_SIZE))
+    except ValueError:
+        per_page = FEED_PAGE_SIZE
+
+    try:
+        filters = parse_feed_filters(request.query_params)
+        page = get_job_feed(filters, cursor=request.query_params.get('cursor'), page_size=per_page)
+    except FeedFilterError as e:
+        return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'results': page['results'],
+        'next_cursor': page['next_cursor'],
+        'per_page': per_page,
+    })
+
+
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def job_posting_detail(request, job_id):
@@ -116,11 +155,63 @@ def job_posting_detail(request, job_id):
         )
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_upload_job_postings(request):
+    """
+    Create job postings in bulk from a CSV/XLSX upload
+
+    Employers upload for themselves; admins pass employer_id to upload on
+    behalf of an employer. Returns one result per row; invalid rows do not
+    abort the upload. Pass dry_run=true to only validate the file.
+    """
+    from .bulk_upload import DEFAULT_BATCH_SIZE, upload_job_postings
+    from utils.spreadsheet_import import SpreadsheetImportError
+
+    if request.user.user_type == 'employer':
+        employer = request.user
+    elif request.user.user_type == 'admin':
+        try:
+            employer = User.objects.get(id=request.data.get('employer_id'), user_type='employer')
+        except (User.DoesNotExist, ValueError, TypeError):
+            return Response(
+                {'error': 'A valid employer_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    else:
+        return Response(
+            {'error': 'Only employers can create job postings'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {'error': 'A CSV or XLSX file is required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+    try:
+        batch_size = int(request.data.get('batch_size', DEFAULT_BATCH_SIZE))
+    except (TypeError, ValueError):
+        batch_size = DEFAULT_BATCH_SIZE
+
+    try:
+        report = upload_job_postings(employer, upload, upload.name, batch_size=batch_size, dry_run=dry_run)
+    except SpreadsheetImportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(report, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_job_applications(request, job_id):
     """
-    Get all applications for a specific job posting
+    Get the applications for a specific job posting, one page at a time
+    Query params: rank (true for best match first, each with a match_score),
+    status, per_page (default 50, max 200), cursor (next_cursor of the previous page)
     """
     try:
         job_posting = JobPosting.objects.get(id=job_id)
@@ -132,19 +223,81 @@ def get_job_applications(request, job_id):
     
     # Check permissions - only employer who posted or admin can see applications
     if (request.user.user_type != 'admin' and 
-        request.user.id != job_posting.employer.id):
+        request.user.id != job_posting.employer_id):
         return Response(
             {'error': 'Permission denied'}, 
             status=status.HTTP_403_FORBIDDEN
         )
-    
-    applications = JobApplication.objects.filter(job=job_posting).select_related(
-        'worker', 'job'
-    )
+
+    per_page = _applicant_page_size(request)
+    rank = request.query_params.get('rank', '').lower() == 'true'
+    list_page = rank_applications if rank else list_applications
+    try:
+        applications, next_cursor = list_page(
+            job_posting, cursor=request.query_params.get('cursor'), limit=per_page,
+            application_status=request.query_params.get('status'),
+        )
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
     from .serializers import JobApplicationSerializer
     serializer = JobApplicationSerializer(applications, many=True)
-    return Response(serializer.data)
+    return Response({
+        'results': serializer.data,
+        'next_cursor': next_cursor,
+        'per_page': per_page,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_update_application_status(request, job_id):
+    """
+    Move many applications of a job to one status, notifying their workers in one batch
+    Body: status, and either application_ids or from_status (a list of current
+    statuses); exclude_ids leaves applications out, e.g. the one just hired
+    """
+    try:
+        job_posting = JobPosting.objects.get(id=job_id)
+    except JobPosting.DoesNotExist:
+        return Response(
+            {'error': 'Job posting not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if (request.user.user_type != 'admin' and 
+        request.user.id != job_posting.employer_id):
+        return Response(
+            {'error': 'Permission denied'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    from_statuses = request.data.get('from_status')
+    if isinstance(from_statuses, str):
+        from_statuses = [from_statuses]
+    try:
+        report = transition_applications(
+            job_posting,
+            request.data.get('status', ''),
+            changed_by=request.user,
+            application_ids=request.data.get('application_ids'),
+            from_statuses=from_statuses,
+            exclude_ids=request.data.get('exclude_ids'),
+        )
+    except ApplicationStatusError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except (TypeError, ValueError) as e:
+        return Response({'error': f'Invalid application ids: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(report)
+
+
+def _applicant_page_size(request):
+    try:
+        per_page = min(int(request.query_params.get('per_page', APPLICANT_PAGE_SIZE)), MAX_APPLICANT_PAGE_SIZE)
+    except ValueError:
+        per_page = APPLICANT_PAGE_SIZE
+    return max(per_page, 1)
 
 
 @api_view(['POST'])
@@ -220,14 +373,25 @@ def shortlist_management(request, job_id=None):
         )
     
     if request.method == 'GET':
-        # Get all shortlists for the authenticated employer
-        shortlists = Shortlist.objects.filter(employer=request.user).select_related(
-            'job', 'worker'
-        )
+        # The authenticated employer's shortlists, one page at a time
+        # Query params: job_id, per_page (default 50, max 200), cursor (next_cursor of the previous page)
+        per_page = _applicant_page_size(request)
+        try:
+            job_id = int(request.query_params['job_id']) if request.query_params.get('job_id') else None
+            shortlists, next_cursor = list_shortlist(
+                request.user, job_id=job_id, cursor=request.query_params.get('cursor'), limit=per_page
+            )
+        except ValueError as e:
+            # InvalidCursor or a job_id that is not a number
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         from .serializers import ShortlistSerializer
         serializer = ShortlistSerializer(shortlists, many=True)
-        return Response(serializer.data)
+        return Response({
+            'results': serializer.data,
+            'next_cursor': next_cursor,
+            'per_page': per_page,
+        })
     
     elif request.method == 'POST':
         # Add a worker to shortlist for a job
@@ -10,6 +10,7 @@ from notifications.schemas import (
     MessageThreadOutSchema
 )
 from notifications.models import Notification, Message, MessageThread
+from notifications.services import NotificationService
 from users.auth import JWTAuth
 from django.core.paginator import Paginator
 from django.db.models import Q
@@ -31,7 +32,7 @@ def mark_all_notifications_read(request):
     """
     Mark all notifications as read for the authenticated user
     """
-    Notification.objects.filter(recipient=request.auth, is_read=False).update(is_read=True)
+    NotificationService.mark_all_as_read(request.auth)
     return {"success": True}
 
 
@@ -0,0 +1,330 @@
+"""
+Bulk notification fan-out for broadcasts and urgent alerts
+
+A broadcast resolves its recipients to a queryset (explicit user ids or a
+filter such as all workers in Amhara) and walks it in recipient id order.
+Each chunk of recipients is one transaction: the notifications are inserted
+with bulk_create, their deliveries are enqueued per channel with
+enqueue_deliveries(), and the broadcast's counters and checkpoint are
+advanced. Sending is left to the delivery workers (see delivery.py), so a
+50k-recipient broadcast costs a few queries per chunk rather than several
+queries and synchronous sends per recipient.
+
+Requests only record a broadcast (create_broadcast) and hand it to the
+broadcast workers (dispatch_broadcast). `manage.py run_notification_workers`
+claims pending broadcasts and fans them out, leasing each one like a
+delivery: the lease (locked_at) is renewed with every chunk, and a running
+broadcast whose lease is older than LEASE_SECONDS is taken over and resumed
+after its checkpoint. With EAGER delivery (development, tests) the fan-out
+runs when the creating transaction commits instead.
+"""
+import logging
+import threading
+from datetime import timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from users.models import User
+
+from .delivery import CHANNELS, enqueue_deliveries, get_delivery_options
+from .models import Notification, NotificationBroadcast, NotificationDelivery
+from .unread_counters import get_unread_counters
+from . import realtime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Filter keys accepted in a broadcast's recipient_filter and the User lookups they map to
+RECIPIENT_FILTERS = {
+    'user_type': 'user_type',
+    'is_verified': 'is_verified',
+    'region': 'worker_profile__region_of_origin',
+    'current_location': 'worker_profile__current_location',
+}
+# The type each recipient filter value must have
+RECIPIENT_FILTER_TYPES = {
+    'user_type': str,
+    'is_verified': bool,
+    'region': str,
+    'current_location': str,
+}
+
+
+class BroadcastError(ValueError):
+    """Raised when a broadcast's recipients or channels are invalid."""
+
+
+class RecipientsNotFound(BroadcastError):
+    """Raised when some of a broadcast's recipient ids do not exist."""
+
+
+def resolve_recipients(recipient_ids: Optional[List[int]] = None, recipient_filter: Optional[Dict] = None):
+    """
+    Returns the queryset of active users a broadcast is sent to.
+
+    Raises:
+        BroadcastError: For a filter that is not a mapping of known keys to
+            values of their type (RECIPIENT_FILTER_TYPES)
+        RecipientsNotFound: For ids that do not exist
+    """
+    if recipient_filter is not None and not isinstance(recipient_filter, dict):
+        raise BroadcastError('The recipient filter must be an object')
+    unknown = set(recipient_filter or {}) - set(RECIPIENT_FILTERS)
+    if unknown:
+        raise BroadcastError(f"Unknown recipient filters: {', '.join(sorted(unknown))}")
+    for key, value in (recipient_filter or {}).items():
+        if not isinstance(value, RECIPIENT_FILTER_TYPES[key]):
+            raise BroadcastError(
+                f"Recipient filter {key} must be a {RECIPIENT_FILTER_TYPES[key].__name__}, got {value!r}"
+            )
+
+    if recipient_ids is not None:
+        ids = set(recipient_ids)
+        found = User.objects.only('id').in_bulk(ids)
+        missing = sorted(ids - set(found))
+        if missing:
+            raise RecipientsNotFound(f"Recipients do not exist: {', '.join(str(rid) for rid in missing[:20])}")
+
+    return _recipient_queryset(recipient_ids, recipient_filter)
+
+
+def _recipient_queryset(recipient_ids, recipient_filter):
+    recipients = User.objects.filter(is_active=True)
+    if recipient_ids is not None:
+        recipients = recipients.filter(id__in=recipient_ids)
+    lookups = {RECIPIENT_FILTERS[key]: value for key, value in (recipient_filter or {}).items()}
+    return recipients.filter(**lookups)
+
+
+def create_broadcast(title: str, message: str, channels: Iterable[str], sender=None,
+                     notification_type: str = 'system_alert', recipient_ids: Optional[List[int]] = None,
+                     recipient_filter: Optional[Dict] = None) -> NotificationBroadcast:
+    """
+    Validates and records a pending broadcast; run_broadcast() performs the
+    fan-out, see dispatch_broadcast().
+
+    Raises:
+        BroadcastError: For unknown channels, no recipient selection, or invalid recipients
+    """
+    channels = list(dict.fromkeys(channels))
+    unknown = set(channels) - set(CHANNELS)
+    if unknown:
+        raise BroadcastError(f"Unknown channels: {', '.join(sorted(unknown))}")
+    if recipient_ids is None and not recipient_filter:
+        raise BroadcastError('Either recipient ids or a recipient filter is required')
+
+    recipients = resolve_recipients(recipient_ids, recipient_filter)
+    return NotificationBroadcast.objects.create(
+        sender=sender,
+        notification_type=notification_type,
+        title=title,
+        message=message,
+        channels=channels,
+        recipient_ids=sorted(set(recipient_ids)) if recipient_ids is not None else None,
+        recipient_filter=recipient_filter or {},
+        total_recipients=recipients.count(),
+    )
+
+
+def run_broadcast(broadcast: NotificationBroadcast, chunk_size: int = DEFAULT_CHUNK_SIZE) -> NotificationBroadcast:
+    """
+    Fans a broadcast out to its recipients, resuming after last_recipient_id.
+
+    Each chunk commits on its own, so progress is visible (and kept) while
+    the broadcast runs.
+    """
+    NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+        status='running', started_at=broadcast.started_at or timezone.now(), locked_at=timezone.now(), error=''
+    )
+
+    try:
+        for recipient_ids in _recipient_chunks(broadcast, chunk_size):
+            _fan_out_chunk(broadcast, recipient_ids)
+            broadcast.last_recipient_id = recipient_ids[-1]
+    except Exception as e:
+        logger.error(f"Broadcast {broadcast.id} failed after recipient {broadcast.last_recipient_id}: {str(e)}")
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(status='failed', error=str(e)[:1000])
+        raise
+
+    NotificationBroadcast.objects.filter(pk=broadcast.pk).update(status='completed', completed_at=timezone.now())
+    broadcast.refresh_from_db()
+    logger.info(
+        f"Broadcast {broadcast.id} created {broadcast.notifications_created} notifications "
+        f"and {broadcast.deliveries_enqueued} deliveries"
+    )
+    return broadcast
+
+
+def _recipient_chunks(broadcast: NotificationBroadcast, chunk_size: int) -> Iterator[List[int]]:
+    """
+    The ids of the recipients after the checkpoint, a chunk at a time in id
+    order. Recipients deleted or deactivated since the broadcast was created
+    are skipped, not an error.
+    """
+    if broadcast.recipient_ids is None:
+        recipients = _recipient_queryset(None, broadcast.recipient_filter).order_by('id').values_list('id', flat=True)
+        while True:
+            recipient_ids = list(recipients.filter(id__gt=broadcast.last_recipient_id)[:chunk_size])
+            if not recipient_ids:
+                return
+            yield recipient_ids
+    else:
+        # Explicit ids are sliced here, so each chunk query carries only its own ids
+        remaining = [rid for rid in sorted(set(broadcast.recipient_ids)) if rid > broadcast.last_recipient_id]
+        for start in range(0, len(remaining), chunk_size):
+            recipient_ids = sorted(
+                _recipient_queryset(remaining[start:start + chunk_size], broadcast.recipient_filter)
+                .values_list('id', flat=True)
+            )
+            if recipient_ids:
+                yield recipient_ids
+
+
+def _fan_out_chunk(broadcast: NotificationBroadcast, recipient_ids: List[int]):
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                recipient_id=recipient_id,
+                sender_id=broadcast.sender_id,
+                notification_type=broadcast.notification_type,
+                title=broadcast.title,
+                message=broadcast.message,
+                broadcast=broadcast,
+            )
+            for recipient_id in recipient_ids
+        ])
+        deliveries = enqueue_deliveries(notifications, broadcast.channels) if broadcast.channels else []
+        get_unread_counters().notifications_created(recipient_ids)
+        realtime.notifications_created(notifications)
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            notifications_created=F('notifications_created') + len(notifications),
+            deliveries_enqueued=F('deliveries_enqueued') + len(deliveries),
+            last_recipient_id=recipient_ids[-1],
+            locked_at=timezone.now(),
+        )
+
+
+def dispatch_broadcast(broadcast: NotificationBroadcast):
+    """
+    Hands a created broadcast to the broadcast workers. With EAGER delivery
+    it is fanned out in the calling thread once the transaction commits.
+    """
+    if get_delivery_options()['EAGER']:
+        transaction.on_commit(lambda: _run_eagerly(broadcast))
+
+
+def _run_eagerly(broadcast: NotificationBroadcast):
+    try:
+        run_broadcast(broadcast)
+    except Exception:
+        pass  # run_broadcast logged it and marked the broadcast failed
+
+
+def claim_broadcast(options: Optional[Dict] = None) -> Optional[NotificationBroadcast]:
+    """
+    Leases the oldest pending broadcast, or a running one whose lease is
+    older than LEASE_SECONDS, by marking it running. Returns None when there
+    is none. Failed broadcasts are only resumed on request (send_broadcast --resume).
+    """
+    options = options or get_delivery_options()
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=options['LEASE_SECONDS'])
+    claimable = (
+        Q(status='pending')
+        | Q(status='running', locked_at__lt=stale_before)
+        | Q(status='running', locked_at__isnull=True)
+    )
+
+    with transaction.atomic():
+        ids = list(
+            NotificationBroadcast.objects.filter(claimable)
+            .order_by('created_at', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:1]
+        )
+        if not ids or not NotificationBroadcast.objects.filter(claimable, id=ids[0]).update(
+            status='running', locked_at=now
+        ):
+            return None
+    return NotificationBroadcast.objects.get(id=ids[0])
+
+
+def run_pending_broadcasts(chunk_size: int = DEFAULT_CHUNK_SIZE, options: Optional[Dict] = None) -> int:
+    """Fans out claimable broadcasts until none is left. Returns the number run."""
+    count = 0
+    while True:
+        broadcast = claim_broadcast(options)
+        if broadcast is None:
+            return count
+        try:
+            run_broadcast(broadcast, chunk_size=chunk_size)
+        except Exception:
+            pass  # run_broadcast logged it and marked the broadcast failed
+        count += 1
+
+
+def run_broadcasts_forever(stop_event: threading.Event, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           options: Optional[Dict] = None):
+    options = options or get_delivery_options()
+    while not stop_event.is_set():
+        try:
+            processed = run_pending_broadcasts(chunk_size, options)
+        except Exception as e:
+            logger.error(f"Broadcast worker loop failed: {str(e)}")
+            close_old_connections()
+            processed = 0
+        if not processed:
+            stop_event.wait(options['POLL_INTERVAL'])
+
+
+def send_broadcast(title: str, message: str, channels: Iterable[str], sender=None,
+                   notification_type: str = 'system_alert', recipient_ids: Optional[List[int]] = None,
+                   recipient_filter: Optional[Dict] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> NotificationBroadcast:
+    """Creates a broadcast and fans it out in the calling thread."""
+    broadcast = create_broadcast(
+        title, message, channels, sender=sender, notification_type=notification_type,
+        recipient_ids=recipient_ids, recipient_filter=recipient_filter,
+    )
+    return run_broadcast(broadcast, chunk_size=chunk_size)
+
+
+def broadcast_progress(broadcast: NotificationBroadcast) -> Dict:
+    """
+    Fan-out and delivery progress of a broadcast.
+
+    Delivery counts are per channel and status, e.g.
+    {"email": {"pending": 120, "sent": 49880}, "sms": {...}}.
+    """
+    deliveries = {channel: {} for channel in broadcast.channels}
+    rows = (
+        NotificationDelivery.objects.filter(notification__broadcast=broadcast)
+        .values('channel', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    for row in rows:
+        deliveries.setdefault(row['channel'], {})[row['status']] = row['count']
+
+    finished = sum(
+        counts.get('sent', 0) + counts.get('dead', 0) for counts in deliveries.values()
+    )
+    return {
+        'id': broadcast.id,
+        'status': broadcast.status,
+        'title': broadcast.title,
+        'channels': broadcast.channels,
+        'total_recipients': broadcast.total_recipients,
+        'notifications_created': broadcast.notifications_created,
+        'deliveries_enqueued': broadcast.deliveries_enqueued,
+        'deliveries': deliveries,
+        'delivery_completed': bool(broadcast.status == 'completed' and finished == broadcast.deliveries_enqueued),
+        'error': broadcast.error,
+        'created_at': broadcast.created_at,
+        'started_at': broadcast.started_at,
+        'completed_at': broadcast.completed_at,
+    }
@@ -0,0 +1,124 @@
+"""
+Coalescing of bursty notifications and email digests
+
+Every message in a busy thread used to create its own notification and
+email for each other participant. Notifications of a coalesced type that
+share a recipient and group key (the thread, for messages) are now merged
+while unread:
+
+- if the recipient has an unread notification with the same type and group
+  key updated within WINDOW_SECONDS, that row is updated in place: its
+  group_count goes up, the title becomes "3 new messages from Abebe" and the
+  message shows the latest preview. The unread count does not change.
+- otherwise a new notification is created as before.
+
+Email for DIGEST_TYPES is not sent straight away. The email delivery is
+scheduled DIGEST_INTERVAL seconds after the first notification of a burst,
+so it describes everything that was merged into the row by then, and it is
+skipped if the notification was read in the meantime. A burst therefore
+produces at most one email per DIGEST_INTERVAL.
+
+Configured by the NOTIFICATION_COALESCING setting.
+"""
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Notification, NotificationDelivery
+
+DEFAULT_OPTIONS = {
+    'TYPES': ('message_received',),
+    'WINDOW_SECONDS': 30 * 60,
+    'DIGEST_TYPES': ('message_received',),
+    'DIGEST_INTERVAL': 15 * 60,
+}
+
+# Title of a notification that has absorbed `count` notifications
+COALESCED_TITLES = {
+    'message_received': '{count} new messages from {sender}',
+}
+
+
+def get_coalescing_options() -> Dict:
+    """NOTIFICATION_COALESCING merged over the defaults."""
+    options = dict(DEFAULT_OPTIONS)
+    options.update(getattr(settings, 'NOTIFICATION_COALESCING', {}))
+    return options
+
+
+def thread_group_key(thread_id: int) -> str:
+    return f"thread:{thread_id}"
+
+
+def coalesced_title(notification_type: str, title: str, count: int, sender=None) -> str:
+    if count <= 1:
+        return title
+    template = COALESCED_TITLES.get(notification_type)
+    if template is None:
+        return f"{title} ({count})"
+    sender_name = (sender.get_full_name() or sender.username) if sender else ''
+    return template.format(count=count, sender=sender_name)
+
+
+def coalesce_notification(recipient, notification_type: str, group_key: str, title: str, message: str,
+                          sender=None, content_object=None,
+                          options: Optional[Dict] = None) -> Optional[Notification]:
+    """
+    Merges a new notification into the recipient's open notification for the
+    same type and group key.
+
+    Call inside a transaction. Returns the updated notification, or None when
+    there is nothing to merge into and a new notification should be created.
+    """
+    options = options or get_coalescing_options()
+    if not group_key or notification_type not in options['TYPES']:
+        return None
+
+    window_start = timezone.now() - timedelta(seconds=options['WINDOW_SECONDS'])
+    notification = (
+        Notification.objects.select_for_update()
+        .filter(
+            recipient=recipient,
+            notification_type=notification_type,
+            group_key=group_key,
+            is_read=False,
+            updated_at__gte=window_start,
+        )
+        .order_by('-updated_at')
+        .first()
+    )
+    if notification is None:
+        return None
+
+    count = notification.group_count + 1
+    update = {
+        'group_count': F('group_count') + 1,
+        'title': coalesced_title(notification_type, title, count, sender),
+        'message': message,
+        'sender': sender,
+        'updated_at': timezone.now(),
+    }
+    if content_object is not None:
+        update['content_type'] = ContentType.objects.get_for_model(content_object)
+        update['object_id'] = content_object.pk
+    Notification.objects.filter(pk=notification.pk).update(**update)
+    notification.refresh_from_db()
+    return notification
+
+
+def digest_delay(notification_type: str, options: Optional[Dict] = None) -> Optional[timedelta]:
+    """How long email for this type is held back, or None when it is sent straight away."""
+    options = options or get_coalescing_options()
+    if notification_type not in options['DIGEST_TYPES']:
+        return None
+    return timedelta(seconds=options['DIGEST_INTERVAL'])
+
+
+def has_pending_delivery(notification: Notification, channel: str) -> bool:
+    return NotificationDelivery.objects.filter(
+        notification=notification, channel=channel, status__in=('pending', 'in_progress')
+    ).exists()
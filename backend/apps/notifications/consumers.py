@@ -0,0 +1,78 @@
+"""
+WebSocket consumer pushing notifications, messages and unread counts
+
+Clients connect to /ws/notifications/?token=<JWT access token> and receive
+JSON frames:
+
+    {"type": "unread_count", "notifications": 3}
+    {"type": "notification", "notification": {...}}
+    {"type": "message", "message": {...}, "thread_unread_count": 2}
+
+Sending {"type": "ping"} is answered with {"type": "pong"}.
+"""
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .realtime import metrics, user_group
+from .unread_counters import get_unread_counters
+
+# Close code for connections without a valid token (mirrors HTTP 401)
+UNAUTHENTICATED_CLOSE_CODE = 4401
+
+
+def read_counters(func):
+    # Counter reads are cache reads (database only on a miss), so they run on the
+    # thread pool instead of being serialised on the single thread-sensitive thread
+    return database_sync_to_async(func, thread_sensitive=False)
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    group_name = None
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            metrics.rejected()
+            await self.close(code=UNAUTHENTICATED_CLOSE_CODE)
+            return
+
+        self.user_id = user.id
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        metrics.connected()
+        await self.send_unread_count()
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            metrics.disconnected()
+
+    async def receive_json(self, content, **kwargs):
+        if content.get('type') == 'ping':
+            await self.send_json({'type': 'pong'})
+
+    # Channel layer events (see realtime.py)
+
+    async def notification_created(self, event):
+        await self.send_json({'type': 'notification', 'notification': event['notification']})
+        metrics.pushed(event.get('sent_at'))
+        await self.send_unread_count()
+
+    async def message_created(self, event):
+        message = event['message']
+        counts = await read_counters(get_unread_counters().get_thread_counts)([message['thread']], self.user_id)
+        await self.send_json({
+            'type': 'message',
+            'message': message,
+            'thread_unread_count': counts[message['thread']],
+        })
+        metrics.pushed(event.get('sent_at'))
+
+    async def unread_changed(self, event):
+        await self.send_unread_count()
+        metrics.pushed(event.get('sent_at'))
+
+    async def send_unread_count(self):
+        count = await read_counters(get_unread_counters().get_notification_count)(self.user_id)
+        await self.send_json({'type': 'unread_count', 'notifications': count})
@@ -0,0 +1,112 @@
+"""
+Batched resolution of the objects notifications link to
+
+Notification.content_object is a GenericForeignKey: read row by row, every
+notification costs a query for its content type and another for the object.
+prefetch_content_objects resolves a whole page at once, one query per
+content type, taking content types from ContentType's process-wide cache,
+and fills the GenericForeignKey cache so `notification.content_object` no
+longer queries.
+
+summarize_content_object turns a linked object into the small dict embedded
+in notification responses, so clients need no follow-up request for the
+job, application or message a notification is about.
+"""
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from django.contrib.contenttypes.models import ContentType
+from django.utils.text import Truncator
+
+from .models import Notification
+
+MESSAGE_EXCERPT_LENGTH = 100
+
+
+def _summarize_job_posting(job):
+    return {'id': job.id, 'title': job.title, 'status': job.status, 'city': job.city}
+
+
+def _summarize_job_application(application):
+    return {
+        'id': application.id,
+        'status': application.application_status,
+        'job_id': application.job_id,
+        'job_title': application.job.title,
+        'worker_id': application.worker_id,
+    }
+
+
+def _summarize_message(message):
+    visible = not message.is_deleted and message.moderation_status == 'approved'
+    return {
+        'id': message.id,
+        'thread_id': message.thread_id,
+        'sender_id': message.sender_id,
+        'excerpt': Truncator(message.content).chars(MESSAGE_EXCERPT_LENGTH) if visible else None,
+    }
+
+
+# (app_label, model) -> (related fields to select with the object, summary function)
+CONTENT_SUMMARIES = {
+    ('employers', 'jobposting'): ((), _summarize_job_posting),
+    ('employers', 'jobapplication'): (('job',), _summarize_job_application),
+    ('notifications', 'message'): ((), _summarize_message),
+}
+
+
+def get_content_type(notification: Notification) -> Optional[ContentType]:
+    """The notification's content type, from the ContentType cache rather than a query per row."""
+    if notification.content_type_id is None:
+        return None
+    return ContentType.objects.db_manager(notification._state.db).get_for_id(notification.content_type_id)
+
+
+def prefetch_content_objects(notifications: Iterable[Notification]) -> List[Notification]:
+    """
+    Loads the content objects of `notifications` with one query per content
+    type and caches each on its notification; objects that no longer exist
+    are cached as None. Returns the notifications as a list.
+    """
+    notifications = list(notifications)
+    field = Notification._meta.get_field('content_object')
+
+    object_ids = defaultdict(set)
+    for notification in notifications:
+        if notification.content_type_id is not None and notification.object_id is not None:
+            object_ids[notification.content_type_id].add(notification.object_id)
+
+    objects = {}
+    for content_type_id, ids in object_ids.items():
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        model = content_type.model_class()
+        if model is None:
+            continue
+        related, _ = CONTENT_SUMMARIES.get((content_type.app_label, content_type.model), ((), None))
+        queryset = model._base_manager.filter(pk__in=ids)
+        if related:
+            queryset = queryset.select_related(*related)
+        for obj in queryset:
+            objects[content_type_id, obj.pk] = obj
+
+    for notification in notifications:
+        if notification.content_type_id is not None:
+            field.set_cached_value(
+                notification, objects.get((notification.content_type_id, notification.object_id))
+            )
+    return notifications
+
+
+def summarize_content_object(notification: Notification) -> Optional[dict]:
+    """
+    A compact summary of the notification's content object, or None when it
+    has none or it was deleted. Models without a summary get their id only.
+    """
+    content_type = get_content_type(notification)
+    if content_type is None:
+        return None
+    obj = notification.content_object
+    if obj is None:
+        return None
+    _, summarize = CONTENT_SUMMARIES.get((content_type.app_label, content_type.model), ((), None))
+    return summarize(obj) if summarize else {'id': obj.pk}
@@ -0,0 +1,406 @@
+"""
+Notification delivery outbox and per-channel worker pools
+
+create_notification() commits the notification together with one
+NotificationDelivery row per requested channel; nothing is sent inside the
+request. Delivery workers (`manage.py run_notification_workers`) drain the
+outbox per channel:
+
+- a claim loop per channel picks due deliveries (SELECT ... FOR UPDATE SKIP
+  LOCKED where the database supports it) and leases them by marking them
+  in_progress; leases older than LEASE_SECONDS are reclaimed after a crash
+- a thread pool per channel sends the claimed deliveries, so a slow SMTP
+  server never holds up SMS or push; email threads send whole chunks over
+  one SMTP connection (see email_dispatch.py)
+- failures are retried with exponential backoff and jitter; after
+  MAX_ATTEMPTS the delivery is dead-lettered (status 'dead') and can be
+  requeued with `run_notification_workers --requeue-dead`
+- every pool keeps throughput, retry and latency metrics
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationDelivery
+
+logger = logging.getLogger(__name__)
+
+CHANNELS = ('email', 'sms', 'push')
+CHANNEL_FLAGS = {
+    'email': 'sent_via_email',
+    'sms': 'sent_via_sms',
+    'push': 'sent_via_push',
+}
+
+DEFAULT_OPTIONS = {
+    'EAGER': False,
+    'WORKERS': {'email': 4, 'sms': 2, 'push': 4},
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 30,
+    'BACKOFF_MAX': 60 * 60,
+    'LEASE_SECONDS': 5 * 60,
+    'POLL_INTERVAL': 1.0,
+    'EMAIL_MESSAGES_PER_CONNECTION': 100,
+}
+
+
+class PermanentDeliveryError(Exception):
+    """Raised by a channel sender when retrying cannot succeed (e.g. no email address)."""
+
+
+def get_delivery_options() -> Dict:
+    """NOTIFICATION_DELIVERY merged over the defaults."""
+    options = dict(DEFAULT_OPTIONS)
+    options.update(getattr(settings, 'NOTIFICATION_DELIVERY', {}))
+    return options
+
+
+def get_channel_sender(channel):
+    from .services import NotificationService
+
+    return {
+        'email': NotificationService.send_email_notification,
+        'sms': NotificationService.send_sms_notification,
+        'push': NotificationService.send_push_notification,
+    }[channel]
+
+
+def enqueue_deliveries(notifications: Iterable[Notification], channels: Iterable[str],
+                       delays: Optional[Dict[str, timedelta]] = None) -> List[NotificationDelivery]:
+    """
+    Creates the outbox rows for delivering notifications over channels.
+
+    Call inside the transaction that creates the notifications so both are
+    committed together. `delays` holds back channels (email digests, see
+    coalescing.py). With EAGER delivery the rows that are due are sent
+    in-process once that transaction commits.
+    """
+    now = timezone.now()
+    delays = delays or {}
+    deliveries = NotificationDelivery.objects.bulk_create([
+        NotificationDelivery(notification=notification, channel=channel,
+                             next_attempt_at=now + delays.get(channel, timedelta()))
+        for notification in notifications
+        for channel in channels
+    ])
+    if deliveries and get_delivery_options()['EAGER']:
+        delivery_ids = [delivery.id for delivery in deliveries if delivery.channel not in delays]
+        transaction.on_commit(lambda: deliver_pending(delivery_ids))
+    return deliveries
+
+
+class DeliveryMetrics:
+    """
+    Thread-safe delivery counters for one channel.
+
+    Latency is the time spent in the channel sender; lag is the time from
+    the notification being queued to it being sent.
+    """
+
+    def __init__(self, channel: str, window: int = 10000):
+        self.channel = channel
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._counts = {'claimed': 0, 'sent': 0, 'retried': 0, 'dead': 0}
+        self._latencies = deque(maxlen=window)
+        self._lags = deque(maxlen=window)
+
+    def record_claimed(self, count: int):
+        with self._lock:
+            self._counts['claimed'] += count
+
+    def record_sent(self, latency: float, lag: float):
+        with self._lock:
+            self._counts['sent'] += 1
+            self._latencies.append(latency)
+            self._lags.append(lag)
+
+    def record_failure(self, dead: bool):
+        with self._lock:
+            self._counts['dead' if dead else 'retried'] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = sorted(self._latencies)
+            lags = sorted(self._lags)
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'channel': self.channel,
+            **counts,
+            'elapsed_seconds': round(elapsed, 2),
+            'throughput_per_second': round(counts['sent'] / elapsed, 2) if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': _percentile_ms(latencies, 50),
+                'p95': _percentile_ms(latencies, 95),
+                'p99': _percentile_ms(latencies, 99),
+            },
+            'lag_seconds_p95': round(lags[int(0.95 * (len(lags) - 1))], 2) if lags else 0.0,
+        }
+
+
+def _percentile_ms(sorted_values: List[float], percent: int) -> float:
+    if not sorted_values:
+        return 0.0
+    return round(sorted_values[int(percent / 100 * (len(sorted_values) - 1))] * 1000, 2)
+
+
+def backoff_seconds(attempts: int, options: Dict) -> float:
+    """Exponential backoff for the given attempt count, with jitter in [delay/2, delay]."""
+    delay = min(options['BACKOFF_MAX'], options['BACKOFF_BASE'] * (2 ** max(0, attempts - 1)))
+    return random.uniform(delay / 2, delay)
+
+
+def claim_deliveries(channel: str, limit: int, options: Optional[Dict] = None,
+                     delivery_ids: Optional[List[int]] = None) -> List[NotificationDelivery]:
+    """
+    Leases up to `limit` due deliveries of a channel by marking them in_progress.
+
+    Concurrent claimers never get the same row: on PostgreSQL the candidates
+    are locked with SKIP LOCKED, and the status update only applies to rows
+    that are still claimable.
+    """
+    options = options or get_delivery_options()
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=options['LEASE_SECONDS'])
+    claimable = (
+        Q(status='pending', next_attempt_at__lte=now)
+        | Q(status='in_progress', locked_at__lt=stale_before)
+    )
+
+    with transaction.atomic():
+        candidates = NotificationDelivery.objects.filter(claimable, channel=channel)
+        if delivery_ids is not None:
+            candidates = candidates.filter(id__in=delivery_ids)
+        ids = list(
+            candidates.order_by('next_attempt_at')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        NotificationDelivery.objects.filter(claimable, id__in=ids).update(
+            status='in_progress', locked_at=now
+        )
+
+    return list(
+        NotificationDelivery.objects.filter(id__in=ids, status='in_progress', locked_at=now)
+        .select_related('notification__recipient')
+    )
+
+
+def record_delivery_success(delivery: NotificationDelivery, latency: float,
+                            metrics: Optional[DeliveryMetrics] = None):
+    now = timezone.now()
+    NotificationDelivery.objects.filter(pk=delivery.pk).update(
+        status='sent', sent_at=now, attempts=F('attempts') + 1, locked_at=None, last_error=''
+    )
+    Notification.objects.filter(pk=delivery.notification_id).update(**{CHANNEL_FLAGS[delivery.channel]: True})
+    if metrics:
+        metrics.record_sent(latency, (now - delivery.created_at).total_seconds())
+
+
+def record_deliveries_skipped(deliveries: List[NotificationDelivery]):
+    NotificationDelivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries]).update(
+        status='skipped', locked_at=None
+    )
+
+
+def record_delivery_failure(delivery: NotificationDelivery, error: Exception, options: Dict,
+                            metrics: Optional[DeliveryMetrics] = None):
+    """Schedules a retry with backoff, or dead-letters the delivery when out of attempts."""
+    attempts = delivery.attempts + 1
+    dead = attempts >= options['MAX_ATTEMPTS'] or isinstance(error, PermanentDeliveryError)
+    update = {'attempts': attempts, 'last_error': str(error)[:1000], 'locked_at': None}
+    if dead:
+        update['status'] = 'dead'
+        logger.error(
+            f"Notification {delivery.notification_id} {delivery.channel} delivery dead-lettered "
+            f"after {attempts} attempts: {str(error)}"
+        )
+    else:
+        update['status'] = 'pending'
+        update['next_attempt_at'] = timezone.now() + timedelta(seconds=backoff_seconds(attempts, options))
+        logger.warning(
+            f"Notification {delivery.notification_id} {delivery.channel} delivery failed "
+            f"(attempt {attempts}), retrying: {str(error)}"
+        )
+    NotificationDelivery.objects.filter(pk=delivery.pk).update(**update)
+    if metrics:
+        metrics.record_failure(dead)
+
+
+def deliver(delivery: NotificationDelivery, options: Optional[Dict] = None,
+            metrics: Optional[DeliveryMetrics] = None) -> bool:
+    """
+    Sends one claimed delivery and records the outcome. Returns True when sent.
+    """
+    options = options or get_delivery_options()
+    started_at = time.monotonic()
+    try:
+        get_channel_sender(delivery.channel)(delivery.notification)
+    except Exception as e:
+        record_delivery_failure(delivery, e, options, metrics)
+        return False
+    record_delivery_success(delivery, time.monotonic() - started_at, metrics)
+    return True
+
+
+def deliver_email_batch(deliveries: List[NotificationDelivery], options: Optional[Dict] = None,
+                        metrics: Optional[DeliveryMetrics] = None) -> int:
+    """
+    Sends claimed email deliveries over shared SMTP connections and records
+    each outcome. Returns the number sent.
+    """
+    from .coalescing import digest_delay
+    from .email_dispatch import EmailBatchDispatcher
+
+    options = options or get_delivery_options()
+    # A digest whose notification was read while it was held back is not sent
+    skipped = [
+        delivery for delivery in deliveries
+        if delivery.notification.is_read and digest_delay(delivery.notification.notification_type)
+    ]
+    if skipped:
+        record_deliveries_skipped(skipped)
+        skipped_ids = {delivery.pk for delivery in skipped}
+        deliveries = [delivery for delivery in deliveries if delivery.pk not in skipped_ids]
+        if not deliveries:
+            return 0
+
+    dispatcher = EmailBatchDispatcher(options['EMAIL_MESSAGES_PER_CONNECTION'])
+    started_at = time.monotonic()
+    errors = dispatcher.send([delivery.notification for delivery in deliveries])
+    # Per-message latency is the batch time amortised over its messages
+    latency = (time.monotonic() - started_at) / max(1, len(deliveries))
+
+    sent = 0
+    for delivery, error in zip(deliveries, errors):
+        if error is None:
+            record_delivery_success(delivery, latency, metrics)
+            sent += 1
+        else:
+            record_delivery_failure(delivery, error, options, metrics)
+    return sent
+
+
+def deliver_pending(delivery_ids: List[int]) -> int:
+    """Delivers the given deliveries in the calling thread (EAGER mode). Returns the number sent."""
+    options = get_delivery_options()
+    sent = 0
+    for channel in CHANNELS:
+        deliveries = claim_deliveries(channel, len(delivery_ids), options, delivery_ids=delivery_ids)
+        if channel == 'email' and deliveries:
+            sent += deliver_email_batch(deliveries, options)
+        else:
+            sent += sum(deliver(delivery, options) for delivery in deliveries)
+    return sent
+
+
+class ChannelWorkerPool:
+    """
+    Drains the outbox of one channel with a pool of sender threads.
+
+    Email deliveries are split into chunks of EMAIL_MESSAGES_PER_CONNECTION
+    and each thread sends a chunk over one SMTP connection; other channels
+    are sent one delivery per task. With workers=0 everything is sent in the
+    claiming thread, which is what tests and one-off drains use.
+    """
+
+    def __init__(self, channel: str, workers: int = 4, batch_size: Optional[int] = None,
+                 options: Optional[Dict] = None):
+        self.channel = channel
+        self.options = options or get_delivery_options()
+        self.batch_size = batch_size or self.options['BATCH_SIZE']
+        self.metrics = DeliveryMetrics(channel)
+        self.executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"notify-{channel}")
+            if workers > 0 else None
+        )
+
+    def run_once(self) -> int:
+        """Claims and sends one batch. Returns the number of deliveries processed."""
+        deliveries = claim_deliveries(self.channel, self.batch_size, self.options)
+        if not deliveries:
+            return 0
+        self.metrics.record_claimed(len(deliveries))
+        if self.channel == 'email':
+            size = self.options['EMAIL_MESSAGES_PER_CONNECTION']
+            tasks = [deliveries[start:start + size] for start in range(0, len(deliveries), size)]
+        else:
+            tasks = [[delivery] for delivery in deliveries]
+
+        if self.executor is None:
+            for task in tasks:
+                self._send(task)
+        else:
+            list(self.executor.map(self._send_in_thread, tasks))
+        return len(deliveries)
+
+    def drain(self) -> int:
+        """Processes batches until nothing is due. Returns the number processed."""
+        total = 0
+        while True:
+            processed = self.run_once()
+            if not processed:
+                return total
+            total += processed
+
+    def run_forever(self, stop_event: threading.Event):
+        poll_interval = self.options['POLL_INTERVAL']
+        while not stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Notification {self.channel} worker loop failed: {str(e)}")
+                close_old_connections()
+                processed = 0
+            if not processed:
+                stop_event.wait(poll_interval)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def _send(self, deliveries):
+        if self.channel == 'email':
+            return deliver_email_batch(deliveries, self.options, self.metrics)
+        return sum(deliver(delivery, self.options, self.metrics) for delivery in deliveries)
+
+    def _send_in_thread(self, deliveries):
+        close_old_connections()
+        try:
+            return self._send(deliveries)
+        except Exception as e:
+            # Bookkeeping failed (e.g. lost DB connection); the leases expire
+            # and the deliveries are picked up again
+            logger.error(f"Notification {self.channel} deliveries could not be recorded: {str(e)}")
+            return 0
+
+
+def requeue_dead_deliveries(channel: Optional[str] = None) -> int:
+    """Moves dead-lettered deliveries back to pending with a fresh attempt budget."""
+    dead = NotificationDelivery.objects.filter(status='dead')
+    if channel:
+        dead = dead.filter(channel=channel)
+    return dead.update(status='pending', attempts=0, next_attempt_at=timezone.now(), locked_at=None)
+
+
+def outbox_backlog() -> Dict[str, Dict[str, int]]:
+    """Delivery counts per channel and status, e.g. {'email': {'pending': 3, 'dead': 1}}."""
+    backlog = {channel: {} for channel in CHANNELS}
+    rows = NotificationDelivery.objects.values('channel', 'status').annotate(count=Count('id'))
+    for row in rows:
+        backlog.setdefault(row['channel'], {})[row['status']] = row['count']
+    return backlog
@@ -0,0 +1,103 @@
+"""
+Batched email sending over reused SMTP connections
+
+send_mail() opens a new SMTP connection (and TLS handshake) per message.
+EmailBatchDispatcher sends a batch of notification emails over one
+connection, opening a new connection every `max_messages_per_connection`
+messages so a long batch does not hit server-side per-session limits.
+A message that fails is reported on its own; the rest of the batch is still
+sent, over a fresh connection if the server dropped the old one.
+"""
+import logging
+import smtplib
+from typing import Callable, List, Optional, Sequence
+
+from django.core.mail import get_connection
+
+from .rendering import NotificationEmailRenderer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MESSAGES_PER_CONNECTION = 100
+
+# Errors after which the connection cannot be used for the next message
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class EmailBatchDispatcher:
+    """
+    Sends notification emails in batches.
+
+    Args:
+        max_messages_per_connection: Messages sent before the connection is recycled
+        connection_factory: Returns an unopened email backend connection
+            (django.core.mail.get_connection by default)
+    """
+
+    def __init__(self, max_messages_per_connection: int = DEFAULT_MESSAGES_PER_CONNECTION,
+                 connection_factory: Optional[Callable] = None,
+                 renderer: Optional[NotificationEmailRenderer] = None):
+        self.max_messages_per_connection = max(1, max_messages_per_connection)
+        self.connection_factory = connection_factory or (lambda: get_connection(fail_silently=False))
+        self.renderer = renderer or NotificationEmailRenderer()
+        self.connections_opened = 0
+
+    def send(self, notifications: Sequence) -> List[Optional[Exception]]:
+        """
+        Sends one email per notification.
+
+        Returns:
+            One entry per notification, in order: None when sent, otherwise
+            the exception that prevented sending
+        """
+        try:
+            # The whole batch is rendered up front so shared content is rendered once
+            rendered = self.renderer.render_batch(notifications)
+        except Exception as e:
+            logger.error(f"Failed to render email batch: {str(e)}")
+            return [e] * len(notifications)
+
+        results = [None] * len(notifications)
+        size = self.max_messages_per_connection
+        for start in range(0, len(notifications), size):
+            self._send_chunk(notifications, rendered, range(start, min(start + size, len(notifications))), results)
+        return results
+
+    def _send_chunk(self, notifications, rendered, indexes, results):
+        from .services import NotificationService
+
+        connection = None
+        try:
+            for index in indexes:
+                try:
+                    if connection is None:
+                        connection = self._open()
+                    message = NotificationService.build_email_message(
+                        notifications[index], connection=connection, rendered=rendered[index]
+                    )
+                    if not connection.send_messages([message]):
+                        raise smtplib.SMTPException('Email backend did not send the message')
+                except CONNECTION_ERRORS as e:
+                    results[index] = e
+                    logger.warning(f"SMTP connection lost, reconnecting for the rest of the batch: {str(e)}")
+                    self._close(connection)
+                    connection = None
+                except Exception as e:
+                    results[index] = e
+        finally:
+            self._close(connection)
+
+    def _open(self):
+        connection = self.connection_factory()
+        connection.open()
+        self.connections_opened += 1
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        if connection is None:
+            return
+        try:
+            connection.close()
+        except Exception:
+            pass
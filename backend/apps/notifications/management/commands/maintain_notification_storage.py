@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.partitioning import get_storage_options, maintain_partitions, prune_read_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates upcoming monthly partitions of the notification and message tables, archives or drops '
+        'expired ones and prunes old read notifications. Run daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, help='Partitions to keep ready (default: PARTITION_MONTHS_AHEAD)')
+        parser.add_argument('--read-older-than-days', type=int,
+                            help='Prune read notifications older than this (default: READ_NOTIFICATION_DAYS)')
+        parser.add_argument('--batch-size', type=int, help='Notifications deleted per transaction')
+        parser.add_argument('--max-batches', type=int, help='Stop pruning after this many batches')
+        parser.add_argument('--skip-partitions', action='store_true')
+        parser.add_argument('--skip-prune', action='store_true')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without changing it')
+
+    def handle(self, *args, **options):
+        storage = get_storage_options()
+        if options['months_ahead'] is not None:
+            storage['PARTITION_MONTHS_AHEAD'] = options['months_ahead']
+
+        report = {}
+        if not options['skip_partitions']:
+            report['partitions'] = maintain_partitions(storage, dry_run=options['dry_run'])
+        if not options['skip_prune']:
+            report['read_notifications_pruned'] = prune_read_notifications(
+                older_than_days=options['read_older_than_days'] or storage['READ_NOTIFICATION_DAYS'],
+                batch_size=options['batch_size'] or storage['PRUNE_BATCH_SIZE'],
+                pause=storage['PRUNE_PAUSE'],
+                max_batches=options['max_batches'],
+                dry_run=options['dry_run'],
+            )
+        self.stdout.write(json.dumps(report, indent=2))
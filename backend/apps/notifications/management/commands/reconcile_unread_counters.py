@@ -0,0 +1,29 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.unread_counters import DEFAULT_RECONCILE_BATCH_SIZE, get_unread_counters
+
+
+class Command(BaseCommand):
+    help = 'Corrects cached unread notification and message counters that drifted from the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_RECONCILE_BATCH_SIZE)
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running and reconcile every INTERVAL seconds (default: reconcile once and exit)',
+        )
+
+    def handle(self, *args, **options):
+        counters = get_unread_counters()
+        while True:
+            started_at = time.monotonic()
+            report = counters.reconcile(batch_size=options['batch_size'])
+            report['elapsed_seconds'] = round(time.monotonic() - started_at, 2)
+            self.stdout.write(json.dumps(report))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,27 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.moderation_queue import rescan_messages
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-checks messages moderated under an older version of the moderation rules. '
+        'Run after changing the rules; does nothing when every verdict is current.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Messages per batch (default: RESCAN_BATCH_SIZE)')
+        parser.add_argument('--workers', type=int, help='Batches checked in parallel (default: RESCAN_WORKERS)')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true', help='Report the verdicts that would change')
+
+    def handle(self, *args, **options):
+        report = rescan_messages(
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            max_batches=options['max_batches'],
+            dry_run=options['dry_run'],
+        )
+        self.stdout.write(json.dumps(report, indent=2))
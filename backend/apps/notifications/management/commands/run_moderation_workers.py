@@ -0,0 +1,52 @@
+import json
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.moderation_queue import ModerationWorkerPool, get_moderation_options, moderation_backlog
+
+
+class Command(BaseCommand):
+    help = 'Runs the workers that moderate newly sent messages and notify recipients of approved ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Moderation threads (default: WORKERS)')
+        parser.add_argument('--batch-size', type=int, help='Messages claimed per poll')
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Moderate everything that is currently queued, print the verdict counts and exit',
+        )
+
+    def handle(self, *args, **options):
+        moderation_options = get_moderation_options()
+        workers = moderation_options['WORKERS'] if options['workers'] is None else options['workers']
+        pool = ModerationWorkerPool(workers=workers, batch_size=options['batch_size'], options=moderation_options)
+
+        try:
+            if options['once']:
+                pool.drain()
+            else:
+                self._run(pool)
+        finally:
+            pool.shutdown()
+
+        self.stdout.write(json.dumps({
+            'version': pool.engine.version,
+            'verdicts': pool.counts,
+            'backlog': moderation_backlog(),
+        }))
+
+    def _run(self, pool):
+        stop_event = threading.Event()
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping moderation workers...')
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write(f"Moderation workers started with rules {pool.engine.version}")
+        pool.run_forever(stop_event)
@@ -0,0 +1,129 @@
+import json
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.notifications.broadcast import run_broadcasts_forever, run_pending_broadcasts
+from apps.notifications.delivery import (
+    CHANNELS,
+    ChannelWorkerPool,
+    get_delivery_options,
+    outbox_backlog,
+    requeue_dead_deliveries,
+)
+
+
+class Command(BaseCommand):
+    help = ('Runs the per-channel notification delivery workers that drain the notification outbox, '
+            'and the broadcast worker that fans out queued broadcasts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--channels',
+            default=','.join(CHANNELS),
+            help=f"Comma-separated channels to serve (default {','.join(CHANNELS)})",
+        )
+        parser.add_argument(
+            '--workers',
+            action='append',
+            default=[],
+            metavar='CHANNEL=N',
+            help='Override the thread count of a channel, e.g. --workers email=8 (repeatable)',
+        )
+        parser.add_argument('--batch-size', type=int, help='Deliveries claimed per poll')
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run queued broadcasts, drain everything that is currently due, print the metrics and exit',
+        )
+        parser.add_argument(
+            '--metrics-interval',
+            type=float,
+            default=60.0,
+            help='Seconds between metric reports while running (default 60)',
+        )
+        parser.add_argument(
+            '--requeue-dead',
+            action='store_true',
+            help='Move dead-lettered deliveries of the selected channels back to pending and exit',
+        )
+
+    def handle(self, *args, **options):
+        channels = [channel.strip() for channel in options['channels'].split(',') if channel.strip()]
+        unknown = [channel for channel in channels if channel not in CHANNELS]
+        if unknown:
+            raise CommandError(f"Unknown channels: {', '.join(unknown)}")
+
+        if options['requeue_dead']:
+            requeued = sum(requeue_dead_deliveries(channel) for channel in channels)
+            self.stdout.write(self.style.SUCCESS(f"Requeued {requeued} dead-lettered deliveries."))
+            return
+
+        delivery_options = get_delivery_options()
+        workers = dict(delivery_options['WORKERS'])
+        for override in options['workers']:
+            channel, _, count = override.partition('=')
+            if channel not in CHANNELS or not count.isdigit():
+                raise CommandError(f"Invalid --workers value: {override}")
+            workers[channel] = int(count)
+
+        pools = [
+            ChannelWorkerPool(
+                channel,
+                workers=workers.get(channel, 1),
+                batch_size=options['batch_size'],
+                options=delivery_options,
+            )
+            for channel in channels
+        ]
+
+        try:
+            if options['once']:
+                run_pending_broadcasts(options=delivery_options)
+                for pool in pools:
+                    pool.drain()
+            else:
+                self._run(pools, options['metrics_interval'], delivery_options)
+        finally:
+            for pool in pools:
+                pool.shutdown()
+
+        self._report(pools)
+
+    def _run(self, pools, metrics_interval, delivery_options):
+        stop_event = threading.Event()
+
+        def stop(signum, frame):
+            self.stdout.write('Stopping notification workers...')
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        threads = [
+            threading.Thread(target=pool.run_forever, args=(stop_event,), name=f"notify-{pool.channel}-claimer")
+            for pool in pools
+        ]
+        threads.append(threading.Thread(
+            target=run_broadcasts_forever, args=(stop_event,), kwargs={'options': delivery_options},
+            name='notify-broadcasts',
+        ))
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Notification workers started for: {', '.join(pool.channel for pool in pools)}")
+
+        next_report = time.monotonic() + metrics_interval
+        while not stop_event.wait(1.0):
+            if time.monotonic() >= next_report:
+                self._report(pools)
+                next_report = time.monotonic() + metrics_interval
+
+        for thread in threads:
+            thread.join()
+
+    def _report(self, pools):
+        for pool in pools:
+            self.stdout.write(json.dumps(pool.metrics.snapshot()))
+        self.stdout.write(json.dumps({'backlog': outbox_backlog()}))
@@ -0,0 +1,87 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.notifications.broadcast import (
+    DEFAULT_CHUNK_SIZE,
+    RECIPIENT_FILTERS,
+    BroadcastError,
+    broadcast_progress,
+    create_broadcast,
+    run_broadcast,
+    run_pending_broadcasts,
+)
+from apps.notifications.delivery import CHANNELS
+from apps.notifications.models import NotificationBroadcast
+
+
+class Command(BaseCommand):
+    help = ('Sends a notification to every user matching a filter, resumes an interrupted broadcast, '
+            'or runs the queued broadcasts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title', help='Notification title')
+        parser.add_argument('--message', help='Notification message')
+        parser.add_argument(
+            '--channels',
+            default=','.join(CHANNELS),
+            help=f"Comma-separated delivery channels (default {','.join(CHANNELS)}, '' for in-app only)",
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='KEY=VALUE',
+            help=f"Recipient filter, repeatable; keys: {', '.join(RECIPIENT_FILTERS)}",
+        )
+        parser.add_argument('--recipient-ids', help='Comma-separated user ids to notify')
+        parser.add_argument('--resume', type=int, metavar='BROADCAST_ID', help='Resume a pending or failed broadcast')
+        parser.add_argument('--pending', action='store_true', help='Run every queued broadcast and exit')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            count = run_pending_broadcasts(chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} queued broadcasts."))
+            return
+        if options['resume']:
+            try:
+                broadcast = NotificationBroadcast.objects.get(id=options['resume'])
+            except NotificationBroadcast.DoesNotExist:
+                raise CommandError(f"Broadcast {options['resume']} does not exist")
+            if broadcast.status == 'completed':
+                raise CommandError(f"Broadcast {broadcast.id} has already completed")
+        else:
+            broadcast = self._create(options)
+
+        broadcast = run_broadcast(broadcast, chunk_size=options['chunk_size'])
+        self.stdout.write(json.dumps(broadcast_progress(broadcast), default=str))
+
+    def _create(self, options):
+        if not options['title'] or not options['message']:
+            raise CommandError('--title and --message are required')
+
+        recipient_filter = {}
+        for item in options['filter']:
+            key, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid --filter {item!r}, expected KEY=VALUE")
+            recipient_filter[key] = {'true': True, 'false': False}.get(value.lower(), value)
+
+        recipient_ids = None
+        if options['recipient_ids']:
+            try:
+                recipient_ids = [int(rid) for rid in options['recipient_ids'].split(',') if rid.strip()]
+            except ValueError:
+                raise CommandError('--recipient-ids must be comma-separated integers')
+
+        try:
+            return create_broadcast(
+                title=options['title'],
+                message=options['message'],
+                channels=[channel for channel in options['channels'].split(',') if channel],
+                recipient_ids=recipient_ids,
+                recipient_filter=recipient_filter,
+            )
+        except BroadcastError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notifications.broadcast import send_broadcast
+from users.models import User
+
+LOAD_TEST_USERNAME_PREFIX = 'ws-loadtest-'
+
+
+def percentile_ms(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[int(percent / 100 * (len(values) - 1))] * 1000, 2)
+
+
+class Command(BaseCommand):
+    help = (
+        'Opens many notification WebSockets against a running server, broadcasts notifications to them '
+        'and reports connection counts and fan-out latency. The server and this command must share the '
+        'Redis channel layer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='ws://localhost:8000/ws/notifications/')
+        parser.add_argument('--origin', default='http://localhost:8000')
+        parser.add_argument('--sockets', type=int, default=1000)
+        parser.add_argument('--rounds', type=int, default=5, help='Broadcasts sent to all sockets')
+        parser.add_argument('--connect-concurrency', type=int, default=200)
+        parser.add_argument('--timeout', type=float, default=30.0, help='Seconds to wait for each round')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the load-test users and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            deleted, _ = User.all_objects.filter(username__startswith=LOAD_TEST_USERNAME_PREFIX).delete()
+            self.stdout.write(f"Deleted {deleted} load-test objects")
+            return
+
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            raise CommandError('aiohttp is required for the WebSocket load test')
+
+        users = self._load_test_users(options['sockets'])
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+        report = asyncio.run(self._run(tokens, [user.id for user in users], options))
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def _load_test_users(self, count):
+        existing = {
+            user.username: user
+            for user in User.objects.filter(username__startswith=LOAD_TEST_USERNAME_PREFIX)
+        }
+        usernames = [f"{LOAD_TEST_USERNAME_PREFIX}{index}" for index in range(count)]
+        User.objects.bulk_create([
+            User(username=username, user_type='worker') for username in usernames if username not in existing
+        ])
+        return list(User.objects.filter(username__in=usernames).order_by('id'))
+
+    async def _run(self, tokens, user_ids, options):
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=0)
+        semaphore = asyncio.Semaphore(options['connect_concurrency'])
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def open_socket(token):
+                async with semaphore:
+                    started_at = time.monotonic()
+                    try:
+                        socket = await session.ws_connect(
+                            f"{options['url']}?token={token}", origin=options['origin'], heartbeat=30
+                        )
+                        await socket.receive_json(timeout=options['timeout'])  # initial unread count
+                    except Exception as e:
+                        return None, str(e)
+                    return socket, time.monotonic() - started_at
+
+            results = await asyncio.gather(*(open_socket(token) for token in tokens))
+            sockets = [socket for socket, _ in results if socket is not None]
+            connect_times = [elapsed for socket, elapsed in results if socket is not None]
+            errors = sorted({elapsed for socket, elapsed in results if socket is None})
+
+            latencies, missed = [], 0
+            for round_number in range(options['rounds']):
+                published_at = time.monotonic()
+                receivers = [
+                    asyncio.ensure_future(self._wait_for_notification(socket, options['timeout']))
+                    for socket in sockets
+                ]
+                await sync_to_async(send_broadcast)(
+                    title=f"Load test {round_number}", message='WebSocket fan-out load test',
+                    channels=[], recipient_ids=user_ids,
+                )
+                for received_at in await asyncio.gather(*receivers):
+                    if received_at is None:
+                        missed += 1
+                    else:
+                        latencies.append(received_at - published_at)
+
+            for socket in sockets:
+                await socket.close()
+
+        return {
+            'sockets_requested': len(tokens),
+            'sockets_connected': len(sockets),
+            'connect_errors': errors[:10],
+            'connect_ms': {'p50': percentile_ms(connect_times, 50), 'p95': percentile_ms(connect_times, 95)},
+            'rounds': options['rounds'],
+            'notifications_received': len(latencies),
+            'notifications_missed': missed,
+            # Measured from the start of each broadcast, so it includes creating the notifications
+            'fan_out_latency_ms': {
+                'p50': percentile_ms(latencies, 50),
+                'p95': percentile_ms(latencies, 95),
+                'p99': percentile_ms(latencies, 99),
+            },
+        }
+
+    @staticmethod
+    async def _wait_for_notification(socket, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                frame = await socket.receive_json(timeout=remaining)
+            except Exception:
+                return None
+            if frame.get('type') == 'notification':
+                return time.monotonic()
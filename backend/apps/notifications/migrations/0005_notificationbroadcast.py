@@ -0,0 +1,98 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notifications", "0004_notificationdelivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationBroadcast",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "notification_type",
+                    models.CharField(
+                        choices=[
+                            ("job_interest", "Job Interest"),
+                            ("job_application", "Job Application"),
+                            ("shortlist", "Shortlisted for Job"),
+                            ("profile_approval", "Profile Approval"),
+                            ("profile_rejection", "Profile Rejection"),
+                            ("profile_update_required", "Profile Update Required"),
+                            ("message_received", "New Message"),
+                            ("job_status_change", "Job Status Change"),
+                            ("system_alert", "System Alert"),
+                        ],
+                        default="system_alert",
+                        max_length=50,
+                    ),
+                ),
+                ("title", models.CharField(max_length=200)),
+                ("message", models.TextField()),
+                ("channels", models.JSONField(blank=True, default=list)),
+                ("recipient_ids", models.JSONField(blank=True, null=True)),
+                ("recipient_filter", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("total_recipients", models.PositiveIntegerField(default=0)),
+                ("notifications_created", models.PositiveIntegerField(default=0)),
+                ("deliveries_enqueued", models.PositiveIntegerField(default=0)),
+                ("last_recipient_id", models.PositiveIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "sender",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="notification_broadcasts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="broadcast",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="notifications",
+                to="notifications.notificationbroadcast",
+            ),
+        ),
+    ]
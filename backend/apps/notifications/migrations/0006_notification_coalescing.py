@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0005_notificationbroadcast"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="group_count",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="group_key",
+            field=models.CharField(blank=True, default="", max_length=100),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name="notificationdelivery",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("in_progress", "In Progress"),
+                    ("sent", "Sent"),
+                    ("skipped", "Skipped"),
+                    ("dead", "Dead Letter"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["recipient", "notification_type", "group_key", "is_read"],
+                name="notificatio_recipie_db226a_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:19
+
+from datetime import date
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+PARTITIONED_TABLES = ("notifications_notification", "notifications_message")
+PARTITIONS_AHEAD = 3
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_table(cursor, quote, table, cutover):
+    """
+    Turns `table` into a table range-partitioned by created_at without copying
+    rows: the existing table is attached as the partition `<table>_legacy`
+    holding everything before `cutover`, then monthly partitions are created.
+    """
+    legacy = f"{table}_legacy"
+
+    cursor.execute(
+        "SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'", [table]
+    )
+    is_identity = bool(cursor.fetchone()[0])
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {quote(table)}")
+    max_id = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [table]
+    )
+    primary_key = cursor.fetchone()[0]
+    cursor.execute(
+        """
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s
+        """,
+        [table, primary_key],
+    )
+    indexes = cursor.fetchall()
+
+    # Unique constraints (and so foreign keys) must include the partition key
+    cursor.execute(
+        "SELECT conrelid::regclass, conname FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    for referencing_table, constraint in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {referencing_table} DROP CONSTRAINT {quote(constraint)}")
+
+    cursor.execute(f"ALTER TABLE {quote(table)} RENAME TO {quote(legacy)}")
+    cursor.execute(f"ALTER TABLE {quote(legacy)} DROP CONSTRAINT {quote(primary_key)}")
+    cursor.execute(f"ALTER TABLE {quote(legacy)} ADD CONSTRAINT {quote(legacy + '_pkey')} PRIMARY KEY (id, created_at)")
+    for name, _ in indexes:
+        cursor.execute(f"ALTER INDEX {quote(name)} RENAME TO {quote(name[:56] + '_legacy')}")
+
+    # Partitioned tables cannot have identity columns before PostgreSQL 17, so ids come from a plain sequence
+    if is_identity:
+        cursor.execute(f"ALTER TABLE {quote(legacy)} ALTER COLUMN id DROP IDENTITY")
+        sequence = f"{table}_id_seq"
+        cursor.execute(f"CREATE SEQUENCE {quote(sequence)}")
+        cursor.execute("SELECT setval(%s, %s, %s)", [sequence, max(max_id, 1), max_id > 0])
+    else:
+        cursor.execute(f"ALTER TABLE {quote(legacy)} ALTER COLUMN id DROP DEFAULT")
+
+    cursor.execute(f"CREATE TABLE {quote(table)} (LIKE {quote(legacy)} INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)")
+    cursor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval(%s::regclass)", [sequence])
+    # pg_get_serial_sequence() gives a schema-qualified name; quote its parts
+    cursor.execute(
+        "SELECT nspname, relname FROM pg_class JOIN pg_namespace ON pg_namespace.oid = pg_class.relnamespace "
+        "WHERE pg_class.oid = %s::regclass",
+        [sequence],
+    )
+    sequence_schema, sequence_name = cursor.fetchone()
+    cursor.execute(f"ALTER SEQUENCE {quote(sequence_schema)}.{quote(sequence_name)} OWNED BY {quote(table)}.id")
+    cursor.execute(f"ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(primary_key)} PRIMARY KEY (id, created_at)")
+    # Same names and definitions as before; the legacy indexes are attached to them, not rebuilt
+    for _, definition in indexes:
+        cursor.execute(definition)
+
+    # A validated CHECK lets ATTACH skip scanning the legacy rows under an exclusive lock
+    bound = f"{legacy}_bound"
+    cursor.execute(
+        f"ALTER TABLE {quote(legacy)} ADD CONSTRAINT {quote(bound)} CHECK (created_at < %s) NOT VALID",
+        [cutover.isoformat()],
+    )
+    cursor.execute(f"ALTER TABLE {quote(legacy)} VALIDATE CONSTRAINT {quote(bound)}")
+    cursor.execute(
+        f"ALTER TABLE {quote(table)} ATTACH PARTITION {quote(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)",
+        [cutover.isoformat()],
+    )
+    cursor.execute(f"ALTER TABLE {quote(legacy)} DROP CONSTRAINT {quote(bound)}")
+
+    start = cutover
+    for _ in range(PARTITIONS_AHEAD):
+        end = add_months(start, 1)
+        cursor.execute(
+            f"CREATE TABLE {quote(f'{table}_p{start:%Y%m}')} PARTITION OF {quote(table)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start.isoformat(), end.isoformat()],
+        )
+        start = end
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    cutover = add_months(timezone.now().date(), 1)
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            partition_table(cursor, quote, table, cutover)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0006_notification_coalescing"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notificationdelivery",
+            name="notification",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="deliveries",
+                to="notifications.notification",
+            ),
+        ),
+        migrations.RunPython(partition_tables, elidable=False),
+    ]
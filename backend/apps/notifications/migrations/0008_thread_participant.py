@@ -0,0 +1,145 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+import django.db.models.deletion
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_thread_state(apps, schema_editor):
+    ThreadParticipant = apps.get_model("notifications", "ThreadParticipant")
+    Message = apps.get_model("notifications", "Message")
+
+    last_id = 0
+    while True:
+        memberships = list(ThreadParticipant.objects.filter(id__gt=last_id).order_by("id")[:BACKFILL_BATCH_SIZE])
+        if not memberships:
+            break
+        last_id = memberships[-1].id
+
+        thread_ids = {membership.thread_id for membership in memberships}
+        last_message_ids = dict(
+            Message.objects.filter(thread_id__in=thread_ids)
+            .values("thread_id")
+            .annotate(last_id=Max("id"))
+            .values_list("thread_id", "last_id")
+        )
+        last_messages = Message.objects.in_bulk(last_message_ids.values())
+
+        for membership in memberships:
+            last_message = last_messages.get(last_message_ids.get(membership.thread_id))
+            membership.last_message = last_message
+            membership.last_message_at = last_message.created_at if last_message else None
+            thread_messages = Message.objects.filter(thread_id=membership.thread_id)
+            membership.unread_count = (
+                thread_messages.exclude(sender_id=membership.user_id).exclude(read_by=membership.user_id).count()
+            )
+            membership.last_read_message_id = (
+                thread_messages.filter(read_by=membership.user_id).aggregate(last_id=Max("id"))["last_id"]
+            )
+        ThreadParticipant.objects.bulk_update(
+            memberships, ["last_message", "last_message_at", "last_read_message", "unread_count"]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notifications", "0007_partition_notifications_and_messages"),
+    ]
+
+    operations = [
+        # The participants M2M table becomes the table of the explicit through model
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="ThreadParticipant",
+                    fields=[
+                        (
+                            "id",
+                            models.BigAutoField(
+                                auto_created=True,
+                                primary_key=True,
+                                serialize=False,
+                                verbose_name="ID",
+                            ),
+                        ),
+                        (
+                            "thread",
+                            models.ForeignKey(
+                                db_column="messagethread_id",
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="memberships",
+                                to="notifications.messagethread",
+                            ),
+                        ),
+                        (
+                            "user",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="thread_memberships",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={
+                        "db_table": "notifications_messagethread_participants",
+                        "unique_together": {("thread", "user")},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name="messagethread",
+                    name="participants",
+                    field=models.ManyToManyField(
+                        related_name="message_threads",
+                        through="notifications.ThreadParticipant",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            database_operations=[],
+        ),
+        migrations.AddField(
+            model_name="threadparticipant",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="notifications.message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="threadparticipant",
+            name="last_message_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="threadparticipant",
+            name="last_read_message",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="notifications.message",
+            ),
+        ),
+        migrations.AddField(
+            model_name="threadparticipant",
+            name="unread_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="threadparticipant",
+            index=models.Index(
+                fields=["user", "-last_message_at"], name="thread_participant_inbox_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_thread_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:23
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_last_read_at(apps, schema_editor):
+    # The read watermarks themselves were backfilled from read_by in 0008
+    ThreadParticipant = apps.get_model("notifications", "ThreadParticipant")
+    Message = apps.get_model("notifications", "Message")
+
+    ThreadParticipant.objects.filter(last_read_message__isnull=False).update(
+        last_read_at=Subquery(Message.objects.filter(id=OuterRef("last_read_message_id")).values("created_at")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0008_thread_participant"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="threadparticipant",
+            name="last_read_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_last_read_at, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="message",
+            name="read_by",
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0009_read_watermarks"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["thread", "created_at", "id"],
+                name="notificatio_thread__cf9902_idx",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="message",
+            name="notificatio_thread__6299ef_idx",
+        ),
+    ]
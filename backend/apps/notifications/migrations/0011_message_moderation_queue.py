@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0010_message_history_index"),
+    ]
+
+    operations = [
+        # Existing messages were moderated (if at all) by the rules before versioning, so a
+        # re-scan checks them all against the current rules
+        migrations.AddField(
+            model_name="message",
+            name="moderation_version",
+            field=models.CharField(blank=True, default="legacy", max_length=12),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="moderation_version",
+            field=models.CharField(blank=True, default="", max_length=12),
+        ),
+        migrations.CreateModel(
+            name="ModerationTask",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "message",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="moderation_task",
+                        to="notifications.message",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+    ]
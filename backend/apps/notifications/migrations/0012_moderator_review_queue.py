@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+SENSITIVITY_LEVELS = ("low", "medium", "high", "critical")
+
+
+def backfill_review_queue(apps, schema_editor):
+    Message = apps.get_model("notifications", "Message")
+    ModerationTask = apps.get_model("notifications", "ModerationTask")
+
+    # Messages still waiting for the moderation workers were stored as pending
+    Message.objects.filter(
+        id__in=ModerationTask.objects.values("message_id"), moderation_status="pending"
+    ).update(moderation_status="queued")
+    # Same ranks as Message.get_review_priority()
+    pending = Message.objects.filter(moderation_status="pending")
+    for rank, level in enumerate(SENSITIVITY_LEVELS):
+        pending.filter(sensitivity_level=level, is_urgent=False).update(review_priority=rank * 2)
+        pending.filter(sensitivity_level=level, is_urgent=True).update(review_priority=rank * 2 + 1)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notifications", "0011_message_moderation_queue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="review_priority",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="message",
+            name="moderation_status",
+            field=models.CharField(
+                choices=[
+                    ("queued", "Awaiting Automatic Moderation"),
+                    ("pending", "Pending Review"),
+                    ("approved", "Approved"),
+                    ("flagged", "Flagged for Review"),
+                    ("removed", "Removed by Moderator"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.RunPython(backfill_review_queue, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="message",
+            name="review_claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="review_claimed_by",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                condition=models.Q(("moderation_status", "pending")),
+                fields=["-review_priority", "created_at"],
+                name="message_review_queue_idx",
+            ),
+        ),
+    ]
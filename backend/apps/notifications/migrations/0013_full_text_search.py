@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:36
+
+from django.db import migrations
+
+# (table, column) pairs, as in notifications/search.py
+SEARCHABLE = (
+    ("notifications_message", "content"),
+    ("notifications_messagethread", "title"),
+)
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, column in SEARCHABLE:
+            if vendor == "postgresql":
+                # On the partitioned message table this creates the index on every partition
+                cursor.execute(
+                    f"CREATE INDEX {quote(table + '_search_idx')} ON {quote(table)} "
+                    f"USING GIN (to_tsvector('simple', {column}))"
+                )
+            elif vendor == "sqlite":
+                fts = f"{table}_fts"
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({column}, content='{table}', content_rowid='id')"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+                )
+                cursor.execute(
+                    f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {column} ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                    f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+                )
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        for table, _ in SEARCHABLE:
+            if vendor == "postgresql":
+                cursor.execute(f"DROP INDEX IF EXISTS {quote(table + '_search_idx')}")
+            elif vendor == "sqlite":
+                fts = f"{table}_fts"
+                for trigger in ("insert", "delete", "update"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {fts}_{trigger}")
+                cursor.execute(f"DROP TABLE IF EXISTS {fts}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0012_moderator_review_queue"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:38
+
+import hashlib
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def participant_key(user_ids, job_reference_id):
+    # Same as MessageThread.get_participant_key()
+    canonical = f"{job_reference_id or ''}:{','.join(str(user_id) for user_id in sorted(set(user_ids)))}"
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def backfill_participant_keys(apps, schema_editor):
+    MessageThread = apps.get_model("notifications", "MessageThread")
+    ThreadParticipant = apps.get_model("notifications", "ThreadParticipant")
+
+    last_id = 0
+    while True:
+        threads = list(MessageThread.objects.filter(id__gt=last_id).order_by("id")[:BACKFILL_BATCH_SIZE])
+        if not threads:
+            break
+        last_id = threads[-1].id
+
+        user_ids = {}
+        for thread_id, user_id in ThreadParticipant.objects.filter(
+            thread_id__in=[thread.id for thread in threads]
+        ).values_list("thread_id", "user_id"):
+            user_ids.setdefault(thread_id, []).append(user_id)
+        keys = {
+            thread.id: participant_key(user_ids[thread.id], thread.job_reference_id)
+            for thread in threads if thread.id in user_ids
+        }
+        # Of duplicate threads only the oldest is keyed; the others stay as they are, unkeyed
+        taken = set(
+            MessageThread.objects.filter(participant_key__in=keys.values()).values_list("participant_key", flat=True)
+        )
+        for thread in threads:
+            key = keys.get(thread.id)
+            if key is not None and key not in taken:
+                thread.participant_key = key
+                taken.add(key)
+        MessageThread.objects.bulk_update(threads, ["participant_key"])
+
+
+def restore_thread_search_triggers(apps, schema_editor):
+    # Adding the unique constraint rebuilds the table on SQLite, dropping its full-text triggers
+    if schema_editor.connection.vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            # As in 0013; the FTS5 table itself survives the rebuild
+            table, column = "notifications_messagethread", "title"
+            fts = f"{table}_fts"
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {column} ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+            )
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0013_full_text_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="messagethread",
+            name="participant_key",
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_participant_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="messagethread",
+            name="participant_key",
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(restore_thread_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notifications", "0014_thread_participant_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificationbroadcast",
+            name="locked_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
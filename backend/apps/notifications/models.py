@@ -1,3 +1,5 @@
+import hashlib
+
 from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
@@ -43,9 +45,21 @@ class Notification(models.Model):
 
     is_read = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Notifications with the same type and group key (e.g. one thread) are coalesced
+    # into one row while unread; group_count is how many were merged (see notifications/coalescing.py)
+    group_key = models.CharField(max_length=100, blank=True, default='')
+    group_count = models.PositiveIntegerField(default=1)
     sent_via_email = models.BooleanField(default=False)
     sent_via_sms = models.BooleanField(default=False)
     sent_via_push = models.BooleanField(default=False)
+    broadcast = models.ForeignKey(
+        'NotificationBroadcast',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notifications'
+    )
 
     class Meta:
         ordering = ['-created_at']
@@ -53,18 +67,115 @@ class Notification(models.Model):
             models.Index(fields=['recipient', 'is_read']),
             models.Index(fields=['notification_type', 'created_at']),
             models.Index(fields=['recipient', 'created_at']),
+            models.Index(fields=['recipient', 'notification_type', 'group_key', 'is_read']),
         ]
 
     def __str__(self):
         return f"{self.notification_type} for {self.recipient.username}: {self.title[:50]}"
 
 
+class NotificationBroadcast(models.Model):
+    """
+    A notification fanned out to many recipients (see notifications/broadcast.py)
+
+    Recipients are either an explicit list of user ids or a filter such as
+    {"user_type": "worker", "region": "Amhara"}. Notifications are created in
+    chunks in recipient id order; last_recipient_id records how far the
+    fan-out got so an interrupted broadcast can be resumed. locked_at is the
+    running worker's lease, renewed with every chunk.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='notification_broadcasts'
+    )
+    notification_type = models.CharField(max_length=50, choices=Notification.NOTIFICATION_TYPES, default='system_alert')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    channels = models.JSONField(default=list, blank=True)  # Example: ["email", "sms", "push"]
+    recipient_ids = models.JSONField(null=True, blank=True)
+    recipient_filter = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    total_recipients = models.PositiveIntegerField(default=0)
+    notifications_created = models.PositiveIntegerField(default=0)
+    deliveries_enqueued = models.PositiveIntegerField(default=0)
+    last_recipient_id = models.PositiveIntegerField(default=0)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Broadcast {self.id} ({self.status}): {self.title[:50]}"
+
+
+class NotificationDelivery(models.Model):
+    """
+    Outbox record for delivering a notification over one channel
+
+    Created in the same transaction as the notification and drained by the
+    per-channel delivery workers (see notifications/delivery.py).
+    """
+    CHANNEL_CHOICES = [
+        ('email', 'Email'),
+        ('sms', 'SMS'),
+        ('push', 'Push'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('in_progress', 'In Progress'),
+        ('sent', 'Sent'),
+        ('skipped', 'Skipped'),
+        ('dead', 'Dead Letter'),
+    ]
+
+    # Not enforced by the database: notifications are partitioned on PostgreSQL (see notifications/partitioning.py)
+    notification = models.ForeignKey(
+        Notification, on_delete=models.CASCADE, related_name='deliveries', db_constraint=False
+    )
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['channel', 'status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} delivery of notification {self.notification_id}: {self.status}"
+
+
 class MessageThread(models.Model):
     """
     Model for message threads between users
     """
     title = models.CharField(max_length=200, blank=True, db_index=True)
-    participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='message_threads')
+    participants = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, through='ThreadParticipant', related_name='message_threads'
+    )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True, db_index=True)
     is_active = models.BooleanField(default=True, db_index=True)
@@ -75,6 +186,9 @@ class MessageThread(models.Model):
         blank=True,
         related_name='message_threads'
     )
+    # Hash of the participant ids and job reference, fixed at creation; unique so that
+    # MessagingService.get_or_create_thread finds a conversation with one indexed lookup
+    participant_key = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
     class Meta:
         ordering = ['-updated_at']
@@ -85,6 +199,49 @@ class MessageThread(models.Model):
             participant_usernames.append("...")
         return f"Thread: {' & '.join(participant_usernames)}"
 
+    @staticmethod
+    def get_participant_key(user_ids, job_reference_id=None):
+        """Canonical hash of a set of participants, in any order, optionally about a job"""
+        canonical = f"{job_reference_id or ''}:{','.join(str(user_id) for user_id in sorted(set(user_ids)))}"
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ThreadParticipant(models.Model):
+    """
+    A user's membership of a thread, with their inbox and read state for it
+
+    last_message_*, last_read_message and unread_count are maintained by
+    MessagingService when messages are sent and read, so the inbox is one
+    indexed query instead of per-thread lookups. last_read_message is the
+    user's read watermark: every message up to it counts as read. Message
+    foreign keys are not enforced by the database because messages are
+    partitioned on PostgreSQL.
+    """
+    thread = models.ForeignKey(
+        MessageThread, on_delete=models.CASCADE, related_name='memberships', db_column='messagethread_id'
+    )
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='thread_memberships')
+    last_message = models.ForeignKey(
+        'Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', db_constraint=False
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_read_message = models.ForeignKey(
+        'Message', on_delete=models.SET_NULL, null=True, blank=True, related_name='+', db_constraint=False
+    )
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Reuses the table of the former auto-created participants M2M
+        db_table = 'notifications_messagethread_participants'
+        unique_together = [('thread', 'user')]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at'], name='thread_participant_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"User {self.user_id} in thread {self.thread_id}"
+
 
 class Message(models.Model):
     """
@@ -98,6 +255,7 @@ class Message(models.Model):
     ]
 
     MODERATION_STATUS_CHOICES = [
+        ('queued', 'Awaiting Automatic Moderation'),
         ('pending', 'Pending Review'),
         ('approved', 'Approved'),
         ('flagged', 'Flagged for Review'),
@@ -109,7 +267,6 @@ class Message(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    read_by = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='read_messages')
     sensitivity_level = models.CharField(max_length=10, choices=SENSITIVITY_LEVELS, default='low', db_index=True)
     is_deleted = models.BooleanField(default=False, db_index=True)
     deleted_for_sender = models.BooleanField(default=False, db_index=True)
@@ -129,14 +286,33 @@ class Message(models.Model):
     # Content security
     is_content_safe = models.BooleanField(default=True, help_text="Whether content passed safety checks")
     content_warning = models.TextField(blank=True, help_text="Warning message about content")
+    # Version of the moderation rules behind the automatic verdict; empty if never checked
+    moderation_version = models.CharField(max_length=12, blank=True, default='')
+    # Moderator work queue: pending messages by priority, each leased to one moderator at a time
+    review_priority = models.PositiveSmallIntegerField(default=0)
+    review_claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    review_claimed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['created_at']
         indexes = [
-            models.Index(fields=['thread', 'created_at']),
+            # Also serves the keyset-paginated history (see utils/cursors.py)
+            models.Index(fields=['thread', 'created_at', 'id']),
             models.Index(fields=['sender', 'created_at']),
             models.Index(fields=['thread', 'is_deleted']),
             models.Index(fields=['moderation_status']),
+            # Only pending messages, so claiming reads one batch whatever the size of the table
+            models.Index(
+                fields=['-review_priority', 'created_at'],
+                name='message_review_queue_idx',
+                condition=models.Q(moderation_status='pending'),
+            ),
         ]
 
     def __str__(self):
@@ -145,10 +321,19 @@ class Message(models.Model):
     @property
     def is_read(self):
         """Check if message is read by all participants in the thread"""
-        unread_count = self.thread.participants.exclude(
-            id__in=self.read_by.values_list('id', flat=True)
-        ).count()
-        return unread_count == 0
+        return not self.thread.memberships.exclude(user_id=self.sender_id).filter(
+            models.Q(last_read_message__isnull=True) | models.Q(last_read_message_id__lt=self.id)
+        ).exists()
+
+    @staticmethod
+    def get_review_priority(sensitivity_level, is_urgent):
+        """Moderator queue priority: by sensitivity, urgent messages first within a level"""
+        ranks = [level for level, _ in Message.SENSITIVITY_LEVELS]
+        return ranks.index(sensitivity_level) * 2 + int(bool(is_urgent))
+
+    def is_read_by(self, user_id, read_watermark):
+        """Whether the user has read this message, given their thread read watermark"""
+        return self.sender_id == user_id or (read_watermark is not None and self.id <= read_watermark)
 
     def approve_content(self, moderator):
         """Approve content that was pending review"""
@@ -164,3 +349,24 @@ class Message(models.Model):
         if flagging_user and self.reviewed_by is None:  # Only set reviewer if not already set
             self.reviewed_by = flagging_user
         self.save()
+
+
+class ModerationTask(models.Model):
+    """
+    Queue entry for the automatic moderation of a new message
+
+    Created with the message and deleted when the moderation workers record
+    its verdict (see notifications/moderation_queue.py).
+    """
+    # Not enforced by the database: messages are partitioned on PostgreSQL (see notifications/partitioning.py)
+    message = models.OneToOneField(
+        Message, on_delete=models.CASCADE, related_name='moderation_task', db_constraint=False
+    )
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Moderation of message {self.message_id}"
@@ -0,0 +1,279 @@
+"""
+Single-pass content moderation engine
+
+All moderation rules are compiled once into:
+
+- one Aho–Corasick automaton holding every keyword, English and Amharic
+  (pyahocorasick when installed, otherwise the pure-Python automaton below)
+- one combined regex holding every pattern rule, each in a named group
+
+so checking a message is one linear pass over the text per structure,
+returning every hit, however many rules there are. A pattern rule can list
+literal anchors, one of which every match contains ('@' for e-mail
+addresses); anchors go into the automaton and the rule's pattern only runs
+on text where one was found, so most messages never reach the regex. Keyword rules replace the
+old `hate.*[a-z]+` style regexes, which backtracked on long messages.
+
+Keywords are matched on lower-cased text and one of three ways:
+
+- word: the keyword is a whole word ("fee" does not match "coffee")
+- prefix: the keyword starts a word ("attack" matches "attacked")
+- substring: anywhere; the default for Ethiopic keywords, since Amharic
+  attaches prepositions and suffixes to the word (በገንዘብ, "with money")
+
+Word characters are str.isalnum() characters, so Ethiopic letters are word
+characters and the Ethiopic wordspace (፡) and full stop (።) are boundaries.
+
+Each rule is either 'prohibited' (the message is flagged) or 'sensitive'
+(the message is held for review). The engine's `version` changes whenever
+the rules do.
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional accelerator
+    ahocorasick = None
+
+PROHIBITED = 'prohibited'
+SENSITIVE = 'sensitive'
+
+MATCH_WORD = 'word'
+MATCH_PREFIX = 'prefix'
+MATCH_SUBSTRING = 'substring'
+
+
+class ModerationRule(NamedTuple):
+    name: str
+    category: str  # PROHIBITED or SENSITIVE
+    keyword: str = ''
+    pattern: str = ''
+    match: str = ''  # Keyword matching; defaults to word (substring for Ethiopic)
+    anchors: Tuple[str, ...] = ()  # Literals every pattern match contains
+
+
+class ModerationHit(NamedTuple):
+    rule: ModerationRule
+    start: int
+    end: int
+    text: str
+
+
+class ModerationResult(NamedTuple):
+    is_safe: bool
+    warning: str
+    sensitivity_level: str
+    hits: Tuple[ModerationHit, ...]
+
+
+DEFAULT_RULES = [
+    # Offensive language
+    ModerationRule('hate', PROHIBITED, keyword='hate', match=MATCH_PREFIX),
+    ModerationRule('kill', PROHIBITED, keyword='kill', match=MATCH_PREFIX),
+    ModerationRule('attack', PROHIBITED, keyword='attack', match=MATCH_PREFIX),
+    ModerationRule('hate (am)', PROHIBITED, keyword='ጥላቻ'),
+    ModerationRule('kill (am)', PROHIBITED, keyword='ግደል'),
+    # Potential contact information sharing
+    ModerationRule('email address', PROHIBITED, pattern=r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b',
+                   anchors=('@',)),
+    ModerationRule('phone number', SENSITIVE, pattern=r'(?<!\d)(?:\+?251|0)[79]\d{8}(?!\d)',
+                   anchors=('2519', '2517', '09', '07')),
+    # Keywords that require closer review
+    *[
+        ModerationRule(keyword, SENSITIVE, keyword=keyword)
+        for keyword in (
+            'payment', 'money', 'cash', 'fee', 'personal', 'contact', 'outside',
+            'off-platform', 'private', 'deal', 'arrangement',
+        )
+    ],
+    ModerationRule('payment (am)', SENSITIVE, keyword='ክፍያ'),
+    ModerationRule('money (am)', SENSITIVE, keyword='ገንዘብ'),
+    ModerationRule('phone (am)', SENSITIVE, keyword='ስልክ'),
+    ModerationRule('broker (am)', SENSITIVE, keyword='ደላላ'),
+]
+
+
+def normalize(text: str) -> str:
+    """NFC and lower case, keeping every character at its position."""
+    text = unicodedata.normalize('NFC', text)
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters lower-case to two (e.g. 'İ'); keep those as they are
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def is_ethiopic(text: str) -> bool:
+    return any('ሀ' <= char <= '᎟' or 'ⶀ' <= char <= '⷟' for char in text)
+
+
+class KeywordAutomaton:
+    """
+    Pure-Python Aho–Corasick automaton: finds every occurrence of every
+    keyword in one pass over the text.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[int]] = [[]]
+        self.keywords = list(keywords)
+        for index, keyword in enumerate(self.keywords):
+            node = 0
+            for char in keyword:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.output[node].append(index)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0) if node else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter(self, text: str):
+        """Yields (end_index, keyword_index) for every match, end_index inclusive."""
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for keyword_index in output[node]:
+                yield position, keyword_index
+
+
+class ModerationEngine:
+    """
+    Checks text against a set of moderation rules in a single pass.
+
+    Args:
+        rules: The rules to compile
+        use_native: Use pyahocorasick when it is installed (default)
+    """
+
+    def __init__(self, rules: Iterable[ModerationRule] = DEFAULT_RULES, use_native: bool = True):
+        self.rules = list(rules)
+        self.version = hashlib.sha256(repr(self.rules).encode()).hexdigest()[:12]
+
+        keyword_rules = [rule for rule in self.rules if rule.keyword]
+        self._keywords = [normalize(rule.keyword) for rule in keyword_rules]
+        self._keyword_rules = keyword_rules
+        self._keyword_modes = [
+            rule.match or (MATCH_SUBSTRING if is_ethiopic(rule.keyword) else MATCH_WORD) for rule in keyword_rules
+        ]
+
+        # Anchors follow the keywords in the automaton, each mapped to its pattern rule
+        self._anchor_rules = [rule for rule in self.rules if rule.pattern and rule.anchors]
+        self._anchor_patterns = [re.compile(rule.pattern) for rule in self._anchor_rules]
+        self._anchor_targets = []
+        for rule_index, rule in enumerate(self._anchor_rules):
+            self._keywords.extend(normalize(anchor) for anchor in rule.anchors)
+            self._anchor_targets.extend([rule_index] * len(rule.anchors))
+        self._automaton = self._build_automaton(use_native and ahocorasick is not None)
+
+        self._pattern_rules = [rule for rule in self.rules if rule.pattern and not rule.anchors]
+        self._pattern = re.compile('|'.join(
+            f"(?P<rule{index}>{rule.pattern})" for index, rule in enumerate(self._pattern_rules)
+        )) if self._pattern_rules else None
+
+    def _build_automaton(self, native: bool):
+        if not self._keywords:
+            return None
+        if not native:
+            return KeywordAutomaton(self._keywords)
+        automaton = ahocorasick.Automaton()
+        for index, keyword in enumerate(self._keywords):
+            # Several rules can share a keyword
+            automaton.add_word(keyword, automaton.get(keyword, ()) + (index,))
+        automaton.make_automaton()
+        return automaton
+
+    def _iter_keywords(self, text: str):
+        if self._automaton is None or not text:
+            return
+        if isinstance(self._automaton, KeywordAutomaton):
+            yield from self._automaton.iter(text)
+        else:
+            for end, indexes in self._automaton.iter(text):
+                for index in indexes:
+                    yield end, index
+
+    def scan(self, text: str) -> List[ModerationHit]:
+        """Every rule hit in the text, in order of position."""
+        hits = []
+        anchored = set()
+        normalized = normalize(text)
+        length = len(normalized)
+        keyword_count = len(self._keyword_rules)
+        for end, index in self._iter_keywords(normalized):
+            if index >= keyword_count:
+                anchored.add(self._anchor_targets[index - keyword_count])
+                continue
+            start = end - len(self._keywords[index]) + 1
+            mode = self._keyword_modes[index]
+            if mode != MATCH_SUBSTRING:
+                if start > 0 and normalized[start - 1].isalnum():
+                    continue
+                if mode == MATCH_WORD and end + 1 < length and normalized[end + 1].isalnum():
+                    continue
+            hits.append(ModerationHit(self._keyword_rules[index], start, end + 1, text[start:end + 1]))
+
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                rule = self._pattern_rules[int(match.lastgroup[len('rule'):])]
+                hits.append(ModerationHit(rule, match.start(), match.end(), match.group()))
+        for rule_index in anchored:
+            rule = self._anchor_rules[rule_index]
+            for match in self._anchor_patterns[rule_index].finditer(text):
+                hits.append(ModerationHit(rule, match.start(), match.end(), match.group()))
+
+        hits.sort(key=lambda hit: hit.start)
+        return hits
+
+    def check(self, text: str) -> ModerationResult:
+        """
+        Classifies text: any prohibited hit makes it unsafe ('high'); sensitive
+        hits make it 'medium', or 'high' from three distinct rules.
+        """
+        hits = tuple(self.scan(text))
+        if any(hit.rule.category == PROHIBITED for hit in hits):
+            return ModerationResult(False, "Content contains potentially prohibited language", 'high', hits)
+
+        sensitive = list(dict.fromkeys(hit.rule.name for hit in hits if hit.rule.category == SENSITIVE))
+        if sensitive:
+            sensitivity = 'medium' if len(sensitive) < 3 else 'high'
+            warning = f"Content contains sensitive keywords: {', '.join(sensitive)}"
+            return ModerationResult(True, warning, sensitivity, hits)
+
+        return ModerationResult(True, "", 'low', hits)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_moderation_engine() -> ModerationEngine:
+    """Returns the process-wide engine compiled from the default rules."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ModerationEngine()
+    return _engine
@@ -0,0 +1,363 @@
+"""
+Asynchronous message moderation and re-scans
+
+EnhancedMessagingService.send_message() stores a new message as 'queued'
+together with a ModerationTask and returns; nothing is checked inside the
+request. Moderation workers (`manage.py run_moderation_workers`) drain the
+tasks:
+
+- a claim loop leases queued tasks (SELECT ... FOR UPDATE SKIP LOCKED where
+  the database supports it) by setting locked_at; leases older than
+  LEASE_SECONDS are reclaimed after a crash
+- a thread pool checks the claimed messages with the moderation engine and
+  records each verdict with the engine's rule version, deleting the task in
+  the same transaction, so a verdict is only ever recorded once
+- recipients are notified, and the message pushed, once it is approved;
+  messages held for review ('pending') go to the moderators' work queue
+  (ContentModerationService.claim_moderation_batch)
+
+When the moderation rules change so does the engine's version, and
+`manage.py rescan_message_moderation` re-checks every message whose verdict
+came from another version, in keyset batches over a bounded thread pool.
+Verdicts a moderator gave (reviewed_by set) and removed messages are left
+alone, and a re-scan never notifies: its messages are history.
+"""
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Message, ModerationTask
+from .moderation import ModerationEngine, get_moderation_engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPTIONS = {
+    'EAGER': False,
+    'WORKERS': 4,
+    'BATCH_SIZE': 100,
+    'LEASE_SECONDS': 5 * 60,
+    'POLL_INTERVAL': 1.0,
+    'RESCAN_BATCH_SIZE': 500,
+    'RESCAN_WORKERS': 4,
+    'REVIEW_BATCH_SIZE': 20,
+    'REVIEW_LEASE_SECONDS': 15 * 60,
+}
+
+# Statuses an automatic verdict may replace on a re-scan
+RESCANNABLE_STATUSES = ('pending', 'approved', 'flagged')
+
+
+class Verdict(NamedTuple):
+    moderation_status: str
+    is_content_safe: bool
+    content_warning: str
+    sensitivity_level: str
+
+
+def get_moderation_options() -> Dict:
+    """MESSAGE_MODERATION merged over the defaults."""
+    options = dict(DEFAULT_OPTIONS)
+    options.update(getattr(settings, 'MESSAGE_MODERATION', {}))
+    return options
+
+
+def get_verdict(content: str, engine: Optional[ModerationEngine] = None) -> Verdict:
+    """
+    Unsafe content is flagged, content with warnings waits for a moderator
+    and everything else is approved.
+    """
+    result = (engine or get_moderation_engine()).check(content)
+    if not result.is_safe:
+        status = 'flagged'
+    elif result.warning:
+        status = 'pending'
+    else:
+        status = 'approved'
+    return Verdict(status, result.is_safe, result.warning, result.sensitivity_level)
+
+
+def enqueue_moderation(message: Message) -> ModerationTask:
+    """
+    Queues a new message for moderation.
+
+    Call inside the transaction that creates the message. With EAGER
+    moderation the message is checked in-process once that transaction
+    commits, and the verdict is set on `message` as well.
+    """
+    task = ModerationTask.objects.create(message=message)
+    if get_moderation_options()['EAGER']:
+        transaction.on_commit(lambda: moderate_messages([message]))
+    return task
+
+
+def claim_messages(limit: int, options: Optional[Dict] = None) -> List[Message]:
+    """
+    Leases up to `limit` queued messages, oldest first.
+
+    Concurrent claimers never get the same task: on PostgreSQL the candidates
+    are locked with SKIP LOCKED, and the lease only applies to tasks that are
+    still claimable.
+    """
+    options = options or get_moderation_options()
+    now = timezone.now()
+    claimable = Q(locked_at__isnull=True) | Q(locked_at__lt=now - timedelta(seconds=options['LEASE_SECONDS']))
+
+    with transaction.atomic():
+        ids = list(
+            ModerationTask.objects.filter(claimable)
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        ModerationTask.objects.filter(claimable, id__in=ids).update(locked_at=now)
+
+    message_ids = ModerationTask.objects.filter(id__in=ids, locked_at=now).values_list('message_id', flat=True)
+    return list(Message.objects.filter(id__in=list(message_ids)).select_related('thread', 'sender'))
+
+
+def _update_verdicts(messages: Iterable[Message], verdicts: Dict[int, Verdict], version: str,
+                     **filters) -> int:
+    """Writes the verdicts with one UPDATE per distinct verdict. Returns the number of rows updated."""
+    by_verdict = {}
+    for message in messages:
+        verdict = verdicts[message.id]
+        priority = Message.get_review_priority(verdict.sensitivity_level, message.is_urgent)
+        by_verdict.setdefault((verdict, priority), []).append(message.id)
+    now = timezone.now()
+    return sum(
+        Message.objects.filter(id__in=ids, **filters).update(
+            **verdict._asdict(), review_priority=priority, moderation_version=version, updated_at=now
+        )
+        for (verdict, priority), ids in by_verdict.items()
+    )
+
+
+def moderate_messages(messages: List[Message], engine: Optional[ModerationEngine] = None) -> Dict[str, int]:
+    """
+    Records the verdicts of queued messages and notifies the recipients of
+    the approved ones.
+
+    Messages whose task is already gone (moderated by another worker) or
+    that a moderator has reviewed meanwhile are skipped. Returns the number of messages per verdict status.
+    """
+    from .services import EnhancedMessagingService
+
+    engine = engine or get_moderation_engine()
+    verdicts = {message.id: get_verdict(message.content, engine) for message in messages}
+
+    with transaction.atomic():
+        queued = set(
+            ModerationTask.objects.filter(message_id__in=list(verdicts))
+            .select_for_update()
+            .values_list('message_id', flat=True)
+        )
+        # A moderator may have decided already; their decision stands
+        undecided = set(
+            Message.objects.filter(id__in=queued, moderation_status='queued', reviewed_by__isnull=True)
+            .values_list('id', flat=True)
+        )
+        messages = [message for message in messages if message.id in undecided]
+        _update_verdicts(messages, verdicts, engine.version, moderation_status='queued', reviewed_by__isnull=True)
+        ModerationTask.objects.filter(message_id__in=queued).delete()
+
+    counts = {}
+    for message in messages:
+        verdict = verdicts[message.id]
+        for field, value in verdict._asdict().items():
+            setattr(message, field, value)
+        message.moderation_version = engine.version
+        message.review_priority = Message.get_review_priority(verdict.sensitivity_level, message.is_urgent)
+        counts[verdict.moderation_status] = counts.get(verdict.moderation_status, 0) + 1
+
+    for message in messages:
+        if message.moderation_status == 'approved':
+            try:
+                EnhancedMessagingService.deliver_approved_message(message)
+            except Exception as e:
+                logger.error(f"Failed to notify recipients of approved message {message.id}: {str(e)}")
+    return counts
+
+
+def moderation_backlog() -> Dict[str, int]:
+    """Queued moderation tasks, e.g. {'queued': 12, 'leased': 3}."""
+    tasks = ModerationTask.objects.all()
+    return {'queued': tasks.count(), 'leased': tasks.filter(locked_at__isnull=False).count()}
+
+
+class ModerationWorkerPool:
+    """
+    Drains the moderation queue with a pool of threads.
+
+    Each claimed batch is split into one chunk per thread. With workers=0
+    everything is moderated in the claiming thread, which is what tests and
+    one-off drains use.
+    """
+
+    def __init__(self, workers: int = 4, batch_size: Optional[int] = None, options: Optional[Dict] = None,
+                 engine: Optional[ModerationEngine] = None):
+        self.options = options or get_moderation_options()
+        self.batch_size = batch_size or self.options['BATCH_SIZE']
+        self.engine = engine or get_moderation_engine()
+        self.workers = workers
+        self.executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='moderate') if workers > 0 else None
+        )
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def run_once(self) -> int:
+        """Claims and moderates one batch. Returns the number of messages claimed."""
+        messages = claim_messages(self.batch_size, self.options)
+        if not messages:
+            return 0
+        if self.executor is None:
+            self._moderate(messages)
+        else:
+            size = -(-len(messages) // self.workers)
+            chunks = [messages[start:start + size] for start in range(0, len(messages), size)]
+            list(self.executor.map(self._moderate_in_thread, chunks))
+        return len(messages)
+
+    def drain(self) -> int:
+        """Moderates batches until the queue is empty. Returns the number processed."""
+        total = 0
+        while True:
+            processed = self.run_once()
+            if not processed:
+                return total
+            total += processed
+
+    def run_forever(self, stop_event: threading.Event):
+        poll_interval = self.options['POLL_INTERVAL']
+        while not stop_event.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Moderation worker loop failed: {str(e)}")
+                close_old_connections()
+                processed = 0
+            if not processed:
+                stop_event.wait(poll_interval)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def _moderate(self, messages):
+        counts = moderate_messages(messages, self.engine)
+        with self._lock:
+            for status, count in counts.items():
+                self.counts[status] = self.counts.get(status, 0) + count
+
+    def _moderate_in_thread(self, messages):
+        close_old_connections()
+        try:
+            self._moderate(messages)
+        except Exception as e:
+            # The leases expire and the messages are claimed again
+            logger.error(f"Moderation verdicts could not be recorded: {str(e)}")
+
+
+def stale_messages(version: str):
+    """Automatically moderated messages whose verdict came from another rule version."""
+    return (
+        Message.objects.filter(moderation_status__in=RESCANNABLE_STATUSES, reviewed_by__isnull=True)
+        .exclude(moderation_version='')
+        .exclude(moderation_version=version)
+    )
+
+
+def rescan_batch(message_ids: List[int], engine: ModerationEngine, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Re-checks a batch of messages with the engine. Returns the number scanned,
+    the number whose verdict changed, and the new verdict statuses.
+    """
+    messages = list(
+        stale_messages(engine.version).filter(id__in=message_ids)
+        .only('id', 'content', 'is_urgent', 'moderation_status', 'is_content_safe', 'content_warning',
+              'sensitivity_level')
+    )
+    verdicts = {message.id: get_verdict(message.content, engine) for message in messages}
+    changed = [
+        message for message in messages
+        if verdicts[message.id] != Verdict(message.moderation_status, message.is_content_safe,
+                                           message.content_warning, message.sensitivity_level)
+    ]
+    report = {'scanned': len(messages), 'changed': len(changed)}
+    for message in changed:
+        key = f"now_{verdicts[message.id].moderation_status}"
+        report[key] = report.get(key, 0) + 1
+    if not dry_run:
+        # Also stamps unchanged verdicts with the new version; a moderator's review in the meantime wins
+        _update_verdicts(messages, verdicts, engine.version,
+                         reviewed_by__isnull=True, moderation_status__in=RESCANNABLE_STATUSES)
+    return report
+
+
+def rescan_messages(engine: Optional[ModerationEngine] = None, batch_size: Optional[int] = None,
+                    workers: Optional[int] = None, max_batches: Optional[int] = None,
+                    dry_run: bool = False) -> Dict[str, int]:
+    """
+    Re-checks every message moderated under another rule version.
+
+    Message ids are walked in keyset batches of `batch_size`; up to
+    `workers` batches are checked at a time, so memory and database load
+    stay bounded however large the backlog. With workers=0 batches are
+    checked in the calling thread.
+    """
+    options = get_moderation_options()
+    engine = engine or get_moderation_engine()
+    batch_size = batch_size or options['RESCAN_BATCH_SIZE']
+    workers = options['RESCAN_WORKERS'] if workers is None else workers
+    stale = stale_messages(engine.version)
+
+    report = {'version': engine.version, 'batches': 0, 'scanned': 0, 'changed': 0}
+
+    def add(batch_report):
+        for key, value in batch_report.items():
+            report[key] = report.get(key, 0) + value
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rescan') if workers > 0 else None
+    in_flight = set()
+    last_id = 0
+    try:
+        while max_batches is None or report['batches'] < max_batches:
+            ids = list(stale.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            report['batches'] += 1
+            if executor is None:
+                add(rescan_batch(ids, engine, dry_run))
+                continue
+            in_flight.add(executor.submit(_rescan_batch_in_thread, ids, engine, dry_run))
+            if len(in_flight) >= workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    add(future.result())
+        for future in in_flight:
+            add(future.result())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    if report['changed'] and not dry_run:
+        logger.info(f"Moderation re-scan to rules {engine.version} changed {report['changed']} verdicts")
+    return report
+
+
+def _rescan_batch_in_thread(message_ids, engine, dry_run):
+    close_old_connections()
+    try:
+        return rescan_batch(message_ids, engine, dry_run)
+    finally:
+        close_old_connections()
@@ -0,0 +1,298 @@
+"""
+Monthly range partitioning and retention for notifications and messages
+
+On PostgreSQL, notifications_notification and notifications_message are
+range-partitioned by created_at, one partition per month:
+
+    notifications_notification_p202610   [2026-10-01, 2026-11-01)
+
+Migration 0007 converts the existing tables without copying rows. The
+current table becomes the first partition (`<table>_legacy`, covering
+everything before the month after the migration ran) and new months get
+their own partitions. Because the partition key must be part of every
+unique constraint, the primary keys become (id, created_at) and foreign keys
+pointing at these tables are not enforced by the database (Django still
+cascades deletes).
+
+`manage.py maintain_notification_storage` (run daily) then:
+
+- creates the partitions for the next PARTITION_MONTHS_AHEAD months
+- detaches (ARCHIVE) or drops partitions older than RETAIN_MONTHS; a
+  detached partition stays behind as a plain table to be dumped and dropped.
+  Rows pointing at a partition's rows through unenforced foreign keys
+  (PARTITION_DEPENDENTS) are first set to NULL or deleted, in batches of
+  PRUNE_BATCH_SIZE, since the database will not do it
+- deletes read notifications older than READ_NOTIFICATION_DAYS in batches
+  of PRUNE_BATCH_SIZE, one short transaction per batch
+
+Partition maintenance is skipped on other databases; pruning works
+everywhere. Configured by the NOTIFICATION_STORAGE setting.
+"""
+import logging
+import re
+import time
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OPTIONS = {
+    'PARTITION_MONTHS_AHEAD': 3,
+    'TABLES': {
+        'notifications_notification': {'RETAIN_MONTHS': 12, 'ARCHIVE': False},
+        'notifications_message': {'RETAIN_MONTHS': 24, 'ARCHIVE': True},
+    },
+    'READ_NOTIFICATION_DAYS': 90,
+    'PRUNE_BATCH_SIZE': 5000,
+    'PRUNE_PAUSE': 0.1,
+}
+
+# Rows referencing a partitioned table through foreign keys without database
+# constraints: (model, field, 'set_null' or 'delete') per table
+PARTITION_DEPENDENTS = {
+    'notifications_notification': [
+        ('NotificationDelivery', 'notification', 'delete'),
+    ],
+    'notifications_message': [
+        ('ThreadParticipant', 'last_message', 'set_null'),
+        ('ThreadParticipant', 'last_read_message', 'set_null'),
+        ('ModerationTask', 'message', 'delete'),
+    ],
+}
+
+# FOR VALUES FROM ('2026-10-01 00:00:00+00') TO ('2026-11-01 00:00:00+00'); MINVALUE for the legacy partition
+PARTITION_BOUND_RE = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: Optional[date]  # None for the legacy partition (MINVALUE)
+    end: date
+
+
+def get_storage_options() -> Dict:
+    """NOTIFICATION_STORAGE merged over the defaults."""
+    options = dict(DEFAULT_OPTIONS)
+    options.update(getattr(settings, 'NOTIFICATION_STORAGE', {}))
+    return options
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table: str, start: date) -> str:
+    return f"{table}_p{start:%Y%m}"
+
+
+def supports_partitioning() -> bool:
+    return connection.vendor == 'postgresql'
+
+
+def plan_partitions(table: str, existing: List[Partition], today: date, months_ahead: int) -> List[Partition]:
+    """
+    Monthly partitions to create so that every month from the current one to
+    `months_ahead` months ahead is covered, without overlapping `existing`.
+    """
+    start = month_start(today)
+    if existing:
+        start = max(start, max(partition.end for partition in existing))
+    last = add_months(month_start(today), months_ahead + 1)
+    planned = []
+    while start < last:
+        end = add_months(start, 1)
+        planned.append(Partition(partition_name(table, start), start, end))
+        start = end
+    return planned
+
+
+def expired_partitions(existing: List[Partition], today: date, retain_months: int) -> List[Partition]:
+    """
+    Partitions whose whole range is older than `retain_months` full months.
+    The legacy partition is never expired here; its old rows are pruned instead.
+    """
+    cutoff = add_months(month_start(today), -retain_months)
+    return [
+        partition for partition in existing
+        if partition.start is not None and partition.end <= cutoff
+    ]
+
+
+def list_partitions(table: str) -> List[Partition]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        partition = parse_partition_bound(name, bound or '')
+        if partition is None:
+            logger.warning(f"Skipping partition {name} with unexpected bound: {bound}")
+            continue
+        partitions.append(partition)
+    return sorted(partitions, key=lambda partition: partition.end)
+
+
+def parse_partition_bound(name: str, bound: str) -> Optional[Partition]:
+    """Parses a monthly range bound as printed by pg_get_expr()."""
+    match = PARTITION_BOUND_RE.search(bound)
+    if not match:
+        return None
+    start, end = match.groups()
+    return Partition(name, _parse_date(start) if start else None, _parse_date(end))
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+
+
+def _parse_date(value: str) -> date:
+    return datetime.fromisoformat(value.replace(' ', 'T')[:19]).date()
+
+
+def create_partitions(table: str, partitions: List[Partition]):
+    with connection.cursor() as cursor:
+        for partition in partitions:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {_quote(partition.name)} PARTITION OF {_quote(table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [partition.start.isoformat(), partition.end.isoformat()],
+            )
+            logger.info(f"Created partition {partition.name}")
+
+
+def release_partition_dependents(table: str, partition: Partition,
+                                 batch_size: int = DEFAULT_OPTIONS['PRUNE_BATCH_SIZE']) -> Dict[str, int]:
+    """
+    Sets to NULL or deletes the rows referencing the partition's rows (see
+    PARTITION_DEPENDENTS), one short transaction per batch. Returns the
+    number of rows changed per 'Model.field'.
+    """
+    from django.apps import apps
+
+    # Partition bounds are UTC midnights
+    start = _utc_midnight(partition.start) if partition.start else None
+    end = _utc_midnight(partition.end)
+    report = {}
+    for model_name, field, action in PARTITION_DEPENDENTS.get(table, ()):
+        model = apps.get_model('notifications', model_name)
+        dependents = model.objects.filter(**{f"{field}__created_at__lt": end})
+        if start is not None:
+            dependents = dependents.filter(**{f"{field}__created_at__gte": start})
+        changed = 0
+        while True:
+            with transaction.atomic():
+                ids = list(dependents.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                batch = model.objects.filter(id__in=ids)
+                if action == 'delete':
+                    batch.delete()
+                else:
+                    batch.update(**{field: None})
+            changed += len(ids)
+        report[f"{model_name}.{field}"] = changed
+        if changed:
+            logger.info(f"Released {changed} {model_name}.{field} references to partition {partition.name}")
+    return report
+
+
+def remove_partition(table: str, partition: Partition, archive: bool,
+                     batch_size: int = DEFAULT_OPTIONS['PRUNE_BATCH_SIZE']):
+    """
+    Detaches the partition, keeping it as a standalone table when archiving,
+    else drops it, after releasing the rows that reference it.
+    """
+    release_partition_dependents(table, partition, batch_size)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(partition.name)}")
+        if not archive:
+            cursor.execute(f"DROP TABLE {_quote(partition.name)}")
+    logger.info(f"{'Archived' if archive else 'Dropped'} partition {partition.name}")
+
+
+def maintain_partitions(options: Optional[Dict] = None, today: Optional[date] = None,
+                        dry_run: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Creates upcoming partitions and removes expired ones for every partitioned table.
+
+    Returns the partition names created, archived and dropped per table.
+    """
+    options = options or get_storage_options()
+    today = today or timezone.now().date()
+    report = {}
+    if not supports_partitioning():
+        return report
+
+    for table, policy in options['TABLES'].items():
+        existing = list_partitions(table)
+        if not existing:
+            logger.warning(f"{table} is not partitioned; run the notifications migrations")
+            continue
+        created = plan_partitions(table, existing, today, options['PARTITION_MONTHS_AHEAD'])
+        expired = expired_partitions(existing, today, policy['RETAIN_MONTHS'])
+        if not dry_run:
+            create_partitions(table, created)
+            for partition in expired:
+                remove_partition(table, partition, policy['ARCHIVE'], options['PRUNE_BATCH_SIZE'])
+        removed_as = 'archived' if policy['ARCHIVE'] else 'dropped'
+        report[table] = {
+            'created': [partition.name for partition in created],
+            removed_as: [partition.name for partition in expired],
+        }
+    return report
+
+
+def prune_read_notifications(older_than_days: int, batch_size: int, pause: float = 0.0,
+                             max_batches: Optional[int] = None, dry_run: bool = False) -> int:
+    """
+    Deletes read notifications created more than `older_than_days` days ago.
+
+    Each batch is its own short transaction, selected by created_at so only
+    the old partitions are scanned. Returns the number of notifications deleted
+    (or that would be deleted, with dry_run).
+    """
+    from .models import Notification
+
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+    if dry_run:
+        return expired.count()
+
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            ids = list(expired.order_by('created_at').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            # Deliveries are deleted with their notification
+            Notification.objects.filter(id__in=ids, created_at__lt=cutoff).delete()
+        deleted += len(ids)
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    if deleted:
+        logger.info(f"Pruned {deleted} read notifications older than {older_than_days} days")
+    return deleted
+
+
+def _quote(name: str) -> str:
+    return connection.ops.quote_name(name)
@@ -0,0 +1,172 @@
+"""
+Live notification and message pushes over WebSockets
+
+Each connected client joins the channel-layer group of its user (see
+consumers.py). Services publish events to those groups once the creating
+transaction commits:
+
+- notification.created: a new notification, followed by the new unread count.
+  A notification coalesced into an existing one is sent again with the same
+  id and a higher group_count
+- message.created: a new message in one of the user's threads, followed by
+  the thread's unread count
+- unread.changed: notifications were read elsewhere (another tab or device)
+
+Consumers read unread counts from the cached counters (unread_counters.py),
+so a push never runs a COUNT. Publishing never fails the caller: when the
+channel layer is unavailable the event is dropped and clients catch up on
+their next fetch.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List
+
+from asgiref.sync import async_to_sync
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id: int) -> str:
+    return f"user.{user_id}"
+
+
+def publish(user_ids: Iterable[int], events: List[Dict]):
+    """
+    Sends events to the groups of the given users after the current
+    transaction commits. `events` is one event per user, in the same order.
+    """
+    targets = list(zip(user_ids, events))
+    if targets:
+        transaction.on_commit(lambda: _send(targets))
+
+
+def _send(targets):
+    from channels.layers import get_channel_layer
+
+    try:
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        async_to_sync(_group_send_many)(channel_layer, targets)
+    except Exception as e:
+        logger.warning(f"Failed to publish {len(targets)} realtime events: {str(e)}")
+
+
+async def _group_send_many(channel_layer, targets):
+    sent_at = time.time()
+    for user_id, event in targets:
+        await channel_layer.group_send(user_group(user_id), {**event, 'sent_at': sent_at})
+
+
+def notification_payload(notification) -> Dict:
+    return {
+        'id': notification.id,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'sender': notification.sender_id,
+        'is_read': notification.is_read,
+        'group_count': notification.group_count,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def message_payload(message) -> Dict:
+    return {
+        'id': message.id,
+        'thread': message.thread_id,
+        'sender': message.sender_id,
+        'sender_username': message.sender.username,
+        'content': message.content,
+        'is_urgent': message.is_urgent,
+        'moderation_status': message.moderation_status,
+        'created_at': message.created_at.isoformat() if message.created_at else None,
+    }
+
+
+def notifications_created(notifications: Iterable):
+    notifications = list(notifications)
+    publish(
+        [notification.recipient_id for notification in notifications],
+        [{'type': 'notification.created', 'notification': notification_payload(notification)}
+         for notification in notifications],
+    )
+
+
+def message_created(message, recipient_ids: Iterable[int]):
+    recipient_ids = list(recipient_ids)
+    event = {'type': 'message.created', 'message': message_payload(message)}
+    publish(recipient_ids, [event] * len(recipient_ids))
+
+
+def unread_changed(user_id: int):
+    publish([user_id], [{'type': 'unread.changed'}])
+
+
+class RealtimeMetrics:
+    """
+    Thread-safe connection and push counters for this process.
+
+    Fan-out latency is the time from an event being published to the
+    consumer sending it down the socket.
+    """
+
+    def __init__(self, window: int = 10000):
+        self._lock = threading.Lock()
+        self._counts = {'active_connections': 0, 'peak_connections': 0, 'total_connections': 0,
+                        'rejected_connections': 0, 'events_pushed': 0}
+        self._latencies = deque(maxlen=window)
+
+    def connected(self):
+        with self._lock:
+            self._counts['active_connections'] += 1
+            self._counts['total_connections'] += 1
+            self._counts['peak_connections'] = max(
+                self._counts['peak_connections'], self._counts['active_connections']
+            )
+
+    def disconnected(self):
+        with self._lock:
+            self._counts['active_connections'] -= 1
+
+    def rejected(self):
+        with self._lock:
+            self._counts['rejected_connections'] += 1
+
+    def pushed(self, sent_at=None):
+        with self._lock:
+            self._counts['events_pushed'] += 1
+            if sent_at:
+                self._latencies.append(max(0.0, time.time() - sent_at))
+
+    def reset(self):
+        with self._lock:
+            active = self._counts['active_connections']
+            self._counts = {key: 0 for key in self._counts}
+            self._counts['active_connections'] = self._counts['peak_connections'] = active
+            self._latencies.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = sorted(self._latencies)
+        return {
+            **counts,
+            'fan_out_latency_ms': {
+                'p50': _percentile_ms(latencies, 50),
+                'p95': _percentile_ms(latencies, 95),
+                'p99': _percentile_ms(latencies, 99),
+            },
+        }
+
+
+def _percentile_ms(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    return round(sorted_values[int(percent / 100 * (len(sorted_values) - 1))] * 1000, 2)
+
+
+metrics = RealtimeMetrics()
@@ -0,0 +1,109 @@
+"""
+Locale-aware notification email rendering
+
+Emails are rendered from per-locale template pairs:
+
+    notifications/email/notification.<locale>.html
+    notifications/email/notification.<locale>.txt
+
+The plain-text alternative is its own template, so no HTML is stripped per
+message. Compiled templates are cached for the life of the process. Within a
+batch, notifications that share a locale, title and message (e.g. a
+broadcast) are rendered once with a placeholder for the recipient's name,
+which is substituted per recipient; templates must therefore only vary per
+recipient through `recipient_name`.
+"""
+import threading
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from django.template.loader import get_template
+from django.utils.html import escape
+
+SUPPORTED_LOCALES = ('en', 'am')
+DEFAULT_LOCALE = 'en'
+TEMPLATE_NAMES = {
+    'html': 'notifications/email/notification.{locale}.html',
+    'text': 'notifications/email/notification.{locale}.txt',
+}
+
+# Stands in for the recipient's name while the shared parts are rendered;
+# HTML escaping leaves it untouched
+RECIPIENT_PLACEHOLDER = '\x00recipient\x00'
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    text: str
+    html: str
+
+
+class NotificationEmailRenderer:
+    """
+    Renders notification emails in the recipient's preferred language.
+
+    `renders` counts full template renders, i.e. distinct
+    (locale, title, message) combinations seen by this renderer.
+    """
+
+    _templates: Dict[Tuple[str, str], object] = {}
+    _templates_lock = threading.Lock()
+
+    def __init__(self):
+        self.renders = 0
+
+    @classmethod
+    def get_template(cls, locale: str, kind: str):
+        """Compiled template for a locale and kind ('html' or 'text'), cached per process."""
+        key = (locale, kind)
+        template = cls._templates.get(key)
+        if template is None:
+            with cls._templates_lock:
+                template = cls._templates.get(key)
+                if template is None:
+                    template = get_template(TEMPLATE_NAMES[kind].format(locale=locale))
+                    cls._templates[key] = template
+        return template
+
+    @classmethod
+    def clear_template_cache(cls):
+        with cls._templates_lock:
+            cls._templates.clear()
+
+    @staticmethod
+    def locale_for(recipient) -> str:
+        locale = getattr(recipient, 'preferred_language', None)
+        return locale if locale in SUPPORTED_LOCALES else DEFAULT_LOCALE
+
+    @staticmethod
+    def recipient_name(recipient) -> str:
+        return recipient.get_full_name() or recipient.username
+
+    def render(self, notification) -> RenderedEmail:
+        return self.render_batch([notification])[0]
+
+    def render_batch(self, notifications: Sequence) -> List[RenderedEmail]:
+        """Renders one email per notification, in order."""
+        shared = {}
+        rendered = []
+        for notification in notifications:
+            locale = self.locale_for(notification.recipient)
+            key = (locale, notification.title, notification.message)
+            parts = shared.get(key)
+            if parts is None:
+                parts = shared[key] = self._render_shared(locale, notification)
+
+            html_parts, text_parts = parts
+            name = self.recipient_name(notification.recipient)
+            rendered.append(RenderedEmail(
+                subject=notification.title,
+                text=name.join(text_parts),
+                html=escape(name).join(html_parts),
+            ))
+        return rendered
+
+    def _render_shared(self, locale, notification):
+        context = {'notification': notification, 'recipient_name': RECIPIENT_PLACEHOLDER}
+        html = self.get_template(locale, 'html').render(context)
+        text = self.get_template(locale, 'text').render(context).strip() + '\n'
+        self.renders += 1
+        return html.split(RECIPIENT_PLACEHOLDER), text.split(RECIPIENT_PLACEHOLDER)
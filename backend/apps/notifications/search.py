@@ -0,0 +1,107 @@
+"""
+Full-text search over message content and thread titles
+
+On PostgreSQL, migration 0013 adds GIN indexes on
+
+    to_tsvector('simple', notifications_message.content)
+    to_tsvector('simple', notifications_messagethread.title)
+
+which PostgreSQL keeps up to date on every insert and update; queries use
+the same expressions so the planner can use them. The 'simple'
+configuration lower-cases words without stemming, which treats English and
+Amharic alike. Queries are parsed with websearch_to_tsquery, so users can
+write "exact phrases", OR and -excluded words, and results are ranked with
+ts_rank.
+
+On SQLite (tests, local development) the same migration creates FTS5 tables
+kept in sync by triggers, ranked with bm25(); every word of the query must
+match. Other databases fall back to icontains, unranked.
+
+Users only find messages in their own threads; admins search everything.
+"""
+import re
+from typing import List
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Message, MessageThread
+
+SEARCH_CONFIG = 'simple'
+
+# (table, column) pairs with a full-text index
+SEARCHABLE = {
+    Message: ('notifications_message', 'content'),
+    MessageThread: ('notifications_messagethread', 'title'),
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def search_words(text: str) -> List[str]:
+    return WORD_RE.findall(text.lower())
+
+
+def full_text_match(queryset: QuerySet, text: str) -> QuerySet:
+    """
+    Filters a Message or MessageThread queryset to rows matching `text`,
+    annotated with `search_rank` (higher is better) and ordered by it.
+    """
+    table, column = SEARCHABLE[queryset.model]
+    vendor = connection.vendor
+    if not text.strip():
+        return queryset.none()
+
+    if vendor == 'postgresql':
+        vector = f"to_tsvector('{SEARCH_CONFIG}', {table}.{column})"
+        query = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        match = RawSQL(f"{vector} @@ {query}", [text], output_field=BooleanField())
+        rank = RawSQL(f"ts_rank({vector}, {query})", [text], output_field=FloatField())
+    elif vendor == 'sqlite':
+        words = search_words(text)
+        if not words:
+            return queryset.none()
+        # Quoted, each word is matched literally; together they must all match
+        fts_query = ' '.join(f'"{word}"' for word in words)
+        fts = fts_table(table)
+        # Joined rather than a subquery per row, so the FTS match runs once
+        return queryset.extra(
+            tables=[fts],
+            where=[f"{fts}.rowid = {table}.id", f"{fts} MATCH %s"],
+            params=[fts_query],
+            select={'search_rank': f"-bm25({fts})"},
+        ).order_by('-search_rank', '-id')
+    else:
+        words = search_words(text)
+        if not words:
+            return queryset.none()
+        condition = Q()
+        for word in words:
+            condition &= Q(**{f"{column}__icontains": word})
+        return queryset.filter(condition).annotate(search_rank=Value(0.0)).order_by('-id')
+
+    return queryset.filter(match).annotate(search_rank=rank).order_by('-search_rank', '-id')
+
+
+def search_messages(user, text: str) -> QuerySet:
+    """
+    Messages matching `text`, best first: in the user's threads and not
+    deleted, or every message for admins.
+    """
+    messages = Message.objects.select_related('sender')
+    if getattr(user, 'user_type', None) != 'admin':
+        messages = messages.filter(thread__memberships__user=user, is_deleted=False)
+    return full_text_match(messages, text)
+
+
+def search_threads(user, text: str) -> QuerySet:
+    """Threads whose title matches `text`, best first: the user's own, or every thread for admins."""
+    threads = MessageThread.objects.all()
+    if getattr(user, 'user_type', None) != 'admin':
+        threads = threads.filter(memberships__user=user)
+    return full_text_match(threads, text)
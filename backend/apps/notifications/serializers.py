@@ -1,22 +1,24 @@
 from rest_framework import serializers
-from .models import Notification, Message, MessageThread
+from .content_objects import get_content_type, summarize_content_object
+from .models import Notification, Message, MessageThread, ThreadParticipant
 from users.models import User
-from django.db.models import Q
 
 
 class NotificationSerializer(serializers.ModelSerializer):
     sender_name = serializers.SerializerMethodField()
     sender_username = serializers.SerializerMethodField()
     content_object_type = serializers.SerializerMethodField()
+    content_object = serializers.SerializerMethodField()
     
     class Meta:
         model = Notification
         fields = [
             'id', 'recipient', 'sender', 'sender_name', 'sender_username', 
             'notification_type', 'title', 'message', 'content_object_type',
-            'is_read', 'created_at', 'sent_via_email', 'sent_via_sms', 'sent_via_push'
+            'content_object', 'is_read', 'created_at', 'updated_at', 'group_count',
+            'sent_via_email', 'sent_via_sms', 'sent_via_push'
         ]
-        read_only_fields = ['id', 'recipient', 'created_at']
+        read_only_fields = ['id', 'recipient', 'created_at', 'group_count']
     
     def get_sender_name(self, obj):
         if obj.sender:
@@ -29,10 +31,15 @@ class NotificationSerializer(serializers.ModelSerializer):
         return None
     
     def get_content_object_type(self, obj):
-        if obj.content_type:
-            return obj.content_type.model
+        content_type = get_content_type(obj)
+        if content_type:
+            return content_type.model
         return None
 
+    def get_content_object(self, obj):
+        # Lists should call prefetch_content_objects first, or this queries per row
+        return summarize_content_object(obj)
+
 
 class UserSerializerForMessaging(serializers.ModelSerializer):
     """
@@ -64,7 +71,9 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_last_message(self, obj):
-        last_msg = obj.messages.last()
+        # Views listing threads pass each thread's ThreadParticipant in the context
+        thread_state = self.context.get('thread_states', {}).get(obj.id)
+        last_msg = thread_state.last_message if thread_state else obj.messages.last()
         if last_msg:
             return {
                 'id': last_msg.id,
@@ -75,14 +84,15 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         return None
 
     def get_unread_count(self, obj):
-        # Count unread messages for the current user
+        thread_state = self.context.get('thread_states', {}).get(obj.id)
+        if thread_state:
+            return thread_state.unread_count
+
+        # Unread messages of the current user, from their thread state
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            unread_count = obj.messages.filter(
-                ~Q(sender=request.user),  # Not sent by current user
-                ~Q(read_by=request.user)  # Not read by current user
-            ).count()
-            return unread_count
+            unread_count = obj.memberships.filter(user=request.user).values_list('unread_count', flat=True).first()
+            return unread_count or 0
         return 0
 
 
@@ -90,6 +100,7 @@ class MessageSerializer(serializers.ModelSerializer):
     sender_name = serializers.SerializerMethodField()
     sender_username = serializers.SerializerMethodField()
     is_read = serializers.SerializerMethodField()
+    read_by = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
@@ -115,5 +126,23 @@ class MessageSerializer(serializers.ModelSerializer):
     def get_is_read(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.read_by.filter(id=request.user.id).exists()
-        return False
\ No newline at end of file
+            return obj.is_read_by(request.user.id, self.get_read_watermarks(obj).get(request.user.id))
+        return False
+
+    def get_read_by(self, obj):
+        return [
+            user_id for user_id, watermark in self.get_read_watermarks(obj).items()
+            if obj.is_read_by(user_id, watermark)
+        ]
+
+    def get_read_watermarks(self, obj):
+        """
+        Read watermark of every participant of the message's thread, loaded once
+        per thread and shared by all messages serialized with this context
+        """
+        watermarks = self.context.setdefault('read_watermarks', {})
+        if obj.thread_id not in watermarks:
+            watermarks[obj.thread_id] = dict(
+                ThreadParticipant.objects.filter(thread_id=obj.thread_id).values_list('user_id', 'last_read_message_id')
+            )
+        return watermarks[obj.thread_id]
\ No newline at end of file
@@ -1,15 +1,29 @@
 from django.conf import settings
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from .models import Notification, Message, MessageThread
+from django.core.mail import EmailMultiAlternatives
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, QuerySet, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import Notification, Message, MessageThread, ModerationTask, ThreadParticipant
+from .broadcast import send_broadcast
+from .coalescing import (
+    coalesce_notification, digest_delay, get_coalescing_options, has_pending_delivery, thread_group_key,
+)
+from .delivery import PermanentDeliveryError, enqueue_deliveries
+from .moderation import get_moderation_engine
+from .moderation_queue import enqueue_moderation, get_moderation_options, get_verdict
+from .rendering import NotificationEmailRenderer
+from .unread_counters import get_unread_counters
+from . import realtime
 from users.models import User
+from utils.cursors import before_cursor, encode_cursor
 from django.utils import timezone
 import logging
-import re
+from datetime import timedelta
 
 logger = logging.getLogger(__name__)
 
+MESSAGE_HISTORY_PAGE_SIZE = 30
+
 
 class NotificationService:
     """
@@ -19,69 +33,86 @@ class NotificationService:
     @staticmethod
     def create_notification(recipient, notification_type, title, message, 
                           sender=None, content_object=None, send_email=False, 
-                          send_sms=False, send_push=False):
+                          send_sms=False, send_push=False, group_key=''):
+        """
+        Create a notification and queue its delivery over the requested channels
+
+        The notification and its outbox rows are committed together; the
+        notification workers send them (see notifications/delivery.py).
+        With a group_key, notifications of coalesced types are merged into
+        the recipient's open notification for that key and email for digest
+        types is held back (see notifications/coalescing.py).
+        """
+        channels = [
+            channel for channel, requested in (('email', send_email), ('sms', send_sms), ('push', send_push))
+            if requested
+        ]
+        options = get_coalescing_options()
+        email_delay = digest_delay(notification_type, options)
+        delays = {'email': email_delay} if email_delay else None
+
+        with transaction.atomic():
+            notification = coalesce_notification(
+                recipient, notification_type, group_key, title, message,
+                sender=sender, content_object=content_object, options=options,
+            )
+            if notification is not None:
+                # Already counted as unread; only channels without a pending delivery are queued again
+                channels = [channel for channel in channels if not has_pending_delivery(notification, channel)]
+                if channels:
+                    enqueue_deliveries([notification], channels, delays)
+                realtime.notifications_created([notification])
+                return notification
+
+            notification = Notification.objects.create(
+                recipient=recipient,
+                sender=sender,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                content_object=content_object,
+                group_key=group_key,
+            )
+            if channels:
+                enqueue_deliveries([notification], channels, delays)
+            get_unread_counters().notifications_created([recipient.id])
+            realtime.notifications_created([notification])
+
+        return notification
+    
+    @staticmethod
+    def build_email_message(notification, connection=None, rendered=None):
         """
-        Create a notification and optionally send it via different channels
+        Build the email for a notification in the recipient's language
+
+        `rendered` is the notification's RenderedEmail when it was rendered as
+        part of a batch (see notifications/rendering.py).
         """
-        # Create the notification object
-        notification = Notification.objects.create(
-            recipient=recipient,
-            sender=sender,
-            notification_type=notification_type,
-            title=title,
-            message=message,
+        recipient_email = notification.recipient.email
+        if not recipient_email:
+            raise PermanentDeliveryError(f"User {notification.recipient.username} has no email address")
+
+        rendered = rendered or NotificationEmailRenderer().render(notification)
+        message = EmailMultiAlternatives(
+            subject=rendered.subject,
+            body=rendered.text,
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@laborcon.com'),
+            to=[recipient_email],
+            connection=connection,
         )
-        
-        # Set the content object if provided
-        if content_object:
-            notification.content_object = content_object
-            notification.save()
-        
-        # Send via different channels if requested
-        try:
-            if send_email:
-                NotificationService.send_email_notification(notification)
-                notification.sent_via_email = True
-                
-            if send_sms:
-                NotificationService.send_sms_notification(notification)
-                notification.sent_via_sms = True
-                
-            if send_push:
-                NotificationService.send_push_notification(notification)
-                notification.sent_via_push = True
-                
-            notification.save()
-        except Exception as e:
-            logger.error(f"Error sending notification {notification.id}: {str(e)}")
-        
-        return notification
-    
+        message.attach_alternative(rendered.html, 'text/html')
+        return message
+
     @staticmethod
     def send_email_notification(notification):
         """
         Send notification via email
+
+        Delivery workers send email in batches over a shared connection
+        (see notifications/email_dispatch.py); this sends a single message.
         """
         try:
-            subject = notification.title
-            html_message = render_to_string('notifications/email_template.html', {
-                'notification': notification,
-                'recipient': notification.recipient
-            })
-            plain_message = strip_tags(html_message)
-            
-            # Get recipient's email
-            recipient_email = notification.recipient.email
-            
-            # In production, you'd use proper email settings
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@laborcon.com'),
-                recipient_list=[recipient_email],
-                html_message=html_message,
-                fail_silently=False,
-            )
+            NotificationService.build_email_message(notification).send(fail_silently=False)
         except Exception as e:
             logger.error(f"Failed to send email notification: {str(e)}")
             raise
@@ -138,25 +169,34 @@ class NotificationService:
         """
         try:
             notification = Notification.objects.get(id=notification_id, recipient=user)
-            notification.is_read = True
-            notification.save()
-            return notification
         except Notification.DoesNotExist:
             return None
+
+        if not notification.is_read:
+            updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+            notification.is_read = True
+            get_unread_counters().notifications_read(user.id, updated)
+            if updated:
+                realtime.unread_changed(user.id)
+        return notification
     
     @staticmethod
     def mark_all_as_read(user):
         """
         Mark all notifications for a user as read
         """
-        Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        updated = Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        get_unread_counters().notifications_read(user.id, updated)
+        if updated:
+            realtime.unread_changed(user.id)
+        return updated
     
     @staticmethod
     def get_unread_count(user):
         """
-        Get the count of unread notifications for a user
+        Get the count of unread notifications for a user (see notifications/unread_counters.py)
         """
-        return Notification.objects.filter(recipient=user, is_read=False).count()
+        return get_unread_counters().get_notification_count(user.id)
 
 
 class MessagingService:
@@ -168,16 +208,45 @@ class MessagingService:
     def create_thread_with_participants(participants, title="", job_reference=None):
         """
         Create a new message thread with specified participants
+
+        Always a new thread, outside deduplication; conversations between
+        users should go through get_or_create_thread.
         """
         thread = MessageThread.objects.create(
             title=title,
             job_reference=job_reference
         )
-        
-        for participant in participants:
-            thread.participants.add(participant)
-        
+        thread.participants.add(*participants)
+
         return thread
+
+    @staticmethod
+    def get_or_create_thread(participants, title="", job_reference=None):
+        """
+        Get the thread between exactly these participants (about this job,
+        if given), creating it if there is none
+
+        One lookup on the unique participant key; concurrent creators of the
+        same thread end up with the same one. Returns (thread, created).
+        """
+        participant_key = MessageThread.get_participant_key(
+            [participant.id for participant in participants], job_reference.id if job_reference else None
+        )
+        thread = MessageThread.objects.filter(participant_key=participant_key).first()
+        if thread is not None:
+            return thread, False
+
+        try:
+            with transaction.atomic():
+                thread = MessageThread.objects.create(
+                    title=title,
+                    job_reference=job_reference,
+                    participant_key=participant_key
+                )
+                thread.participants.add(*participants)
+        except IntegrityError:
+            return MessageThread.objects.get(participant_key=participant_key), False
+        return thread, True
     
     @staticmethod
     def send_message(thread_id, sender, content, is_urgent=False):
@@ -193,11 +262,11 @@ class MessagingService:
                 is_urgent=is_urgent
             )
             
-            # Add sender to read_by field since they sent the message
-            message.read_by.add(sender)
-            
             # Create notifications for recipients
-            recipients = thread.participants.exclude(id=sender.id)
+            recipients = list(thread.participants.exclude(id=sender.id))
+            MessagingService.record_message_sent(message)
+            get_unread_counters().message_created(thread.id, [recipient.id for recipient in recipients])
+            realtime.message_created(message, [recipient.id for recipient in recipients])
             for recipient in recipients:
                 NotificationService.create_notification(
                     recipient=recipient,
@@ -207,34 +276,87 @@ class MessagingService:
                     sender=sender,
                     content_object=message,
                     send_email=True,
-                    send_push=True
+                    send_push=True,
+                    group_key=thread_group_key(thread.id)
                 )
             
             return message
         except MessageThread.DoesNotExist:
             raise ValueError(f"Thread with id {thread_id} does not exist")
     
+    @staticmethod
+    def record_message_sent(message):
+        """
+        Update the thread state of every participant for a new message: it is
+        the thread's last message, unread for everyone but the sender and read
+        by the sender
+        """
+        memberships = ThreadParticipant.objects.filter(thread_id=message.thread_id)
+        memberships.exclude(user_id=message.sender_id).update(unread_count=F('unread_count') + 1)
+        # Guarded so a slower concurrent send cannot move last_message backwards
+        memberships.filter(Q(last_message__isnull=True) | Q(last_message_id__lt=message.id)).update(
+            last_message=message, last_message_at=message.created_at
+        )
+        memberships.filter(user_id=message.sender_id).update(
+            last_read_message_id=Greatest(Coalesce('last_read_message_id', Value(0)), Value(message.id)),
+            last_read_at=timezone.now(),
+        )
+
+    @staticmethod
+    def advance_read_watermark(thread_id, user, message_id):
+        """
+        Mark every message in the thread up to message_id as read by the user
+
+        Moves the user's read watermark forward (never back) and returns the
+        number of messages that became read.
+        """
+        with transaction.atomic():
+            membership = ThreadParticipant.objects.select_for_update().filter(
+                thread_id=thread_id, user=user
+            ).first()
+            if membership is None:
+                return 0
+            if membership.last_read_message_id is not None and membership.last_read_message_id >= message_id:
+                return 0
+
+            if membership.last_message_id is None or message_id >= membership.last_message_id:
+                unread_count = 0
+            else:
+                # Reading part of the thread; what is left unread is after the watermark
+                unread_count = Message.objects.filter(thread_id=thread_id, id__gt=message_id).exclude(
+                    sender=user
+                ).count()
+            newly_read = max(0, membership.unread_count - unread_count)
+            ThreadParticipant.objects.filter(pk=membership.pk).update(
+                last_read_message_id=message_id, last_read_at=timezone.now(), unread_count=unread_count
+            )
+            get_unread_counters().messages_read(thread_id, user.id, newly_read)
+        return newly_read
+
     @staticmethod
     def mark_message_as_read(message_id, user):
         """
-        Mark a message as read by a specific user
+        Mark a message, and every earlier message in its thread, as read by a specific user
         """
         try:
             message = Message.objects.get(id=message_id)
-            message.read_by.add(user)
-            return message
         except Message.DoesNotExist:
             return None
+
+        if message.sender_id != user.id:
+            MessagingService.advance_read_watermark(message.thread_id, user, message.id)
+        return message
     
     @staticmethod
     def get_thread_messages(thread_id, user):
         """
-        Get all messages in a thread that the user has access to
+        Get all messages in a thread that the user has access to, marking them read
         """
         try:
             thread = MessageThread.objects.get(id=thread_id)
+            membership = ThreadParticipant.objects.filter(thread=thread, user=user).first()
             # Verify that the user is a participant in the thread
-            if not thread.participants.filter(id=user.id).exists():
+            if membership is None:
                 raise PermissionError("User is not a participant in this thread")
             
             messages = Message.objects.filter(
@@ -242,16 +364,46 @@ class MessagingService:
                 is_deleted=False
             ).select_related('sender')
             
-            # Mark unread messages as read by this user
-            for message in messages:
-                if message.sender != user and user not in message.read_by.all():
-                    message.read_by.add(user)
+            # Opening the thread reads everything in it: one watermark update
+            if membership.last_message_id is not None:
+                MessagingService.advance_read_watermark(thread.id, user, membership.last_message_id)
             
             return messages
         except MessageThread.DoesNotExist:
             raise ValueError(f"Thread with id {thread_id} does not exist")
 
 
+    @staticmethod
+    def get_message_history(thread_id, user, cursor=None, limit=MESSAGE_HISTORY_PAGE_SIZE):
+        """
+        Get a page of a thread's messages, newest first
+
+        Without a cursor this is the latest `limit` messages and opening it
+        marks the thread read; pass the returned cursor to load older ones.
+        Returns (messages, next_cursor), next_cursor being None on the oldest page.
+        """
+        try:
+            thread = MessageThread.objects.get(id=thread_id)
+        except MessageThread.DoesNotExist:
+            raise ValueError(f"Thread with id {thread_id} does not exist")
+
+        membership = ThreadParticipant.objects.filter(thread=thread, user=user).first()
+        if membership is None:
+            raise PermissionError("User is not a participant in this thread")
+
+        messages = Message.objects.filter(thread=thread, is_deleted=False)
+        if cursor:
+            messages = messages.filter(before_cursor(cursor))
+        page = list(messages.select_related('sender').order_by('-created_at', '-id')[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        if cursor is None and membership.last_message_id is not None:
+            MessagingService.advance_read_watermark(thread.id, user, membership.last_message_id)
+
+        return page, encode_cursor(page[-1]) if has_more else None
+
+
 # Utility functions for common notification scenarios
 
 def notify_job_application(job_application):
@@ -339,21 +491,46 @@ def notify_job_status_change(job_posting, change_message):
     )
 
 
+def notify_job_postings_published(employer, job_postings):
+    """
+    Send a single notification for a batch of job postings created by a bulk upload
+    """
+    count = len(job_postings)
+    titles = ', '.join(job_posting.title for job_posting in job_postings[:3])
+    if count > 3:
+        titles += f' and {count - 3} more'
+
+    NotificationService.create_notification(
+        recipient=employer,
+        notification_type='job_status_change',
+        title=f'{count} job posting{"s" if count != 1 else ""} published',
+        message=f'Your bulk upload created {count} job posting{"s" if count != 1 else ""}: {titles}',
+        content_object=job_postings[0] if count == 1 else None,
+        send_email=True,
+        send_push=True
+    )
+
+
 def notify_urgent_matter(recipients, title, message, sender=None):
     """
     Send an urgent notification to multiple recipients via SMS and other channels
+
+    Recipients may be a queryset or a list of users; the notifications are
+    created in bulk and delivered by the notification workers.
+    Returns the NotificationBroadcast tracking the fan-out.
     """
-    for recipient in recipients:
-        NotificationService.create_notification(
-            recipient=recipient,
-            notification_type='system_alert',
-            title=title,
-            message=message,
-            sender=sender,
-            send_email=True,
-            send_sms=True,  # Specifically send SMS for urgent matters
-            send_push=True
-        )
+    if isinstance(recipients, QuerySet):
+        recipient_ids = list(recipients.values_list('id', flat=True))
+    else:
+        recipient_ids = [recipient.id for recipient in recipients]
+
+    return send_broadcast(
+        title=title,
+        message=message,
+        channels=['email', 'sms', 'push'],  # Specifically send SMS for urgent matters
+        sender=sender,
+        recipient_ids=recipient_ids,
+    )
 
 
 class ContentModerationService:
@@ -361,68 +538,27 @@ class ContentModerationService:
     Service for moderating content including messages
     """
 
-    # Define potentially problematic content patterns
-    PROHIBITED_PATTERNS = [
-        # Offensive language patterns (basic examples)
-        r'(?i)hate.*[a-z]+',
-        r'(?i)kill.*[a-z]+',
-        r'(?i)attack.*[a-z]+',
-        # Potential contact information sharing
-        r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',  # email patterns
-        # Add more patterns as needed for Ethiopian context
-    ]
-
-    SENSITIVE_KEYWORDS = [
-        # Keywords that require closer review
-        'payment', 'money', 'cash', 'fee', 'personal', 'contact', 'outside',
-        'off-platform', 'private', 'deal', 'arrangement'
-    ]
-
     @staticmethod
     def check_content_safety(content):
         """
-        Check if content is safe based on predefined patterns
+        Check if content is safe against the moderation rules (see notifications/moderation.py)
         Returns (is_safe, warning_message, sensitivity_level)
         """
-        content_lower = content.lower()
-
-        # Check for prohibited patterns
-        for pattern in ContentModerationService.PROHIBITED_PATTERNS:
-            if re.search(pattern, content):
-                return False, "Content contains potentially prohibited language", 'high'
-
-        # Check for sensitive keywords
-        found_sensitive = []
-        for keyword in ContentModerationService.SENSITIVE_KEYWORDS:
-            if keyword in content_lower:
-                found_sensitive.append(keyword)
-
-        if found_sensitive:
-            sensitivity = 'medium' if len(found_sensitive) < 3 else 'high'
-            warning = f"Content contains sensitive keywords: {', '.join(found_sensitive)}"
-            return True, warning, sensitivity
-
-        # If no issues found
-        return True, "", 'low'
+        result = get_moderation_engine().check(content)
+        return result.is_safe, result.warning, result.sensitivity_level
 
     @staticmethod
     def moderate_new_message(message):
         """
         Apply moderation to a new message
         """
-        is_safe, warning, sensitivity_level = ContentModerationService.check_content_safety(message.content)
-
-        message.is_content_safe = is_safe
-        message.content_warning = warning
-        message.sensitivity_level = sensitivity_level
-
-        # Determine moderation status
-        if not is_safe:
-            message.moderation_status = 'flagged'
-        elif warning:  # Has warnings but is still safe
-            message.moderation_status = 'pending'  # May want human review
-        else:
-            message.moderation_status = 'approved'  # Automatically approved if safe
+        # Unsafe content is flagged, content with warnings waits for human review
+        engine = get_moderation_engine()
+        verdict = get_verdict(message.content, engine)
+        for field, value in verdict._asdict().items():
+            setattr(message, field, value)
+        message.moderation_version = engine.version
+        message.review_priority = Message.get_review_priority(message.sensitivity_level, message.is_urgent)
 
         message.save()
         return message
@@ -432,7 +568,54 @@ class ContentModerationService:
         """
         Get messages that need moderation review
         """
-        return Message.objects.filter(moderation_status='pending').order_by('created_at')
+        return Message.objects.filter(moderation_status='pending').order_by('-review_priority', 'created_at')
+
+    @staticmethod
+    def claim_moderation_batch(moderator, limit=None):
+        """
+        Lease the next pending messages to a moderator, most sensitive first
+
+        Returns the moderator's unexpired claims topped up to `limit` with
+        unclaimed messages. Concurrent moderators never get the same message:
+        candidates are locked with SKIP LOCKED where the database supports
+        it, and only still-claimable messages are leased. Claims expire after
+        REVIEW_LEASE_SECONDS and are released by a moderation action.
+        """
+        options = get_moderation_options()
+        limit = limit or options['REVIEW_BATCH_SIZE']
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=options['REVIEW_LEASE_SECONDS'])
+        queue = ContentModerationService.get_moderation_queue()
+        claimable = Q(review_claimed_at__isnull=True) | Q(review_claimed_at__lt=stale_before)
+
+        with transaction.atomic():
+            held = list(
+                queue.filter(review_claimed_by=moderator, review_claimed_at__gte=stale_before)
+                .values_list('id', flat=True)[:limit]
+            )
+            # Renewing the moderator's own claims restarts their lease
+            Message.objects.filter(id__in=held, review_claimed_by=moderator).update(review_claimed_at=now)
+            if len(held) < limit:
+                ids = list(
+                    queue.filter(claimable)
+                    .select_for_update(skip_locked=True)
+                    .values_list('id', flat=True)[:limit - len(held)]
+                )
+                Message.objects.filter(claimable, id__in=ids, moderation_status='pending').update(
+                    review_claimed_by=moderator, review_claimed_at=now
+                )
+
+        return list(queue.filter(review_claimed_by=moderator, review_claimed_at=now).select_related('sender', 'thread'))
+
+    @staticmethod
+    def release_moderation_claims(moderator, message_ids=None):
+        """
+        Return a moderator's claimed messages (all of them, or `message_ids`) to the queue
+        """
+        claims = Message.objects.filter(review_claimed_by=moderator)
+        if message_ids is not None:
+            claims = claims.filter(id__in=message_ids)
+        return claims.update(review_claimed_by=None, review_claimed_at=None)
 
     @staticmethod
     def manual_moderation_action(message_id, action, moderator_user, reason=''):
@@ -457,7 +640,12 @@ class ContentModerationService:
 
             message.reviewed_by = moderator_user
             message.reviewed_at = timezone.now()
-            message.save()
+            message.review_claimed_by = None
+            message.review_claimed_at = None
+            with transaction.atomic():
+                # A queued message's automatic verdict must not overwrite the moderator's
+                ModerationTask.objects.filter(message_id=message.id).delete()
+                message.save()
 
             return message
         except Message.DoesNotExist:
@@ -474,40 +662,52 @@ class EnhancedMessagingService(MessagingService):
     def send_message(thread_id, sender, content, is_urgent=False):
         """
         Send a message within a thread with content moderation
+
+        The message is stored as queued for the moderation
+        workers; recipients are notified once it is approved (see
+        notifications/moderation_queue.py).
         """
         try:
             thread = MessageThread.objects.get(id=thread_id)
 
-            # Create the message
-            message = Message.objects.create(
-                thread=thread,
-                sender=sender,
-                content=content,
-                is_urgent=is_urgent
-            )
+            with transaction.atomic():
+                message = Message.objects.create(
+                    thread=thread,
+                    sender=sender,
+                    content=content,
+                    is_urgent=is_urgent,
+                    moderation_status='queued'
+                )
+                enqueue_moderation(message)
 
-            # Apply content moderation
-            message = ContentModerationService.moderate_new_message(message)
-
-            # Only add sender to read_by if the message is approved
-            if message.moderation_status == 'approved':
-                message.read_by.add(sender)
-
-            # If the message is approved, create notifications for recipients
-            if message.moderation_status == 'approved':
-                recipients = thread.participants.exclude(id=sender.id)
-                for recipient in recipients:
-                    NotificationService.create_notification(
-                        recipient=recipient,
-                        notification_type='message_received',
-                        title=f"New message from {sender.get_full_name() or sender.username}",
-                        message=content[:100] + "..." if len(content) > 100 else content,
-                        sender=sender,
-                        content_object=message,
-                        send_email=True,
-                        send_push=True
-                    )
+                # Unread counts include messages still awaiting moderation, as the thread list always has
+                recipient_ids = list(thread.participants.exclude(id=sender.id).values_list('id', flat=True))
+                MessagingService.record_message_sent(message)
+                get_unread_counters().message_created(thread.id, recipient_ids)
 
             return message
         except MessageThread.DoesNotExist:
-            raise ValueError(f"Thread with id {thread_id} does not exist")
\ No newline at end of file
+            raise ValueError(f"Thread with id {thread_id} does not exist")
+
+    @staticmethod
+    def deliver_approved_message(message):
+        """
+        Push an approved message to the other participants and notify them
+        """
+        thread = message.thread
+        sender = message.sender
+        content = message.content
+        recipients = list(thread.participants.exclude(id=sender.id))
+        realtime.message_created(message, [recipient.id for recipient in recipients])
+        for recipient in recipients:
+            NotificationService.create_notification(
+                recipient=recipient,
+                notification_type='message_received',
+                title=f"New message from {sender.get_full_name() or sender.username}",
+                message=content[:100] + "..." if len(content) > 100 else content,
+                sender=sender,
+                content_object=message,
+                send_email=True,
+                send_push=True,
+                group_key=thread_group_key(thread.id)
+            )
\ No newline at end of file
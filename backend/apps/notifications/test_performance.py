@@ -0,0 +1,270 @@
+import asyncio
+import random
+import re
+
+import pytest
+from django.core import mail
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from apps.notifications.email_dispatch import EmailBatchDispatcher
+from apps.notifications.models import Notification
+from apps.notifications.moderation import ModerationEngine
+from apps.notifications.rendering import NotificationEmailRenderer
+from apps.notifications.services import NotificationService
+from tests.smtp_stub import run_smtp_stub
+from users.models import User
+
+MESSAGE_COUNT = 200
+
+
+@pytest.fixture
+def smtp_stub(settings):
+    # connect_latency models the TCP + TLS setup of a real mail server
+    with run_smtp_stub(connect_latency=0.005) as server:
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST = server.host
+        settings.EMAIL_PORT = server.port
+        settings.EMAIL_USE_TLS = False
+        yield server
+
+
+@pytest.fixture
+def notifications():
+    return [
+        Notification(
+            recipient=User(username=f"user{index}", email=f"user{index}@example.com"),
+            notification_type='system_alert',
+            title='Maintenance window',
+            message='The platform will be down for maintenance tonight.',
+        )
+        for index in range(MESSAGE_COUNT)
+    ]
+
+
+def test_email_one_connection_per_message_benchmark(benchmark, smtp_stub, notifications):
+    def send():
+        for notification in notifications:
+            NotificationService.build_email_message(notification, connection=mail.get_connection()).send()
+
+    benchmark.pedantic(send, rounds=3)
+    benchmark.extra_info['messages_per_second'] = MESSAGE_COUNT / benchmark.stats.stats.mean
+
+
+def test_email_batch_dispatcher_benchmark(benchmark, smtp_stub, notifications):
+    def send():
+        EmailBatchDispatcher(max_messages_per_connection=100).send(notifications)
+
+    benchmark.pedantic(send, rounds=3)
+    benchmark.extra_info['messages_per_second'] = MESSAGE_COUNT / benchmark.stats.stats.mean
+
+
+RENDER_BATCH_SIZE = 10000
+
+
+@pytest.fixture
+def broadcast_notifications():
+    languages = ['en', 'am']
+    return [
+        Notification(
+            recipient=User(username=f"user{index}", preferred_language=languages[index % 2]),
+            notification_type='system_alert',
+            title='Road closure',
+            message='The Bahir Dar road is closed today.',
+        )
+        for index in range(RENDER_BATCH_SIZE)
+    ]
+
+
+def test_email_render_per_message_benchmark(benchmark, broadcast_notifications):
+    def render():
+        for notification in broadcast_notifications:
+            html = render_to_string('notifications/email/notification.en.html', {
+                'notification': notification,
+                'recipient_name': notification.recipient.username,
+            })
+            strip_tags(html)
+
+    benchmark.pedantic(render, rounds=3)
+    benchmark.extra_info['renders_per_second'] = RENDER_BATCH_SIZE / benchmark.stats.stats.mean
+
+
+def test_email_render_batch_benchmark(benchmark, broadcast_notifications):
+    def render():
+        NotificationEmailRenderer().render_batch(broadcast_notifications)
+
+    benchmark.pedantic(render, rounds=3)
+    benchmark.extra_info['renders_per_second'] = RENDER_BATCH_SIZE / benchmark.stats.stats.mean
+
+
+WEBSOCKET_COUNT = 2000
+
+
+@pytest.fixture
+def websocket_settings(settings):
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': WEBSOCKET_COUNT * 2},
+    }}
+
+
+def test_websocket_fan_out_benchmark(benchmark, websocket_settings):
+    """Pushes one notification to each of WEBSOCKET_COUNT connected sockets."""
+    from channels.layers import get_channel_layer
+    from channels.testing import WebsocketCommunicator
+    from django.core.cache import cache
+
+    from apps.notifications.consumers import NotificationConsumer
+    from apps.notifications.realtime import _group_send_many, metrics
+    from apps.notifications.unread_counters import get_unread_counters
+
+    users = [User(id=index + 1, username=f"user{index}") for index in range(WEBSOCKET_COUNT)]
+    # Counters exist, so consumers never fall back to the database
+    cache.set_many({get_unread_counters().notifications_key(user.id): 0 for user in users})
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    metrics.reset()
+
+    async def connect_all():
+        communicators = []
+        for user in users:
+            communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/')
+            communicator.scope['user'] = user
+            await communicator.connect()
+            await communicator.receive_json_from()
+            communicators.append(communicator)
+        return communicators
+
+    async def fan_out(communicators):
+        event = {'type': 'notification.created', 'notification': {'id': 1, 'title': 'Road closure'}}
+        await _group_send_many(get_channel_layer(), [(user.id, event) for user in users])
+        for communicator in communicators:
+            assert (await communicator.receive_json_from(timeout=10))['type'] == 'notification'
+            await communicator.receive_json_from(timeout=10)  # unread count
+
+    communicators = loop.run_until_complete(connect_all())
+    try:
+        benchmark.pedantic(lambda: loop.run_until_complete(fan_out(communicators)), rounds=3)
+    finally:
+        loop.run_until_complete(asyncio.gather(*(communicator.disconnect() for communicator in communicators)))
+        loop.close()
+        asyncio.set_event_loop(None)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['peak_connections'] == WEBSOCKET_COUNT
+    benchmark.extra_info.update({
+        'peak_connections': snapshot['peak_connections'],
+        'events_pushed': snapshot['events_pushed'],
+        'fan_out_latency_ms': snapshot['fan_out_latency_ms'],
+        'pushes_per_second': WEBSOCKET_COUNT / benchmark.stats.stats.mean,
+    })
+
+
+MODERATION_CORPUS_SIZE = 2000
+CORPUS_WORDS = (
+    'hello when can you start the job is in Addis Ababa we need a cleaner and a cook for three months '
+    'the salary is paid monthly please bring your documents the contract starts next week thank you '
+    'ሰላም ስራው መቼ ይጀምራል ደሞዝ በወር ይከፈላል እባክዎ ሰነዶችዎን ይዘው ይምጡ አመሰግናለሁ ቤት ሰራተኛ ምግብ አብሳይ'
+).split()
+CORPUS_HITS = ['payment', 'cash', 'ክፍያ', 'ገንዘብ', 'worker@example.com', '0911223344', 'attack']
+
+
+@pytest.fixture(scope='module')
+def moderation_corpus():
+    """Messages of real chat lengths (mostly short, some long), a tenth with a rule hit."""
+    generator = random.Random(42)
+    corpus = []
+    for index in range(MODERATION_CORPUS_SIZE):
+        length = int(generator.choice([8, 15, 30, 60, 120, 300]) * generator.uniform(0.5, 1.5))
+        words = [generator.choice(CORPUS_WORDS) for _ in range(length)]
+        if index % 10 == 0:
+            words.insert(generator.randrange(len(words)), generator.choice(CORPUS_HITS))
+        corpus.append(' '.join(words))
+    return corpus
+
+
+LEGACY_PROHIBITED_PATTERNS = [
+    r'(?i)hate.*[a-z]+',
+    r'(?i)kill.*[a-z]+',
+    r'(?i)attack.*[a-z]+',
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+]
+LEGACY_SENSITIVE_KEYWORDS = [
+    'payment', 'money', 'cash', 'fee', 'personal', 'contact', 'outside',
+    'off-platform', 'private', 'deal', 'arrangement',
+]
+
+
+def legacy_check_content_safety(content):
+    """The checker the moderation engine replaced: one re.search per pattern, one scan per keyword."""
+    content_lower = content.lower()
+    for pattern in LEGACY_PROHIBITED_PATTERNS:
+        if re.search(pattern, content):
+            return False
+    return [keyword for keyword in LEGACY_SENSITIVE_KEYWORDS if keyword in content_lower]
+
+
+def run_moderation_benchmark(benchmark, corpus, check):
+    benchmark.pedantic(lambda: [check(message) for message in corpus], rounds=5)
+    characters = sum(len(message) for message in corpus)
+    benchmark.extra_info['messages_per_second'] = len(corpus) / benchmark.stats.stats.mean
+    benchmark.extra_info['mb_per_second'] = characters / benchmark.stats.stats.mean / 1e6
+
+
+def test_moderation_legacy_benchmark(benchmark, moderation_corpus):
+    run_moderation_benchmark(benchmark, moderation_corpus, legacy_check_content_safety)
+
+
+def test_moderation_engine_benchmark(benchmark, moderation_corpus):
+    run_moderation_benchmark(benchmark, moderation_corpus, ModerationEngine().check)
+
+
+def test_moderation_engine_pure_python_benchmark(benchmark, moderation_corpus):
+    run_moderation_benchmark(benchmark, moderation_corpus, ModerationEngine(use_native=False).check)
+
+
+# Every letter after a dot starts a new attempt of the legacy e-mail regex, each scanning to the end
+BACKTRACKING_MESSAGE = 'a.' * 5000
+
+
+def test_moderation_legacy_backtracking_benchmark(benchmark):
+    benchmark.pedantic(lambda: legacy_check_content_safety(BACKTRACKING_MESSAGE), rounds=3)
+
+
+def test_moderation_engine_backtracking_benchmark(benchmark):
+    benchmark.pedantic(lambda: ModerationEngine().check(BACKTRACKING_MESSAGE), rounds=3)
+
+
+SEARCH_CORPUS_SIZE = 20000
+
+
+@pytest.fixture
+def search_corpus(db, moderation_corpus):
+    from apps.notifications.models import Message
+    from apps.notifications.services import MessagingService
+
+    user = User.objects.create(username='searcher')
+    thread = MessagingService.create_thread_with_participants([user], title='Search benchmark')
+    messages = [
+        Message(thread=thread, sender=user, content=moderation_corpus[index % len(moderation_corpus)])
+        for index in range(SEARCH_CORPUS_SIZE)
+    ]
+    Message.objects.bulk_create(messages, batch_size=1000)
+    return user
+
+
+def test_message_search_icontains_benchmark(benchmark, search_corpus):
+    from apps.notifications.models import Message
+
+    def search():
+        return list(Message.objects.filter(content__icontains='contract', thread__memberships__user=search_corpus)
+                    .order_by('-id')[:20])
+
+    assert benchmark.pedantic(search, rounds=5)
+
+
+def test_message_search_full_text_benchmark(benchmark, search_corpus):
+    from apps.notifications.search import search_messages
+
+    assert benchmark.pedantic(lambda: list(search_messages(search_corpus, 'contract')[:20]), rounds=5)
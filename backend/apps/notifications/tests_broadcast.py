@@ -0,0 +1,251 @@
+import io
+import json
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.notifications.broadcast import (
+    BroadcastError,
+    RecipientsNotFound,
+    broadcast_progress,
+    claim_broadcast,
+    create_broadcast,
+    dispatch_broadcast,
+    run_broadcast,
+    run_pending_broadcasts,
+    send_broadcast,
+)
+from apps.notifications.delivery import ChannelWorkerPool
+from apps.notifications.models import Notification, NotificationBroadcast, NotificationDelivery
+from apps.notifications.services import notify_urgent_matter
+from apps.workers.models import WorkerProfile
+from apps.workers.tests_bulk_import import make_fayda_id
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_worker(index, region='Amhara'):
+    user = User.objects.create(username=f"worker{index}", email=f"worker{index}@example.com", user_type='worker')
+    WorkerProfile.objects.create(
+        user=user,
+        fayda_id=make_fayda_id(index),
+        full_name=f"Worker {index}",
+        age=25,
+        place_of_birth='Bahir Dar',
+        region_of_origin=region,
+        current_location='Addis Ababa',
+        emergency_contact_name='Emergency Contact',
+        emergency_contact_phone='0911000000',
+        education_level='secondary',
+        religion='eth_orthodox',
+        working_time='full_time',
+        years_experience=2,
+    )
+    return user
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BroadcastFanOutTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', user_type='admin')
+        self.amhara = [make_worker(i) for i in range(5)]
+        self.tigray = [make_worker(i, region='Tigray') for i in range(5, 7)]
+
+    def test_filter_fan_out_creates_notifications_and_deliveries_in_chunks(self):
+        broadcast = create_broadcast(
+            'Road closure', 'Avoid the Bahir Dar road today.', ['email', 'sms'], sender=self.admin,
+            recipient_filter={'user_type': 'worker', 'region': 'Amhara'},
+        )
+        self.assertEqual(broadcast.total_recipients, 5)
+
+        # Per chunk of 2: notification insert, delivery insert, counter update (+ savepoints),
+        # plus the chunk lookups and status updates; independent of per-recipient work
+        with self.assertNumQueries(22):
+            broadcast = run_broadcast(broadcast, chunk_size=2)
+
+        self.assertEqual(broadcast.status, 'completed')
+        self.assertEqual(broadcast.notifications_created, 5)
+        self.assertEqual(broadcast.deliveries_enqueued, 10)
+        self.assertEqual(
+            set(Notification.objects.filter(broadcast=broadcast).values_list('recipient_id', flat=True)),
+            {user.id for user in self.amhara},
+        )
+        self.assertEqual(NotificationDelivery.objects.filter(status='pending').count(), 10)
+
+    def test_progress_reports_delivery_counts(self):
+        broadcast = send_broadcast(
+            'Alert', 'Body', ['email', 'sms'], recipient_ids=[user.id for user in self.tigray],
+        )
+
+        ChannelWorkerPool('sms', workers=0).drain()
+        progress = broadcast_progress(broadcast)
+
+        self.assertEqual(progress['deliveries'], {'email': {'pending': 2}, 'sms': {'sent': 2}})
+        self.assertFalse(progress['delivery_completed'])
+
+        ChannelWorkerPool('email', workers=0).drain()
+        self.assertTrue(broadcast_progress(broadcast)['delivery_completed'])
+
+    def test_interrupted_broadcast_resumes_after_checkpoint(self):
+        broadcast = create_broadcast('Alert', 'Body', ['push'], recipient_filter={'region': 'Amhara'})
+        # Simulate a crash after the first two recipients were notified
+        first_two = sorted(user.id for user in self.amhara)[:2]
+        for user_id in first_two:
+            Notification.objects.create(recipient_id=user_id, title='Alert', message='Body', broadcast=broadcast)
+        NotificationBroadcast.objects.filter(pk=broadcast.pk).update(
+            status='failed', last_recipient_id=first_two[-1], notifications_created=2
+        )
+        broadcast.refresh_from_db()
+
+        broadcast = run_broadcast(broadcast)
+
+        self.assertEqual(broadcast.status, 'completed')
+        self.assertEqual(broadcast.notifications_created, 5)
+        self.assertEqual(Notification.objects.filter(broadcast=broadcast).count(), 5)
+
+    def test_explicit_recipients_are_queried_a_chunk_at_a_time(self):
+        ids = sorted(user.id for user in self.amhara)
+        broadcast = create_broadcast('Alert', 'Body', [], recipient_ids=ids)
+        User.objects.filter(id=ids[1]).update(is_active=False)
+
+        # Per chunk: recipient lookup, notification insert, counter update (+ savepoints)
+        with self.assertNumQueries(18) as queries:
+            broadcast = run_broadcast(broadcast, chunk_size=2)
+
+        chunk_lookups = [query['sql'] for query in queries.captured_queries
+                         if query['sql'].startswith('SELECT') and '"users_user"' in query['sql']]
+        self.assertEqual(len(chunk_lookups), 3)
+        self.assertTrue(chunk_lookups[0].endswith(f"IN ({ids[0]}, {ids[1]}))"))
+        self.assertEqual(
+            sorted(Notification.objects.filter(broadcast=broadcast).values_list('recipient_id', flat=True)),
+            ids[:1] + ids[2:],
+        )
+
+    def test_workers_claim_queued_and_abandoned_broadcasts(self):
+        queued = create_broadcast('Queued', 'Body', ['push'], recipient_filter={'region': 'Tigray'})
+        abandoned = create_broadcast('Abandoned', 'Body', ['push'], recipient_filter={'region': 'Amhara'})
+        live = create_broadcast('Live', 'Body', ['push'], recipient_filter={'region': 'Amhara'})
+        NotificationBroadcast.objects.filter(pk=abandoned.pk).update(
+            status='running', locked_at=timezone.now() - timedelta(hours=1)
+        )
+        NotificationBroadcast.objects.filter(pk=live.pk).update(status='running', locked_at=timezone.now())
+
+        self.assertEqual(run_pending_broadcasts(), 2)
+
+        statuses = dict(NotificationBroadcast.objects.values_list('title', 'status'))
+        self.assertEqual(statuses, {'Queued': 'completed', 'Abandoned': 'completed', 'Live': 'running'})
+        self.assertEqual(Notification.objects.filter(broadcast=queued).count(), 2)
+        self.assertIsNone(claim_broadcast())
+
+    @override_settings(NOTIFICATION_DELIVERY={'EAGER': True})
+    def test_eager_delivery_runs_the_broadcast_on_commit(self):
+        broadcast = create_broadcast('Alert', 'Body', [], recipient_filter={'region': 'Tigray'})
+        with self.captureOnCommitCallbacks(execute=True):
+            dispatch_broadcast(broadcast)
+
+        broadcast.refresh_from_db()
+        self.assertEqual((broadcast.status, broadcast.notifications_created), ('completed', 2))
+
+    def test_invalid_recipients_and_channels_are_rejected(self):
+        with self.assertRaisesMessage(RecipientsNotFound, 'Recipients do not exist: 9999'):
+            create_broadcast('Alert', 'Body', ['sms'], recipient_ids=[self.amhara[0].id, 9999])
+        with self.assertRaisesMessage(BroadcastError, 'Unknown recipient filters: salary'):
+            create_broadcast('Alert', 'Body', ['sms'], recipient_filter={'salary': 10})
+        with self.assertRaisesMessage(BroadcastError, 'The recipient filter must be an object'):
+            create_broadcast('Alert', 'Body', ['sms'], recipient_filter=['region', 'Amhara'])
+        with self.assertRaisesMessage(BroadcastError, "Recipient filter is_verified must be a bool, got 'yes'"):
+            create_broadcast('Alert', 'Body', ['sms'], recipient_filter={'is_verified': 'yes'})
+        with self.assertRaisesMessage(BroadcastError, 'Unknown channels: fax'):
+            create_broadcast('Alert', 'Body', ['fax'], recipient_filter={'region': 'Amhara'})
+        self.assertFalse(NotificationBroadcast.objects.exists())
+
+    def test_notify_urgent_matter_accepts_a_queryset(self):
+        broadcast = notify_urgent_matter(User.objects.filter(user_type='worker'), 'Alert', 'Body', self.admin)
+
+        self.assertEqual(broadcast.notifications_created, 7)
+        self.assertEqual(broadcast.deliveries_enqueued, 21)
+        self.assertEqual(Notification.objects.filter(sender=self.admin).count(), 7)
+
+    def test_command_sends_to_filtered_recipients(self):
+        output = io.StringIO()
+
+        call_command(
+            'send_broadcast', '--title', 'Alert', '--message', 'Body', '--channels', 'sms',
+            '--filter', 'region=Tigray', stdout=output,
+        )
+
+        progress = json.loads(output.getvalue())
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual(progress['notifications_created'], 2)
+
+    def test_command_runs_queued_broadcasts(self):
+        broadcast = create_broadcast('Alert', 'Body', ['sms'], recipient_filter={'region': 'Tigray'})
+        output = io.StringIO()
+
+        call_command('send_broadcast', '--pending', stdout=output)
+
+        self.assertIn('Ran 1 queued broadcasts', output.getvalue())
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'completed')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UrgentNotificationEndpointTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', user_type='admin')
+        self.workers = [make_worker(i) for i in range(3)]
+        self.url = reverse('notifications:send-urgent-notification')
+
+    def test_admin_queues_broadcast_by_filter_and_reads_progress(self):
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post(self.url, {
+            'title': 'Alert', 'message': 'Body', 'recipient_filter': {'region': 'Amhara'},
+        }, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['recipient_count'], 3)
+        progress_url = reverse('notifications:broadcast-progress', args=[response.data['broadcast_id']])
+        self.assertEqual(response.data['progress_url'], progress_url)
+        self.assertEqual(self.client.get(progress_url).data['status'], 'pending')
+        self.assertFalse(Notification.objects.exists())
+
+        run_pending_broadcasts()
+        progress = self.client.get(progress_url)
+        self.assertEqual(progress.data['status'], 'completed')
+        self.assertEqual(progress.data['deliveries_enqueued'], 9)
+        self.assertEqual(progress.data['deliveries']['sms'], {'pending': 3})
+
+    def test_unknown_recipient_returns_404(self):
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.post(self.url, {
+            'title': 'Alert', 'message': 'Body', 'recipient_ids': [self.workers[0].id, 9999],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_invalid_recipient_filter_returns_400(self):
+        self.client.force_authenticate(self.admin)
+
+        for recipient_filter in (['region', 'Amhara'], {'region': ['Amhara']}, {'is_verified': 'false'}):
+            response = self.client.post(self.url, {
+                'title': 'Alert', 'message': 'Body', 'recipient_filter': recipient_filter,
+            }, format='json')
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_non_admin_is_forbidden(self):
+        self.client.force_authenticate(self.workers[0])
+
+        response = self.client.post(self.url, {
+            'title': 'Alert', 'message': 'Body', 'recipient_ids': [self.workers[1].id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notifications.delivery import ChannelWorkerPool
+from apps.notifications.models import Notification, NotificationDelivery
+from apps.notifications.moderation_queue import ModerationWorkerPool
+from apps.notifications.services import EnhancedMessagingService, MessagingService, NotificationService
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationCoalescingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker', email='worker@example.com')
+        self.employer = User.objects.create(username='employer', first_name='Abebe', last_name='Kebede',
+                                            user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+
+    def message_notifications(self):
+        return Notification.objects.filter(recipient=self.worker, notification_type='message_received')
+
+    def release_digests(self):
+        NotificationDelivery.objects.update(next_attempt_at=timezone.now())
+
+    def test_burst_of_messages_becomes_one_notification(self):
+        for index in range(30):
+            MessagingService.send_message(self.thread.id, self.employer, f"Message {index}")
+
+        notification = self.message_notifications().get()
+        self.assertEqual(notification.group_count, 30)
+        self.assertEqual(notification.title, '30 new messages from Abebe Kebede')
+        self.assertEqual(notification.message, 'Message 29')
+        self.assertEqual(notification.content_object.content, 'Message 29')
+        self.assertEqual(NotificationService.get_unread_count(self.worker), 1)
+        self.assertEqual(
+            sorted(notification.deliveries.values_list('channel', flat=True)), ['email', 'push']
+        )
+
+    def test_threads_and_read_notifications_are_not_merged(self):
+        other_thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+        MessagingService.send_message(self.thread.id, self.employer, 'First')
+        MessagingService.send_message(other_thread.id, self.employer, 'Other thread')
+        self.assertEqual(self.message_notifications().count(), 2)
+
+        NotificationService.mark_all_as_read(self.worker)
+        MessagingService.send_message(self.thread.id, self.employer, 'After reading')
+
+        self.assertEqual(self.message_notifications().count(), 3)
+        self.assertEqual(self.message_notifications().filter(is_read=False).get().group_count, 1)
+
+    @override_settings(NOTIFICATION_COALESCING={'WINDOW_SECONDS': 60})
+    def test_idle_notification_starts_a_new_row(self):
+        MessagingService.send_message(self.thread.id, self.employer, 'Morning')
+        self.message_notifications().update(updated_at=timezone.now() - timedelta(minutes=5))
+
+        EnhancedMessagingService.send_message(self.thread.id, self.employer, 'Afternoon')
+        ModerationWorkerPool(workers=0).drain()
+
+        self.assertEqual(self.message_notifications().count(), 2)
+
+    def test_other_types_are_not_coalesced(self):
+        for _ in range(2):
+            NotificationService.create_notification(
+                self.worker, 'system_alert', 'Alert', 'Body', group_key='maintenance'
+            )
+
+        self.assertEqual(Notification.objects.filter(notification_type='system_alert').count(), 2)
+
+    def test_digest_email_is_held_back_and_sent_once(self):
+        for index in range(5):
+            MessagingService.send_message(self.thread.id, self.employer, f"Message {index}")
+        pool = ChannelWorkerPool('email', workers=0)
+
+        self.assertEqual(pool.drain(), 0)
+        self.release_digests()
+        self.assertEqual(pool.drain(), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('5 new messages from Abebe Kebede', mail.outbox[0].subject)
+
+        # Messages after the digest went out queue the next digest on the same notification
+        MessagingService.send_message(self.thread.id, self.employer, 'One more')
+        notification = self.message_notifications().get()
+        self.assertEqual(notification.deliveries.filter(channel='email', status='pending').count(), 1)
+
+    def test_digest_is_skipped_when_read_before_it_is_sent(self):
+        MessagingService.send_message(self.thread.id, self.employer, 'Hello')
+        NotificationService.mark_all_as_read(self.worker)
+        self.release_digests()
+
+        ChannelWorkerPool('email', workers=0).drain()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(NotificationDelivery.objects.get(channel='email').status, 'skipped')
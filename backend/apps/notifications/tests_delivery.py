@@ -0,0 +1,158 @@
+import io
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.notifications.delivery import (
+    ChannelWorkerPool,
+    claim_deliveries,
+    get_delivery_options,
+    outbox_backlog,
+    requeue_dead_deliveries,
+)
+from apps.notifications.models import Notification, NotificationDelivery
+from apps.notifications.services import NotificationService
+from users.models import User
+
+
+def create_notification(recipient, **channels):
+    return NotificationService.create_notification(
+        recipient=recipient,
+        notification_type='system_alert',
+        title='Maintenance window',
+        message='The platform will be down for maintenance tonight.',
+        **channels
+    )
+
+
+class NotificationOutboxTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='worker', email='worker@example.com', phone_number='+251911000000')
+
+    def test_create_notification_only_queues_delivery(self):
+        notification = create_notification(self.user, send_email=True, send_push=True)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(notification.deliveries.values_list('channel', flat=True)),
+            ['email', 'push']
+        )
+        self.assertTrue(all(status == 'pending' for status in notification.deliveries.values_list('status', flat=True)))
+        self.assertFalse(notification.sent_via_email)
+
+    def test_notification_without_channels_has_no_deliveries(self):
+        notification = create_notification(self.user)
+
+        self.assertFalse(notification.deliveries.exists())
+
+    def test_worker_pool_sends_and_marks_delivered(self):
+        notification = create_notification(self.user, send_email=True)
+        pool = ChannelWorkerPool('email', workers=0)
+
+        self.assertEqual(pool.drain(), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['worker@example.com'])
+        notification.refresh_from_db()
+        self.assertTrue(notification.sent_via_email)
+        delivery = notification.deliveries.get()
+        self.assertEqual(delivery.status, 'sent')
+        self.assertEqual(delivery.attempts, 1)
+        self.assertIsNotNone(delivery.sent_at)
+        self.assertEqual(pool.metrics.snapshot()['sent'], 1)
+
+    def test_channels_are_drained_independently(self):
+        create_notification(self.user, send_email=True, send_sms=True)
+
+        ChannelWorkerPool('sms', workers=0).drain()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(NotificationDelivery.objects.get(channel='email').status, 'pending')
+        self.assertEqual(NotificationDelivery.objects.get(channel='sms').status, 'sent')
+
+    @override_settings(NOTIFICATION_DELIVERY={'MAX_ATTEMPTS': 2, 'BACKOFF_BASE': 10, 'BACKOFF_MAX': 10})
+    def test_failures_are_retried_with_backoff_then_dead_lettered(self):
+        create_notification(self.user, send_sms=True)
+        pool = ChannelWorkerPool('sms', workers=0)
+
+        with mock.patch.object(NotificationService, 'send_sms_notification', side_effect=RuntimeError('gateway down')):
+            pool.run_once()
+            delivery = NotificationDelivery.objects.get()
+            self.assertEqual(delivery.status, 'pending')
+            self.assertEqual(delivery.attempts, 1)
+            self.assertEqual(delivery.last_error, 'gateway down')
+            self.assertGreater(delivery.next_attempt_at, timezone.now() + timedelta(seconds=4))
+
+            # Not due yet
+            self.assertEqual(pool.run_once(), 0)
+
+            NotificationDelivery.objects.update(next_attempt_at=timezone.now())
+            pool.run_once()
+
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, 'dead')
+        self.assertEqual(delivery.attempts, 2)
+        snapshot = pool.metrics.snapshot()
+        self.assertEqual((snapshot['retried'], snapshot['dead']), (1, 1))
+
+        self.assertEqual(requeue_dead_deliveries('sms'), 1)
+        self.assertEqual(pool.drain(), 1)
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.status, 'sent')
+
+    def test_expired_leases_are_reclaimed(self):
+        create_notification(self.user, send_push=True)
+        options = get_delivery_options()
+
+        self.assertEqual(len(claim_deliveries('push', 10, options)), 1)
+        # Leased deliveries are not handed out twice
+        self.assertEqual(claim_deliveries('push', 10, options), [])
+
+        NotificationDelivery.objects.update(
+            locked_at=timezone.now() - timedelta(seconds=options['LEASE_SECONDS'] + 1)
+        )
+        self.assertEqual(len(claim_deliveries('push', 10, options)), 1)
+
+    @override_settings(NOTIFICATION_DELIVERY={'EAGER': True})
+    def test_eager_delivery_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = create_notification(self.user, send_email=True)
+
+        self.assertEqual(len(mail.outbox), 1)
+        notification.refresh_from_db()
+        self.assertTrue(notification.sent_via_email)
+
+    def test_command_drains_once_and_reports(self):
+        create_notification(self.user, send_email=True, send_push=True)
+        output = io.StringIO()
+
+        call_command('run_notification_workers', '--once', '--workers', 'email=0', '--workers', 'push=0', stdout=output)
+
+        self.assertEqual(len(mail.outbox), 1)
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[-1]['backlog']['email'], {'sent': 1})
+        self.assertEqual(outbox_backlog()['push'], {'sent': 1})
+
+
+class NotificationWorkerThreadPoolTest(TransactionTestCase):
+    # Deliveries must stay in the outbox for the pool to drain them
+    @override_settings(NOTIFICATION_DELIVERY={'EAGER': False})
+    def test_thread_pool_drains_outbox(self):
+        users = [User.objects.create(username=f"user{i}", email=f"user{i}@example.com") for i in range(20)]
+        for user in users:
+            create_notification(user, send_email=True)
+
+        pool = ChannelWorkerPool('email', workers=4, batch_size=8)
+        try:
+            self.assertEqual(pool.drain(), 20)
+        finally:
+            pool.shutdown()
+
+        self.assertEqual(len(mail.outbox), 20)
+        self.assertEqual(Notification.objects.filter(sent_via_email=True).count(), 20)
+        self.assertEqual(pool.metrics.snapshot()['sent'], 20)
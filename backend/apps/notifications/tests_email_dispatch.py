@@ -0,0 +1,117 @@
+import smtplib
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.notifications.delivery import ChannelWorkerPool, PermanentDeliveryError
+from apps.notifications.email_dispatch import EmailBatchDispatcher
+from apps.notifications.models import Notification, NotificationDelivery
+from apps.notifications.services import NotificationService
+from tests.smtp_stub import run_smtp_stub
+from users.models import User
+
+
+def make_notifications(count, email='user{}@example.com'):
+    return [
+        Notification(
+            recipient=User(username=f"user{index}", email=email.format(index) if email else ''),
+            notification_type='system_alert',
+            title=f"Alert {index}",
+            message='Platform maintenance tonight.',
+        )
+        for index in range(count)
+    ]
+
+
+class FlakyConnection(LocmemEmailBackend):
+    """Locmem backend whose session drops after a given number of messages."""
+
+    def __init__(self, drop_after, **kwargs):
+        super().__init__(**kwargs)
+        self.drop_after = drop_after
+        self.sent = 0
+
+    def send_messages(self, messages):
+        if self.sent >= self.drop_after:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        self.sent += len(messages)
+        return super().send_messages(messages)
+
+
+class EmailBatchDispatcherTest(SimpleTestCase):
+    def test_reuses_one_smtp_connection_per_chunk(self):
+        with run_smtp_stub() as server:
+            dispatcher = EmailBatchDispatcher(
+                max_messages_per_connection=10,
+                connection_factory=lambda: mail.get_connection(
+                    'django.core.mail.backends.smtp.EmailBackend',
+                    host=server.host, port=server.port, use_tls=False, fail_silently=False,
+                ),
+            )
+            results = dispatcher.send(make_notifications(25))
+
+        self.assertEqual(results, [None] * 25)
+        self.assertEqual(len(server.messages), 25)
+        self.assertEqual(server.connection_count, 3)
+        self.assertEqual(dispatcher.connections_opened, 3)
+
+    def test_messages_have_plain_text_and_html(self):
+        message = NotificationService.build_email_message(make_notifications(1)[0])
+
+        self.assertEqual(message.to, ['user0@example.com'])
+        self.assertIn('Platform maintenance tonight.', message.body)
+        self.assertNotIn('<p>', message.body)
+        self.assertEqual(message.alternatives[0][1], 'text/html')
+
+    def test_failed_message_does_not_abort_the_batch(self):
+        notifications = make_notifications(3)
+        notifications[1].recipient.email = ''
+        dispatcher = EmailBatchDispatcher(connection_factory=lambda: mail.get_connection(
+            'django.core.mail.backends.locmem.EmailBackend'))
+
+        results = dispatcher.send(notifications)
+
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], PermanentDeliveryError)
+        self.assertIsNone(results[2])
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_reconnects_after_the_server_drops_the_session(self):
+        connections = iter([FlakyConnection(drop_after=2), FlakyConnection(drop_after=10)])
+        dispatcher = EmailBatchDispatcher(connection_factory=lambda: next(connections))
+
+        results = dispatcher.send(make_notifications(6))
+
+        # The third message hits the dropped session; the rest go over a new connection
+        self.assertIsInstance(results[2], smtplib.SMTPServerDisconnected)
+        self.assertEqual(sum(result is None for result in results), 5)
+        self.assertEqual(dispatcher.connections_opened, 2)
+
+
+@override_settings(NOTIFICATION_DELIVERY={'EMAIL_MESSAGES_PER_CONNECTION': 4})
+class EmailWorkerPoolTest(TestCase):
+    def test_email_pool_sends_in_batches_over_shared_connections(self):
+        users = [User.objects.create(username=f"user{i}", email=f"user{i}@example.com") for i in range(10)]
+        for user in users:
+            NotificationService.create_notification(user, 'system_alert', 'Alert', 'Body', send_email=True)
+
+        with run_smtp_stub() as server:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                                   EMAIL_HOST=server.host, EMAIL_PORT=server.port, EMAIL_USE_TLS=False):
+                sent = ChannelWorkerPool('email', workers=0).drain()
+
+        self.assertEqual(sent, 10)
+        self.assertEqual(len(server.messages), 10)
+        self.assertEqual(server.connection_count, 3)
+        self.assertEqual(Notification.objects.filter(sent_via_email=True).count(), 10)
+
+    def test_missing_email_address_is_dead_lettered_immediately(self):
+        user = User.objects.create(username='no-email')
+        NotificationService.create_notification(user, 'system_alert', 'Alert', 'Body', send_email=True)
+
+        ChannelWorkerPool('email', workers=0).drain()
+
+        delivery = NotificationDelivery.objects.get()
+        self.assertEqual(delivery.status, 'dead')
+        self.assertEqual(delivery.attempts, 1)
@@ -0,0 +1,319 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.notifications.moderation import (
+    DEFAULT_RULES, PROHIBITED, SENSITIVE, KeywordAutomaton, ModerationEngine, ModerationRule,
+)
+from apps.notifications.models import Message, ModerationTask, Notification
+from apps.notifications.moderation_queue import (
+    ModerationWorkerPool, claim_messages, moderate_messages, rescan_messages,
+)
+from apps.notifications.services import ContentModerationService, EnhancedMessagingService, MessagingService
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+class ModerationEngineTest(SimpleTestCase):
+    def setUp(self):
+        self.engines = [ModerationEngine(), ModerationEngine(use_native=False)]
+
+    def rule_names(self, text):
+        results = {tuple(hit.rule.name for hit in engine.scan(text)) for engine in self.engines}
+        self.assertEqual(len(results), 1, f"Native and pure-Python engines disagree on {text!r}")
+        return list(results.pop())
+
+    def test_keywords_match_whole_words(self):
+        self.assertEqual(self.rule_names('A coffee and a fee'), ['fee'])
+        self.assertEqual(self.rule_names('Send the PAYMENT, in cash.'), ['payment', 'cash'])
+        self.assertEqual(self.rule_names('That was a good idea, indeed'), [])
+
+    def test_prohibited_words_match_as_prefixes(self):
+        self.assertEqual(self.rule_names('They attacked him'), ['attack'])
+        self.assertEqual(self.rule_names('Skills: cooking'), [])
+
+    def test_ethiopic_keywords_match_inside_words(self):
+        self.assertEqual(self.rule_names('ክፍያውን በገንዘብ እከፍላለሁ'), ['payment (am)', 'money (am)'])
+        self.assertEqual(self.rule_names('ስልክ፡ቁጥሬ።'), ['phone (am)'])
+
+    def test_patterns(self):
+        self.assertEqual(self.rule_names('Write to abebe.k@example.com'), ['email address'])
+        self.assertEqual(self.rule_names('Call 0911223344 or +251711223344'), ['phone number', 'phone number'])
+        self.assertEqual(self.rule_names('Order 2511234 of 09 and 091122334455'), [])
+
+    def test_hits_carry_the_original_text(self):
+        hit = self.engines[0].scan('Pay in CASH please')[0]
+        self.assertEqual((hit.start, hit.end, hit.text), (7, 11, 'CASH'))
+
+    def test_check_levels(self):
+        engine = self.engines[0]
+        self.assertEqual(engine.check('See you tomorrow')[:3], (True, '', 'low'))
+        self.assertEqual(engine.check('About the fee')[:3],
+                         (True, 'Content contains sensitive keywords: fee', 'medium'))
+        self.assertEqual(engine.check('Cash, fee, private deal')[2], 'high')
+        self.assertEqual(engine.check('Cash cash cash')[2], 'medium')
+        self.assertFalse(engine.check('mail me at a@b.co').is_safe)
+
+    def test_long_message_with_many_dots_is_linear(self):
+        # The old e-mail regex retried from every letter here, scanning to the end each time
+        result = self.engines[0].check('a.' * 50000 + ' payment')
+        self.assertEqual([hit.rule.name for hit in result.hits], ['payment'])
+
+    def test_custom_rules_and_version(self):
+        rules = [ModerationRule('scam', PROHIBITED, keyword='scam'), ModerationRule('iban', SENSITIVE, pattern=r'ET\d{10}')]
+        engine = ModerationEngine(rules)
+        self.assertFalse(engine.check('Not a scam').is_safe)
+        self.assertEqual(engine.check('ET1234567890').sensitivity_level, 'medium')
+        self.assertNotEqual(engine.version, ModerationEngine(DEFAULT_RULES).version)
+        self.assertEqual(ModerationEngine(DEFAULT_RULES).version, ModerationEngine(list(DEFAULT_RULES)).version)
+
+    def test_automaton_finds_overlapping_keywords(self):
+        automaton = KeywordAutomaton(['he', 'she', 'hers'])
+        matches = [(end, automaton.keywords[index]) for end, index in automaton.iter('ushers')]
+        self.assertEqual(sorted(matches), [(3, 'he'), (3, 'she'), (5, 'hers')])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MessageModerationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker', email='worker@example.com')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+
+    def moderate(self, content):
+        message = Message.objects.create(thread=self.thread, sender=self.employer, content=content)
+        return ContentModerationService.moderate_new_message(message)
+
+    def test_moderation_statuses(self):
+        self.assertEqual(self.moderate('When can you start?').moderation_status, 'approved')
+
+        pending = self.moderate('The placement fee is 500 ብር, ክፍያ ከዛ በኋላ')
+        self.assertEqual(pending.moderation_status, 'pending')
+        self.assertEqual(pending.content_warning, 'Content contains sensitive keywords: fee, payment (am)')
+
+        flagged = self.moderate('Email me: employer@example.com')
+        self.assertEqual(flagged.moderation_status, 'flagged')
+        self.assertFalse(flagged.is_content_safe)
+        self.assertEqual(flagged.sensitivity_level, 'high')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ModerationQueueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker', email='worker@example.com')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+
+    def send(self, content):
+        return EnhancedMessagingService.send_message(self.thread.id, self.employer, content)
+
+    def notifications(self):
+        return Notification.objects.filter(recipient=self.worker, notification_type='message_received')
+
+    def test_verdicts_land_in_the_worker_and_notify(self):
+        approved = self.send('When can you start?')
+        held = self.send('What is the fee?')
+        flagged = self.send('Email me: employer@example.com')
+
+        self.assertEqual(approved.moderation_status, 'queued')
+        self.assertEqual(ModerationTask.objects.count(), 3)
+        self.assertFalse(self.notifications().exists())
+        self.assertEqual(list(ContentModerationService.get_moderation_queue()), [])
+
+        pool = ModerationWorkerPool(workers=0)
+        self.assertEqual(pool.drain(), 3)
+
+        self.assertEqual(pool.counts, {'approved': 1, 'pending': 1, 'flagged': 1})
+        self.assertFalse(ModerationTask.objects.exists())
+        statuses = dict(Message.objects.values_list('id', 'moderation_status'))
+        self.assertEqual(
+            [statuses[approved.id], statuses[held.id], statuses[flagged.id]], ['approved', 'pending', 'flagged']
+        )
+        self.assertEqual(Message.objects.get(id=approved.id).moderation_version, pool.engine.version)
+        self.assertEqual(self.notifications().get().object_id, approved.id)
+        self.assertEqual([message.id for message in ContentModerationService.get_moderation_queue()], [held.id])
+
+    def test_verdict_is_recorded_once(self):
+        message = self.send('Hello there')
+        claimed = claim_messages(10)
+
+        self.assertEqual(claimed, [message])
+        self.assertEqual(claim_messages(10), [])
+        self.assertEqual(moderate_messages(claimed), {'approved': 1})
+        self.assertEqual(moderate_messages(claimed), {})
+        self.assertEqual(self.notifications().count(), 1)
+
+    def test_moderator_decision_on_queued_message_stands(self):
+        message = self.send('When can you start?')
+        ContentModerationService.manual_moderation_action(message.id, 'remove', self.employer, 'Spam')
+
+        self.assertFalse(ModerationTask.objects.exists())
+        self.assertEqual(ModerationWorkerPool(workers=0).drain(), 0)
+        self.assertEqual(Message.objects.get(id=message.id).moderation_status, 'removed')
+        self.assertFalse(self.notifications().exists())
+
+    def test_decision_while_claimed_is_not_overwritten(self):
+        message = self.send('When can you start?')
+        claimed = claim_messages(10)
+        # Decided without deleting the task, e.g. a direct update
+        Message.objects.filter(id=message.id).update(moderation_status='removed', reviewed_by=self.employer)
+
+        self.assertEqual(moderate_messages(claimed), {})
+        self.assertEqual(Message.objects.get(id=message.id).moderation_status, 'removed')
+        self.assertFalse(ModerationTask.objects.exists())
+        self.assertFalse(self.notifications().exists())
+
+    def test_expired_lease_is_claimed_again(self):
+        message = self.send('Hello there')
+        claim_messages(10)
+        ModerationTask.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(claim_messages(10), [message])
+
+    @override_settings(MESSAGE_MODERATION={'EAGER': True}, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+    def test_eager_moderation_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = self.send('When can you start?')
+
+        self.assertEqual(message.moderation_status, 'approved')
+        self.assertFalse(ModerationTask.objects.exists())
+        self.assertEqual(self.notifications().count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ModerationRescanTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.moderator = User.objects.create(username='moderator', is_staff=True)
+        self.thread = MessagingService.create_thread_with_participants([self.employer])
+        self.engine = ModerationEngine([ModerationRule('scam', PROHIBITED, keyword='scam')])
+
+    def moderated(self, content, **fields):
+        message = Message.objects.create(thread=self.thread, sender=self.employer, content=content)
+        ContentModerationService.moderate_new_message(message)
+        Message.objects.filter(id=message.id).update(**fields)
+        return message
+
+    def status(self, message):
+        return Message.objects.get(id=message.id).moderation_status
+
+    def test_rescan_applies_new_rules_in_batches(self):
+        scam = [self.moderated(f'This is a scam {index}') for index in range(5)]
+        fee = self.moderated('What is the fee?')
+        reviewed = self.moderated('Another scam', reviewed_by=self.moderator)
+        removed = self.moderated('scam', moderation_status='removed')
+        unversioned = Message.objects.create(thread=self.thread, sender=self.employer, content='A scam')
+
+        dry_run = rescan_messages(self.engine, batch_size=2, workers=0, dry_run=True)
+        self.assertEqual((dry_run['scanned'], dry_run['changed']), (6, 6))
+        self.assertEqual(self.status(scam[0]), 'approved')
+
+        report = rescan_messages(self.engine, batch_size=2, workers=0)
+
+        self.assertEqual(report, {
+            'version': self.engine.version, 'batches': 3, 'scanned': 6, 'changed': 6,
+            'now_flagged': 5, 'now_approved': 1,
+        })
+        self.assertEqual([self.status(message) for message in scam], ['flagged'] * 5)
+        self.assertEqual(self.status(fee), 'approved')
+        self.assertEqual(self.status(reviewed), 'approved')
+        self.assertEqual(self.status(removed), 'removed')
+        self.assertEqual(self.status(unversioned), 'pending')
+        self.assertEqual(rescan_messages(self.engine, workers=0)['scanned'], 0)
+
+    def test_command_reports_current_rules(self):
+        self.moderated('Hello')
+        out = StringIO()
+        call_command('rescan_message_moderation', workers=0, stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual((report['scanned'], report['changed']), (0, 0))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ModeratorReviewQueueTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.first = User.objects.create(username='first', user_type='admin')
+        self.second = User.objects.create(username='second', user_type='admin')
+        self.thread = MessagingService.create_thread_with_participants([self.employer])
+
+    def held(self, content, is_urgent=False):
+        message = Message.objects.create(thread=self.thread, sender=self.employer, content=content,
+                                         is_urgent=is_urgent, moderation_status='queued')
+        return ContentModerationService.moderate_new_message(message)
+
+    def test_moderators_claim_disjoint_batches_by_priority(self):
+        medium = [self.held(f'About the fee {index}') for index in range(3)]
+        urgent = self.held('About the fee', is_urgent=True)
+        high = self.held('Cash, fee and a private deal')
+        self.held('Mail me at a@b.co')  # flagged, not pending
+
+        first = ContentModerationService.claim_moderation_batch(self.first, limit=3)
+        second = ContentModerationService.claim_moderation_batch(self.second, limit=3)
+
+        self.assertEqual(first, [high, urgent, medium[0]])
+        self.assertEqual(second, medium[1:])
+        self.assertEqual(ContentModerationService.claim_moderation_batch(self.first, limit=3), first)
+
+        ContentModerationService.manual_moderation_action(high.id, 'approve', self.first)
+        self.assertEqual(ContentModerationService.claim_moderation_batch(self.first, limit=3), first[1:])
+
+    @override_settings(MESSAGE_MODERATION={'REVIEW_LEASE_SECONDS': 60})
+    def test_abandoned_claims_expire_and_can_be_released(self):
+        messages = [self.held(f'About the fee {index}') for index in range(2)]
+        ContentModerationService.claim_moderation_batch(self.first)
+        Message.objects.filter(id=messages[0].id).update(review_claimed_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(ContentModerationService.claim_moderation_batch(self.second), [messages[0]])
+        self.assertEqual(ContentModerationService.release_moderation_claims(self.first), 1)
+        self.assertEqual(ContentModerationService.claim_moderation_batch(self.second), messages)
+
+    def test_claim_and_release_endpoints(self):
+        message = self.held('About the fee')
+        self.client.force_authenticate(self.first)
+
+        response = self.client.post(reverse('notifications:moderation-queue-claim'), {'limit': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['results']], [message.id])
+        self.assertIsNotNone(response.data['claimed_until'])
+
+        response = self.client.post(reverse('notifications:moderation-queue-release'),
+                                    {'message_ids': [message.id]}, format='json')
+        self.assertEqual(response.data, {'released': 1})
+
+        self.client.force_authenticate(self.employer)
+        response = self.client.post(reverse('notifications:moderation-queue-claim'))
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, MESSAGE_MODERATION={'EAGER': False})
+class SendMessageResponseTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+        self.client.force_authenticate(self.employer)
+
+    def test_queued_message_is_returned_without_a_review_warning(self):
+        response = self.client.post(reverse('notifications:send-message', args=[self.thread.id]),
+                                    {'content': 'When can you start?'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['moderation_status'], 'queued')
+        self.assertEqual(response.data['content'], 'When can you start?')
+        self.assertNotIn('warning', response.data)
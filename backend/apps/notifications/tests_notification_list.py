@@ -0,0 +1,120 @@
+from datetime import date
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from apps.employers.models import JobApplication, JobPosting
+from apps.notifications.content_objects import prefetch_content_objects
+from apps.notifications.models import Message, Notification
+from apps.notifications.services import MessagingService
+from apps.notifications.views import get_notifications
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationContentObjectTest(APITestCase):
+    def setUp(self):
+        self.worker = User.objects.create(username='worker', user_type='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+
+    def get(self, **params):
+        # The Ninja API's route of the same path comes first, so call the view directly
+        request = APIRequestFactory().get('/api/notifications/notifications/', params)
+        force_authenticate(request, self.employer)
+        return get_notifications(request)
+
+    def create_job(self, title='Nanny'):
+        return JobPosting.objects.create(
+            employer=self.employer, title=title, description='Looking after two children',
+            location='Bole', city='Addis Ababa', region='Addis Ababa', salary_min=3000, salary_max=5000,
+            working_arrangement='full_time', experience_required=1, education_required='primary',
+            start_date=date(2026, 11, 1),
+        )
+
+    def notify(self, content_object):
+        return Notification.objects.create(
+            recipient=self.employer, notification_type='system_alert', title='Update', message='Update',
+            content_type=ContentType.objects.get_for_model(content_object), object_id=content_object.pk,
+        )
+
+    def create_notifications(self, count):
+        start = Notification.objects.count()
+        for index in range(start, start + count):
+            job = self.create_job(f"Job {index}")
+            kind = index % 3
+            if kind == 0:
+                self.notify(job)
+            elif kind == 1:
+                worker = User.objects.create(username=f"applicant{index}", user_type='worker')
+                self.notify(JobApplication.objects.create(job=job, worker=worker))
+            else:
+                self.notify(Message.objects.create(thread=self.thread, sender=self.worker,
+                                                   content=f"Message {index}", moderation_status='approved'))
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(per_page=100)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_embeds_summaries_of_linked_objects(self):
+        job = self.create_job()
+        application = JobApplication.objects.create(job=job, worker=self.worker)
+        message = Message.objects.create(thread=self.thread, sender=self.worker, content='Hello',
+                                         moderation_status='approved')
+        held = Message.objects.create(thread=self.thread, sender=self.worker, content='Call me',
+                                      moderation_status='pending')
+        for content_object in (job, application, message, held):
+            self.notify(content_object)
+        Notification.objects.create(recipient=self.employer, notification_type='system_alert',
+                                    title='Alert', message='Alert')
+
+        results = self.get().data['results']
+        summaries = {(result['content_object_type'], (result['content_object'] or {}).get('id')): result
+                     for result in results}
+
+        self.assertEqual(summaries['jobposting', job.id]['content_object'],
+                         {'id': job.id, 'title': 'Nanny', 'status': 'active', 'city': 'Addis Ababa'})
+        self.assertEqual(summaries['jobapplication', application.id]['content_object'], {
+            'id': application.id, 'status': 'pending', 'job_id': job.id, 'job_title': 'Nanny',
+            'worker_id': self.worker.id,
+        })
+        self.assertEqual(summaries['message', message.id]['content_object']['excerpt'], 'Hello')
+        # Messages not (yet) approved are linked without their content
+        self.assertIsNone(summaries['message', held.id]['content_object']['excerpt'])
+        self.assertIsNone(summaries[None, None]['content_object'])
+
+    def test_deleted_object_summarizes_as_none(self):
+        job = self.create_job()
+        self.notify(job)
+        job.delete()
+
+        result = self.get().data['results'][0]
+        self.assertEqual(result['content_object_type'], 'jobposting')
+        self.assertIsNone(result['content_object'])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.create_notifications(6)
+        _, few = self.list_queries()
+
+        self.create_notifications(94)
+        response, many = self.list_queries()
+
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(many, few)
+
+    def test_prefetch_queries_once_per_content_type(self):
+        self.create_notifications(30)
+        notifications = list(Notification.objects.filter(recipient=self.employer))
+        ContentType.objects.get_for_models(JobPosting, JobApplication, Message)
+
+        with self.assertNumQueries(3):
+            prefetch_content_objects(notifications)
+        with self.assertNumQueries(0):
+            self.assertEqual(sum(1 for n in notifications if n.content_object is not None), 30)
@@ -0,0 +1,132 @@
+import io
+import json
+from datetime import date, timedelta
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.notifications.models import Message, ModerationTask, Notification, NotificationDelivery, ThreadParticipant
+from apps.notifications.partitioning import (
+    Partition,
+    expired_partitions,
+    parse_partition_bound,
+    plan_partitions,
+    prune_read_notifications,
+    release_partition_dependents,
+)
+from apps.notifications.services import MessagingService, NotificationService
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+TABLE = 'notifications_notification'
+
+
+class PartitionPlanningTest(TestCase):
+    legacy = Partition(f"{TABLE}_legacy", None, date(2026, 11, 1))
+
+    def test_parses_postgres_bounds(self):
+        self.assertEqual(
+            parse_partition_bound('p', "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')"),
+            Partition('p', date(2026, 11, 1), date(2026, 12, 1)),
+        )
+        self.assertEqual(
+            parse_partition_bound('legacy', "FOR VALUES FROM (MINVALUE) TO ('2026-11-01 00:00:00+00')"),
+            Partition('legacy', None, date(2026, 11, 1)),
+        )
+        self.assertIsNone(parse_partition_bound('default', 'DEFAULT'))
+
+    def test_plans_missing_months_after_existing_partitions(self):
+        existing = [self.legacy, Partition(f"{TABLE}_p202611", date(2026, 11, 1), date(2026, 12, 1))]
+
+        planned = plan_partitions(TABLE, existing, date(2026, 11, 15), months_ahead=3)
+
+        self.assertEqual(
+            [partition.name for partition in planned],
+            [f"{TABLE}_p202612", f"{TABLE}_p202701", f"{TABLE}_p202702"],
+        )
+        self.assertEqual(planned[-1].end, date(2027, 3, 1))
+        self.assertEqual(plan_partitions(TABLE, existing + planned, date(2026, 11, 15), months_ahead=3), [])
+
+    def test_expires_whole_months_past_retention_but_never_legacy(self):
+        existing = [
+            self.legacy,
+            Partition(f"{TABLE}_p202611", date(2026, 11, 1), date(2026, 12, 1)),
+            Partition(f"{TABLE}_p202612", date(2026, 12, 1), date(2027, 1, 1)),
+        ]
+
+        expired = expired_partitions(existing, date(2027, 12, 10), retain_months=12)
+
+        self.assertEqual([partition.name for partition in expired], [f"{TABLE}_p202611"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReadNotificationPruningTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='worker')
+        old = timezone.now() - timedelta(days=120)
+        for index in range(5):
+            notification = NotificationService.create_notification(
+                self.user, 'system_alert', f"Old {index}", 'Body', send_email=True
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=old, is_read=index < 3)
+        self.recent = NotificationService.create_notification(self.user, 'system_alert', 'Recent', 'Body')
+        Notification.objects.filter(pk=self.recent.pk).update(is_read=True)
+
+    def test_prunes_old_read_notifications_in_batches(self):
+        self.assertEqual(prune_read_notifications(older_than_days=90, batch_size=2, max_batches=1), 2)
+        self.assertEqual(prune_read_notifications(older_than_days=90, batch_size=2), 1)
+
+        self.assertEqual(Notification.objects.filter(title__startswith='Old').count(), 2)
+        self.assertFalse(Notification.objects.filter(title__startswith='Old', is_read=True).exists())
+        self.assertTrue(Notification.objects.filter(pk=self.recent.pk).exists())
+        self.assertEqual(NotificationDelivery.objects.count(), 2)
+
+    def test_command_reports_without_partitions_off_postgres(self):
+        output = io.StringIO()
+
+        call_command('maintain_notification_storage', '--dry-run', stdout=output)
+
+        report = json.loads(output.getvalue())
+        self.assertEqual(report, {'partitions': {}, 'read_notifications_pruned': 3})
+        self.assertEqual(Notification.objects.count(), 6)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PartitionDependentsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+        self.partition = Partition('p202611', date(2026, 11, 1), date(2026, 12, 1))
+        self.inside = timezone.datetime(2026, 11, 15, tzinfo=dt_timezone.utc)
+
+    def test_releases_references_to_messages_in_the_partition(self):
+        old = MessagingService.send_message(self.thread.id, self.employer, 'Old')
+        Message.objects.filter(id=old.id).update(created_at=self.inside)
+        ThreadParticipant.objects.update(last_message=old, last_read_message=old)
+        ModerationTask.objects.create(message=old)
+        recent = MessagingService.send_message(self.thread.id, self.employer, 'Recent')
+        ModerationTask.objects.create(message=recent)
+
+        report = release_partition_dependents('notifications_message', self.partition, batch_size=1)
+
+        # Sending `recent` already moved the thread's last_message and the sender's read position on
+        self.assertEqual(report, {'ThreadParticipant.last_message': 0, 'ThreadParticipant.last_read_message': 1,
+                                  'ModerationTask.message': 1})
+        self.assertFalse(ThreadParticipant.objects.filter(last_read_message=old).exists())
+        self.assertFalse(ThreadParticipant.objects.filter(last_message=old).exists())
+        self.assertEqual(list(ModerationTask.objects.values_list('message_id', flat=True)), [recent.id])
+
+    def test_deletes_deliveries_of_notifications_in_the_partition(self):
+        old = NotificationService.create_notification(self.worker, 'system_alert', 'Old', 'Body', send_email=True)
+        Notification.objects.filter(id=old.id).update(created_at=self.inside)
+        recent = NotificationService.create_notification(self.worker, 'system_alert', 'New', 'Body', send_email=True)
+
+        release_partition_dependents(TABLE, self.partition)
+
+        self.assertEqual(list(NotificationDelivery.objects.values_list('notification_id', flat=True)), [recent.id])
@@ -0,0 +1,91 @@
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.notifications.realtime import metrics
+from apps.notifications.services import MessagingService, NotificationService
+from core.asgi import application
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def connect(user=None, token=None):
+    if user is not None:
+        token = str(AccessToken.for_user(user))
+    path = f"/ws/notifications/?token={token}" if token else '/ws/notifications/'
+    return WebsocketCommunicator(application, path, headers=[(b'origin', b'http://testserver')])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class NotificationConsumerTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+
+    async def test_connection_without_valid_token_is_rejected(self):
+        for communicator in (connect(), connect(token='not-a-jwt')):
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4401)
+        self.assertEqual(metrics.snapshot()['rejected_connections'], 2)
+
+    async def test_pushes_new_notifications_and_unread_counts(self):
+        communicator = connect(self.worker)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'notifications': 0})
+
+        await database_sync_to_async(NotificationService.create_notification)(
+            self.worker, 'system_alert', 'Road closure', 'Avoid the Bahir Dar road today.'
+        )
+
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame['type'], 'notification')
+        self.assertEqual(frame['notification']['title'], 'Road closure')
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'notifications': 1})
+
+        await database_sync_to_async(NotificationService.mark_all_as_read)(self.worker)
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'unread_count', 'notifications': 0})
+
+        snapshot = metrics.snapshot()
+        self.assertEqual((snapshot['active_connections'], snapshot['events_pushed']), (1, 2))
+        await communicator.disconnect()
+        self.assertEqual(metrics.snapshot()['active_connections'], 0)
+
+    async def test_pushes_new_messages_to_other_participants_only(self):
+        thread = await database_sync_to_async(MessagingService.create_thread_with_participants)(
+            [self.worker, self.employer]
+        )
+        worker_socket, employer_socket = connect(self.worker), connect(self.employer)
+        for communicator in (worker_socket, employer_socket):
+            await communicator.connect()
+            await communicator.receive_json_from()
+
+        await database_sync_to_async(MessagingService.send_message)(thread.id, self.employer, 'Are you available?')
+
+        frames = [await worker_socket.receive_json_from() for _ in range(3)]
+        message = next(frame for frame in frames if frame['type'] == 'message')
+        self.assertEqual(message['message']['content'], 'Are you available?')
+        self.assertEqual(message['thread_unread_count'], 1)
+        # The message notification is pushed too
+        self.assertIn('notification', [frame['type'] for frame in frames])
+        self.assertTrue(await employer_socket.receive_nothing())
+
+        for communicator in (worker_socket, employer_socket):
+            await communicator.disconnect()
+
+    async def test_ping(self):
+        communicator = connect(self.worker)
+        await communicator.connect()
+        await communicator.receive_json_from()
+
+        await communicator.send_json_to({'type': 'ping'})
+
+        self.assertEqual(await communicator.receive_json_from(), {'type': 'pong'})
+        await communicator.disconnect()
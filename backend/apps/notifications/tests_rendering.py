@@ -0,0 +1,62 @@
+from django.test import SimpleTestCase
+
+from apps.notifications.models import Notification
+from apps.notifications.rendering import NotificationEmailRenderer
+from apps.notifications.services import NotificationService
+from users.models import User
+
+
+def make_notification(username, language='en', title='Maintenance window', message='Down tonight.', **user_fields):
+    return Notification(
+        recipient=User(username=username, email=f"{username}@example.com", preferred_language=language, **user_fields),
+        notification_type='system_alert',
+        title=title,
+        message=message,
+    )
+
+
+class NotificationEmailRendererTest(SimpleTestCase):
+    def test_renders_in_the_recipients_language(self):
+        renderer = NotificationEmailRenderer()
+
+        english, amharic = renderer.render_batch([make_notification('abebe'), make_notification('kebede', 'am')])
+
+        self.assertIn('Hello abebe,', english.text)
+        self.assertIn('ሰላም kebede፣', amharic.text)
+        self.assertIn('lang="am"', amharic.html)
+        self.assertEqual(amharic.subject, 'Maintenance window')
+
+    def test_unknown_language_falls_back_to_english(self):
+        rendered = NotificationEmailRenderer().render(make_notification('abebe', 'fr'))
+
+        self.assertIn('Hello abebe,', rendered.text)
+
+    def test_shared_content_is_rendered_once_per_batch(self):
+        renderer = NotificationEmailRenderer()
+        notifications = [make_notification(f"user{i}") for i in range(50)]
+        notifications.append(make_notification('other', title='Different title'))
+
+        rendered = renderer.render_batch(notifications)
+
+        self.assertEqual(renderer.renders, 2)
+        self.assertIn('Hello user7,', rendered[7].text)
+        self.assertIn('Hello user7,', rendered[7].html)
+
+    def test_recipient_name_is_escaped_in_html_only(self):
+        rendered = NotificationEmailRenderer().render(
+            make_notification('tom', first_name='Tom <b>', last_name='& Jerry')
+        )
+
+        self.assertIn('Hello Tom <b> & Jerry,', rendered.text)
+        self.assertIn('Hello Tom &lt;b&gt; &amp; Jerry,', rendered.html)
+
+    def test_plain_text_alternative_has_no_markup(self):
+        notification = make_notification('abebe', message='Bring <ID> & papers.\nArrive early.')
+
+        message = NotificationService.build_email_message(notification)
+
+        self.assertIn('Bring <ID> & papers.\nArrive early.', message.body)
+        self.assertNotIn('<p>', message.body)
+        html, mimetype = message.alternatives[0]
+        self.assertEqual(mimetype, 'text/html')
+        self.assertIn('Bring &lt;ID&gt; &amp; papers.<br>Arrive early.', html)
@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.notifications.models import Message
+from apps.notifications.search import search_messages, search_threads
+from apps.notifications.services import MessagingService
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MessageSearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.other = User.objects.create(username='other', user_type='employer')
+        self.admin = User.objects.create(username='admin', user_type='admin')
+        self.thread = MessagingService.create_thread_with_participants(
+            [self.worker, self.employer], title='Nanny position in Bole'
+        )
+        self.other_thread = MessagingService.create_thread_with_participants(
+            [self.other, self.employer], title='Gardener position'
+        )
+
+    def message(self, content, thread=None, **fields):
+        return Message.objects.create(thread=thread or self.thread, sender=self.employer, content=content, **fields)
+
+    def test_results_are_ranked_and_scoped(self):
+        long = self.message('We talked about many things today, the garden, the cooking and the nanny role')
+        short = self.message('Nanny interview on Monday')
+        self.message('Cooking schedule')
+        self.message('The nanny starts Monday', thread=self.other_thread)
+        self.message('Old nanny message', is_deleted=True)
+
+        self.assertEqual(list(search_messages(self.worker, 'nanny')), [short, long])
+        self.assertEqual(list(search_messages(self.worker, 'NANNY monday')), [short])
+        self.assertEqual(search_messages(self.admin, 'nanny').count(), 4)
+        self.assertEqual(list(search_messages(self.worker, '')), [])
+
+    def test_amharic_words(self):
+        message = self.message('ሰላም፡ ስራው መቼ ይጀምራል?')
+
+        self.assertEqual(list(search_messages(self.worker, 'ስራው')), [message])
+        self.assertEqual(list(search_messages(self.worker, 'ስራ')), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        message = self.message('Interview on Monday')
+        Message.objects.filter(id=message.id).update(content='Interview on Tuesday')
+
+        self.assertEqual(list(search_messages(self.worker, 'monday')), [])
+        self.assertEqual(list(search_messages(self.worker, 'tuesday')), [message])
+        message.delete()
+        self.assertEqual(list(search_messages(self.admin, 'tuesday')), [])
+
+    def test_thread_titles(self):
+        self.assertEqual(list(search_threads(self.worker, 'position')), [self.thread])
+        self.assertEqual(search_threads(self.admin, 'position').count(), 2)
+
+    def test_search_endpoint(self):
+        message = self.message('Can the nanny start in Bole?')
+        self.client.force_authenticate(self.worker)
+        url = reverse('notifications:search-messages')
+
+        response = self.client.get(url, {'q': 'bole'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['id'] for result in response.data['results']], [message.id])
+        self.assertGreater(response.data['results'][0]['search_rank'], 0)
+        self.assertEqual([thread['id'] for thread in response.data['threads']], [self.thread.id])
+        self.assertEqual(self.client.get(url).status_code, 400)
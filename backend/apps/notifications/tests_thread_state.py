@@ -0,0 +1,226 @@
+from importlib import import_module
+
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.notifications.models import MessageThread, ThreadParticipant
+from apps.notifications.services import EnhancedMessagingService, MessagingService
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ThreadParticipantStateTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+
+    def state(self, user, thread=None):
+        return ThreadParticipant.objects.get(thread=thread or self.thread, user=user)
+
+    def test_send_and_read_maintain_state(self):
+        first = MessagingService.send_message(self.thread.id, self.employer, 'Hello')
+        last = EnhancedMessagingService.send_message(self.thread.id, self.employer, 'Are you available?')
+
+        worker_state, employer_state = self.state(self.worker), self.state(self.employer)
+        self.assertEqual((worker_state.last_message_id, worker_state.unread_count), (last.id, 2))
+        self.assertEqual(worker_state.last_message_at, last.created_at)
+        self.assertIsNone(worker_state.last_read_message_id)
+        self.assertEqual((employer_state.unread_count, employer_state.last_read_message_id), (0, last.id))
+
+        MessagingService.mark_message_as_read(first.id, self.worker)
+        MessagingService.mark_message_as_read(first.id, self.worker)
+        worker_state = self.state(self.worker)
+        self.assertEqual((worker_state.unread_count, worker_state.last_read_message_id), (1, first.id))
+
+        list(MessagingService.get_thread_messages(self.thread.id, self.worker))
+        worker_state = self.state(self.worker)
+        self.assertEqual((worker_state.unread_count, worker_state.last_read_message_id), (0, last.id))
+
+    def test_thread_listing_query_count_does_not_grow_with_threads(self):
+        self.client.force_authenticate(self.worker)
+        url = reverse('notifications:user-threads')
+        MessagingService.send_message(self.thread.id, self.employer, 'Hello')
+
+        with CaptureQueriesContext(connection) as one_thread:
+            self.client.get(url)
+        for index in range(5):
+            thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+            MessagingService.send_message(thread.id, self.employer, f"Message {index}")
+        with CaptureQueriesContext(connection) as six_threads:
+            response = self.client.get(url)
+
+        self.assertEqual(len(six_threads), len(one_thread))
+        self.assertEqual(response.data['count'], 6)
+        first = response.data['results'][0]
+        self.assertEqual((first['last_message']['content'], first['unread_count']), ('Message 4', 1))
+        self.assertEqual(len(first['participants']), 2)
+
+    def test_thread_listing_is_sorted_by_last_activity(self):
+        older = MessagingService.create_thread_with_participants([self.worker, self.employer])
+        MessagingService.send_message(older.id, self.employer, 'Older thread')
+        MessagingService.send_message(self.thread.id, self.worker, 'Newest')
+        self.client.force_authenticate(self.worker)
+
+        response = self.client.get(reverse('notifications:user-threads'))
+
+        self.assertEqual([thread['id'] for thread in response.data['results']], [self.thread.id, older.id])
+        self.assertEqual(response.data['results'][0]['unread_count'], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReadWatermarkTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+        self.messages = [
+            MessagingService.send_message(self.thread.id, self.employer, f"Message {index}") for index in range(5)
+        ]
+        self.client.force_authenticate(self.worker)
+
+    def test_reading_a_message_reads_everything_before_it(self):
+        MessagingService.mark_message_as_read(self.messages[2].id, self.worker)
+
+        state = ThreadParticipant.objects.get(thread=self.thread, user=self.worker)
+        self.assertEqual((state.last_read_message_id, state.unread_count), (self.messages[2].id, 2))
+        self.assertIsNotNone(state.last_read_at)
+        self.assertTrue(self.messages[1].is_read)
+        self.assertFalse(self.messages[3].is_read)
+
+        # The watermark never moves back
+        MessagingService.mark_message_as_read(self.messages[0].id, self.worker)
+        state.refresh_from_db()
+        self.assertEqual((state.last_read_message_id, state.unread_count), (self.messages[2].id, 2))
+
+    def test_opening_a_thread_costs_the_same_whatever_its_length(self):
+        url = reverse('notifications:thread-messages', args=[self.thread.id])
+        with CaptureQueriesContext(connection) as short_thread:
+            self.client.get(url)
+
+        for index in range(20):
+            MessagingService.send_message(self.thread.id, self.employer, f"More {index}")
+        with CaptureQueriesContext(connection) as long_thread:
+            response = self.client.get(url)
+
+        self.assertEqual(len(long_thread), len(short_thread))
+        self.assertEqual(len(response.data), 25)
+        self.assertTrue(all(message['is_read'] for message in response.data))
+        self.assertEqual(response.data[0]['read_by'], [self.worker.id, self.employer.id])
+        self.assertEqual(ThreadParticipant.objects.get(thread=self.thread, user=self.worker).unread_count, 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MessageHistoryTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+        self.messages = [
+            MessagingService.send_message(self.thread.id, self.employer, f"Message {index}") for index in range(7)
+        ]
+        self.url = reverse('notifications:thread-message-history', args=[self.thread.id])
+        self.client.force_authenticate(self.worker)
+
+    def test_pages_back_from_the_newest_message(self):
+        pages, cursor = [], None
+        while True:
+            response = self.client.get(self.url, {'per_page': 3, **({'cursor': cursor} if cursor else {})})
+            pages.append([message['content'] for message in response.data['results']])
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, [
+            ['Message 6', 'Message 5', 'Message 4'],
+            ['Message 3', 'Message 2', 'Message 1'],
+            ['Message 0'],
+        ])
+
+    def test_newest_page_marks_thread_read_and_pages_cost_the_same(self):
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.client.get(self.url, {'per_page': 3})
+        self.assertEqual(ThreadParticipant.objects.get(thread=self.thread, user=self.worker).unread_count, 0)
+        self.assertTrue(all(message['is_read'] for message in response.data['results']))
+
+        with CaptureQueriesContext(connection) as older_page:
+            self.client.get(self.url, {'per_page': 3, 'cursor': response.data['next_cursor']})
+        # The older page does not touch the read watermark
+        self.assertLess(len(older_page), len(first_page))
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'not-a-cursor'}).status_code, 400)
+
+        outsider = User.objects.create(username='outsider')
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse('notifications:thread-message-history', args=[0])).status_code, 404
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ThreadDeduplicationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.agent = User.objects.create(username='agent')
+        self.url = reverse('notifications:create-thread')
+
+    def test_same_participants_get_the_same_thread(self):
+        thread, created = MessagingService.get_or_create_thread([self.worker, self.employer], title='Hello')
+        self.assertTrue(created)
+        self.assertEqual(MessagingService.get_or_create_thread([self.employer, self.worker]), (thread, False))
+
+        other, created = MessagingService.get_or_create_thread([self.worker, self.employer, self.agent])
+        self.assertTrue(created)
+        self.assertNotEqual(other, thread)
+        self.assertEqual(set(thread.participants.all()), {self.worker, self.employer})
+
+    def test_participant_key(self):
+        key = MessageThread.get_participant_key([3, 1, 2, 1])
+        self.assertEqual(key, MessageThread.get_participant_key([1, 2, 3]))
+        self.assertNotEqual(key, MessageThread.get_participant_key([1, 2, 3], job_reference_id=7))
+        self.assertNotEqual(key, MessageThread.get_participant_key([1, 2]))
+
+    def test_create_endpoint_reuses_the_thread(self):
+        self.client.force_authenticate(self.employer)
+        data = {'participant_ids': [self.employer.id, self.worker.id, self.agent.id]}
+
+        with CaptureQueriesContext(connection) as queries:
+            created = self.client.post(self.url, data, format='json')
+        # Participants are resolved with one query, however many there are
+        lookups = [query for query in queries if '"users_user"."id" IN' in query['sql']]
+        self.assertEqual(len(lookups), 1)
+
+        self.assertEqual(created.status_code, 201)
+        data['participant_ids'].reverse()
+        existing = self.client.post(self.url, data, format='json')
+        self.assertEqual((existing.status_code, existing.data['id']), (200, created.data['id']))
+
+        missing = self.client.post(self.url, {'participant_ids': [self.employer.id, 0]}, format='json')
+        self.assertEqual(missing.status_code, 404)
+
+    def test_backfill_keeps_the_oldest_duplicate(self):
+        backfill = import_module('apps.notifications.migrations.0014_thread_participant_key').backfill_participant_keys
+        threads = [MessagingService.create_thread_with_participants([self.worker, self.employer]) for _ in range(3)]
+        lone = MessagingService.create_thread_with_participants([self.worker, self.agent])
+
+        backfill(django_apps, None)
+
+        keys = dict(MessageThread.objects.values_list('id', 'participant_key'))
+        self.assertEqual(keys[threads[0].id], MessageThread.get_participant_key([self.worker.id, self.employer.id]))
+        self.assertEqual([keys[thread.id] for thread in threads[1:]], [None, None])
+        self.assertIsNotNone(keys[lone.id])
+        self.assertEqual(MessagingService.get_or_create_thread([self.employer, self.worker]), (threads[0], False))
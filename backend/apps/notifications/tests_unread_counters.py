@@ -0,0 +1,152 @@
+import io
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from apps.notifications.broadcast import send_broadcast
+from apps.notifications.models import Notification
+from apps.notifications.services import MessagingService, NotificationService
+from apps.notifications.unread_counters import get_unread_counters
+from users.models import User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def create_notification(recipient):
+    return NotificationService.create_notification(recipient, 'system_alert', 'Alert', 'Body')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class NotificationUnreadCounterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='worker')
+        self.counters = get_unread_counters()
+
+    def test_counter_is_initialized_once_then_read_from_cache(self):
+        create_notification(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(NotificationService.get_unread_count(self.user), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(NotificationService.get_unread_count(self.user), 1)
+
+    def test_counter_follows_creates_and_reads(self):
+        NotificationService.get_unread_count(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = create_notification(self.user)
+            create_notification(self.user)
+            create_notification(self.user)
+        self.assertEqual(NotificationService.get_unread_count(self.user), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationService.mark_as_read(first.id, self.user)
+            # Reading an already read notification does not decrement again
+            NotificationService.mark_as_read(first.id, self.user)
+        self.assertEqual(NotificationService.get_unread_count(self.user), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            NotificationService.mark_all_as_read(self.user)
+        self.assertEqual(NotificationService.get_unread_count(self.user), 0)
+
+    def test_rolled_back_notification_is_not_counted(self):
+        NotificationService.get_unread_count(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    create_notification(self.user)
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+
+        self.assertEqual(NotificationService.get_unread_count(self.user), 0)
+
+    def test_broadcast_increments_existing_counters(self):
+        other = User.objects.create(username='other')
+        NotificationService.get_unread_count(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            send_broadcast('Alert', 'Body', [], recipient_ids=[self.user.id, other.id])
+
+        self.assertEqual(NotificationService.get_unread_count(self.user), 1)
+        # Users without a counter are counted on their first read
+        self.assertIsNone(cache.get(self.counters.notifications_key(other.id)))
+        self.assertEqual(NotificationService.get_unread_count(other), 1)
+
+    def test_reconcile_corrects_drift(self):
+        create_notification(self.user)
+        NotificationService.get_unread_count(self.user)
+        # A write that bypassed the services
+        Notification.objects.update(is_read=True)
+        output = io.StringIO()
+
+        call_command('reconcile_unread_counters', stdout=output)
+
+        report = json.loads(output.getvalue())
+        self.assertEqual((report['notifications_checked'], report['notifications_corrected']), (1, 1))
+        self.assertEqual(NotificationService.get_unread_count(self.user), 0)
+
+    def test_cache_failure_falls_back_to_database(self):
+        create_notification(self.user)
+
+        with mock.patch.object(LocMemCache, 'get', side_effect=ConnectionError('redis down')):
+            self.assertEqual(NotificationService.get_unread_count(self.user), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MessageUnreadCounterTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.worker = User.objects.create(username='worker')
+        self.employer = User.objects.create(username='employer', user_type='employer')
+        self.thread = MessagingService.create_thread_with_participants([self.worker, self.employer])
+        self.counters = get_unread_counters()
+
+    def thread_count(self, user):
+        return self.counters.get_thread_counts([self.thread.id], user.id)[self.thread.id]
+
+    def test_thread_counters_follow_sends_and_reads(self):
+        self.assertEqual(self.thread_count(self.worker), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = MessagingService.send_message(self.thread.id, self.employer, 'Hello')
+            MessagingService.send_message(self.thread.id, self.employer, 'Are you available?')
+        self.assertEqual(self.thread_count(self.worker), 2)
+        self.assertEqual(self.thread_count(self.employer), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MessagingService.mark_message_as_read(first.id, self.worker)
+            MessagingService.mark_message_as_read(first.id, self.worker)
+        self.assertEqual(self.thread_count(self.worker), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MessagingService.get_thread_messages(self.thread.id, self.worker)
+        self.assertEqual(self.thread_count(self.worker), 0)
+
+    def test_thread_list_reads_counters_from_cache(self):
+        MessagingService.send_message(self.thread.id, self.employer, 'Hello')
+        self.counters.get_thread_counts([self.thread.id], self.worker.id)
+        self.client.force_authenticate(self.worker)
+
+        with mock.patch('apps.notifications.unread_counters.count_unread_messages') as recount:
+            response = self.client.get(reverse('notifications:user-threads'))
+
+        recount.assert_not_called()
+        self.assertEqual(response.data['results'][0]['unread_count'], 1)
+
+    def test_unread_count_endpoint(self):
+        create_notification(self.worker)
+        self.client.force_authenticate(self.worker)
+
+        response = self.client.get(reverse('notifications:unread-notification-count'))
+
+        self.assertEqual(response.data, {'unread_count': 1})
@@ -0,0 +1,263 @@
+"""
+Per-user unread counters for notifications and message threads
+
+Unread counts are kept in a Django cache alias (Redis in every environment)
+so the unread-count endpoints are a single cache read instead of a COUNT on
+every poll:
+
+    unread:notifications:<user_id>        unread notifications of a user
+    unread:thread:<thread_id>:<user_id>   unread messages of a user in a thread
+
+Counters are created lazily from the database the first time they are read
+and expire TIMEOUT seconds later, so only users who actually poll have one. Writes only adjust counters that exist, after the
+surrounding transaction commits; a missing counter is simply recounted on the
+next read. `manage.py reconcile_unread_counters` periodically corrects any
+drift against the database. If the cache cannot be reached, reads fall back
+to the database and writes are skipped.
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Count
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEY_PREFIX = 'unread'
+DEFAULT_TIMEOUT = 60 * 60 * 24 * 7  # 7 days
+DEFAULT_RECONCILE_BATCH_SIZE = 1000
+
+
+class UnreadCounters:
+    """
+    Unread notification and message counters stored in a Django cache alias.
+    """
+
+    def __init__(self, cache_alias: str = 'default', key_prefix: str = DEFAULT_KEY_PREFIX,
+                 timeout: int = DEFAULT_TIMEOUT):
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def notifications_key(self, user_id: int) -> str:
+        return f"{self.key_prefix}:notifications:{user_id}"
+
+    def thread_key(self, thread_id: int, user_id: int) -> str:
+        return f"{self.key_prefix}:thread:{thread_id}:{user_id}"
+
+    # Reads
+
+    def get_notification_count(self, user_id: int) -> int:
+        """Unread notifications of a user; one cache read once the counter exists."""
+        key = self.notifications_key(user_id)
+        try:
+            count = self.cache.get(key)
+        except Exception as e:
+            self._log_error('get', e)
+            return count_unread_notifications([user_id]).get(user_id, 0)
+
+        if count is None:
+            count = count_unread_notifications([user_id]).get(user_id, 0)
+            self._initialize({key: count})
+        return count
+
+    def get_thread_counts(self, thread_ids: Iterable[int], user_id: int) -> Dict[int, int]:
+        """Unread messages of a user per thread; one cache read for all threads."""
+        keys = {self.thread_key(thread_id, user_id): thread_id for thread_id in thread_ids}
+        try:
+            cached = self.cache.get_many(list(keys))
+        except Exception as e:
+            self._log_error('get_many', e)
+            cached = {}
+
+        counts = {keys[key]: count for key, count in cached.items()}
+        missing = [thread_id for thread_id in keys.values() if thread_id not in counts]
+        if missing:
+            recounted = count_unread_messages(missing, user_id)
+            counts.update(recounted)
+            self._initialize({self.thread_key(thread_id, user_id): recounted[thread_id] for thread_id in missing})
+        return counts
+
+    # Writes (applied once the current transaction commits)
+
+    def notifications_created(self, user_ids: Iterable[int]):
+        deltas = defaultdict(int)
+        for user_id in user_ids:
+            deltas[self.notifications_key(user_id)] += 1
+        self._on_commit(self._adjust, dict(deltas))
+
+    def notifications_read(self, user_id: int, count: int):
+        if count:
+            self._on_commit(self._adjust, {self.notifications_key(user_id): -count})
+
+    def message_created(self, thread_id: int, recipient_ids: Iterable[int]):
+        deltas = {self.thread_key(thread_id, user_id): 1 for user_id in recipient_ids}
+        self._on_commit(self._adjust, deltas)
+
+    def messages_read(self, thread_id: int, user_id: int, count: int):
+        if count:
+            self._on_commit(self._adjust, {self.thread_key(thread_id, user_id): -count})
+
+    # Reconciliation
+
+    def reconcile(self, batch_size: int = DEFAULT_RECONCILE_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Corrects existing counters that drifted from the database.
+
+        Returns the number of notification and thread counters checked and corrected.
+        """
+        from users.models import User
+        from .models import ThreadParticipant
+
+        report = {'notifications_checked': 0, 'notifications_corrected': 0,
+                  'threads_checked': 0, 'threads_corrected': 0}
+
+        user_ids = User.objects.order_by('id').values_list('id', flat=True)
+        last_id = 0
+        while True:
+            batch = list(user_ids.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            keys = {self.notifications_key(user_id): user_id for user_id in batch}
+            cached = self._get_many(keys)
+            if not cached:
+                continue
+            actual = count_unread_notifications([keys[key] for key in cached])
+            corrections = {
+                key: actual.get(keys[key], 0) for key, count in cached.items() if count != actual.get(keys[key], 0)
+            }
+            report['notifications_checked'] += len(cached)
+            report['notifications_corrected'] += self._correct(corrections)
+
+        memberships = ThreadParticipant.objects.order_by('id').values_list('id', 'thread_id', 'user_id')
+        last_id = 0
+        while True:
+            batch = list(memberships.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            keys = {self.thread_key(thread_id, user_id): (thread_id, user_id) for _, thread_id, user_id in batch}
+            cached = self._get_many(keys)
+            if not cached:
+                continue
+            threads_by_user = defaultdict(list)
+            for key in cached:
+                thread_id, user_id = keys[key]
+                threads_by_user[user_id].append(thread_id)
+            corrections = {}
+            for user_id, thread_ids in threads_by_user.items():
+                actual = count_unread_messages(thread_ids, user_id)
+                for thread_id in thread_ids:
+                    key = self.thread_key(thread_id, user_id)
+                    if cached[key] != actual[thread_id]:
+                        corrections[key] = actual[thread_id]
+            report['threads_checked'] += len(cached)
+            report['threads_corrected'] += self._correct(corrections)
+
+        return report
+
+    # Helpers
+
+    def _on_commit(self, func, deltas):
+        if deltas:
+            transaction.on_commit(lambda: func(deltas))
+
+    def _adjust(self, deltas: Dict[str, int]):
+        """Adds the deltas to the counters that exist; never goes below zero."""
+        try:
+            cache = self.cache
+            existing = cache.get_many(list(deltas))
+            for key in existing:
+                try:
+                    value = cache.incr(key, deltas[key])
+                except ValueError:
+                    continue  # Expired in the meantime; recounted on the next read
+                if value < 0:
+                    cache.set(key, 0, self.timeout)
+        except Exception as e:
+            self._log_error('incr', e)
+
+    def _initialize(self, counts: Dict[str, int]):
+        try:
+            cache = self.cache
+            for key, count in counts.items():
+                # add() keeps a counter another request created meanwhile
+                cache.add(key, count, self.timeout)
+        except Exception as e:
+            self._log_error('add', e)
+
+    def _get_many(self, keys) -> Dict[str, int]:
+        try:
+            return self.cache.get_many(list(keys))
+        except Exception as e:
+            self._log_error('get_many', e)
+            return {}
+
+    def _correct(self, corrections: Dict[str, int]) -> int:
+        if corrections:
+            try:
+                self.cache.set_many(corrections, self.timeout)
+            except Exception as e:
+                self._log_error('set_many', e)
+                return 0
+            logger.info(f"Corrected {len(corrections)} unread counters")
+        return len(corrections)
+
+    def _log_error(self, operation, error):
+        logger.warning(f"Unread counter {operation} failed: {str(error)}")
+
+
+def count_unread_notifications(user_ids: List[int]) -> Dict[int, int]:
+    from .models import Notification
+
+    rows = (
+        Notification.objects.filter(recipient_id__in=user_ids, is_read=False)
+        .values('recipient_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return {row['recipient_id']: row['count'] for row in rows}
+
+
+def count_unread_messages(thread_ids: List[int], user_id: int) -> Dict[int, int]:
+    """Unread messages of the user in each thread, from their thread state."""
+    from .models import ThreadParticipant
+
+    counts = {thread_id: 0 for thread_id in thread_ids}
+    counts.update(
+        ThreadParticipant.objects.filter(thread_id__in=thread_ids, user_id=user_id)
+        .values_list('thread_id', 'unread_count')
+    )
+    return counts
+
+
+_unread_counters = None
+_unread_counters_lock = threading.Lock()
+
+
+def get_unread_counters() -> UnreadCounters:
+    """
+    Returns the process-wide unread counters configured by the
+    UNREAD_COUNTERS setting.
+    """
+    global _unread_counters
+    if _unread_counters is None:
+        with _unread_counters_lock:
+            if _unread_counters is None:
+                from django.conf import settings
+
+                options = getattr(settings, 'UNREAD_COUNTERS', {})
+                _unread_counters = UnreadCounters(
+                    cache_alias=options.get('CACHE_ALIAS', 'default'),
+                    key_prefix=options.get('KEY_PREFIX', DEFAULT_KEY_PREFIX),
+                    timeout=options.get('TIMEOUT', DEFAULT_TIMEOUT),
+                )
+    return _unread_counters
@@ -14,13 +14,18 @@ urlpatterns = [
     path('threads/', views.get_message_threads, name='user-threads'),
     path('threads/create/', views.create_message_thread, name='create-thread'),
     path('threads/<int:thread_id>/messages/', views.get_thread_messages, name='thread-messages'),
+    path('threads/<int:thread_id>/messages/history/', views.get_thread_message_history, name='thread-message-history'),
     path('threads/<int:thread_id>/send/', views.create_message, name='send-message'),
     path('messages/<int:message_id>/read/', views.mark_message_as_read, name='mark-message-read'),
+    path('messages/search/', views.search_messages, name='search-messages'),
 
     # Content moderation endpoints (admin only)
     path('moderation-queue/', views.get_moderation_queue, name='moderation-queue'),
+    path('moderation-queue/claim/', views.claim_moderation_batch, name='moderation-queue-claim'),
+    path('moderation-queue/release/', views.release_moderation_claims, name='moderation-queue-release'),
     path('moderate-message/<int:message_id>/', views.moderate_message, name='moderate-message'),
 
     # Special admin endpoint for urgent notifications
     path('urgent-notify/', views.send_urgent_notification, name='send-urgent-notification'),
+    path('broadcasts/<int:broadcast_id>/', views.get_broadcast_progress, name='broadcast-progress'),
 ]
\ No newline at end of file
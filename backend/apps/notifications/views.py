@@ -1,26 +1,37 @@
+from datetime import timedelta
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.core.paginator import Paginator
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db.models import Q
 from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
 
-from .models import Notification, Message, MessageThread
+from .models import Notification, NotificationBroadcast, Message, ThreadParticipant
+from .broadcast import BroadcastError, RecipientsNotFound, broadcast_progress, create_broadcast, dispatch_broadcast
+from .content_objects import prefetch_content_objects
+from .moderation_queue import get_moderation_options
+from . import search
 from .services import (
     NotificationService,
     MessagingService,
     EnhancedMessagingService,
     ContentModerationService,
+    MESSAGE_HISTORY_PAGE_SIZE,
     notify_job_application,
     notify_shortlist,
     notify_profile_approval,
     notify_profile_rejection,
     notify_job_status_change,
-    notify_urgent_matter
 )
 from .serializers import NotificationSerializer, MessageSerializer, MessageThreadSerializer
 from users.permissions import IsAdminUser
+from utils.cursors import InvalidCursor
+
+# Threads matched by title listed with the message search results
+SEARCH_THREAD_LIMIT = 5
 
 
 @api_view(['GET'])
@@ -60,7 +71,9 @@ def get_notifications(request):
         # Invalid page number, return first page
         page_obj = paginator.page(1)
 
-    serializer = NotificationSerializer(page_obj, many=True, context={'request': request})
+    serializer = NotificationSerializer(
+        prefetch_content_objects(page_obj), many=True, context={'request': request}
+    )
     
     response_data = {
         'count': notifications.count(),
@@ -112,7 +125,7 @@ def mark_all_notifications_as_read(request):
 @permission_classes([IsAuthenticated])
 def get_unread_notification_count(request):
     """
-    Get count of unread notifications
+    Get count of unread notifications (a single cache read, see notifications/unread_counters.py)
     """
     count = NotificationService.get_unread_count(request.user)
     return Response({'unread_count': count})
@@ -124,9 +137,11 @@ def get_message_threads(request):
     """
     Get all message threads for the user
     """
-    threads = MessageThread.objects.filter(
-        participants=request.user
-    ).prefetch_related('participants').order_by('-updated_at')
+    # One row per thread the user is in, carrying their inbox state, newest activity first
+    # (threads without messages yet sort first, as new threads did before)
+    memberships = ThreadParticipant.objects.filter(user=request.user).select_related(
+        'thread', 'last_message__sender'
+    ).prefetch_related('thread__participants').order_by('-last_message_at', '-thread_id')
 
     # Pagination
     page = request.query_params.get('page', 1)
@@ -138,7 +153,7 @@ def get_message_threads(request):
     except ValueError:
         per_page = 20
 
-    paginator = Paginator(threads, per_page)
+    paginator = Paginator(memberships, per_page)
     
     try:
         page_obj = paginator.page(page)
@@ -146,10 +161,13 @@ def get_message_threads(request):
         # Invalid page number, return first page
         page_obj = paginator.page(1)
 
-    serializer = MessageThreadSerializer(page_obj, many=True, context={'request': request})
+    serializer = MessageThreadSerializer(
+        [membership.thread for membership in page_obj], many=True,
+        context={'request': request, 'thread_states': {membership.thread_id: membership for membership in page_obj}}
+    )
     
     response_data = {
-        'count': threads.count(),
+        'count': paginator.count,
         'next': page_obj.next_page_number() if page_obj.has_next() else None,
         'previous': page_obj.previous_page_number() if page_obj.has_previous() else None,
         'page': int(page),
@@ -188,6 +206,86 @@ def get_thread_messages(request, thread_id):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_thread_message_history(request, thread_id):
+    """
+    Get a thread's messages newest first, one page at a time
+    Query params: per_page (default 30, max 100), cursor (next_cursor of the previous page)
+    """
+    try:
+        per_page = min(int(request.query_params.get('per_page', MESSAGE_HISTORY_PAGE_SIZE)), 100)
+    except ValueError:
+        per_page = MESSAGE_HISTORY_PAGE_SIZE
+
+    try:
+        messages, next_cursor = MessagingService.get_message_history(
+            thread_id, request.user, cursor=request.query_params.get('cursor'), limit=max(per_page, 1)
+        )
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except PermissionError:
+        return Response(
+            {'error': 'You are not a participant in this thread'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = MessageSerializer(messages, many=True, context={'request': request})
+    return Response({
+        'results': serializer.data,
+        'next_cursor': next_cursor,
+        'per_page': per_page,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_messages(request):
+    """
+    Full-text search over the user's messages and thread titles (every thread for admins)
+    Query params: q (words, "phrases", OR, -word), page, per_page (default 20, max 100)
+    Messages are ranked best first; the best matching threads by title are listed alongside.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'Search query q is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        per_page = min(int(request.query_params.get('per_page', 20)), 100)
+    except ValueError:
+        per_page = 20
+
+    messages = search.search_messages(request.user, query)
+    paginator = Paginator(messages, max(per_page, 1))
+    try:
+        page_obj = paginator.page(request.query_params.get('page', 1))
+    except (EmptyPage, PageNotAnInteger):
+        page_obj = paginator.page(1)
+
+    serializer = MessageSerializer(page_obj, many=True, context={'request': request})
+    results = [
+        {**data, 'search_rank': message.search_rank}
+        for data, message in zip(serializer.data, page_obj)
+    ]
+    threads = search.search_threads(request.user, query)[:SEARCH_THREAD_LIMIT]
+
+    return Response({
+        'query': query,
+        'threads': [
+            {'id': thread.id, 'title': thread.title, 'search_rank': thread.search_rank} for thread in threads
+        ],
+        'count': paginator.count,
+        'next': page_obj.next_page_number() if page_obj.has_next() else None,
+        'previous': page_obj.previous_page_number() if page_obj.has_previous() else None,
+        'page': page_obj.number,
+        'total_pages': paginator.num_pages,
+        'per_page': per_page,
+        'results': results,
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_message(request, thread_id):
@@ -218,11 +316,10 @@ def create_message(request, thread_id):
             'id': message.id
         }
 
-        if message.moderation_status != 'approved':
+        if message.moderation_status in ('pending', 'flagged'):
             response_data['warning'] = 'Your message is under review and will be visible after approval'
-
-        # If approved, return full message data
-        if message.moderation_status == 'approved':
+        else:
+            # Approved, or queued for automatic moderation and already visible to the recipients
             serializer = MessageSerializer(message, context={'request': request})
             response_data.update(serializer.data)
 
@@ -280,6 +377,46 @@ def get_moderation_queue(request):
     return Response(response_data)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def claim_moderation_batch(request):
+    """
+    Claim the next pending messages to review (admin only)
+
+    Each message is leased to one moderator at a time, most sensitive first;
+    claiming again returns the moderator's unreviewed claims topped up with
+    new ones. Expected data: {limit: optional batch size, up to 100}
+    """
+    try:
+        limit = min(int(request.data.get('limit') or 0), 100) or None
+    except (TypeError, ValueError):
+        return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    messages = ContentModerationService.claim_moderation_batch(request.user, limit)
+    serializer = MessageSerializer(messages, many=True, context={'request': request})
+    lease_seconds = get_moderation_options()['REVIEW_LEASE_SECONDS']
+    return Response({
+        'count': len(messages),
+        'claimed_until': (messages[0].review_claimed_at + timedelta(seconds=lease_seconds)) if messages else None,
+        'results': serializer.data,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def release_moderation_claims(request):
+    """
+    Return claimed messages to the moderation queue (admin only)
+    Expected data: {message_ids: optional list, defaults to all of the moderator's claims}
+    """
+    message_ids = request.data.get('message_ids')
+    if message_ids is not None and not isinstance(message_ids, list):
+        return Response({'error': 'message_ids must be a list'}, status=status.HTTP_400_BAD_REQUEST)
+
+    released = ContentModerationService.release_moderation_claims(request.user, message_ids)
+    return Response({'released': released})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def moderate_message(request, message_id):
@@ -301,23 +438,9 @@ def moderate_message(request, message_id):
             message_id, action, request.user, reason
         )
 
-        # If message was approved, send notifications to participants
+        # If message was approved, push it and send notifications to participants
         if action == 'approve':
-            thread = message.thread
-            sender = message.sender
-            content = message.content
-            recipients = thread.participants.exclude(id=sender.id)
-            for recipient in recipients:
-                NotificationService.create_notification(
-                    recipient=recipient,
-                    notification_type='message_received',
-                    title=f"New message from {sender.get_full_name() or sender.username}",
-                    message=content[:100] + "..." if len(content) > 100 else content,
-                    sender=sender,
-                    content_object=message,
-                    send_email=True,
-                    send_push=True
-                )
+            EnhancedMessagingService.deliver_approved_message(message)
 
         serializer = MessageSerializer(message, context={'request': request})
         return Response(serializer.data)
@@ -337,7 +460,8 @@ def moderate_message(request, message_id):
 @permission_classes([IsAuthenticated])
 def create_message_thread(request):
     """
-    Create a new message thread with specified participants
+    Get or create the message thread between the specified participants
+    Responds 201 with a new thread, or 200 with the existing one for the same participants and job
     """
     participant_ids = request.data.get('participant_ids', [])
     title = request.data.get('title', '')
@@ -357,17 +481,27 @@ def create_message_thread(request):
         )
 
     try:
-        # Get participant user objects
-        participants = []
-        for pid in participant_ids:
-            try:
-                participant = request.user.__class__.objects.get(id=pid)
-                participants.append(participant)
-            except request.user.__class__.DoesNotExist:
-                return Response(
-                    {'error': f'Participant with id {pid} does not exist'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+        participant_ids = {int(pid) for pid in participant_ids}
+    except (TypeError, ValueError):
+        return Response(
+            {'error': 'Participant ids must be numbers'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(participant_ids) < 2:
+        return Response(
+            {'error': 'At least 2 participants are required'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        # Get participant user objects in one query
+        participants = request.user.__class__.objects.in_bulk(participant_ids)
+        missing = sorted(participant_ids - participants.keys())
+        if missing:
+            return Response(
+                {'error': f'Participant with id {missing[0]} does not exist'},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
         # Get job reference if provided
         job_reference = None
@@ -381,16 +515,16 @@ def create_message_thread(request):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-        # Create the thread through the service function
-        thread = MessagingService.create_thread_with_participants(
-            participants=participants,
+        # Reuse the existing thread between these participants about this job
+        thread, created = MessagingService.get_or_create_thread(
+            participants=list(participants.values()),
             title=title,
             job_reference=job_reference
         )
 
         # Serialize and return the thread
         serializer = MessageThreadSerializer(thread, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
     except Exception as e:
         return Response(
@@ -427,7 +561,12 @@ def mark_message_as_read(request, message_id):
 @permission_classes([IsAuthenticated])
 def send_urgent_notification(request):
     """
-    Send an urgent notification to multiple recipients (admin only)
+    Send an urgent notification to many recipients (admin only)
+
+    Recipients are either `recipient_ids` or a `recipient_filter` such as
+    {"user_type": "worker", "region": "Amhara"}. The broadcast is queued and
+    fanned out by the notification workers; responds 202 with its id and the
+    URL of its progress.
     """
     if request.user.user_type != 'admin':
         return Response(
@@ -435,37 +574,59 @@ def send_urgent_notification(request):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    recipient_ids = request.data.get('recipient_ids', [])
+    recipient_ids = request.data.get('recipient_ids') or None
+    recipient_filter = request.data.get('recipient_filter') or None
     title = request.data.get('title', '')
     message = request.data.get('message', '')
+    channels = request.data.get('channels', ['email', 'sms', 'push'])
     
-    if not recipient_ids or not title or not message:
+    if not (recipient_ids or recipient_filter) or not title or not message:
         return Response(
-            {'error': 'Recipient IDs, title, and message are required'}, 
+            {'error': 'Recipient IDs or a recipient filter, title, and message are required'}, 
             status=status.HTTP_400_BAD_REQUEST
         )
     
     try:
-        recipients = []
-        for rid in recipient_ids:
-            try:
-                recipient = request.user.__class__.objects.get(id=rid)
-                recipients.append(recipient)
-            except request.user.__class__.DoesNotExist:
-                return Response(
-                    {'error': f'Recipient with id {rid} does not exist'}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        
-        notify_urgent_matter(recipients, title, message, request.user)
-        
-        return Response({
-            'message': f'Urgent notification sent to {len(recipients)} recipients',
-            'recipient_count': len(recipients)
-        })
-        
-    except Exception as e:
+        broadcast = create_broadcast(
+            title=title,
+            message=message,
+            channels=channels,
+            sender=request.user,
+            recipient_ids=recipient_ids,
+            recipient_filter=recipient_filter,
+        )
+    except RecipientsNotFound as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except BroadcastError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except (TypeError, ValueError) as e:
+        return Response({'error': f'Invalid recipients: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    dispatch_broadcast(broadcast)
+
+    return Response({
+        'message': f'Urgent notification queued for {broadcast.total_recipients} recipients',
+        'recipient_count': broadcast.total_recipients,
+        'broadcast_id': broadcast.id,
+        'progress_url': reverse('notifications:broadcast-progress', args=[broadcast.id]),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_broadcast_progress(request, broadcast_id):
+    """
+    Get fan-out and delivery progress of a broadcast (admin only)
+    """
+    if request.user.user_type != 'admin':
         return Response(
-            {'error': str(e)}, 
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+            {'error': 'Permission denied. Admin access required.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        broadcast = NotificationBroadcast.objects.get(id=broadcast_id)
+    except NotificationBroadcast.DoesNotExist:
+        return Response({'error': 'Broadcast not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(broadcast_progress(broadcast))
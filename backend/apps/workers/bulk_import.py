@@ -0,0 +1,256 @@
+"""
+Bulk worker onboarding from agency spreadsheets (CSV or XLSX)
+
+Rows are streamed from the file and processed in batches:
+- every field is validated in memory against the model rules, Fayda IDs are
+  validated with the table-driven batch validator
+- duplicate Fayda IDs and usernames are found with one query per batch
+  (fayda_id_hash__in / username__in) instead of one query per row
+- valid rows are written with bulk_create inside one transaction per batch,
+  so PII is encrypted for the whole batch in a single insert
+
+Invalid rows are reported with their spreadsheet row number and never abort
+the import. Caches are invalidated once, after the last batch.
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from users.models import User
+from utils.fayda_id_validator import validate_fayda_id_batch
+from utils.spreadsheet_import import clean_text, iter_spreadsheet_rows, split_list
+from .models import WorkerProfile, hash_fayda_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+# Optional columns: email, phone_number, first_name, last_name, skills
+# ("Cooking; Cleaning") and languages ("Amharic:fluent; English:basic")
+REQUIRED_COLUMNS = (
+    'username', 'fayda_id', 'full_name', 'age', 'place_of_birth', 'region_of_origin',
+    'current_location', 'emergency_contact_name', 'emergency_contact_phone',
+    'education_level', 'religion', 'working_time', 'years_experience',
+)
+
+FAYDA_REASON_MESSAGES = {
+    'length': 'Fayda ID must be 16 digits.',
+    'format': 'Fayda ID must contain digits only.',
+    'date': 'Fayda ID contains an invalid date.',
+    'region': 'Fayda ID contains an unknown region code.',
+    'checksum': 'Invalid Fayda ID format or checksum.',
+}
+
+
+def _parse_languages(value) -> List[Dict[str, str]]:
+    """Parses 'Amharic:fluent; English:basic' into the languages JSON shape."""
+    languages = []
+    for item in split_list(value):
+        language, _, proficiency = item.partition(':')
+        entry = {'language': language.strip()}
+        if proficiency.strip():
+            entry['proficiency'] = proficiency.strip()
+        languages.append(entry)
+    return languages
+
+
+def _parse_int(value, field, errors) -> Optional[int]:
+    text = clean_text(value)
+    if not text:
+        errors[field] = ['This field is required.']
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        errors[field] = ['A valid integer is required.']
+        return None
+
+
+class WorkerImporter:
+    """
+    Imports worker rows in batches.
+
+    Imported users get an unusable password; agencies hand the account over
+    through the normal password reset flow.
+
+    Args:
+        batch_size: Rows validated and inserted per transaction
+        dry_run: Validate every row without writing anything
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False):
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        self._seen_hashes = set()
+        self._seen_usernames = set()
+
+    def run(self, rows: Iterable[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Imports (row_number, row) pairs and returns a report:
+        {'total_rows', 'created', 'failed', 'errors': [{'row', 'errors'}], ...}
+        """
+        started_at = time.monotonic()
+        report = {'total_rows': 0, 'created': 0, 'failed': 0, 'errors': [], 'dry_run': self.dry_run}
+
+        batch = []
+        for row_number, row in rows:
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                self._process_batch(batch, report)
+                batch = []
+        if batch:
+            self._process_batch(batch, report)
+
+        if report['created'] and not self.dry_run:
+            # One invalidation for the whole import instead of one per profile save
+            cache.clear()
+
+        report['failed'] = len(report['errors'])
+        report['elapsed_seconds'] = round(time.monotonic() - started_at, 4)
+        logger.info(
+            f"Worker import finished: {report['created']} created, {report['failed']} failed "
+            f"out of {report['total_rows']} rows in {report['elapsed_seconds']}s"
+        )
+        return report
+
+    def _process_batch(self, batch, report):
+        report['total_rows'] += len(batch)
+        prepared = []
+        for row_number, row in batch:
+            errors = {}
+            user, profile = self._build_objects(row, errors)
+            prepared.append((row_number, user, profile, errors))
+
+        reasons = validate_fayda_id_batch([profile.fayda_id for _, _, profile, _ in prepared])
+        for (_, _, profile, errors), reason in zip(prepared, reasons):
+            if reason is not None:
+                errors.setdefault('fayda_id', []).append(FAYDA_REASON_MESSAGES[reason])
+            else:
+                profile.fayda_id_hash = hash_fayda_id(profile.fayda_id)
+
+        self._check_duplicates(prepared)
+
+        valid = []
+        for row_number, user, profile, errors in prepared:
+            if errors:
+                report['errors'].append({'row': row_number, 'errors': errors})
+            else:
+                valid.append((row_number, user, profile))
+
+        if valid and not self.dry_run:
+            report['created'] += self._insert(valid, report)
+        elif valid:
+            report['created'] += len(valid)
+
+    def _build_objects(self, row, errors) -> Tuple[User, WorkerProfile]:
+        user = User(
+            username=clean_text(row.get('username')),
+            email=clean_text(row.get('email')),
+            phone_number=clean_text(row.get('phone_number')) or None,
+            first_name=clean_text(row.get('first_name')),
+            last_name=clean_text(row.get('last_name')),
+            user_type='worker',
+            password=make_password(None),
+        )
+        profile = WorkerProfile(
+            fayda_id=clean_text(row.get('fayda_id')),
+            full_name=clean_text(row.get('full_name')),
+            place_of_birth=clean_text(row.get('place_of_birth')),
+            region_of_origin=clean_text(row.get('region_of_origin')),
+            current_location=clean_text(row.get('current_location')),
+            emergency_contact_name=clean_text(row.get('emergency_contact_name')),
+            emergency_contact_phone=clean_text(row.get('emergency_contact_phone')),
+            education_level=clean_text(row.get('education_level')).lower(),
+            religion=clean_text(row.get('religion')).lower(),
+            working_time=clean_text(row.get('working_time')).lower(),
+            skills=split_list(row.get('skills')),
+            languages=_parse_languages(row.get('languages')),
+        )
+        profile.age = _parse_int(row.get('age'), 'age', errors)
+        profile.years_experience = _parse_int(row.get('years_experience'), 'years_experience', errors)
+        if profile.age is not None and (profile.age < 16 or profile.age > 65):
+            errors['age'] = ['Age must be between 16 and 65 years.']
+
+        # Field-level rules (required, max_length, choices) without the
+        # per-row uniqueness queries full_clean would run
+        self._clean_fields(user, errors, exclude=['password'])
+        self._clean_fields(profile, errors, exclude=['user', 'fayda_id', 'fayda_id_hash', 'age', 'years_experience'])
+        return user, profile
+
+    @staticmethod
+    def _clean_fields(instance, errors, exclude):
+        try:
+            instance.clean_fields(exclude=exclude)
+        except ValidationError as e:
+            for field, messages in e.message_dict.items():
+                errors.setdefault(field, []).extend(messages)
+
+    def _check_duplicates(self, prepared):
+        hashes = [profile.fayda_id_hash for _, _, profile, _ in prepared if profile.fayda_id_hash]
+        usernames = [user.username for _, user, _, _ in prepared if user.username]
+        existing_hashes = set(
+            WorkerProfile.all_objects.filter(fayda_id_hash__in=hashes).values_list('fayda_id_hash', flat=True)
+        )
+        existing_usernames = set(
+            User.all_objects.filter(username__in=usernames).values_list('username', flat=True)
+        )
+
+        for _, user, profile, errors in prepared:
+            if errors:
+                continue
+            if profile.fayda_id_hash in existing_hashes:
+                errors['fayda_id'] = ['A worker profile with this Fayda ID already exists.']
+            elif profile.fayda_id_hash in self._seen_hashes:
+                errors['fayda_id'] = ['Duplicate Fayda ID in the import file.']
+            if user.username in existing_usernames:
+                errors['username'] = ['A user with that username already exists.']
+            elif user.username in self._seen_usernames:
+                errors['username'] = ['Duplicate username in the import file.']
+            if not errors:
+                self._seen_hashes.add(profile.fayda_id_hash)
+                self._seen_usernames.add(user.username)
+
+    def _insert(self, valid, report) -> int:
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([user for _, user, _ in valid])
+                for user, (_, _, profile) in zip(users, valid):
+                    profile.user = user
+                WorkerProfile.objects.bulk_create([profile for _, _, profile in valid])
+            return len(valid)
+        except IntegrityError as e:
+            # A concurrent import or registration won a race on a unique
+            # column; retry row by row so only the conflicting rows fail
+            logger.warning(f"Bulk insert of {len(valid)} worker rows failed, retrying per row: {str(e)}")
+            return self._insert_rows(valid, report)
+
+    def _insert_rows(self, valid, report) -> int:
+        created = 0
+        for row_number, user, profile in valid:
+            user.pk = None
+            profile.pk = None
+            try:
+                with transaction.atomic():
+                    user.save()
+                    profile.user = user
+                    WorkerProfile.objects.bulk_create([profile])
+                created += 1
+            except IntegrityError as e:
+                report['errors'].append({'row': row_number, 'errors': {'non_field_errors': [str(e)]}})
+        return created
+
+
+def iter_import_rows(file, filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Streams (row_number, row) pairs from a worker CSV or XLSX file."""
+    return iter_spreadsheet_rows(file, filename, REQUIRED_COLUMNS)
+
+
+def import_workers(file, filename: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                   dry_run: bool = False) -> Dict[str, Any]:
+    """Imports workers from a CSV or XLSX file object and returns the report."""
+    return WorkerImporter(batch_size=batch_size, dry_run=dry_run).run(iter_import_rows(file, filename))
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.workers.bulk_import import DEFAULT_BATCH_SIZE, import_workers
+from utils.spreadsheet_import import SpreadsheetImportError
+
+
+class Command(BaseCommand):
+    help = 'Imports worker profiles in bulk from an agency CSV or XLSX spreadsheet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .csv or .xlsx file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows validated and inserted per transaction (default {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate every row and report errors without writing anything',
+        )
+        parser.add_argument(
+            '--errors-file',
+            help='Write the per-row errors to this file as JSON',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as file:
+                report = import_workers(
+                    file,
+                    path,
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, SpreadsheetImportError) as e:
+            raise CommandError(str(e))
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {json.dumps(error['errors'])}"))
+        if len(report['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(report['errors']) - 20} more rows with errors"))
+
+        if options['errors_file']:
+            with open(options['errors_file'], 'w') as errors_file:
+                json.dump(report['errors'], errors_file, indent=2)
+
+        action = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {report['created']} of {report['total_rows']} rows "
+            f"({report['failed']} failed) in {report['elapsed_seconds']}s."
+        ))
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:53
+
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def hash_fayda_id(fayda_id):
+    # Same as apps.workers.models.hash_fayda_id() when this migration was written
+    if not fayda_id:
+        return None
+    key = settings.FAYDA_ID_HASH_KEY.encode()
+    return hmac.new(key, str(fayda_id).strip().encode(), hashlib.sha256).hexdigest()
+
+
+def backfill_batch(WorkerProfile, profiles):
+    hashes = {profile.id: hash_fayda_id(profile.fayda_id) for profile in profiles}
+    taken = dict(
+        WorkerProfile.objects.filter(fayda_id_hash__in=set(hashes.values()) - {None}).values_list("fayda_id_hash", "id")
+    )
+    hashed = []
+    for profile in profiles:
+        fayda_id_hash = hashes[profile.id]
+        if fayda_id_hash is None:
+            continue
+        if fayda_id_hash in taken:
+            # The encrypted fayda_id column never enforced uniqueness; only the oldest profile is indexed
+            logger.warning(f"Worker profile {profile.id} has the same Fayda ID as profile {taken[fayda_id_hash]}; "
+                           f"leaving its fayda_id_hash empty")
+            continue
+        profile.fayda_id_hash = fayda_id_hash
+        taken[fayda_id_hash] = profile.id
+        hashed.append(profile)
+    WorkerProfile.objects.bulk_update(hashed, ["fayda_id_hash"])
+
+
+def populate_fayda_id_hash(apps, schema_editor):
+    WorkerProfile = apps.get_model("workers", "WorkerProfile")
+    batch = []
+    # Oldest first, so of duplicate profiles the oldest keeps the hash
+    for profile in WorkerProfile.objects.only("id", "fayda_id").order_by("created_at", "id").iterator(
+        chunk_size=BACKFILL_BATCH_SIZE
+    ):
+        batch.append(profile)
+        if len(batch) == BACKFILL_BATCH_SIZE:
+            backfill_batch(WorkerProfile, batch)
+            batch = []
+    if batch:
+        backfill_batch(WorkerProfile, batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workers", "0007_alter_workerprofile_profile_photo"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workerprofile",
+            name="fayda_id_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(populate_fayda_id_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="workerprofile",
+            name="fayda_id_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
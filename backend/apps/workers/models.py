@@ -8,6 +8,23 @@ from imagekit.models import ImageSpecField, ProcessedImageField
 from imagekit.processors import ResizeToFill
 from utils.fayda_id_validator import validate_fayda_id_format
 import hashlib
+import hmac
+
+
+def hash_fayda_id(fayda_id):
+    """
+    Keyed, deterministic hash of a Fayda ID used as a blind index.
+
+    The encrypted fayda_id column cannot be queried or kept unique (the
+    ciphertext differs on every save), so lookups and the uniqueness
+    constraint go through this hash instead. It is keyed with its own
+    FAYDA_ID_HASH_KEY so rotating the encryption key leaves it intact.
+    """
+    if not fayda_id:
+        return None
+    key = settings.FAYDA_ID_HASH_KEY.encode()
+    return hmac.new(key, str(fayda_id).strip().encode(), hashlib.sha256).hexdigest()
+
 
 class SoftDeleteManager(models.Manager):
     def get_queryset(self):
@@ -25,6 +42,7 @@ class WorkerProfile(models.Model):
     
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='worker_profile')
     fayda_id = EncryptedCharField(max_length=20, unique=True)
+    fayda_id_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     full_name = EncryptedCharField(max_length=100)
     age = models.IntegerField(db_index=True)
     place_of_birth = EncryptedCharField(max_length=100)
@@ -122,6 +140,7 @@ class WorkerProfile(models.Model):
         self.full_clean()
 
         is_new = self.pk is None
+        self.fayda_id_hash = hash_fayda_id(self.fayda_id)
         # Clear search cache when a worker profile is updated
         # This will help maintain cache consistency
         # Clear all search caches for now - in production this could be more targeted
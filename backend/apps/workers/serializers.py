@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import WorkerProfile
+from .models import WorkerProfile, hash_fayda_id
 from users.models import User
 
 
@@ -43,7 +43,7 @@ class WorkerProfileCreateSerializer(serializers.ModelSerializer):
         """
         Validate that the Fayda ID is unique
         """
-        if WorkerProfile.objects.filter(fayda_id=value).exists():
+        if WorkerProfile.all_objects.filter(fayda_id_hash=hash_fayda_id(value)).exists():
             raise serializers.ValidationError("A worker profile with this Fayda ID already exists.")
         return value
 
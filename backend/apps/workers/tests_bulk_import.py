@@ -0,0 +1,219 @@
+import csv
+import importlib
+import io
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.apps import apps
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.admin_panel.models import AdminAction
+from apps.workers.bulk_import import REQUIRED_COLUMNS, import_workers
+from apps.workers.models import WorkerProfile, hash_fayda_id
+from users.models import User
+from utils.fayda_id_validator import CHECKSUM_WEIGHTS
+from utils.spreadsheet_import import SpreadsheetImportError
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+COLUMNS = list(REQUIRED_COLUMNS) + ['phone_number', 'skills', 'languages']
+
+
+def make_fayda_id(sequence):
+    """Builds a valid Fayda ID (15 May 2022, Tigray) for the given sequence number."""
+    base = f"22051501{sequence:07d}"
+    total = sum(int(digit) * weight for digit, weight in zip(base, CHECKSUM_WEIGHTS))
+    return base + str((10 - total % 10) % 10)
+
+
+def make_row(sequence, **overrides):
+    row = {
+        'username': f"worker{sequence}",
+        'fayda_id': make_fayda_id(sequence),
+        'full_name': f"Worker {sequence}",
+        'age': '25',
+        'place_of_birth': 'Mekelle',
+        'region_of_origin': 'Tigray',
+        'current_location': 'Addis Ababa',
+        'emergency_contact_name': 'Contact Person',
+        'emergency_contact_phone': '+251911000000',
+        'education_level': 'secondary',
+        'religion': 'eth_orthodox',
+        'working_time': 'full_time',
+        'years_experience': '3',
+        'phone_number': '+251911111111',
+        'skills': 'Cooking; Cleaning',
+        'languages': 'Amharic:fluent; English:basic',
+    }
+    row.update(overrides)
+    return row
+
+
+def make_csv(rows):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue().encode()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WorkerBulkImportTest(TestCase):
+    def test_imports_valid_rows(self):
+        report = import_workers(io.BytesIO(make_csv([make_row(i) for i in range(1, 6)])), 'workers.csv', batch_size=2)
+
+        self.assertEqual(report['total_rows'], 5)
+        self.assertEqual(report['created'], 5)
+        self.assertEqual(report['errors'], [])
+
+        profile = WorkerProfile.objects.select_related('user').get(user__username='worker3')
+        self.assertEqual(profile.fayda_id, make_fayda_id(3))
+        self.assertEqual(profile.fayda_id_hash, hash_fayda_id(make_fayda_id(3)))
+        self.assertEqual(profile.skills, ['Cooking', 'Cleaning'])
+        self.assertEqual(profile.languages[0], {'language': 'Amharic', 'proficiency': 'fluent'})
+        self.assertEqual(profile.user.user_type, 'worker')
+        self.assertFalse(profile.user.has_usable_password())
+
+    def test_reports_row_errors_without_aborting(self):
+        rows = [
+            make_row(1),
+            make_row(2, fayda_id='2205150100000001'),  # bad checksum
+            make_row(3, age='70'),
+            make_row(4, religion='unknown'),
+            make_row(5, fayda_id=make_fayda_id(1)),  # duplicate within the file
+            make_row(6, username='worker1'),  # duplicate username
+            make_row(7),
+        ]
+        report = import_workers(io.BytesIO(make_csv(rows)), 'workers.csv', batch_size=3)
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['failed'], 5)
+        errors = {error['row']: error['errors'] for error in report['errors']}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6, 7])
+        self.assertIn('fayda_id', errors[3])
+        self.assertIn('age', errors[4])
+        self.assertIn('religion', errors[5])
+        self.assertIn('fayda_id', errors[6])
+        self.assertIn('username', errors[7])
+        self.assertEqual(WorkerProfile.objects.count(), 2)
+
+    def test_existing_fayda_id_is_rejected(self):
+        import_workers(io.BytesIO(make_csv([make_row(1)])), 'workers.csv')
+        report = import_workers(io.BytesIO(make_csv([make_row(2, fayda_id=make_fayda_id(1))])), 'workers.csv')
+
+        self.assertEqual(report['created'], 0)
+        self.assertEqual(report['errors'][0]['errors']['fayda_id'],
+                         ['A worker profile with this Fayda ID already exists.'])
+
+    def test_dry_run_writes_nothing(self):
+        report = import_workers(io.BytesIO(make_csv([make_row(1), make_row(2)])), 'workers.csv', dry_run=True)
+
+        self.assertEqual(report['created'], 2)
+        self.assertFalse(User.objects.filter(username__startswith='worker').exists())
+
+    def test_missing_columns_and_unsupported_files(self):
+        with self.assertRaises(SpreadsheetImportError):
+            import_workers(io.BytesIO(b'username,fayda_id\nworker1,1\n'), 'workers.csv')
+        with self.assertRaises(SpreadsheetImportError):
+            import_workers(io.BytesIO(b''), 'workers.txt')
+
+    def test_imports_xlsx(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(COLUMNS)
+        for i in range(1, 4):
+            row = make_row(i, age=25, years_experience=2)
+            sheet.append([row[column] for column in COLUMNS])
+        output = io.BytesIO()
+        workbook.save(output)
+        output.seek(0)
+
+        report = import_workers(output, 'workers.xlsx')
+
+        self.assertEqual(report['created'], 3)
+        self.assertEqual(WorkerProfile.objects.get(user__username='worker2').age, 25)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as file:
+            file.write(make_csv([make_row(1), make_row(2, age='abc')]))
+        try:
+            output = io.StringIO()
+            call_command('import_workers', file.name, stdout=output)
+        finally:
+            os.unlink(file.name)
+
+        self.assertIn('Imported 1 of 2 rows (1 failed)', output.getvalue())
+        self.assertTrue(WorkerProfile.objects.filter(user__username='worker1').exists())
+
+
+class FaydaIdHashBackfillTest(TestCase):
+    migration = importlib.import_module('apps.workers.migrations.0008_workerprofile_fayda_id_hash')
+
+    def create_profiles(self, fayda_ids):
+        users = [User.objects.create(username=f"worker{index}", user_type='worker') for index in range(len(fayda_ids))]
+        # bulk_create skips save(), so the profiles start without a hash, as before the migration
+        WorkerProfile.objects.bulk_create([
+            WorkerProfile(
+                user=user, fayda_id=fayda_id, full_name='Worker', age=25, place_of_birth='Mekelle',
+                region_of_origin='Tigray', current_location='Addis Ababa', emergency_contact_name='Contact Person',
+                emergency_contact_phone='+251911000000', education_level='secondary', religion='eth_orthodox',
+                working_time='full_time', years_experience=3,
+            )
+            for user, fayda_id in zip(users, fayda_ids)
+        ])
+        return list(WorkerProfile.all_objects.order_by('id'))
+
+    def test_duplicates_keep_the_hash_on_the_oldest_profile_only(self):
+        newer, older, other = self.create_profiles([make_fayda_id(1), make_fayda_id(1), make_fayda_id(2)])
+        WorkerProfile.all_objects.filter(id=older.id).update(created_at=timezone.now() - timedelta(days=1))
+
+        with self.assertLogs(self.migration.__name__, 'WARNING') as logs, \
+                override_settings(FAYDA_ID_HASH_KEY='backfill-key'):
+            self.migration.populate_fayda_id_hash(apps, None)
+            expected = {older.id: hash_fayda_id(make_fayda_id(1)), other.id: hash_fayda_id(make_fayda_id(2))}
+
+        self.assertEqual(dict(WorkerProfile.all_objects.values_list('id', 'fayda_id_hash')),
+                         {newer.id: None, **expected})
+        self.assertIn(f"Worker profile {newer.id} has the same Fayda ID as profile {older.id}", logs.output[0])
+        self.assertNotIn(make_fayda_id(1), logs.output[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WorkerImportEndpointTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', user_type='admin')
+        self.worker = User.objects.create(username='someone', user_type='worker')
+        self.url = reverse('admin_panel:import-workers')
+
+    def _upload(self, rows, **data):
+        upload = SimpleUploadedFile('workers.csv', make_csv(rows), content_type='text/csv')
+        return self.client.post(self.url, {'file': upload, **data}, format='multipart')
+
+    def test_admin_can_import(self):
+        self.client.force_authenticate(self.admin)
+        response = self._upload([make_row(1), make_row(2, working_time='sometimes')])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+        self.assertTrue(AdminAction.objects.filter(admin_user=self.admin, action_type='other').exists())
+
+    def test_non_admin_is_forbidden(self):
+        self.client.force_authenticate(self.worker)
+        response = self._upload([make_row(1)])
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_missing_file(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(self.url, {}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -2,6 +2,10 @@
 ASGI config for laborcon project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests are handled by Django; WebSocket connections (live
+notifications, see apps/notifications/consumers.py) by Channels. Serve it
+with an ASGI server, e.g. ``daphne core.asgi:application`` (``runserver``
+already does in development).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -11,6 +15,20 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "laborcon.settings")
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+# Initialise Django before importing consumers, which import models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from apps.notifications.routing import websocket_urlpatterns  # noqa: E402
+from users.auth import JWTWebSocketAuthMiddleware  # noqa: E402
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    "websocket": AllowedHostsOriginValidator(
+        JWTWebSocketAuthMiddleware(URLRouter(websocket_urlpatterns))
+    ),
+})
@@ -17,6 +17,12 @@ SECRET_KEY = config('SECRET_KEY')
 # Fernet key for field encryption
 FIELD_ENCRYPTION_KEY = config('FIELD_ENCRYPTION_KEY')
 
+# HMAC key for the Fayda ID blind index (WorkerProfile.fayda_id_hash) and the
+# verification cache (utils/verification_cache.py). Kept separate from
+# FIELD_ENCRYPTION_KEY so that key can be rotated; changing this one requires
+# recomputing every stored hash.
+FAYDA_ID_HASH_KEY = config('FAYDA_ID_HASH_KEY')
+
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=False, cast=bool)
@@ -20,6 +20,12 @@ SECRET_KEY = config('SECRET_KEY')
 # Fernet key for field encryption
 FIELD_ENCRYPTION_KEY = config('FIELD_ENCRYPTION_KEY')
 
+# HMAC key for the Fayda ID blind index (WorkerProfile.fayda_id_hash) and the
+# verification cache (utils/verification_cache.py). Kept separate from
+# FIELD_ENCRYPTION_KEY so that key can be rotated; changing this one requires
+# recomputing every stored hash.
+FAYDA_ID_HASH_KEY = config('FAYDA_ID_HASH_KEY')
+
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = config('DEBUG', default=False, cast=bool)
@@ -30,6 +36,7 @@ ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
 # Application definition
 
 INSTALLED_APPS = [
+    "daphne",  # ASGI runserver (HTTP + WebSockets); must come before staticfiles
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -244,6 +251,99 @@ CACHES = {
     }
 }
 
+# Channel layer for live WebSocket pushes (see apps/notifications/realtime.py)
+CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {
+            "hosts": [REDIS_URL],
+            "capacity": 1500,  # queued events per channel before new ones are dropped
+            "expiry": 30,
+        },
+    }
+}
+
+# Fayda ID verification cache (shared across workers, see utils/verification_cache.py)
+FAYDA_VERIFICATION_CACHE = {
+    "BACKEND": "utils.verification_cache.RedisVerificationCache",
+    "CACHE_ALIAS": "default",
+    "POSITIVE_TTL": config("FAYDA_VERIFICATION_POSITIVE_TTL", default=60 * 60 * 24 * 30, cast=int),
+    "NEGATIVE_TTL": config("FAYDA_VERIFICATION_NEGATIVE_TTL", default=60 * 60, cast=int),
+    "MAX_ENTRIES": 10000,  # Bound for the in-memory fallback
+}
+
+# Government Fayda verification endpoint used for batch verification.
+# Leave the URL empty to use the built-in simulation.
+FAYDA_VERIFICATION_API = {
+    "URL": config("FAYDA_VERIFICATION_API_URL", default=""),
+    "CONCURRENCY": config("FAYDA_VERIFICATION_CONCURRENCY", default=20, cast=int),
+    "RATE_LIMIT": config("FAYDA_VERIFICATION_RATE_LIMIT", default=50.0, cast=float),  # requests per second
+    "MAX_RETRIES": 3,
+    "TIMEOUT": 5.0,
+    "CIRCUIT_FAILURE_THRESHOLD": 5,
+    "CIRCUIT_RESET_TIMEOUT": 30.0,
+}
+
+# Notification delivery outbox (see apps/notifications/delivery.py).
+# Deliveries are drained by `manage.py run_notification_workers`; with EAGER
+# they are sent in-process right after the creating transaction commits.
+NOTIFICATION_DELIVERY = {
+    "EAGER": config("NOTIFICATION_DELIVERY_EAGER", default=False, cast=bool),
+    "WORKERS": {"email": 4, "sms": 2, "push": 4},  # threads per channel
+    "BATCH_SIZE": 100,  # deliveries claimed per poll
+    "MAX_ATTEMPTS": 5,  # then dead-lettered
+    "BACKOFF_BASE": 30,  # seconds, doubled per attempt
+    "BACKOFF_MAX": 60 * 60,
+    "LEASE_SECONDS": 5 * 60,  # in-progress deliveries older than this are reclaimed
+    "POLL_INTERVAL": 1.0,
+    "EMAIL_MESSAGES_PER_CONNECTION": 100,  # SMTP connection is recycled after this many messages
+}
+
+# Coalescing of bursty notifications (see apps/notifications/coalescing.py)
+NOTIFICATION_COALESCING = {
+    "TYPES": ["message_received"],  # merged per recipient and thread while unread
+    "WINDOW_SECONDS": 30 * 60,  # a notification idle for longer starts a new row
+    "DIGEST_TYPES": ["message_received"],  # email held back and sent as one digest
+    "DIGEST_INTERVAL": 15 * 60,
+}
+
+# Monthly partitions and retention of notifications and messages (see
+# apps/notifications/partitioning.py); run `manage.py maintain_notification_storage` daily.
+NOTIFICATION_STORAGE = {
+    "PARTITION_MONTHS_AHEAD": 3,
+    "TABLES": {
+        "notifications_notification": {"RETAIN_MONTHS": 12, "ARCHIVE": False},
+        # Expired message partitions are detached and kept for export, not dropped
+        "notifications_message": {"RETAIN_MONTHS": 24, "ARCHIVE": True},
+    },
+    "READ_NOTIFICATION_DAYS": 90,
+    "PRUNE_BATCH_SIZE": 5000,  # read notifications deleted per transaction
+    "PRUNE_PAUSE": 0.1,  # seconds between batches
+}
+
+# Asynchronous moderation of new messages (see apps/notifications/moderation_queue.py).
+# Run `manage.py run_moderation_workers`; after changing the moderation rules run
+# `manage.py rescan_message_moderation` to re-check messages moderated under the old ones.
+MESSAGE_MODERATION = {
+    "EAGER": config("MESSAGE_MODERATION_EAGER", default=False, cast=bool),
+    "WORKERS": 4,
+    "BATCH_SIZE": 100,  # messages claimed per poll
+    "LEASE_SECONDS": 5 * 60,  # claimed messages not moderated within this are claimed again
+    "POLL_INTERVAL": 1.0,
+    "RESCAN_BATCH_SIZE": 500,
+    "RESCAN_WORKERS": 4,  # batches re-checked in parallel
+    "REVIEW_BATCH_SIZE": 20,  # pending messages a moderator claims at a time
+    "REVIEW_LEASE_SECONDS": 15 * 60,  # unreviewed claims then return to the queue
+}
+
+# Unread notification/message counters (see apps/notifications/unread_counters.py).
+# Run `manage.py reconcile_unread_counters --interval 300` to correct drift.
+UNREAD_COUNTERS = {
+    "CACHE_ALIAS": "default",
+    "KEY_PREFIX": "unread",
+    "TIMEOUT": 60 * 60 * 24 * 7,  # counters are recounted from the database after this
+}
+
 # CORS settings for frontend integration (Next.js)
 CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000,http://127.0.0.1:3000', cast=Csv())
 
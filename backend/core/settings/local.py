@@ -20,6 +20,12 @@ DATABASES = {
 # Additional local development settings
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Deliver notifications in-process so no delivery worker is needed locally
+NOTIFICATION_DELIVERY = {**NOTIFICATION_DELIVERY, 'EAGER': True}
+
+# Moderate messages in-process so no moderation worker is needed locally
+MESSAGE_MODERATION = {**MESSAGE_MODERATION, 'EAGER': True}
+
 # Enable Django Debug Toolbar for local development
 if DEBUG:
     INSTALLED_APPS += [
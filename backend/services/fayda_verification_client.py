@@ -0,0 +1,260 @@
+"""
+Asynchronous client for the government Fayda ID verification endpoint
+
+Used for batch verification during registration campaigns. Requests run
+concurrently up to a configurable limit and are shaped by:
+- a token-bucket rate limiter shared by every request of the client
+- retries with exponential backoff and full jitter for transient failures
+- a circuit breaker that fails fast while the endpoint is unhealthy
+
+Endpoint contract: POST {base_url}/verify with {"fayda_id", "full_name"}
+returns 200 {"found": true, "details": {...}}, or 404 for unknown IDs.
+429 and 5xx responses, timeouts and connection errors are retried.
+"""
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is rejected because the circuit is open."""
+
+
+class VerificationRequestError(Exception):
+    """Raised when the endpoint returns a response that cannot be used."""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter for asyncio code.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. No lock
+    is needed: the refill-check-take sequence never awaits, so it is atomic
+    within the event loop.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; open ->
+    half-open after `reset_timeout` seconds, where a single trial request is
+    let through. A successful trial closes the circuit, a failed one reopens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+
+        return True
+
+    def record_success(self):
+        self._failures = 0
+        self._trial_in_flight = False
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Fayda verification circuit opened after %s failures", self._failures)
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class FaydaVerificationClient:
+    """
+    Batch client for the government verification endpoint.
+
+    lookup_many() returns one record per request, in input order:
+    {'found': True, 'details': {...}} or {'found': False} for answered
+    lookups, and {'error': '...'} when the ID could not be looked up.
+    """
+
+    def __init__(self, base_url: str, concurrency: int = 20, rate_limit: float = 50.0,
+                 burst: Optional[float] = None, max_retries: int = 3, backoff_base: float = 0.2,
+                 backoff_max: float = 5.0, timeout: float = 5.0,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.rate_limiter = TokenBucket(rate_limit, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    async def lookup_many(self, entries: Sequence[Tuple[str, Optional[str]]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Looks up (fayda_id, full_name) pairs concurrently.
+
+        Returns:
+            (records, stats) where stats reports throughput and latency
+            percentiles in milliseconds
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {'retries': 0, 'circuit_rejections': 0}
+        latencies = []
+        started_at = time.monotonic()
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            async def run(fayda_id, full_name):
+                async with semaphore:
+                    request_started_at = time.monotonic()
+                    record = await self._lookup_with_retries(session, fayda_id, full_name, stats)
+                    latencies.append(time.monotonic() - request_started_at)
+                    return record
+
+            records = await asyncio.gather(*(run(fayda_id, full_name) for fayda_id, full_name in entries))
+
+        elapsed = time.monotonic() - started_at
+        latencies.sort()
+        failed = sum(1 for record in records if 'error' in record)
+        stats.update({
+            'total': len(records),
+            'succeeded': len(records) - failed,
+            'failed': failed,
+            'elapsed_seconds': round(elapsed, 4),
+            'throughput_per_second': round(len(records) / elapsed, 2) if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': round(_percentile(latencies, 50) * 1000, 2),
+                'p95': round(_percentile(latencies, 95) * 1000, 2),
+                'p99': round(_percentile(latencies, 99) * 1000, 2),
+                'max': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            },
+            'circuit_state': self.circuit_breaker.state,
+        })
+        return list(records), stats
+
+    async def _lookup_with_retries(self, session, fayda_id, full_name, stats):
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                stats['circuit_rejections'] += 1
+                return {'error': 'Verification service unavailable'}
+
+            await self.rate_limiter.acquire()
+            try:
+                record = await self._lookup(session, fayda_id, full_name)
+            except (aiohttp.ClientError, asyncio.TimeoutError, VerificationRequestError) as e:
+                retryable = getattr(e, 'retryable', True)
+                if retryable:
+                    self.circuit_breaker.record_failure()
+                else:
+                    # The endpoint answered; a bad request says nothing about its health
+                    self.circuit_breaker.record_success()
+                if not retryable or attempt >= self.max_retries:
+                    logger.error(f"Fayda verification failed for request after {attempt + 1} attempts: {str(e)}")
+                    return {'error': str(e) or e.__class__.__name__}
+                attempt += 1
+                stats['retries'] += 1
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            self.circuit_breaker.record_success()
+            return record
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _lookup(self, session, fayda_id, full_name):
+        payload = {'fayda_id': fayda_id, 'full_name': full_name}
+        async with session.post(f"{self.base_url}/verify", json=payload) as response:
+            if response.status == 404:
+                return {'found': False}
+            if response.status in RETRYABLE_STATUSES:
+                raise VerificationRequestError(f"Verification endpoint returned {response.status}", retryable=True)
+            if response.status != 200:
+                raise VerificationRequestError(f"Verification endpoint returned {response.status}")
+            data = await response.json()
+            return {'found': bool(data.get('found', True)), 'details': data.get('details') or {}}
+
+
+_client = None
+
+
+def get_verification_client() -> Optional[FaydaVerificationClient]:
+    """
+    Returns the process-wide client configured by FAYDA_VERIFICATION_API, or
+    None when no endpoint URL is configured (the simulation is used instead).
+    """
+    global _client
+    from django.conf import settings
+
+    options = getattr(settings, 'FAYDA_VERIFICATION_API', {})
+    if not options.get('URL'):
+        return None
+
+    if _client is None:
+        _client = FaydaVerificationClient(
+            base_url=options['URL'],
+            concurrency=options.get('CONCURRENCY', 20),
+            rate_limit=options.get('RATE_LIMIT', 50.0),
+            max_retries=options.get('MAX_RETRIES', 3),
+            timeout=options.get('TIMEOUT', 5.0),
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=options.get('CIRCUIT_FAILURE_THRESHOLD', 5),
+                reset_timeout=options.get('CIRCUIT_RESET_TIMEOUT', 30.0),
+            ),
+        )
+    return _client
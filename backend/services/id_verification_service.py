@@ -1,9 +1,15 @@
 """
 Service layer for handling Fayda ID verification and related operations
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Tuple
+from asgiref.sync import async_to_sync
 from django.core.exceptions import ValidationError
-from utils.fayda_id_validator import verify_fayda_id
+from utils.fayda_id_validator import (
+    GovernmentIDVerificationService,
+    validate_fayda_id_batch,
+    verify_fayda_id,
+)
+from .fayda_verification_client import get_verification_client
 
 
 class IDVerificationService:
@@ -37,6 +43,77 @@ class IDVerificationService:
         return result
         
     
+    @staticmethod
+    def verify_worker_ids(entries: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Any]:
+        """
+        Verifies many (fayda_id, full_name) pairs at once.
+
+        IDs are format-checked in one batch, served from the verification
+        cache where possible, and only the remaining unique IDs are sent to
+        the government endpoint (concurrently, when FAYDA_VERIFICATION_API
+        is configured).
+
+        Returns:
+            {'results': [...], 'stats': {...}} with one result per entry, in
+            the same shape as verify_worker_id
+        """
+        entries = list(entries)
+        service = GovernmentIDVerificationService()
+        reasons = validate_fayda_id_batch([fayda_id or '' for fayda_id, _ in entries])
+
+        records = {}
+        to_lookup = []
+        for (fayda_id, full_name), reason in zip(entries, reasons):
+            if reason is not None or fayda_id in records:
+                continue
+            record = service.cache.get(fayda_id)
+            records[fayda_id] = record
+            if record is None:
+                to_lookup.append((fayda_id, full_name))
+
+        stats = {'total': len(entries), 'cache_hits': len(records) - len(to_lookup), 'lookups': len(to_lookup)}
+        client = get_verification_client()
+        if client is not None and to_lookup:
+            looked_up, client_stats = async_to_sync(client.lookup_many)(to_lookup)
+            stats['client'] = client_stats
+        else:
+            looked_up = [service._lookup_government_record(fayda_id, full_name) for fayda_id, full_name in to_lookup]
+
+        for (fayda_id, _), record in zip(to_lookup, looked_up):
+            records[fayda_id] = record
+            if 'error' not in record:
+                service.cache.set(fayda_id, record)
+
+        results = []
+        for (fayda_id, full_name), reason in zip(entries, reasons):
+            if not fayda_id:
+                results.append({
+                    'is_valid': False,
+                    'is_verified': False,
+                    'error': 'Fayda ID is required',
+                    'details': None
+                })
+            elif reason is not None:
+                results.append({
+                    'is_valid': False,
+                    'is_verified': False,
+                    'error': 'Invalid ID format',
+                    'details': None
+                })
+            elif 'error' in records[fayda_id]:
+                results.append({
+                    'is_valid': True,
+                    'is_verified': False,
+                    'error': records[fayda_id]['error'],
+                    'details': None
+                })
+            else:
+                results.append(
+                    GovernmentIDVerificationService.result_from_record(records[fayda_id], full_name, fayda_id)
+                )
+
+        return {'results': results, 'stats': stats}
+
     @staticmethod
     def validate_and_verify_worker_profile(fayda_id: str, full_name: str) -> Dict[str, Any]:
         """
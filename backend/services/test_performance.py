@@ -0,0 +1,28 @@
+import asyncio
+
+import pytest
+
+from services.fayda_verification_client import FaydaVerificationClient
+from tests.verification_stub import run_stub_server
+
+
+@pytest.fixture(scope='module')
+def stub_server():
+    with run_stub_server(latency=0.02, latency_jitter=0.03, failure_rate=0.05, seed=42) as server:
+        yield server
+
+
+def test_batch_verification_throughput_benchmark(benchmark, stub_server):
+    entries = [(f"22051501{index:07d}0", None) for index in range(500)]
+
+    def verify_batch():
+        client = FaydaVerificationClient(stub_server.base_url, concurrency=50, rate_limit=2000, backoff_base=0.01)
+        return asyncio.run(client.lookup_many(entries))
+
+    records, stats = benchmark.pedantic(verify_batch, rounds=3, iterations=1)
+    benchmark.extra_info.update({
+        'throughput_per_second': stats['throughput_per_second'],
+        'latency_ms': stats['latency_ms'],
+        'retries': stats['retries'],
+    })
+    assert stats['succeeded'] == len(entries)
@@ -3,10 +3,15 @@ Tests for the ID Verification Service
 """
 from django.test import TestCase
 from services.id_verification_service import IDVerificationService
+from utils.fayda_id_validator import GovernmentIDVerificationService
 
 
 class TestIDVerificationService(TestCase):
     """Test cases for the ID Verification Service"""
+
+    def setUp(self):
+        # Verification results are cached across tests; start from a clean cache
+        GovernmentIDVerificationService.reset_storage()
     
     def test_verify_worker_id_with_valid_id(self):
         """Test verifying a worker ID with a valid format"""
@@ -0,0 +1,135 @@
+"""
+Tests for batch Fayda ID verification against a local stub endpoint
+"""
+import asyncio
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from services import fayda_verification_client
+from services.fayda_verification_client import CircuitBreaker, FaydaVerificationClient, TokenBucket
+from services.id_verification_service import IDVerificationService
+from tests.verification_stub import run_stub_server
+from utils.fayda_id_validator import GovernmentIDVerificationService
+
+VALID_IDS = ["2205150100000008", "2207110400000005", "2207120500000009"]
+
+
+class TestFaydaVerificationClient(TestCase):
+    """Test cases for the asyncio verification client"""
+
+    def test_lookup_many_preserves_order(self):
+        """Test that records come back in input order with stats"""
+        with run_stub_server(latency=0.01, unknown_ids={VALID_IDS[1]}) as server:
+            client = FaydaVerificationClient(server.base_url, concurrency=3, rate_limit=1000)
+            records, stats = asyncio.run(client.lookup_many([(fayda_id, 'Test Name') for fayda_id in VALID_IDS]))
+
+        self.assertEqual(records[0]['details']['fayda_id'], VALID_IDS[0])
+        self.assertEqual(records[1], {'found': False})
+        self.assertEqual(records[2]['details']['fayda_id'], VALID_IDS[2])
+        self.assertEqual(stats['succeeded'], 3)
+        self.assertGreater(stats['throughput_per_second'], 0)
+        self.assertGreaterEqual(stats['latency_ms']['p99'], stats['latency_ms']['p50'])
+
+    def test_retries_transient_failures(self):
+        """Test that 503 responses are retried until they succeed"""
+        with run_stub_server(failure_rate=0.5, seed=7) as server:
+            client = FaydaVerificationClient(server.base_url, rate_limit=1000, max_retries=10,
+                                             backoff_base=0.001, circuit_breaker=CircuitBreaker(failure_threshold=100))
+            records, stats = asyncio.run(client.lookup_many([(VALID_IDS[0], None)] * 20))
+
+        self.assertTrue(all(record['found'] for record in records))
+        self.assertGreater(stats['retries'], 0)
+        self.assertEqual(server.request_count, 20 + stats['retries'])
+
+    def test_circuit_breaker_fails_fast(self):
+        """Test that an unhealthy endpoint opens the circuit and stops receiving requests"""
+        with run_stub_server(failure_rate=1.0) as server:
+            client = FaydaVerificationClient(server.base_url, concurrency=1, rate_limit=1000, max_retries=0,
+                                             circuit_breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+            records, stats = asyncio.run(client.lookup_many([(VALID_IDS[0], None)] * 10))
+
+        self.assertEqual(server.request_count, 3)
+        self.assertEqual(stats['circuit_rejections'], 7)
+        self.assertEqual(stats['failed'], 10)
+        self.assertEqual(stats['circuit_state'], CircuitBreaker.OPEN)
+
+    def test_circuit_breaker_half_open_trial(self):
+        """Test that a successful trial request closes the circuit again"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        with mock.patch('services.fayda_verification_client.time.monotonic', return_value=100):
+            breaker.record_failure()
+            self.assertFalse(breaker.allow_request())
+
+        with mock.patch('services.fayda_verification_client.time.monotonic', return_value=111):
+            self.assertTrue(breaker.allow_request())
+            self.assertFalse(breaker.allow_request())  # only one trial at a time
+            breaker.record_success()
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_token_bucket_limits_rate(self):
+        """Test that the token bucket spaces requests beyond the burst"""
+        bucket = TokenBucket(rate=100, capacity=1)
+
+        async def take(count):
+            for _ in range(count):
+                await bucket.acquire()
+
+        loop_time = asyncio.run(self._timed(take(6)))
+        self.assertGreaterEqual(loop_time, 0.045)
+
+    @staticmethod
+    async def _timed(coroutine):
+        loop = asyncio.get_running_loop()
+        started_at = loop.time()
+        await coroutine
+        return loop.time() - started_at
+
+
+class TestBatchWorkerIDVerification(TestCase):
+    """Test cases for IDVerificationService.verify_worker_ids"""
+
+    def setUp(self):
+        GovernmentIDVerificationService.reset_storage()
+        fayda_verification_client._client = None
+
+    def tearDown(self):
+        fayda_verification_client._client = None
+
+    def test_batch_without_endpoint_uses_simulation(self):
+        """Test batch verification with the built-in simulation"""
+        batch = IDVerificationService.verify_worker_ids([
+            (VALID_IDS[0], 'Abebe Kebede'),
+            ('123', 'Bad Format'),
+            ('', None),
+        ])
+
+        results = batch['results']
+        self.assertTrue(results[0]['is_verified'])
+        self.assertEqual(results[1]['error'], 'Invalid ID format')
+        self.assertEqual(results[2]['error'], 'Fayda ID is required')
+
+    def test_batch_against_stub_endpoint(self):
+        """Test that only uncached unique IDs reach the endpoint"""
+        with run_stub_server(latency=0.005) as server:
+            with override_settings(FAYDA_VERIFICATION_API={'URL': server.base_url, 'RATE_LIMIT': 1000}):
+                IDVerificationService.verify_worker_id(VALID_IDS[0], 'Abebe Kebede')  # cached via the simulation
+                batch = IDVerificationService.verify_worker_ids(
+                    [(fayda_id, 'Abebe Kebede') for fayda_id in VALID_IDS] + [(VALID_IDS[1], 'Abebe Kebede')]
+                )
+
+        self.assertEqual(server.request_count, 2)
+        self.assertEqual(batch['stats']['cache_hits'], 1)
+        self.assertEqual(batch['stats']['client']['total'], 2)
+        self.assertTrue(all(result['is_verified'] for result in batch['results']))
+
+    def test_endpoint_errors_are_not_cached(self):
+        """Test that transport failures are reported and retried on the next batch"""
+        with run_stub_server(failure_rate=1.0) as server:
+            with override_settings(FAYDA_VERIFICATION_API={'URL': server.base_url, 'MAX_RETRIES': 0}):
+                batch = IDVerificationService.verify_worker_ids([(VALID_IDS[0], None)])
+
+        self.assertFalse(batch['results'][0]['is_verified'])
+        self.assertIsNotNone(batch['results'][0]['error'])
+        self.assertIsNone(GovernmentIDVerificationService().cache.get(VALID_IDS[0]))
@@ -0,0 +1,133 @@
+"""
+Local SMTP stand-in for testing and load-testing email delivery
+
+Accepts the subset of SMTP that Django's SMTP backend uses and stores every
+received message in memory. `connect_latency` delays the greeting of each new
+connection to model the TCP + TLS setup cost of a real mail server:
+
+    python -m tests.smtp_stub --port 8025 --connect-latency 0.05
+"""
+import argparse
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+
+
+class SMTPStubServer(socketserver.ThreadingTCPServer):
+    """
+    Args:
+        connect_latency: Seconds to wait before greeting each new connection
+        message_latency: Seconds to wait before accepting each message
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 0), connect_latency: float = 0.0, message_latency: float = 0.0):
+        super().__init__(address, SMTPStubHandler)
+        self.connect_latency = connect_latency
+        self.message_latency = message_latency
+        self.connection_count = 0
+        self.messages = []
+        self._lock = threading.Lock()
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def record_connection(self):
+        with self._lock:
+            self.connection_count += 1
+
+    def record_message(self, mail_from, recipients, data):
+        with self._lock:
+            self.messages.append({'from': mail_from, 'to': recipients, 'data': data})
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.record_connection()
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+        self._reply('220 localhost SMTP stub ready')
+
+        mail_from, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb in ('EHLO', 'HELO'):
+                self._reply('250 localhost')
+            elif verb == 'MAIL':
+                mail_from, recipients = command[10:].strip(), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].strip())
+                self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = self._read_data()
+                if self.server.message_latency:
+                    time.sleep(self.server.message_latency)
+                self.server.record_message(mail_from, recipients, data)
+                mail_from, recipients = None, []
+                self._reply('250 OK: queued')
+            elif verb in ('RSET', 'NOOP'):
+                mail_from, recipients = None, []
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                return b''.join(lines)
+            lines.append(line)
+
+    def _reply(self, text):
+        self.wfile.write(f"{text}\r\n".encode())
+
+
+@contextmanager
+def run_smtp_stub(**kwargs):
+    """Runs an SMTPStubServer in a background thread for the duration of the block."""
+    server = SMTPStubServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local SMTP stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8025)
+    parser.add_argument('--connect-latency', type=float, default=0.05)
+    parser.add_argument('--message-latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = SMTPStubServer(
+        (args.host, args.port),
+        connect_latency=args.connect_latency,
+        message_latency=args.message_latency,
+    )
+    print(f"SMTP stub listening on {stub.host}:{stub.port}")
+    stub.serve_forever()
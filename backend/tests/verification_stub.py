@@ -0,0 +1,133 @@
+"""
+Local stub of the government Fayda verification endpoint
+
+Simulates latency and transient failures so the batch verification client
+can be tested and load-tested without the real service:
+
+    python -m tests.verification_stub --port 8089 --latency 0.05 --failure-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+
+
+class VerificationStubServer(ThreadingHTTPServer):
+    """
+    HTTP server answering POST /verify.
+
+    Args:
+        latency: Seconds to wait before answering each request
+        latency_jitter: Extra random latency in [0, latency_jitter] seconds
+        failure_rate: Probability of answering 503 instead of a result
+        unknown_ids: IDs answered with 404 (not in the registry)
+        seed: Seed for the failure/jitter random generator
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 0), latency: float = 0.0, latency_jitter: float = 0.0,
+                 failure_rate: float = 0.0, unknown_ids: Optional[Iterable[str]] = None,
+                 seed: Optional[int] = None):
+        super().__init__(address, VerificationStubHandler)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.unknown_ids = set(unknown_ids or [])
+        self.request_count = 0
+        self.failure_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_outcome(self):
+        """Returns (delay_seconds, should_fail) for the next request."""
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            should_fail = self._random.random() < self.failure_rate
+            if should_fail:
+                self.failure_count += 1
+        return delay, should_fail
+
+
+class VerificationStubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.rstrip('/') != '/verify':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        delay, should_fail = self.server.next_outcome()
+        if delay:
+            time.sleep(delay)
+
+        if should_fail:
+            self._send_json(503, {'error': 'Service temporarily unavailable'})
+            return
+
+        fayda_id = payload.get('fayda_id')
+        if fayda_id in self.server.unknown_ids:
+            self._send_json(404, {'found': False})
+            return
+
+        self._send_json(200, {
+            'found': True,
+            'details': {'fayda_id': fayda_id, 'full_name': payload.get('full_name')},
+        })
+
+    def _send_json(self, status_code, body):
+        data = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep test and load-test output quiet
+        pass
+
+
+@contextmanager
+def run_stub_server(**kwargs):
+    """Runs a VerificationStubServer in a background thread for the duration of the block."""
+    server = VerificationStubServer(**kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local Fayda verification stub server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = VerificationStubServer(
+        (args.host, args.port),
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        failure_rate=args.failure_rate,
+    )
+    print(f"Verification stub listening on {stub.base_url}")
+    stub.serve_forever()
@@ -1,6 +1,11 @@
 """
 Authentication utilities for the users API
 """
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
 from ninja.security import HttpBearer
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import AccessToken
@@ -27,4 +32,25 @@ class JWTAuth(HttpBearer):
             return None
         except User.DoesNotExist:
             # User doesn't exist
-            return None
\ No newline at end of file
+            return None
+
+
+@database_sync_to_async
+def get_user_for_token(token):
+    try:
+        return User.objects.get(id=AccessToken(token).get('user_id'))
+    except (TokenError, User.DoesNotExist):
+        return AnonymousUser()
+
+
+class JWTWebSocketAuthMiddleware(BaseMiddleware):
+    """
+    Sets scope['user'] for WebSocket connections from a JWT access token
+
+    Browsers cannot set headers on WebSocket requests, so the token is passed
+    as the `token` query parameter.
+    """
+    async def __call__(self, scope, receive, send):
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0]
+        scope = dict(scope, user=await get_user_for_token(token) if token else AnonymousUser())
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0005_alter_user_managers_user_deleted_at_user_is_deleted"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="preferred_language",
+            field=models.CharField(
+                choices=[("en", "English"), ("am", "Amharic")],
+                default="en",
+                max_length=5,
+            ),
+        ),
+    ]
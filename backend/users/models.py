@@ -14,10 +14,16 @@ class User(AbstractUser):
         ('employer', 'Employer'),
         ('admin', 'Admin'),
     ]
+
+    LANGUAGE_CHOICES = [
+        ('en', 'English'),
+        ('am', 'Amharic'),
+    ]
     
     user_type = models.CharField(max_length=10, choices=USER_TYPE_CHOICES, default='worker', db_index=True)
     phone_number = models.CharField(max_length=15, blank=True, null=True, db_index=True)
     is_verified = models.BooleanField(default=False, db_index=True)
+    preferred_language = models.CharField(max_length=5, choices=LANGUAGE_CHOICES, default='en')  # Used for notifications
     data_processing_consent = models.BooleanField(default=False) # GDPR compliance
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(blank=True, null=True)
@@ -29,7 +29,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = User
-        fields = ('username', 'email', 'password', 'password_confirm', 'user_type', 'phone_number')
+        fields = ('username', 'email', 'password', 'password_confirm', 'user_type', 'phone_number', 'preferred_language')
     
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
@@ -45,7 +45,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             email=validated_data.get('email', ''),
             password=validated_data['password'],
             user_type=validated_data.get('user_type', 'worker'),
-            phone_number=validated_data.get('phone_number', '')
+            phone_number=validated_data.get('phone_number', ''),
+            preferred_language=validated_data.get('preferred_language', 'en')
         )
         
         return user
@@ -54,7 +55,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'user_type', 'phone_number', 'is_verified', 'date_joined', 'last_login')
+        fields = ('id', 'username', 'email', 'user_type', 'phone_number', 'preferred_language', 'is_verified', 'date_joined', 'last_login')
         read_only_fields = ('id', 'date_joined', 'last_login', 'is_verified')
 
 
@@ -0,0 +1,39 @@
+"""
+Opaque cursors for keyset pagination, newest first
+
+A cursor encodes the (timestamp, id) of the last row of a page. The next
+page is the rows strictly before it in (timestamp, id) order, so pages stay
+stable while new rows arrive and fetching an old page costs the same as
+fetching the newest one (an index range scan on (..., timestamp, id)).
+Used by message history, the job feed, and the employer's applicant and
+shortlist lists, each on its own timestamp field.
+"""
+import base64
+from datetime import datetime
+from typing import Tuple
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor()."""
+
+
+def encode_cursor(obj, field: str = 'created_at') -> str:
+    raw = f"{getattr(obj, field).isoformat()}|{obj.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+
+
+def before_cursor(cursor: str, field: str = 'created_at') -> Q:
+    """Filter for the rows that come before the cursor, newest first by `field` then id."""
+    timestamp, row_id = decode_cursor(cursor)
+    return Q(**{f"{field}__lt": timestamp}) | Q(**{field: timestamp, 'id__lt': row_id})
@@ -4,11 +4,168 @@ Fayda ID Validation and Verification System
 This module implements an Ethiopian national ID validation system with:
 - Format validation
 - Checksum verification
+- Table-driven batch validation with per-ID reason codes
 - Simulation of government ID verification
 """
 
 import re
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional
+
+from utils.verification_cache import VerificationCache, cacheable_record, get_verification_cache, keyed_hash
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is only needed for batch validation
+    np = None
+
+
+# Ethiopian regions and their 2-digit codes
+REGION_CODES = {
+    '01': 'Tigray',
+    '02': 'Afar',
+    '03': 'Amhara',
+    '04': 'Oromia',
+    '05': 'Somali',
+    '06': 'Benishangul-Gumuz',
+    '07': 'SNNPR',
+    '08': 'Gambela',
+    '09': 'Harari',
+    '10': 'Addis Ababa',
+    '11': 'Dire Dawa',
+}
+
+FAYDA_ID_LENGTH = 16
+
+# Reason codes returned by the batch validator (None means the ID is valid)
+REASON_LENGTH = 'length'
+REASON_FORMAT = 'format'
+REASON_DATE = 'date'
+REASON_REGION = 'region'
+REASON_CHECKSUM = 'checksum'
+
+# Index 0 is reserved for "valid"; the batch path stores these indexes as uint8
+REASON_CODES = (None, REASON_LENGTH, REASON_FORMAT, REASON_DATE, REASON_REGION, REASON_CHECKSUM)
+
+# Alternating 1/3 weights over the first 15 digits, starting with 1
+CHECKSUM_WEIGHTS = tuple(1 if i % 2 == 0 else 3 for i in range(FAYDA_ID_LENGTH - 1))
+
+# weighted_digit[position][digit] -> digit * weight, so the scalar path is just lookups
+_WEIGHTED_DIGITS = tuple(
+    tuple(digit * weight for digit in range(10)) for weight in CHECKSUM_WEIGHTS
+)
+_DIGIT_VALUES = {str(digit): digit for digit in range(10)}
+
+if np is not None:
+    _NP_CHECKSUM_WEIGHTS = np.array(CHECKSUM_WEIGHTS, dtype=np.int32)
+    _NP_VALID_REGIONS = np.zeros(100, dtype=bool)
+    _NP_VALID_REGIONS[[int(code) for code in REGION_CODES]] = True
+
+
+def fayda_id_reason(fayda_id: str) -> Optional[str]:
+    """
+    Returns the reason a Fayda ID is invalid, or None if it is valid.
+
+    Checks run in order (length, format, date, region, checksum) and the
+    first failure wins, matching the batch validator.
+    """
+    if not isinstance(fayda_id, str) or len(fayda_id) != FAYDA_ID_LENGTH:
+        return REASON_LENGTH
+
+    if not (fayda_id.isascii() and fayda_id.isdigit()):
+        return REASON_FORMAT
+
+    # First 6 digits represent the birth date (YYMMDD)
+    month = _DIGIT_VALUES[fayda_id[2]] * 10 + _DIGIT_VALUES[fayda_id[3]]
+    day = _DIGIT_VALUES[fayda_id[4]] * 10 + _DIGIT_VALUES[fayda_id[5]]
+    if month > 12 or not 1 <= day <= 31:
+        return REASON_DATE
+
+    # Next 2 digits represent the region code
+    if fayda_id[6:8] not in REGION_CODES:
+        return REASON_REGION
+
+    if not _checksum_matches(fayda_id):
+        return REASON_CHECKSUM
+
+    return None
+
+
+def _checksum_matches(fayda_id: str) -> bool:
+    """Checks the 16th digit against the weighted sum of the first 15."""
+    total = 0
+    for position, weighted in enumerate(_WEIGHTED_DIGITS):
+        total += weighted[_DIGIT_VALUES[fayda_id[position]]]
+
+    # The check digit makes the total divisible by 10
+    expected_check_digit = (10 - (total % 10)) % 10
+    return expected_check_digit == _DIGIT_VALUES[fayda_id[15]]
+
+
+def validate_fayda_id_batch(fayda_ids: Iterable[str]) -> List[Optional[str]]:
+    """
+    Validates many Fayda IDs at once.
+
+    Args:
+        fayda_ids: The IDs to validate
+
+    Returns:
+        A list of reason codes in input order: None for a valid ID, otherwise
+        one of 'length', 'format', 'date', 'region' or 'checksum'.
+    """
+    fayda_ids = list(fayda_ids)
+    if np is None:
+        return [fayda_id_reason(fayda_id) for fayda_id in fayda_ids]
+
+    codes = _batch_reason_indexes(fayda_ids)
+    return [REASON_CODES[code] for code in codes.tolist()]
+
+
+def _batch_reason_indexes(fayda_ids: List[str]):
+    """
+    Vectorised validation returning an array of indexes into REASON_CODES.
+
+    Well-sized IDs are packed into one (n, 16) uint8 digit matrix so the date,
+    region and checksum rules each run as a single array operation.
+    """
+    count = len(fayda_ids)
+    codes = np.full(count, REASON_CODES.index(REASON_LENGTH), dtype=np.uint8)
+
+    sized = [
+        index for index, fayda_id in enumerate(fayda_ids)
+        if isinstance(fayda_id, str) and len(fayda_id) == FAYDA_ID_LENGTH
+    ]
+    if not sized:
+        return codes
+
+    # Non-ASCII characters become '?' so every ID stays exactly 16 bytes wide
+    packed = ''.join(fayda_ids[index] for index in sized).encode('ascii', 'replace')
+    digits = (np.frombuffer(packed, dtype=np.uint8).reshape(-1, FAYDA_ID_LENGTH) - ord('0')).astype(np.int32)
+
+    reasons = np.zeros(len(sized), dtype=np.uint8)
+
+    # Bytes below '0' wrap around on the uint8 subtraction, so one bound check suffices
+    is_numeric = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    reasons[~is_numeric] = REASON_CODES.index(REASON_FORMAT)
+    pending = reasons == 0
+
+    month = digits[:, 2] * 10 + digits[:, 3]
+    day = digits[:, 4] * 10 + digits[:, 5]
+    bad_date = pending & ((month > 12) | (day < 1) | (day > 31))
+    reasons[bad_date] = REASON_CODES.index(REASON_DATE)
+    pending &= ~bad_date
+
+    region = np.clip(digits[:, 6] * 10 + digits[:, 7], 0, 99)
+    bad_region = pending & ~_NP_VALID_REGIONS[region]
+    reasons[bad_region] = REASON_CODES.index(REASON_REGION)
+    pending &= ~bad_region
+
+    total = digits[:, :FAYDA_ID_LENGTH - 1] @ _NP_CHECKSUM_WEIGHTS
+    expected_check_digit = (10 - (total % 10)) % 10
+    bad_checksum = pending & (expected_check_digit != digits[:, FAYDA_ID_LENGTH - 1])
+    reasons[bad_checksum] = REASON_CODES.index(REASON_CHECKSUM)
+
+    codes[np.asarray(sized, dtype=np.intp)] = reasons
+    return codes
 
 
 class FaydaIDValidator:
@@ -18,20 +175,8 @@ class FaydaIDValidator:
     """
     
     def __init__(self):
-        # Ethiopian regions and their 2-digit codes
-        self.region_codes = {
-            '01': 'Tigray',
-            '02': 'Afar',
-            '03': 'Amhara',
-            '04': 'Oromia',
-            '05': 'Somali',
-            '06': 'Benishangul-Gumuz',
-            '07': 'SNNPR',
-            '08': 'Gambela',
-            '09': 'Harari',
-            '10': 'Addis Ababa',
-            '11': 'Dire Dawa',
-        }
+        # Shared, module-level lookup table; instances no longer rebuild it
+        self.region_codes = REGION_CODES
     
     def validate_format(self, fayda_id: str) -> bool:
         """
@@ -43,37 +188,13 @@ class FaydaIDValidator:
         Returns:
             True if format is valid, False otherwise
         """
-        if not isinstance(fayda_id, str):
-            return False
-        
-        # Check length and numeric format
-        if len(fayda_id) != 16 or not fayda_id.isdigit():
-            return False
-        
-        # Check if first 6 digits represent valid birth date (YYMMDD)
-        birth_date_part = fayda_id[:6]
-        year = birth_date_part[:2]
-        month = birth_date_part[2:4]
-        day = birth_date_part[4:6]
-        
-        # Basic validation for date components
-        try:
-            year_int = int(year)
-            month_int = int(month)
-            day_int = int(day)
-            
-            if not (0 <= month_int <= 12 and 1 <= day_int <= 31):
-                return False
-        except ValueError:
-            return False
-        
-        # Check if next 2 digits represent valid region code
-        region_code = fayda_id[6:8]
-        if region_code not in self.region_codes:
-            return False
-        
-        # Validate the checksum algorithm
-        return self._validate_checksum(fayda_id)
+        return fayda_id_reason(fayda_id) is None
+
+    def validate_batch(self, fayda_ids: Iterable[str]) -> List[Optional[str]]:
+        """
+        Validates many IDs at once, returning a reason code (or None) per ID.
+        """
+        return validate_fayda_id_batch(fayda_ids)
     
     def _validate_checksum(self, fayda_id: str) -> bool:
         """
@@ -84,39 +205,24 @@ class FaydaIDValidator:
         - Weight pattern: alternating 1 and 3 (starting with 1)
         - Check digit is the number that, when added to the sum, makes it divisible by 10
         """
-        if len(fayda_id) != 16:
+        if len(fayda_id) != FAYDA_ID_LENGTH or not (fayda_id.isascii() and fayda_id.isdigit()):
             return False
 
-        # Calculate weighted sum of first 15 digits
-        total = 0
-        for i in range(15):
-            digit = int(fayda_id[i])
-            # Apply alternating weights of 1 and 3, starting with 1
-            weight = 1 if i % 2 == 0 else 3
-            total += digit * weight
-
-        # The check digit should make the total sum divisible by 10
-        # So (total + check_digit) % 10 == 0
-        # Which means check_digit = (10 - (total % 10)) % 10
-        expected_check_digit = (10 - (total % 10)) % 10
-        actual_check_digit = int(fayda_id[15])
-
-        return expected_check_digit == actual_check_digit
+        return _checksum_matches(fayda_id)
 
 
 class GovernmentIDVerificationService:
     """
     Simulates government ID verification service
-    """
 
-    # Class-level storage to maintain state across instances for simulation
-    _valid_ids = set()
-    _id_details = {}
+    Lookup results are kept in a shared verification cache (see
+    utils.verification_cache) so repeated verifications of an ID are served
+    without calling the government endpoint again.
+    """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[VerificationCache] = None):
         # In a real implementation, this would connect to government ID verification API
-        # For simulation, we'll maintain a simple database of valid IDs
-        pass
+        self.cache = cache if cache is not None else get_verification_cache()
         
     def verify_id(self, fayda_id: str, full_name: str = None) -> Dict[str, any]:
         """
@@ -130,8 +236,7 @@ class GovernmentIDVerificationService:
             Dictionary with verification result
         """
         # Validate format first
-        validator = FaydaIDValidator()
-        if not validator.validate_format(fayda_id):
+        if fayda_id_reason(fayda_id) is not None:
             return {
                 'is_valid': False,
                 'is_verified': False,
@@ -139,53 +244,84 @@ class GovernmentIDVerificationService:
                 'details': None
             }
 
-        # Simulate checking against government database
-        # In real implementation, this would call government API
-        is_registered = fayda_id in GovernmentIDVerificationService._valid_ids
-
-        if is_registered:
-            # Return stored details
-            details = GovernmentIDVerificationService._id_details.get(fayda_id, {})
-            if full_name and details.get('full_name') != full_name:
-                return {
-                    'is_valid': True,
-                    'is_verified': False,
-                    'error': 'Name does not match ID records',
-                    'details': details
-                }
+        record = self.cache.get(fayda_id)
+        if record is None:
+            record = self._lookup_government_record(fayda_id, full_name)
+            self.cache.set(fayda_id, record)
+
+        return self.result_from_record(record, full_name, fayda_id)
+
+    @staticmethod
+    def result_from_record(record: Dict[str, any], full_name: str = None, fayda_id: str = None) -> Dict[str, any]:
+        """
+        Builds a verification result from a government lookup record.
+
+        Records are reduced as for the cache (cacheable_record), so a cached
+        and a fresh lookup give the same result; the name is checked against
+        the registered name's hash.
+
+        Args:
+            record: {'found': bool, 'details': dict} as returned by the registry or the cache
+            full_name: Optional name to match against ID records
+            fayda_id: The verified ID, echoed in the details
 
+        Returns:
+            Dictionary with verification result
+        """
+        record = cacheable_record(record)
+        if not record.get('found'):
+            return {
+                'is_valid': True,
+                'is_verified': False,
+                'error': 'ID not found in government records',
+                'details': None
+            }
+
+        name_matches = full_name is not None and keyed_hash(full_name) == record['details']['name_hash']
+        details = {
+            'fayda_id': fayda_id,
+            'full_name': full_name if name_matches else None,
+            'region': record['details']['region'],
+            'birth_year': record['details']['birth_year'],
+        }
+        if full_name and not name_matches:
             return {
                 'is_valid': True,
-                'is_verified': True,
-                'error': None,
+                'is_verified': False,
+                'error': 'Name does not match ID records',
                 'details': details
             }
-        else:
-            # For simulation, we'll consider all valid format IDs as verified
-            # In real world, this would depend on government database lookup
-            details = {
+
+        return {
+            'is_valid': True,
+            'is_verified': True,
+            'error': None,
+            'details': details
+        }
+
+    def _lookup_government_record(self, fayda_id: str, full_name: str = None) -> Dict[str, any]:
+        """
+        Looks an ID up in the government registry.
+
+        Returns {'found': True, 'details': {...}} for registered IDs and
+        {'found': False} otherwise. In a real implementation this would call
+        the government API; for simulation every well-formed ID is registered
+        under the name it is first verified with.
+        """
+        return {
+            'found': True,
+            'details': {
                 'fayda_id': fayda_id,
                 'full_name': full_name,
                 'region': self._extract_region_from_id(fayda_id),
                 'birth_year': self._extract_birth_year_from_id(fayda_id)
             }
-
-            # Register the ID as valid for future lookups
-            GovernmentIDVerificationService._valid_ids.add(fayda_id)
-            GovernmentIDVerificationService._id_details[fayda_id] = details
-
-            return {
-                'is_valid': True,
-                'is_verified': True,
-                'error': None,
-                'details': details
-            }
+        }
     
     def _extract_region_from_id(self, fayda_id: str) -> Optional[str]:
         """Extracts region name from ID's region code."""
-        validator = FaydaIDValidator()
         region_code = fayda_id[6:8]
-        return validator.region_codes.get(region_code)
+        return REGION_CODES.get(region_code)
     
     def _extract_birth_year_from_id(self, fayda_id: str) -> Optional[int]:
         """Extracts birth year from ID."""
@@ -203,9 +339,8 @@ class GovernmentIDVerificationService:
 
     @classmethod
     def reset_storage(cls):
-        """Reset the stored ID data - for testing purposes only"""
-        cls._valid_ids.clear()
-        cls._id_details.clear()
+        """Reset the cached ID data - for testing purposes only"""
+        get_verification_cache().clear()
 
 
 def validate_fayda_id_format(fayda_id: str) -> bool:
@@ -218,8 +353,7 @@ def validate_fayda_id_format(fayda_id: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    validator = FaydaIDValidator()
-    return validator.validate_format(fayda_id)
+    return fayda_id_reason(fayda_id) is None
 
 
 def verify_fayda_id(fayda_id: str, full_name: str = None) -> Dict[str, any]:
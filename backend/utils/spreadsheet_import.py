@@ -0,0 +1,105 @@
+"""
+Streaming readers for CSV/XLSX uploads used by the bulk import pipelines
+
+Rows are yielded one at a time as dictionaries keyed by the normalized header
+(lowercase, spaces replaced by underscores), so callers can process files of
+any size in fixed-size batches.
+"""
+import csv
+import io
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+class SpreadsheetImportError(Exception):
+    """Raised when an uploaded file cannot be read at all."""
+
+
+def normalize_header(header) -> str:
+    return str(header or '').strip().lower().replace(' ', '_')
+
+
+def _check_columns(columns: List[str], required_columns: Iterable[str]):
+    missing = [column for column in required_columns if column not in columns]
+    if missing:
+        raise SpreadsheetImportError(f"Missing required columns: {', '.join(missing)}")
+
+
+def _iter_csv_rows(file, required_columns) -> Iterator[Dict[str, Any]]:
+    if isinstance(file, (bytes, bytearray)):
+        file = io.BytesIO(file)
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+    reader = csv.reader(file)
+    try:
+        columns = [normalize_header(header) for header in next(reader)]
+    except StopIteration:
+        raise SpreadsheetImportError('The file is empty')
+    _check_columns(columns, required_columns)
+    for values in reader:
+        yield dict(zip(columns, values))
+
+
+def _iter_xlsx_rows(file, required_columns) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise SpreadsheetImportError('XLSX import requires openpyxl')
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise SpreadsheetImportError(f"Could not read XLSX file: {str(e)}")
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        try:
+            columns = [normalize_header(header) for header in next(rows)]
+        except StopIteration:
+            raise SpreadsheetImportError('The file is empty')
+        _check_columns(columns, required_columns)
+        for values in rows:
+            yield dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+def iter_spreadsheet_rows(file, filename: str,
+                          required_columns: Iterable[str] = ()) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Streams (row_number, row) pairs from a CSV or XLSX file. Row numbers match
+    the spreadsheet (the header is row 1); blank rows are skipped.
+
+    Raises:
+        SpreadsheetImportError: unsupported file type, unreadable file or
+            missing required columns
+    """
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        rows = _iter_xlsx_rows(file, required_columns)
+    elif name.endswith('.csv'):
+        rows = _iter_csv_rows(file, required_columns)
+    else:
+        raise SpreadsheetImportError('Only .csv and .xlsx files are supported')
+
+    for row_number, row in enumerate(rows, start=2):
+        if any(value not in (None, '') for value in row.values()):
+            yield row_number, row
+
+
+def clean_text(value) -> str:
+    """Cell value as stripped text; whole floats from XLSX lose their '.0'."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def split_list(value) -> List[str]:
+    """Splits 'a; b' (or 'a, b' when no semicolon is present) into items."""
+    text = clean_text(value)
+    if not text:
+        return []
+    separator = ';' if ';' in text else ','
+    return [item.strip() for item in text.split(separator) if item.strip()]
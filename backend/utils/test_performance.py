@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from utils.fayda_id_validator import CHECKSUM_WEIGHTS, REGION_CODES, validate_fayda_id_batch, validate_fayda_id_format
+
+
+def _make_fayda_ids(count, seed=2024):
+    rng = random.Random(seed)
+    regions = list(REGION_CODES)
+    ids = []
+    for _ in range(count):
+        base = (
+            f"{rng.randint(0, 99):02d}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+            f"{rng.choice(regions)}{rng.randint(0, 9999999):07d}"
+        )
+        total = sum(int(digit) * weight for digit, weight in zip(base, CHECKSUM_WEIGHTS))
+        ids.append(base + str((10 - total % 10) % 10))
+    return ids
+
+
+@pytest.fixture(scope='module')
+def fayda_ids():
+    return _make_fayda_ids(1_000_000)
+
+
+def test_fayda_batch_validation_benchmark(benchmark, fayda_ids):
+    results = benchmark.pedantic(validate_fayda_id_batch, args=(fayda_ids,), rounds=3, iterations=1)
+    assert results.count(None) == len(fayda_ids)
+
+
+def test_fayda_single_validation_benchmark(benchmark, fayda_ids):
+    def validate_each():
+        return sum(1 for fayda_id in fayda_ids if validate_fayda_id_format(fayda_id))
+
+    assert benchmark.pedantic(validate_each, rounds=1, iterations=1) == len(fayda_ids)
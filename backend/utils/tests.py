@@ -1,8 +1,15 @@
 """
 Tests for the Fayda ID validation and verification utilities
 """
-from django.test import TestCase
-from utils.fayda_id_validator import FaydaIDValidator, GovernmentIDVerificationService, validate_fayda_id_format, verify_fayda_id
+from unittest import mock
+
+from django.core.cache import cache as default_cache
+from django.test import TestCase, override_settings
+from utils.fayda_id_validator import (
+    FaydaIDValidator, GovernmentIDVerificationService, validate_fayda_id_format, verify_fayda_id,
+    validate_fayda_id_batch, fayda_id_reason
+)
+from utils.verification_cache import LocalLRUVerificationCache, RedisVerificationCache, VerificationCache, keyed_hash
 
 
 class TestFaydaIDValidator(TestCase):
@@ -88,6 +95,37 @@ class TestFaydaIDValidator(TestCase):
         self.assertFalse(validate_fayda_id_format(invalid_id))
 
 
+class TestFaydaIDBatchValidation(TestCase):
+    """Test cases for the batch Fayda ID validator"""
+
+    def test_reason_codes(self):
+        """Test that each failing rule reports its own reason code"""
+        ids = [
+            "2205150100000008",  # valid
+            "22051501000000",  # too short
+            "220515010000000a",  # non-numeric
+            "2213150100000008",  # month 13
+            "2205150000000000",  # region 00
+            "2205150100000009",  # wrong check digit
+            None,
+        ]
+        expected = [None, 'length', 'format', 'date', 'region', 'checksum', 'length']
+        self.assertEqual(validate_fayda_id_batch(ids), expected)
+
+    def test_batch_matches_single_path(self):
+        """Test that the batch and single-ID paths agree on every ID"""
+        ids = ["2205150100000008", "2207110400000005", "2207120500000002", "１２０５１５０１００００００８",
+               "2205150100000001", "0000000000000000", "9912311100000000", ""]
+        for fayda_id, reason in zip(ids, validate_fayda_id_batch(ids)):
+            with self.subTest(fayda_id=fayda_id):
+                self.assertEqual(reason, fayda_id_reason(fayda_id))
+                self.assertEqual(reason is None, validate_fayda_id_format(fayda_id))
+
+    def test_empty_batch(self):
+        """Test that an empty batch returns an empty result"""
+        self.assertEqual(validate_fayda_id_batch([]), [])
+
+
 class TestGovernmentIDVerificationService(TestCase):
     """Test cases for the government ID verification service"""
 
@@ -146,4 +184,120 @@ class TestGovernmentIDVerificationService(TestCase):
 
         self.assertEqual(result['is_valid'], True)
         self.assertEqual(result['is_verified'], True)
-        self.assertIsNone(result['error'])
\ No newline at end of file
+        self.assertIsNone(result['error'])
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestVerificationCache(TestCase):
+    """Test cases for the Fayda verification cache"""
+
+    def test_base_class_is_abstract(self):
+        """Test that a cache must implement get, set, delete and clear"""
+        with self.assertRaises(TypeError):
+            VerificationCache()
+
+    def test_lru_eviction(self):
+        """Test that the LRU cache stays bounded and evicts the oldest entry"""
+        cache = LocalLRUVerificationCache(max_entries=2)
+        cache.set('a', {'found': True})
+        cache.set('b', {'found': True})
+        cache.get('a')  # 'a' becomes most recently used
+        cache.set('c', {'found': True})
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_separate_positive_and_negative_ttls(self):
+        """Test that negative results expire on their own TTL"""
+        cache = LocalLRUVerificationCache(positive_ttl=100, negative_ttl=10)
+        with mock.patch('utils.verification_cache.time.monotonic', return_value=1000):
+            cache.set('found', {'found': True})
+            cache.set('missing', {'found': False})
+
+        with mock.patch('utils.verification_cache.time.monotonic', return_value=1050):
+            self.assertIsNotNone(cache.get('found'))
+            self.assertIsNone(cache.get('missing'))
+
+        stats = cache.stats()
+        self.assertEqual(stats['positive_sets'], 1)
+        self.assertEqual(stats['negative_sets'], 1)
+        self.assertEqual(stats['expirations'], 1)
+
+    def test_repeated_verification_uses_cache(self):
+        """Test that the government lookup runs once per ID"""
+        service = GovernmentIDVerificationService(cache=LocalLRUVerificationCache())
+        with mock.patch.object(service, '_lookup_government_record',
+                               wraps=service._lookup_government_record) as lookup:
+            service.verify_id("2205150100000008", "Test Name")
+            result = service.verify_id("2205150100000008", "Test Name")
+
+        self.assertEqual(lookup.call_count, 1)
+        self.assertTrue(result['is_verified'])
+
+    def test_cache_is_shared_between_service_instances(self):
+        """Test that a second service instance sees the first one's lookup"""
+        cache = LocalLRUVerificationCache()
+        GovernmentIDVerificationService(cache=cache).verify_id("2205150100000008", "Test Name")
+
+        result = GovernmentIDVerificationService(cache=cache).verify_id("2205150100000008", "Other Name")
+        self.assertFalse(result['is_verified'])
+        self.assertEqual(result['error'], 'Name does not match ID records')
+
+    def test_negative_result(self):
+        """Test that IDs missing from the registry are cached as negative results"""
+        cache = LocalLRUVerificationCache()
+        service = GovernmentIDVerificationService(cache=cache)
+        with mock.patch.object(service, '_lookup_government_record', return_value={'found': False}) as lookup:
+            result = service.verify_id("2205150100000008")
+            service.verify_id("2205150100000008")
+
+        self.assertEqual(lookup.call_count, 1)
+        self.assertTrue(result['is_valid'])
+        self.assertFalse(result['is_verified'])
+        self.assertEqual(cache.stats()['negative_sets'], 1)
+
+    def test_redis_errors_fall_back_to_memory(self):
+        """Test that cache server errors are counted and served from memory"""
+        cache = RedisVerificationCache()
+        broken = mock.Mock()
+        broken.get.side_effect = ConnectionError('redis down')
+        broken.set.side_effect = ConnectionError('redis down')
+        with mock.patch.object(RedisVerificationCache, 'cache', new_callable=mock.PropertyMock, return_value=broken):
+            cache.set('2205150100000008', {'found': False})
+            self.assertEqual(cache.get('2205150100000008'), {'found': False})
+
+        self.assertEqual(cache.stats()['errors'], 2)
+        self.assertEqual(cache.stats()['fallback']['hits'], 1)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_shared_entries_hold_no_id_or_name(self):
+        """Test that the shared cache is keyed on a hash and stores no personal data"""
+        cache = RedisVerificationCache(key_prefix='verification')
+        GovernmentIDVerificationService(cache=cache).verify_id("2205150100000008", "Test Name")
+
+        key = f"verification:{keyed_hash('2205150100000008')}"
+        self.assertEqual(default_cache.get(key), {
+            'found': True,
+            'details': {'region': 'Tigray', 'birth_year': 2022, 'name_hash': keyed_hash('Test Name')},
+        })
+        self.assertIsNone(default_cache.get('verification:2205150100000008'))
+
+        result = GovernmentIDVerificationService(cache=cache).verify_id("2205150100000008", "Test Name")
+        self.assertTrue(result['is_verified'])
+        self.assertEqual(result['details']['full_name'], 'Test Name')
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_clear_leaves_other_cache_data_alone(self):
+        """Test that clearing without pattern deletes does not wipe the shared cache alias"""
+        default_cache.set('unread:1', 3)
+        cache = RedisVerificationCache()
+        cache.set('2205150100000008', {'found': False})
+
+        with self.assertLogs('utils.verification_cache', 'WARNING'):
+            cache.clear()
+        self.assertEqual(default_cache.get('unread:1'), 3)
+        self.assertIsNone(cache.stats()['redis'])
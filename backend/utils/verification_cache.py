@@ -0,0 +1,316 @@
+"""
+Verification cache for Fayda ID government lookups
+
+Government lookups are cached per Fayda ID so that repeated verifications of
+the same ID - across gunicorn workers and restarts - do not hit the
+government endpoint again. Positive and negative results use separate TTLs.
+
+Fayda IDs and names are personal data, encrypted at rest elsewhere, so the
+cache never holds them in the clear: entries are keyed on an HMAC of the ID
+(FAYDA_ID_HASH_KEY), and a record is reduced to whether the ID was found,
+its region and birth year, and an HMAC of the registered name - enough to
+check a name against it (see cacheable_record).
+
+Backends:
+- RedisVerificationCache: shared cache on top of a Django cache alias
+  (django-redis by default), falling back to an in-memory LRU when the
+  cache server cannot be reached. Its size is bounded by the Redis server's
+  maxmemory and eviction policy, whose counters stats() reports
+- LocalLRUVerificationCache: bounded, per-process LRU with TTLs
+"""
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POSITIVE_TTL = 60 * 60 * 24 * 30  # 30 days
+DEFAULT_NEGATIVE_TTL = 60 * 60  # 1 hour
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_KEY_PREFIX = 'fayda_verification'
+
+
+def _is_positive(record: Dict[str, Any]) -> bool:
+    """A record is positive when the government registry knows the ID."""
+    return bool(record.get('found'))
+
+
+def keyed_hash(value: Optional[str]) -> Optional[str]:
+    """HMAC-SHA256 of a Fayda ID or name under FAYDA_ID_HASH_KEY; None for no value."""
+    from django.conf import settings
+
+    if value is None:
+        return None
+    return hmac.new(settings.FAYDA_ID_HASH_KEY.encode(), str(value).encode(), hashlib.sha256).hexdigest()
+
+
+def cacheable_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The part of a government lookup record that may be cached:
+    {'found': False}, or {'found': True, 'details': {'region', 'birth_year',
+    'name_hash'}}. Records already in this form are returned unchanged.
+    """
+    if not _is_positive(record):
+        return {'found': False}
+    details = record.get('details') or {}
+    if 'name_hash' in details:
+        return record
+    return {
+        'found': True,
+        'details': {
+            'region': details.get('region'),
+            'birth_year': details.get('birth_year'),
+            'name_hash': keyed_hash(details.get('full_name')),
+        },
+    }
+
+
+class VerificationCache(ABC):
+    """
+    Base class for verification caches.
+
+    Records are dictionaries returned by the government lookup, stored as
+    cacheable_record() reduces them; a record with a truthy 'found' key is
+    cached with the positive TTL, anything else with the negative TTL.
+    """
+
+    def __init__(self, positive_ttl: int = DEFAULT_POSITIVE_TTL,
+                 negative_ttl: int = DEFAULT_NEGATIVE_TTL):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'positive_sets': 0,
+            'negative_sets': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'errors': 0,
+        }
+
+    @abstractmethod
+    def get(self, fayda_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, fayda_id: str, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, fayda_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def ttl_for(self, record: Dict[str, Any]) -> int:
+        return self.positive_ttl if _is_positive(record) else self.negative_ttl
+
+    def stats(self) -> Dict[str, int]:
+        """Returns a snapshot of the cache counters."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _count_set(self, record: Dict[str, Any]) -> None:
+        self._count('positive_sets' if _is_positive(record) else 'negative_sets')
+
+
+class LocalLRUVerificationCache(VerificationCache):
+    """
+    In-memory LRU cache bounded by entry count, with per-entry expiry.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # fayda_id -> (expires_at, record)
+        self._lock = threading.Lock()
+
+    def get(self, fayda_id):
+        with self._lock:
+            entry = self._entries.get(fayda_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[fayda_id]
+                self._count('expirations')
+                entry = None
+            if entry is None:
+                self._count('misses')
+                return None
+            self._entries.move_to_end(fayda_id)
+        self._count('hits')
+        return entry[1]
+
+    def set(self, fayda_id, record):
+        record = cacheable_record(record)
+        expires_at = time.monotonic() + self.ttl_for(record)
+        with self._lock:
+            self._entries[fayda_id] = (expires_at, record)
+            self._entries.move_to_end(fayda_id)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self._count('evictions', evicted)
+        self._count_set(record)
+
+    def delete(self, fayda_id):
+        with self._lock:
+            self._entries.pop(fayda_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        stats = super().stats()
+        stats['size'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        return stats
+
+
+class RedisVerificationCache(VerificationCache):
+    """
+    Shared cache stored in a Django cache alias (Redis in every environment).
+
+    Any cache error is logged and counted, and the call is served by an
+    in-memory LRU instead so verification keeps working while Redis is down.
+    """
+
+    def __init__(self, cache_alias: str = 'default', key_prefix: str = DEFAULT_KEY_PREFIX,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+        self.fallback = LocalLRUVerificationCache(max_entries=max_entries, **kwargs)
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def make_key(self, fayda_id: str) -> str:
+        return f"{self.key_prefix}:{keyed_hash(fayda_id)}"
+
+    def get(self, fayda_id):
+        try:
+            record = self.cache.get(self.make_key(fayda_id))
+        except Exception as e:
+            self._record_error('get', e)
+            return self.fallback.get(fayda_id)
+
+        self._count('hits' if record is not None else 'misses')
+        return record
+
+    def set(self, fayda_id, record):
+        record = cacheable_record(record)
+        try:
+            self.cache.set(self.make_key(fayda_id), record, self.ttl_for(record))
+        except Exception as e:
+            self._record_error('set', e)
+            self.fallback.set(fayda_id, record)
+            return
+        self._count_set(record)
+
+    def delete(self, fayda_id):
+        self.fallback.delete(fayda_id)
+        try:
+            self.cache.delete(self.make_key(fayda_id))
+        except Exception as e:
+            self._record_error('delete', e)
+
+    def clear(self):
+        """
+        Deletes this cache's entries by key pattern. Other cache backends
+        cannot delete by pattern, and the alias is shared with other data,
+        so there the shared entries are left to expire.
+        """
+        self.fallback.clear()
+        try:
+            cache = self.cache
+            if not hasattr(cache, 'delete_pattern'):
+                logger.warning(f"Cache alias {self.cache_alias} cannot delete by pattern; "
+                               f"verification entries are left to expire")
+                return
+            cache.delete_pattern(f"{self.key_prefix}:*")
+        except Exception as e:
+            self._record_error('clear', e)
+
+    def stats(self):
+        stats = super().stats()
+        stats['fallback'] = self.fallback.stats()
+        stats['redis'] = self.redis_stats()
+        return stats
+
+    def redis_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Memory bound and eviction counters of the Redis server behind the
+        cache alias, or None when the alias is not django-redis or the
+        server cannot be reached.
+        """
+        try:
+            from django_redis import get_redis_connection
+
+            info = get_redis_connection(self.cache_alias).info()
+        except Exception:
+            return None
+        return {
+            'maxmemory': info.get('maxmemory'),
+            'maxmemory_policy': info.get('maxmemory_policy'),
+            'used_memory': info.get('used_memory'),
+            'evicted_keys': info.get('evicted_keys'),
+            'expired_keys': info.get('expired_keys'),
+        }
+
+    def _record_error(self, operation, error):
+        self._count('errors')
+        logger.warning(f"Verification cache {operation} failed, using in-memory fallback: {str(error)}")
+
+
+_verification_cache = None
+_verification_cache_lock = threading.Lock()
+
+
+def get_verification_cache() -> VerificationCache:
+    """
+    Returns the process-wide verification cache configured by the
+    FAYDA_VERIFICATION_CACHE setting.
+    """
+    global _verification_cache
+    if _verification_cache is None:
+        with _verification_cache_lock:
+            if _verification_cache is None:
+                _verification_cache = _build_verification_cache()
+    return _verification_cache
+
+
+def _build_verification_cache() -> VerificationCache:
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    options = dict(getattr(settings, 'FAYDA_VERIFICATION_CACHE', {}))
+    backend = import_string(options.pop('BACKEND', 'utils.verification_cache.RedisVerificationCache'))
+    kwargs = {
+        'positive_ttl': options.pop('POSITIVE_TTL', DEFAULT_POSITIVE_TTL),
+        'negative_ttl': options.pop('NEGATIVE_TTL', DEFAULT_NEGATIVE_TTL),
+        'max_entries': options.pop('MAX_ENTRIES', DEFAULT_MAX_ENTRIES),
+    }
+    if 'CACHE_ALIAS' in options:
+        kwargs['cache_alias'] = options.pop('CACHE_ALIAS')
+    if 'KEY_PREFIX' in options:
+        kwargs['key_prefix'] = options.pop('KEY_PREFIX')
+    return backend(**kwargs)